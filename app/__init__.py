@@ -1,6 +1,24 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
-engine = create_engine('sqlite:///trades.db', echo=False, connect_args={'check_same_thread': False}, poolclass=StaticPool)
-Session = sessionmaker(bind=engine)
+from config import Config as config
+
+engine = create_engine('sqlite:///trades.db', echo=False, connect_args={'check_same_thread': False}, poolclass=QueuePool,
+                       pool_size=config.scheduler_workers + 2, max_overflow=config.scheduler_workers)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(connection, _):
+    """
+    Readers and the journal writer do not block each other in WAL mode, and with synchronous=NORMAL a
+    commit is only fsynced at checkpoints
+    """
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+# every thread gets its own session
+Session = scoped_session(sessionmaker(bind=engine))
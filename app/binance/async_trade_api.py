@@ -0,0 +1,295 @@
+"""
+This module contains the AsyncTradeAPI class which mirrors TradeAPI over python-binance's AsyncClient
+"""
+
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from binance import AsyncClient
+from binance.exceptions import BinanceAPIException
+
+from config import Config as config
+from app import metrics
+from app.binance.fast_json import FastJsonAsyncClient
+from app.binance.order_submitter import AsyncOrderSubmitter
+from app.binance.quantize import SymbolQuantizer
+from app.binance.rate_governor import RateGovernor, AsyncGovernedClient
+from app.binance.single_flight import AsyncSingleFlight
+from app.binance.trade_api import SymbolData, TickerData, TradeApiFilters, Order, OpenOrderBook, Quote, SymbolFilterCache, TickerBook
+
+
+class AsyncTradeAPI:
+    """
+    Async trade API class for the Binance API
+
+    Every method mirrors the TradeAPI method of the same name, and shares its filter cache, ticker
+    book, live book and order tracker semantics.
+    """
+
+    def __init__(self, client: Optional[AsyncClient] = None, governor: Optional[RateGovernor] = None):
+        """
+        :param client: The AsyncClient to use, see `create` to build one from the config
+        :param governor: The rate governor every REST call of `create`'s client goes through
+        """
+        self.governor = governor or RateGovernor()
+        self.client: Optional[AsyncClient] = client
+        # orders go over their own session with a synced clock, and over the client when it is not set
+        self.order_client: Optional[AsyncOrderSubmitter] = None
+        self.filter_cache = SymbolFilterCache(None, ttl=config.filter_cache_ttl)
+        self._ticker_book: Optional[TickerBook] = None
+        self._open_order_book: Optional[OpenOrderBook] = None
+        self._order_generation = 0
+        self._filter_lock = asyncio.Lock()
+        self.single_flight = AsyncSingleFlight(window=config.coalesce_window)
+
+        # set to the LiveTickerBook of a running MarketDataStream to read prices without any I/O
+        self.live_book: Optional[TickerBook] = None
+
+        # set to the OrderTracker of a running UserDataStream to read orders without any I/O
+        self.order_tracker = None
+
+        # set to an IndicatorEngine to feed it every fetched ticker
+        self.indicators = None
+
+        # set to the DepthCache of a running depth stream to price orders against the order books
+        self.depth_cache = None
+
+    @classmethod
+    async def create(cls, is_mock: bool = False) -> "AsyncTradeAPI":
+        """
+        It connects an AsyncClient with the configured keys and loads the exchange info
+
+        :param is_mock: Do not connect to Binance
+        :return: An AsyncTradeAPI object.
+        """
+        if is_mock:
+            return cls()
+        api = cls()
+        api.client = AsyncGovernedClient(await FastJsonAsyncClient.create(config.api_key, config.api_secret), api.governor)
+        api.order_client = AsyncGovernedClient(await AsyncOrderSubmitter.create(config.api_key, config.api_secret), api.governor)
+        api.filter_cache.load(await api.client.get_exchange_info())
+        return api
+
+    async def close(self):
+        """
+        It closes the client session
+        """
+        if self.client is not None:
+            await self.client.close_connection()
+        if self.order_client is not None:
+            await self.order_client.close_connection()
+
+    @metrics.timed(metrics.api_call_seconds, "get_ticker_snapshot")
+    async def get_ticker_snapshot(self, max_age: Optional[float] = None) -> TickerBook:
+        """
+        It returns a ticker book for every symbol on the exchange, see TradeAPI.get_ticker_snapshot
+
+        :param max_age: The oldest snapshot in seconds the caller accepts, defaults to config.ticker_max_age
+        :type max_age: float
+        :return: A TickerBook object.
+        """
+        live_book = self.live_book
+        if live_book is not None and live_book.age <= config.stream_max_age:
+            return live_book
+
+        max_age = config.ticker_max_age if max_age is None else max_age
+        book = self._ticker_book
+        if book is not None and book.age <= max_age:
+            return book
+
+        # the book age already decides whether a completed snapshot is reused
+        return await self.single_flight.do(("get_ticker",), self._fetch_ticker_book, window=0)
+
+    async def _fetch_ticker_book(self) -> TickerBook:
+        tickers = await self.client.get_ticker()
+        if self.indicators is not None:
+            self.indicators.update_tickers(tickers)
+        book = self._ticker_book = TickerBook(tickers)
+        return book
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol")
+    async def get_symbol(self, symbol, max_age: Optional[float] = None) -> Optional[SymbolData]:
+        """
+        It returns the symbol data for a given symbol from the ticker snapshot
+
+        :param symbol: The symbol of the instrument you want to trade
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :return: The symbol data object that matches the symbol passed in, or None.
+        """
+        return (await self.get_ticker_snapshot(max_age)).get_symbol(symbol)
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbols_data")
+    async def get_symbols_data(self, max_age: Optional[float] = None) -> List[SymbolData]:
+        """
+        Gets the symbols data from the ticker snapshot and returns it as a SymbolsData object
+
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :return: A list of SymbolData objects
+        """
+        book = await self.get_ticker_snapshot(max_age)
+        return [book.get_symbol(symbol) for symbol in config.symbols if symbol in book]
+
+    @metrics.timed(metrics.api_call_seconds, "get_ticker_info")
+    async def get_ticker_info(self, symbol, max_age: Optional[float] = None) -> Optional[TickerData]:
+        """
+        It returns the ticker info for a given symbol
+
+        :param symbol: The ticker to get the info for
+        :type symbol: str
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :type max_age: float
+        :return: A TickerData object.
+        """
+        return (await self.get_ticker_snapshot(max_age)).get_ticker(symbol)
+
+    @metrics.timed(metrics.api_call_seconds, "get_quote")
+    async def get_quote(self, symbol, max_age: Optional[float] = None) -> Optional[Quote]:
+        """
+        It returns the parsed prices, price change and volume of a symbol, see TradeAPI.get_quote
+        """
+        return (await self.get_ticker_snapshot(max_age)).get_quote(symbol)
+
+    def get_depth(self, symbol: str):
+        """
+        It returns the order book of a symbol from the attached depth cache, see TradeAPI.get_depth
+        """
+        depth_cache = self.depth_cache
+        return depth_cache.get(symbol) if depth_cache is not None else None
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol_filters")
+    async def get_symbol_filters(self, symbol: str) -> Optional[TradeApiFilters]:
+        """
+        It returns the cached filters for a given symbol
+
+        :param symbol: The symbol to get the filters for
+        :type symbol: str
+        :return: A TradeApiFilters object.
+        """
+        cache = self.filter_cache
+        if cache.is_expired:
+            async with self._filter_lock:
+                if cache.is_expired:
+                    cache.load(await self.client.get_exchange_info())
+        if cache.lookup(symbol) is None:
+            await self.single_flight.do(("get_symbol_filters", symbol), lambda: self._add_symbol(symbol))
+        filters: Optional[TradeApiFilters] = cache.get_cached_filters(symbol)
+        if filters is None:
+            logging.error("Error retrieving data for symbol %s", symbol)
+        return filters
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol_quantizer")
+    async def get_symbol_quantizer(self, symbol: str) -> Optional[SymbolQuantizer]:
+        """
+        It returns the cached quantizer for a given symbol, see TradeAPI.get_symbol_quantizer
+        """
+        if await self.get_symbol_filters(symbol) is None:
+            return None
+        return self.filter_cache.get_cached_quantizer(symbol)
+
+    async def _add_symbol(self, symbol: str):
+        self.filter_cache.add_symbol(await self.client.get_symbol_info(symbol))
+
+    @metrics.timed(metrics.api_call_seconds, "get_open_order_book")
+    async def get_open_order_book(self, max_age: Optional[float] = None) -> OpenOrderBook:
+        """
+        It returns the open orders of the whole account, see TradeAPI.get_open_order_book
+
+        :param max_age: The oldest book in seconds the caller accepts, defaults to config.open_orders_max_age
+        :type max_age: float
+        :return: An OpenOrderBook object.
+        """
+        max_age = config.open_orders_max_age if max_age is None else max_age
+        generation = self._order_generation
+        book = self._open_order_book
+        if book is not None and book.generation == generation and book.age <= max_age:
+            return book
+        return await self.single_flight.do(("get_open_orders", generation), lambda: self._fetch_open_order_book(generation, max_age),
+                                           window=0)
+
+    async def _fetch_open_order_book(self, generation: int, max_age: Optional[float] = None) -> OpenOrderBook:
+        # a caller delayed after reading the book reuses a sweep of its generation that completed in the meantime
+        book = self._open_order_book
+        if max_age is not None and book is not None and book.generation == generation and book.age <= max_age:
+            return book
+        book = OpenOrderBook(await self.client.get_open_orders(recvWindow=10000), generation)
+        if generation == self._order_generation:
+            self._open_order_book = book
+        return book
+
+    def invalidate_open_orders(self):
+        """
+        It makes the next get_open_orders call fetch the open orders again
+        """
+        self._order_generation += 1
+        self._open_order_book = None
+
+    @metrics.timed(metrics.api_call_seconds, "get_open_orders")
+    async def get_open_orders(self, symbol) -> List[Order]:
+        """
+        It returns the open orders for a given symbol, from the order tracker while it is synced and
+        from the account-wide open order book otherwise
+        """
+        if self.order_tracker is not None and self.order_tracker.synced:
+            return self.order_tracker.get_open_orders(symbol)
+        return (await self.get_open_order_book()).get_orders(symbol)
+
+    @metrics.timed(metrics.api_call_seconds, "order_limit_buy")
+    async def order_limit_buy(self, **params) -> dict:
+        """
+        It places a limit buy order and invalidates the open order book
+        """
+        params.setdefault("recvWindow", config.order_recv_window)
+        try:
+            order = await (self.order_client or self.client).order_limit_buy(**params)
+        except BinanceAPIException:
+            metrics.order_rejects.inc("BUY")
+            raise
+        finally:
+            self.invalidate_open_orders()
+        metrics.orders.inc("BUY")
+        return order
+
+    @metrics.timed(metrics.api_call_seconds, "order_limit_sell")
+    async def order_limit_sell(self, **params) -> dict:
+        """
+        It places a limit sell order and invalidates the open order book
+        """
+        params.setdefault("recvWindow", config.order_recv_window)
+        try:
+            order = await (self.order_client or self.client).order_limit_sell(**params)
+        except BinanceAPIException:
+            metrics.order_rejects.inc("SELL")
+            raise
+        finally:
+            self.invalidate_open_orders()
+        metrics.orders.inc("SELL")
+        return order
+
+    @metrics.timed(metrics.api_call_seconds, "cancel_order")
+    async def cancel_order(self, **params) -> dict:
+        """
+        It cancels an order and invalidates the open order book
+        """
+        try:
+            return await self.client.cancel_order(**params)
+        finally:
+            self.invalidate_open_orders()
+
+    @metrics.timed(metrics.api_call_seconds, "get_order")
+    async def get_order(self, symbol, order_id) -> Order:
+        """
+        It returns the order for the given symbol and orderId, from the order tracker while it is synced
+        and knows the order, and from the REST API otherwise
+        """
+        if self.order_tracker is not None and self.order_tracker.synced:
+            order = self.order_tracker.get_order(int(order_id))
+            if order is not None:
+                return order
+        state = await self.single_flight.do(("get_order", symbol, str(order_id)),
+                                            lambda: self.client.get_order(symbol=symbol, orderId=order_id, recvWindow=10000))
+        order = Order(**state)
+        if self.order_tracker is not None:
+            self.order_tracker.track(order, state.get("updateTime", 0))
+        return order
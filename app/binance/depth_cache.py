@@ -0,0 +1,322 @@
+"""
+This module contains the DepthCache class which keeps a local copy of the order books of a few symbols up to
+date from a REST snapshot and the Binance `<symbol>@depth@100ms` diff streams
+"""
+
+
+import asyncio
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from config import Config as config
+from app.binance.market_stream import WebSocketStream
+
+# the diffs kept for a symbol while its snapshot is fetched, the oldest are dropped past it
+MAX_PENDING_EVENTS = 1000
+# the snapshots fetched for a symbol in a row before waiting for its next diff to try again
+MAX_SNAPSHOT_ATTEMPTS = 3
+
+
+class FillEstimate(NamedTuple):
+    """
+    The prices an order would fill at against one side of a book
+    """
+
+    quantity: float
+    cost: float
+    average_price: float
+    worst_price: float
+    best_price: float
+    levels: int
+
+    @property
+    def slippage_percent(self) -> float:
+        """
+        It returns how far the average price is from the best price in percent
+        """
+        return abs(self.average_price / self.best_price - 1) * 100
+
+
+class DepthSide:
+    """
+    One side of an order book
+
+    The price levels are kept best first in two parallel arrays of doubles, the prices and their
+    quantities. The bids are stored as negated prices so both sides are sorted ascending, a level
+    is found with a binary search, and a fill walks the arrays from the front without allocating.
+    """
+
+    def __init__(self, descending: bool):
+        """
+        :param descending: True for the bids, whose best price is the highest
+        """
+        self.sign = -1.0 if descending else 1.0
+        self._keys = array("d")
+        self._quantities = array("d")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, levels: Iterable[Tuple[str, str]]):
+        """
+        It replaces the side with the [price, quantity] levels of a snapshot
+        """
+        sign = self.sign
+        parsed = sorted((float(price) * sign, float(quantity)) for price, quantity in levels if float(quantity) > 0)
+        self._keys = array("d", [key for key, _ in parsed])
+        self._quantities = array("d", [quantity for _, quantity in parsed])
+
+    def set(self, price: float, quantity: float):
+        """
+        It sets the quantity of a price level, a quantity of 0 removes it
+        """
+        keys, key = self._keys, price * self.sign
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if quantity > 0:
+                self._quantities[i] = quantity
+            else:
+                del keys[i]
+                del self._quantities[i]
+        elif quantity > 0:
+            keys.insert(i, key)
+            self._quantities.insert(i, quantity)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """
+        It returns the best price level, or None if the side is empty
+        """
+        if not self._keys:
+            return None
+        return self._keys[0] * self.sign, self._quantities[0]
+
+    def top(self, n: int) -> List[Tuple[float, float]]:
+        """
+        It returns the n best price levels as (price, quantity) tuples
+        """
+        sign = self.sign
+        return [(key * sign, quantity) for key, quantity in zip(self._keys[:n], self._quantities[:n])]
+
+    def fill(self, quantity: Optional[float] = None, quote: Optional[float] = None) -> Optional[FillEstimate]:
+        """
+        It walks the side from the best level until an order of the base quantity, or of the quote amount, is filled
+
+        :param quantity: The base asset quantity of the order
+        :param quote: The quote asset amount of the order, used if quantity is None
+        :return: A FillEstimate object, or None for an empty order or if the side is too thin to fill it.
+        """
+        keys, quantities, sign = self._keys, self._quantities, self.sign
+        by_quote = quantity is None
+        remaining = quote if by_quote else quantity
+        # e.g. the executed quantity of an order that has not filled yet, which has no fill price
+        if not keys or remaining is None or remaining <= 0:
+            return None
+        filled = cost = 0.0
+        for i in range(len(keys)):
+            price, available = keys[i] * sign, quantities[i]
+            need = remaining / price if by_quote else remaining
+            if available >= need:
+                filled += need
+                cost += need * price
+                return FillEstimate(quantity=filled, cost=cost, average_price=cost / filled, worst_price=price,
+                                    best_price=keys[0] * sign, levels=i + 1)
+            filled += available
+            cost += available * price
+            remaining -= available * price if by_quote else available
+        return None
+
+
+class DepthBook:
+    """
+    Local order book of a symbol
+
+    It is loaded from a REST snapshot and kept up to date by the diffs of the depth stream, following
+    the update ids: a diff ending at or before the snapshot is dropped, and every other diff must
+    start right after the last one applied, otherwise updates were missed and the book is marked
+    out of sync until it is loaded again.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = DepthSide(descending=True)
+        self.asks = DepthSide(descending=False)
+        self.last_update_id = 0
+        self.synced = False
+        self.updated_at: Optional[float] = None
+        self.lock = Lock()
+
+    def load_snapshot(self, snapshot: dict):
+        """
+        It replaces the book with a get_order_book response
+
+        :param snapshot: The snapshot dict, with its lastUpdateId, bids and asks
+        """
+        with self.lock:
+            self.bids.load(snapshot["bids"])
+            self.asks.load(snapshot["asks"])
+            self.last_update_id = snapshot["lastUpdateId"]
+            self.synced = True
+            self.updated_at = time.monotonic()
+
+    def apply_diff(self, event: dict) -> bool:
+        """
+        It applies a `depthUpdate` stream event to the book
+
+        :param event: The stream event
+        :type event: dict
+        :return: True if the event was applied or is older than the book, False if updates were missed.
+        """
+        with self.lock:
+            if event["u"] <= self.last_update_id:
+                return True
+            if event["U"] > self.last_update_id + 1:
+                self.synced = False
+                return False
+            for price, quantity in event["b"]:
+                self.bids.set(float(price), float(quantity))
+            for price, quantity in event["a"]:
+                self.asks.set(float(price), float(quantity))
+            self.last_update_id = event["u"]
+            self.updated_at = time.monotonic()
+        return True
+
+    def top(self, n: int = 5) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        """
+        It returns the n best bid and ask levels as (price, quantity) tuples
+        """
+        with self.lock:
+            return self.bids.top(n), self.asks.top(n)
+
+    def price_to_fill(self, side: str, quantity: Optional[float] = None, quote: Optional[float] = None) -> Optional[FillEstimate]:
+        """
+        It returns the prices an order would fill at, a BUY takes the asks and a SELL the bids
+
+        :param side: BUY or SELL
+        :param quantity: The base asset quantity of the order
+        :param quote: The quote asset amount of the order, used if quantity is None
+        :return: A FillEstimate object, or None for an empty order or if the book is too thin to fill it.
+        """
+        with self.lock:
+            return (self.asks if side == "BUY" else self.bids).fill(quantity, quote)
+
+
+class DepthCache(WebSocketStream):
+    """
+    Depth cache for the Binance API
+
+    It subscribes to the combined `<symbol>@depth@100ms` streams of its symbols and loads every book
+    from a REST snapshot after each (re)connect. A book that misses a diff is loaded again on its
+    own while its diffs are buffered, the other books keep updating. Only the books in sync with
+    a connected stream are handed out, so the bot prices from the last price otherwise.
+    """
+
+    name = "depth-stream"
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        snapshot: Callable[..., dict],
+        url: Optional[str] = None,
+        limit: Optional[int] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        """
+        :param symbols: The symbols to keep the order books of
+        :param snapshot: A callable taking symbol and limit and returning a get_order_book response
+        :param url: The base url of the stream endpoint, defaults to config.stream_url
+        :param limit: The number of levels of the snapshots, defaults to config.depth_limit
+        :param reconnect_delay: The first delay in seconds before reconnecting
+        :param max_reconnect_delay: The longest delay in seconds before reconnecting
+        """
+        super().__init__(reconnect_delay, max_reconnect_delay)
+        self.books: Dict[str, DepthBook] = {symbol: DepthBook(symbol) for symbol in symbols}
+        self.streams = [f"{symbol.lower()}@depth@100ms" for symbol in self.books]
+        self.url = f"{url or config.stream_url}/stream?streams={'/'.join(self.streams)}"
+        self.snapshot = snapshot
+        self.limit = limit or config.depth_limit
+        self.snapshots = 0
+        self.resyncs = 0
+        self._pending: Dict[str, List[dict]] = {}
+        self._resyncing: Set[str] = set()
+
+    def get(self, symbol: str) -> Optional[DepthBook]:
+        """
+        It returns the order book of a symbol, or None if it is not cached or not in sync
+        """
+        book = self.books.get(symbol)
+        if book is None or not book.synced or not self.connected.is_set():
+            return None
+        return book
+
+    async def get_url(self) -> str:
+        return self.url
+
+    def on_message(self, data: dict):
+        """
+        It applies a combined stream message to its book, loading the book again after a gap
+
+        :param data: The decoded combined stream message
+        :type data: dict
+        """
+        event = data["data"]
+        symbol = event["s"]
+        book = self.books.get(symbol)
+        if book is None or (book.synced and book.apply_diff(event)):
+            return
+        pending = self._pending.setdefault(symbol, [])
+        if len(pending) >= MAX_PENDING_EVENTS:
+            del pending[0]
+        pending.append(event)
+        if symbol not in self._resyncing:
+            logging.warning("%s order book out of sync at diff %s, resyncing...", symbol, event["U"])
+            self.resyncs += 1
+            self._resyncing.add(symbol)
+            asyncio.ensure_future(self._resync_symbol(symbol))
+
+    def on_disconnect(self):
+        # the books miss every diff until the next resync
+        for book in self.books.values():
+            book.synced = False
+        self._pending.clear()
+
+    async def resync(self):
+        """
+        It loads every book from a snapshot, the diffs received in the meantime wait on the connection
+        """
+        for symbol in self.books:
+            await self._load(symbol)
+
+    async def _resync_symbol(self, symbol: str):
+        try:
+            await self._load(symbol)
+        finally:
+            self._resyncing.discard(symbol)
+
+    async def _load(self, symbol: str):
+        """
+        It loads the book of a symbol from a snapshot and applies the diffs buffered since, fetching a
+        newer snapshot if the diffs start after the one fetched
+        """
+        book = self.books[symbol]
+        loop = asyncio.get_running_loop()
+        for _ in range(MAX_SNAPSHOT_ATTEMPTS):
+            try:
+                snapshot = await loop.run_in_executor(None, lambda: self.snapshot(symbol=symbol, limit=self.limit))
+            except Exception as e:
+                logging.error("Error fetching the %s order book: %s", symbol, (type(e).__name__, e))
+                return
+            self.snapshots += 1
+            book.load_snapshot(snapshot)
+            pending = self._pending.pop(symbol, [])
+            for i, event in enumerate(pending):
+                if not book.apply_diff(event):
+                    self._pending[symbol] = pending[i:]
+                    break
+            else:
+                return
+        logging.warning("%s order book snapshots keep trailing the depth stream, waiting for the next diff...", symbol)
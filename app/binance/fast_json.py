@@ -0,0 +1,77 @@
+"""
+This module contains the JSON decoder of the Binance responses and stream messages, and the clients that use it
+"""
+
+
+import json
+from typing import Any, Optional, Union
+
+import aiohttp
+import requests
+from binance import AsyncClient, Client
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from config import Config as config
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the json module decodes the same objects
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    It decodes a JSON document with orjson when it is installed and the json module otherwise
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJsonClient(Client):
+    """
+    Binance client whose responses are decoded with `loads` instead of requests' json decoder
+    """
+
+    def __init__(self, *args, api_url: Optional[str] = None, **kwargs):
+        """
+        :param api_url: The base url of the REST API, e.g. of a simulated exchange, defaults to config.api_url
+            and to Binance when that is empty
+        """
+        if api_url or config.api_url:
+            self.API_URL = api_url or config.api_url
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _handle_response(response: requests.Response):
+        if not (200 <= response.status_code < 300):
+            raise BinanceAPIException(response, response.status_code, response.text)
+        try:
+            return loads(response.content)
+        except ValueError:
+            raise BinanceRequestException('Invalid Response: %s' % response.text)
+
+
+class FastJsonAsyncClient(AsyncClient):
+    """
+    Async Binance client whose responses are decoded with `loads` instead of aiohttp's json decoder
+    """
+
+    def __init__(self, *args, api_url: Optional[str] = None, **kwargs):
+        """
+        :param api_url: The base url of the REST API, e.g. of a simulated exchange, defaults to config.api_url
+            and to Binance when that is empty
+        """
+        if api_url or config.api_url:
+            self.API_URL = api_url or config.api_url
+        super().__init__(*args, **kwargs)
+
+    async def _handle_response(self, response: aiohttp.ClientResponse):
+        if not str(response.status).startswith('2'):
+            raise BinanceAPIException(response, response.status, await response.text())
+        try:
+            return loads(await response.read())
+        except ValueError:
+            txt = await response.text()
+            raise BinanceRequestException(f'Invalid Response: {txt}')
@@ -0,0 +1,320 @@
+"""
+This module contains the MarketDataStream class which keeps a live ticker book up to date from the
+Binance combined market data streams
+"""
+
+
+import asyncio
+import logging
+import time
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional
+
+import websockets
+
+from config import Config as config
+from app.binance.fast_json import loads
+from app.binance.recorder import MarketDataRecorder
+from app.binance.trade_api import Quote, TickerBook, TickerData
+
+
+def ticker_from_event(event: dict) -> dict:
+    """
+    It converts a `24hrTicker` or `24hrMiniTicker` stream event into the dict returned by the REST
+    ticker endpoint, so both can be parsed into a TickerData object
+
+    :param event: The stream event
+    :type event: dict
+    :return: A ticker dict.
+    """
+    if event["e"] == "24hrTicker":
+        return {
+            "symbol": event["s"], "priceChange": event["p"], "priceChangePercent": event["P"], "weightedAvgPrice": event["w"],
+            "prevClosePrice": event["x"], "lastPrice": event["c"], "bidPrice": event["b"], "askPrice": event["a"],
+            "openPrice": event["o"], "highPrice": event["h"], "lowPrice": event["l"], "volume": event["v"],
+            "openTime": event["O"], "closeTime": event["C"], "firstId": event["F"], "lastId": event["L"], "count": event["n"],
+        }
+
+    # the mini ticker has no change, bid or ask fields, so they are derived from the open and close price
+    open_price, last_price = float(event["o"]), float(event["c"])
+    price_change = last_price - open_price
+    return {
+        "symbol": event["s"], "priceChange": f"{price_change:.8f}",
+        "priceChangePercent": f"{price_change / open_price * 100 if open_price else 0:.3f}",
+        "weightedAvgPrice": event["c"], "prevClosePrice": event["o"], "lastPrice": event["c"], "bidPrice": event["c"],
+        "askPrice": event["c"], "openPrice": event["o"], "highPrice": event["h"], "lowPrice": event["l"], "volume": event["v"],
+        "openTime": event["E"] - 86400000, "closeTime": event["E"],
+    }
+
+
+class LiveTickerBook(TickerBook):
+    """
+    Live ticker book for the Binance API
+
+    A TickerBook that is updated in place by the market data stream. Its age is the time since the
+    last update, and every read and write goes through a lock so symbol workers can share it.
+    """
+
+    def __init__(self):
+        super().__init__([])
+        self._event_times: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def seed(self, tickers: Iterable[dict]):
+        """
+        It replaces the book with a REST ticker snapshot, e.g. after a reconnect
+
+        :param tickers: The ticker dicts returned by the get_ticker call
+        """
+        with self._lock:
+            self._raw.update({x["symbol"]: x for x in tickers})
+            self._tickers.clear()
+            self._quotes.clear()
+            self.fetched_at = time.monotonic()
+
+    def update(self, event: dict) -> bool:
+        """
+        It applies a ticker stream event to the book, ignoring events older than the last one seen
+        for the symbol
+
+        :param event: The stream event
+        :type event: dict
+        :return: True if the event was applied.
+        """
+        symbol, event_time = event["s"], event["E"]
+        with self._lock:
+            if event_time < self._event_times.get(symbol, 0):
+                return False
+            # a full ticker event carries more fields than a mini ticker one, so it is not downgraded
+            if event["e"] == "24hrMiniTicker" and self._event_times.get(symbol) == event_time:
+                return False
+            self._event_times[symbol] = event_time
+            self._raw[symbol] = ticker_from_event(event)
+            self._tickers.pop(symbol, None)
+            self._quotes.pop(symbol, None)
+            self.fetched_at = time.monotonic()
+        return True
+
+    def get_ticker(self, symbol: str) -> Optional[TickerData]:
+        with self._lock:
+            return super().get_ticker(symbol)
+
+    def get_quote(self, symbol: str) -> Optional[Quote]:
+        with self._lock:
+            return super().get_quote(symbol)
+
+    def get_fields(self, symbols: Iterable[str], field: str) -> List[Optional[str]]:
+        with self._lock:
+            return super().get_fields(symbols, field)
+
+
+class WebSocketStream:
+    """
+    WebSocket stream base class for the Binance API
+
+    It keeps a connection open on a background thread, reconnects with an exponential backoff and
+    records the gap since the last message before calling resync after every (re)connect.
+    """
+
+    name = "stream"
+
+    def __init__(self, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        """
+        :param reconnect_delay: The first delay in seconds before reconnecting
+        :param max_reconnect_delay: The longest delay in seconds before reconnecting
+        """
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = Event()
+        self.messages = 0
+        self.reconnects = 0
+        self.gaps = 0
+        self.last_gap: Optional[float] = None
+        self._last_message_at: Optional[float] = None
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ws = None
+
+    async def get_url(self) -> str:
+        """
+        It returns the url to connect to
+        """
+        raise NotImplementedError
+
+    def on_message(self, data):
+        """
+        It handles a decoded message
+
+        :param data: The decoded message
+        """
+        raise NotImplementedError
+
+    async def resync(self):
+        """
+        It brings the local state back in line with the exchange after a (re)connect
+        """
+
+    def on_disconnect(self):
+        """
+        It is called when the connection is lost
+        """
+
+    def start(self):
+        """
+        It starts the stream on a daemon thread
+        """
+        self._stopped.clear()
+        self._thread = Thread(target=asyncio.run, args=(self._run(),), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        It closes the connection and waits for the stream thread to exit
+
+        :param timeout: The number of seconds to wait for the thread
+        """
+        self._stopped.set()
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def reconnect(self):
+        """
+        It closes the current connection, so the stream connects again to a new url. It is called from
+        the stream thread, e.g. by on_message
+        """
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
+
+    def handle_message(self, message: str):
+        """
+        It decodes a raw message and passes it to on_message
+
+        :param message: The raw message received from the stream
+        :type message: str
+        """
+        self.on_message(loads(message))
+        self.messages += 1
+        self._last_message_at = time.monotonic()
+
+    async def _on_connect(self):
+        """
+        It records the gap since the last message of the previous connection and resyncs
+        """
+        if self._last_message_at is not None:
+            self.gaps += 1
+            self.last_gap = time.monotonic() - self._last_message_at
+            logging.warning("%s reconnected after a %.1fs gap, resyncing...", self.name, self.last_gap)
+        await self.resync()
+        self.connected.set()
+
+    async def _run(self):
+        """
+        It keeps a connection to the stream open until the stream is stopped
+        """
+        self._loop, self._task = asyncio.get_running_loop(), asyncio.current_task()
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(await self.get_url()) as ws:
+                    self._ws = ws
+                    await self._on_connect()
+                    delay = self.reconnect_delay
+                    async for message in ws:
+                        self.handle_message(message)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logging.error("%s error: %s", self.name, (type(e).__name__, e))
+            self._ws = None
+            self.connected.clear()
+            self.on_disconnect()
+            if self._stopped.is_set():
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+            delay = min(delay * 2, self.max_reconnect_delay)
+        self._ws = None
+        self.connected.clear()
+        self.on_disconnect()
+
+
+class MarketDataStream(WebSocketStream):
+    """
+    Market data stream for the Binance API
+
+    It subscribes to the combined `!miniTicker@arr` and `<symbol>@ticker` streams and reseeds the book
+    from a REST snapshot after every gap. With a recorder, every applied ticker update and the
+    `<symbol>@trade` events of trade_symbols are recorded too. With an IndicatorEngine, the same
+    updates and trades feed its rolling windows.
+    """
+
+    name = "market-stream"
+
+    def __init__(
+        self,
+        book: LiveTickerBook,
+        symbols: Iterable[str] = (),
+        url: Optional[str] = None,
+        snapshot: Optional[Callable[[], List[dict]]] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        recorder: Optional[MarketDataRecorder] = None,
+        trade_symbols: Iterable[str] = (),
+        indicators=None,
+    ):
+        """
+        :param book: The live ticker book to keep up to date
+        :param symbols: The symbols to subscribe to the full ticker stream for
+        :param url: The base url of the stream endpoint, defaults to config.stream_url
+        :param snapshot: A callable returning a REST ticker snapshot used to seed the book
+        :param reconnect_delay: The first delay in seconds before reconnecting
+        :param max_reconnect_delay: The longest delay in seconds before reconnecting
+        :param recorder: The recorder to keep the ticker and trade updates with
+        :param trade_symbols: The symbols to subscribe to the trade stream for, recorded only
+        :param indicators: The IndicatorEngine to feed the ticker updates and trades to
+        """
+        super().__init__(reconnect_delay, max_reconnect_delay)
+        self.book = book
+        self.recorder = recorder
+        self.indicators = indicators
+        self.streams = (["!miniTicker@arr"] + [f"{symbol.lower()}@ticker" for symbol in symbols]
+                        + [f"{symbol.lower()}@trade" for symbol in trade_symbols])
+        self.url = f"{url or config.stream_url}/stream?streams={'/'.join(self.streams)}"
+        self.snapshot = snapshot
+
+    async def get_url(self) -> str:
+        return self.url
+
+    def on_message(self, data: dict):
+        """
+        It applies a combined stream message to the book
+
+        :param data: The decoded combined stream message
+        :type data: dict
+        """
+        data = data["data"]
+        recorder, indicators = self.recorder, self.indicators
+        for event in data if isinstance(data, list) else [data]:
+            if event["e"] == "trade":
+                if recorder is not None:
+                    recorder.record_trade(event)
+                if indicators is not None:
+                    indicators.update_trade(event)
+            elif self.book.update(event) and (recorder is not None or indicators is not None):
+                ticker = ticker_from_event(event)
+                if recorder is not None:
+                    recorder.record_ticker(ticker, event["E"])
+                if indicators is not None:
+                    indicators.update_ticker(ticker, event["E"] / 1000)
+
+    async def resync(self):
+        if self.snapshot is not None:
+            tickers = await asyncio.get_running_loop().run_in_executor(None, self.snapshot)
+            self.book.seed(tickers)
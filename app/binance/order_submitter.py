@@ -0,0 +1,306 @@
+"""
+This module contains the OrderSubmitter classes which place limit orders over a dedicated keep-alive
+session with pre-built, pre-signed request bodies and a server-time offset kept up to date in the background
+"""
+
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import requests
+from binance import Client
+from binance.exceptions import BinanceAPIException
+from requests.adapters import HTTPAdapter
+
+from config import Config as config
+from app.binance.fast_json import loads
+
+# the error code of a request whose timestamp is outside of its recvWindow
+TIMESTAMP_ERROR = -1021
+
+
+class ServerClock:
+    """
+    Offset of the exchange clock from the local clock
+
+    Each sync takes a few server time samples and keeps the one with the shortest round trip, taking
+    the server time as read half way through it.
+    """
+
+    def __init__(self, samples: int = 3):
+        """
+        :param samples: The number of server time requests of a sync
+        """
+        self.samples = samples
+        self.offset_ms = 0.0
+        self.round_trip_ms: Optional[float] = None
+        self.synced_at: Optional[float] = None
+        self.syncs = 0
+
+    def now_ms(self) -> int:
+        """
+        It returns the current exchange time in milliseconds
+        """
+        return int(time.time() * 1000 + self.offset_ms)
+
+    def update(self, samples: List[Tuple[float, float, float]]):
+        """
+        It sets the offset from (local send time, server time, local receive time) samples in milliseconds
+        """
+        sent, server, received = min(samples, key=lambda x: x[2] - x[0])
+        self.offset_ms = server - (sent + received) / 2
+        self.round_trip_ms = received - sent
+        self.synced_at = time.monotonic()
+        self.syncs += 1
+
+    def sync(self, get_server_time: Callable[[], dict]):
+        """
+        It measures the offset with the server time endpoint
+        """
+        samples = []
+        for _ in range(self.samples):
+            sent = time.time() * 1000
+            server = get_server_time()["serverTime"]
+            samples.append((sent, server, time.time() * 1000))
+        self.update(samples)
+
+    async def sync_async(self, get_server_time):
+        """
+        Async version of sync
+        """
+        samples = []
+        for _ in range(self.samples):
+            sent = time.time() * 1000
+            server = (await get_server_time())["serverTime"]
+            samples.append((sent, server, time.time() * 1000))
+        self.update(samples)
+
+
+class OrderSigner:
+    """
+    Builds the signed bodies of the order requests
+
+    The fixed part of the body of every symbol and side is built once and the HMAC key schedule is
+    computed once, so signing an order only hashes its body.
+    """
+
+    def __init__(self, api_secret: str, clock: ServerClock, recv_window: Optional[int] = None):
+        """
+        :param api_secret: The API secret the requests are signed with
+        :param clock: The clock of the request timestamps
+        :param recv_window: The milliseconds after its timestamp an order is valid, defaults to config.order_recv_window
+        """
+        self.clock = clock
+        self.recv_window = recv_window or config.order_recv_window
+        self._hmac = hmac.new((api_secret or "").encode(), digestmod=hashlib.sha256)
+        self._prefixes: Dict[Tuple[str, str, str], str] = {}
+
+    def prefix(self, symbol: str, side: str, time_in_force: str = Client.TIME_IN_FORCE_GTC) -> str:
+        """
+        It returns the fixed part of the body of the limit orders of a symbol and side
+        """
+        key = (symbol, side, time_in_force)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes[key] = f"symbol={symbol}&side={side}&type=LIMIT&timeInForce={time_in_force}"
+        return prefix
+
+    def prepare(self, symbols):
+        """
+        It builds the fixed part of the bodies of both sides of the symbols ahead of the first order
+        """
+        for symbol in symbols:
+            for side in (Client.SIDE_BUY, Client.SIDE_SELL):
+                self.prefix(symbol, side)
+
+    def body(self, side: str, symbol: str, quantity, price, timeInForce: str = Client.TIME_IN_FORCE_GTC,
+             recvWindow: Optional[int] = None, **params) -> str:
+        """
+        It returns the signed body of a limit order, its parameters named as in Client.order_limit_buy
+        """
+        body = (f"{self.prefix(symbol, side, timeInForce)}&quantity={quantity}&price={price}"
+                f"&recvWindow={recvWindow or self.recv_window}")
+        for key, value in params.items():
+            if value is not None:
+                body += f"&{key}={value}"
+        body += f"&timestamp={self.clock.now_ms()}"
+        signature = self._hmac.copy()
+        signature.update(body.encode())
+        return f"{body}&signature={signature.hexdigest()}"
+
+
+class OrderSubmitter:
+    """
+    Order client for the Binance API
+
+    It places limit orders over its own keep-alive session, so orders never queue behind market data
+    reads for a connection, with the bodies of OrderSigner. The exchange time is kept in a
+    ServerClock refreshed every `sync_interval` seconds from a background thread, which also keeps
+    the connections of the session open, and right away after a timestamp error, after which the
+    order is sent once more. It has the method names of the python-binance Client, so a
+    GovernedClient can wrap it.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, api_url: Optional[str] = None, recv_window: Optional[int] = None,
+                 sync_interval: Optional[float] = None, pool_size: Optional[int] = None):
+        """
+        :param api_key: The API key
+        :param api_secret: The API secret
+        :param api_url: The base url of the REST API, defaults to config.api_url and to Binance when that is empty
+        :param recv_window: The milliseconds after its timestamp an order is valid, defaults to config.order_recv_window
+        :param sync_interval: The seconds between two server time syncs, defaults to config.time_sync_interval
+        :param pool_size: The number of kept-alive connections, defaults to config.scheduler_workers
+        """
+        self.url = f"{api_url or config.api_url or Client.API_URL.format('', 'com')}/{Client.PRIVATE_API_VERSION}"
+        self.sync_interval = config.time_sync_interval if sync_interval is None else sync_interval
+        self.clock = ServerClock()
+        self.signer = OrderSigner(api_secret, self.clock, recv_window)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or config.scheduler_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": "application/json", "Content-Type": "application/x-www-form-urlencoded",
+                                     "X-MBX-APIKEY": api_key or ""})
+        self.response: Optional[requests.Response] = None
+        self.timestamp_retries = 0
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "OrderSubmitter":
+        """
+        It syncs the clock, which opens a connection, and keeps it synced from a daemon thread
+        """
+        self.clock.sync(self.get_server_time)
+        if self.sync_interval > 0:
+            self._thread = Thread(target=self._run, name="server-clock", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.sync_interval):
+            try:
+                self.clock.sync(self.get_server_time)
+            except Exception as e:
+                logging.warning("Could not sync the server time: %s", e)
+
+    def close(self):
+        """
+        It stops the clock syncs and closes the session
+        """
+        self._stopped.set()
+        self.session.close()
+
+    def _handle(self, response: requests.Response):
+        self.response = response
+        if not 200 <= response.status_code < 300:
+            raise BinanceAPIException(response, response.status_code, response.text)
+        return loads(response.content)
+
+    def get_server_time(self) -> dict:
+        return self._handle(self.session.get(f"{self.url}/time", timeout=Client.REQUEST_TIMEOUT))
+
+    def _place(self, side: str, **params) -> dict:
+        try:
+            body = self.signer.body(side, **params)
+            return self._handle(self.session.post(f"{self.url}/order", data=body, timeout=Client.REQUEST_TIMEOUT))
+        except BinanceAPIException as e:
+            if e.code != TIMESTAMP_ERROR:
+                raise
+            # the clock drifted past the recvWindow, resync and sign the order again
+            self.timestamp_retries += 1
+            self.clock.sync(self.get_server_time)
+            body = self.signer.body(side, **params)
+            return self._handle(self.session.post(f"{self.url}/order", data=body, timeout=Client.REQUEST_TIMEOUT))
+
+    def order_limit_buy(self, **params) -> dict:
+        """
+        It places a limit buy order, with the parameters of Client.order_limit_buy
+        """
+        return self._place(Client.SIDE_BUY, **params)
+
+    def order_limit_sell(self, **params) -> dict:
+        """
+        It places a limit sell order, with the parameters of Client.order_limit_sell
+        """
+        return self._place(Client.SIDE_SELL, **params)
+
+
+class AsyncOrderSubmitter:
+    """
+    Async version of OrderSubmitter over an aiohttp session, see `create`
+    """
+
+    def __init__(self, api_key: str, api_secret: str, api_url: Optional[str] = None, recv_window: Optional[int] = None,
+                 sync_interval: Optional[float] = None, pool_size: Optional[int] = None):
+        self.url = f"{api_url or config.api_url or Client.API_URL.format('', 'com')}/{Client.PRIVATE_API_VERSION}"
+        self.sync_interval = config.time_sync_interval if sync_interval is None else sync_interval
+        self.clock = ServerClock()
+        self.signer = OrderSigner(api_secret, self.clock, recv_window)
+        self.pool_size = pool_size or config.max_concurrency
+        self.headers = {"Accept": "application/json", "Content-Type": "application/x-www-form-urlencoded", "X-MBX-APIKEY": api_key or ""}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.response: Optional[aiohttp.ClientResponse] = None
+        self.timestamp_retries = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "AsyncOrderSubmitter":
+        """
+        It opens the session, syncs the clock and keeps it synced from a task
+        """
+        self = cls(*args, **kwargs)
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size), headers=self.headers)
+        await self.clock.sync_async(self.get_server_time)
+        if self.sync_interval > 0:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.clock.sync_async(self.get_server_time)
+            except Exception as e:
+                logging.warning("Could not sync the server time: %s", e)
+
+    async def close_connection(self):
+        """
+        It stops the clock syncs and closes the session
+        """
+        if self._task is not None:
+            self._task.cancel()
+        if self.session is not None:
+            await self.session.close()
+
+    async def _request(self, method: str, path: str, body: Optional[str] = None):
+        async with self.session.request(method, f"{self.url}/{path}", data=body, timeout=aiohttp.ClientTimeout(Client.REQUEST_TIMEOUT)) as response:
+            self.response = response
+            content = await response.read()
+            if not 200 <= response.status < 300:
+                raise BinanceAPIException(response, response.status, content.decode())
+            return loads(content)
+
+    async def get_server_time(self) -> dict:
+        return await self._request("GET", "time")
+
+    async def _place(self, side: str, **params) -> dict:
+        try:
+            return await self._request("POST", "order", self.signer.body(side, **params))
+        except BinanceAPIException as e:
+            if e.code != TIMESTAMP_ERROR:
+                raise
+            self.timestamp_retries += 1
+            await self.clock.sync_async(self.get_server_time)
+            return await self._request("POST", "order", self.signer.body(side, **params))
+
+    async def order_limit_buy(self, **params) -> dict:
+        return await self._place(Client.SIDE_BUY, **params)
+
+    async def order_limit_sell(self, **params) -> dict:
+        return await self._place(Client.SIDE_SELL, **params)
@@ -0,0 +1,282 @@
+"""
+This module contains the OrderTracker class which keeps the state of the account's orders in memory,
+driven by the Binance user data stream
+"""
+
+
+import asyncio
+import logging
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+from config import Config as config
+from app.binance.market_stream import WebSocketStream
+from app.binance.trade_api import Order
+
+FINAL_ORDER_STATUSES = {"FILLED", "CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH"}
+
+
+class Fill(BaseModel):
+    """
+    Fill model for the Binance user data stream
+    """
+    price: str
+    quantity: str
+    commission: str
+    commissionAsset: Optional[str]
+    time: int
+
+
+def order_from_execution_report(event: dict) -> Order:
+    """
+    It converts an `executionReport` event into an Order object
+
+    :param event: The execution report event
+    :type event: dict
+    :return: An Order object.
+    """
+    return Order(
+        symbol=event["s"], orderId=event["i"], clientOrderId=event["c"], price=event["p"], origQty=event["q"],
+        executedQty=event["z"], status=event["X"], timeInForce=event["f"], type=event["o"], side=event["S"],
+        stopPrice=event["P"], icebergQty=event["F"], time=event["O"],
+    )
+
+
+class OrderTracker:
+    """
+    Order tracker for the Binance API
+
+    It keeps a map of orderId to the latest Order state and its fills. Once synced with the exchange
+    it is the authoritative source for the account's open orders.
+    """
+
+    def __init__(self):
+        self.synced = False
+        self.updates = 0
+        self._orders: Dict[int, Order] = {}
+        self._fills: Dict[int, List[Fill]] = {}
+        self._update_times: Dict[int, int] = {}
+        self._unconfirmed: Set[int] = set()
+        self._lock = Lock()
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def track(self, order: Order, update_time: int = 0) -> bool:
+        """
+        It stores the state of an order unless a newer state is already known
+
+        :param order: The order to store
+        :type order: Order
+        :param update_time: The exchange time of the state in milliseconds
+        :type update_time: int
+        :return: True if the order was stored.
+        """
+        with self._lock:
+            if update_time < self._update_times.get(order.orderId, 0):
+                return False
+            self._orders[order.orderId] = order
+            self._update_times[order.orderId] = update_time
+            self._unconfirmed.discard(order.orderId)
+            self.updates += 1
+        return True
+
+    def apply_execution_report(self, event: dict) -> bool:
+        """
+        It applies an `executionReport` event from the user data stream
+
+        :param event: The execution report event
+        :type event: dict
+        :return: True if the event was applied.
+        """
+        if not self.track(order_from_execution_report(event), event["T"]):
+            return False
+        if event["x"] == "TRADE":
+            fill = Fill(price=event["L"], quantity=event["l"], commission=event["n"], commissionAsset=event["N"], time=event["T"])
+            with self._lock:
+                self._fills.setdefault(event["i"], []).append(fill)
+        return True
+
+    def sync_open_orders(self, orders: List[Order]):
+        """
+        It replaces the known open orders with the account's open orders fetched over REST
+
+        :param orders: Every open order of the account
+        """
+        with self._lock:
+            open_ids = {order.orderId for order in orders}
+            for order_id, order in self._orders.items():
+                if order.status not in FINAL_ORDER_STATUSES and order_id not in open_ids:
+                    # the order closed while we were not listening, its final state is reconciled later
+                    self._unconfirmed.add(order_id)
+            for order in orders:
+                # an order the stream already reported is at least as recent as the REST snapshot
+                if order.orderId not in self._update_times:
+                    self._orders[order.orderId] = order
+                    self._update_times[order.orderId] = 0
+            self.synced = True
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """
+        It returns the latest known state of an order
+
+        :param order_id: The order id
+        :return: An Order object, or None if the order is not tracked.
+        """
+        return self._orders.get(order_id)
+
+    def get_fills(self, order_id: int) -> List[Fill]:
+        """
+        It returns the fills received for an order
+        """
+        return list(self._fills.get(order_id, []))
+
+    def get_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        """
+        It returns the open orders for a symbol, or for the whole account
+
+        :param symbol: The symbol to get the open orders for
+        :type symbol: str
+        :return: A list of Order objects.
+        """
+        with self._lock:
+            orders = list(self._orders.values())
+        return [x for x in orders if x.status not in FINAL_ORDER_STATUSES and (symbol is None or x.symbol == symbol)]
+
+    def get_unconfirmed_orders(self) -> List[Order]:
+        """
+        It returns the orders that closed while the stream was not listening, i.e. whose final state
+        has to be reconciled over REST
+        """
+        with self._lock:
+            return [self._orders[order_id] for order_id in self._unconfirmed]
+
+    def prune(self, max_age: float):
+        """
+        It forgets final orders whose last update is older than max_age seconds
+
+        :param max_age: The number of seconds a final order is kept for
+        """
+        cutoff = (time.time() - max_age) * 1000
+        with self._lock:
+            for order_id, order in list(self._orders.items()):
+                if order.status in FINAL_ORDER_STATUSES and self._update_times.get(order_id, 0) < cutoff:
+                    del self._orders[order_id]
+                    self._update_times.pop(order_id, None)
+                    self._fills.pop(order_id, None)
+                    self._unconfirmed.discard(order_id)
+
+
+class UserDataStream(WebSocketStream):
+    """
+    User data stream for the Binance API
+
+    It listens to the account's `executionReport` events with a listenKey kept alive in the background,
+    and reconciles the tracker over REST after every gap and every config.order_reconcile_interval.
+    """
+
+    name = "user-stream"
+
+    def __init__(
+        self,
+        tracker: OrderTracker,
+        client,
+        url: Optional[str] = None,
+        keepalive_interval: Optional[float] = None,
+        reconcile_interval: Optional[float] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        """
+        :param tracker: The order tracker to keep up to date
+        :param client: The Binance client used for the listenKey and the REST reconciliation
+        :param url: The base url of the stream endpoint, defaults to config.stream_url
+        :param keepalive_interval: The number of seconds between listenKey keepalives
+        :param reconcile_interval: The number of seconds between REST reconciliations
+        :param reconnect_delay: The first delay in seconds before reconnecting
+        :param max_reconnect_delay: The longest delay in seconds before reconnecting
+        """
+        super().__init__(reconnect_delay, max_reconnect_delay)
+        self.tracker = tracker
+        self.client = client
+        self.url = url or config.stream_url
+        self.keepalive_interval = keepalive_interval or config.listen_key_keepalive
+        self.reconcile_interval = reconcile_interval or config.order_reconcile_interval
+        self.listen_key: Optional[str] = None
+        self.keepalives = 0
+        self.reconciliations = 0
+
+    async def _call(self, func, *args, **kwargs):
+        """
+        It runs a blocking client call on the default executor
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: func(*args, **kwargs))
+
+    async def get_url(self) -> str:
+        self.listen_key = await self._call(self.client.stream_get_listen_key)
+        return f"{self.url}/ws/{self.listen_key}"
+
+    def on_message(self, data: dict):
+        if data.get("e") == "executionReport":
+            self.tracker.apply_execution_report(data)
+        elif data.get("e") == "listenKeyExpired":
+            logging.warning("listenKey expired, reconnecting...")
+            # no event reaches an expired listenKey, so the bot falls back to REST until the next key resyncs
+            self.listen_key = None
+            self.tracker.synced = False
+            self.reconnect()
+
+    def on_disconnect(self):
+        # the tracker misses every event until the next resync, so the bot falls back to REST
+        self.tracker.synced = False
+
+    async def resync(self):
+        """
+        It replaces the open orders with a single REST call for the whole account and reconciles
+        the orders that closed in the meantime
+        """
+        orders = await self._call(self.client.get_open_orders, recvWindow=10000)
+        self.tracker.sync_open_orders([Order(**x) for x in orders])
+        await self.reconcile()
+
+    async def reconcile(self):
+        """
+        It fetches the state of every order the stream has not confirmed over REST
+        """
+        for order in self.tracker.get_unconfirmed_orders():
+            try:
+                state = await self._call(self.client.get_order, symbol=order.symbol, orderId=order.orderId, recvWindow=10000)
+                self.tracker.track(Order(**state), state.get("updateTime", 0))
+            except Exception as e:
+                logging.error("Error reconciling order %s: %s", order.orderId, (type(e).__name__, e))
+        self.tracker.prune(config.order_reconcile_interval * 10)
+        self.reconciliations += 1
+
+    async def _housekeeping(self):
+        """
+        It keeps the listenKey alive and periodically resyncs the tracker as a safety net
+        """
+        last_keepalive = last_reconcile = time.monotonic()
+        while True:
+            await asyncio.sleep(min(self.keepalive_interval, self.reconcile_interval))
+            now = time.monotonic()
+            try:
+                if self.listen_key and now - last_keepalive >= self.keepalive_interval:
+                    await self._call(self.client.stream_keepalive, self.listen_key)
+                    self.keepalives += 1
+                    last_keepalive = now
+                if self.connected.is_set() and now - last_reconcile >= self.reconcile_interval:
+                    await self.resync()
+                    last_reconcile = now
+            except Exception as e:
+                logging.error("%s housekeeping error: %s", self.name, (type(e).__name__, e))
+
+    async def _run(self):
+        housekeeping = asyncio.ensure_future(self._housekeeping())
+        try:
+            await super()._run()
+        finally:
+            housekeeping.cancel()
@@ -0,0 +1,208 @@
+"""
+This module contains the SymbolQuantizer class which snaps order prices and quantities to the exchange
+filters of a symbol with integer arithmetic
+"""
+
+
+import math
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from app.binance.trade_api import TradeApiFilters
+
+# Binance prices and quantities have at most 8 decimals, so every value is held as an integer of 1e-8 units
+DECIMALS = 8
+SCALE = 10 ** DECIMALS
+
+# a float like 0.0025 or 1024.36 is stored a few ulps below its decimal, so a scaled float within this
+# relative distance of a whole number of units is rounded to it instead of floored
+FLOAT_TOLERANCE = 1e-12
+
+# below 1e15 units (15 significant digits) the nearest float of units / SCALE formats back to the exact decimal
+EXACT_FLOAT_UNITS = 10 ** 15
+
+Number = Union[str, float, int]
+
+
+def to_units(value: Number) -> int:
+    """
+    It converts a price or quantity to an integer number of 1e-8 units, rounding down
+
+    :param value: A decimal string as returned by the exchange, or a number
+    :return: The number of units.
+    """
+    if isinstance(value, str):
+        whole, _, fraction = value.strip().partition(".")
+        negative = whole.startswith("-")
+        units = int(whole or "0") * SCALE + (-1 if negative else 1) * int((fraction + "0" * DECIMALS)[:DECIMALS])
+        return units
+    if isinstance(value, int):
+        return value * SCALE
+    scaled = value * SCALE
+    units = int(round(scaled))
+    if abs(scaled - units) <= abs(scaled) * FLOAT_TOLERANCE:
+        return units
+    return math.floor(scaled)
+
+
+def format_units(units: int, decimals: int = DECIMALS) -> str:
+    """
+    It formats a number of 1e-8 units as a decimal string with the given number of decimals
+
+    :param units: The number of units, a multiple of 10 ** (8 - decimals)
+    :param decimals: The number of decimals of the string
+    :return: A string such as "0.00358100".
+    """
+    if -EXACT_FLOAT_UNITS < units < EXACT_FLOAT_UNITS:
+        return "%.*f" % (decimals, units / SCALE)
+    sign = "-" if units < 0 else ""
+    whole, fraction = divmod(abs(units), SCALE)
+    if not decimals:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}.{fraction:08d}"[:len(sign) + len(str(whole)) + 1 + decimals]
+
+
+def step_decimals(step_units: int) -> int:
+    """
+    It returns the number of decimals needed to write every multiple of a step
+
+    :param step_units: The step in 1e-8 units
+    """
+    decimals = DECIMALS
+    while decimals and step_units % 10 == 0:
+        step_units //= 10
+        decimals -= 1
+    return decimals
+
+
+class SymbolQuantizer:
+    """
+    Symbol quantizer for the Binance API
+
+    It precomputes the tick size, step size and minimum notional of a symbol as integer units once, so
+    prices and quantities are snapped with integer division instead of float modulo and formatted
+    with exactly the decimals the exchange accepts.
+    """
+
+    def __init__(self, tick_size: Number, step_size: Number, min_notional: Optional[Number] = None,
+                 min_price: Optional[Number] = None, min_quantity: Optional[Number] = None):
+        """
+        :param tick_size: The price step of the PRICE_FILTER
+        :param step_size: The quantity step of the LOT_SIZE filter
+        :param min_notional: The smallest price * quantity of the MIN_NOTIONAL or NOTIONAL filter
+        :param min_price: The smallest price of the PRICE_FILTER
+        :param min_quantity: The smallest quantity of the LOT_SIZE filter
+        """
+        self.tick_units = to_units(tick_size) or 1
+        self.step_units = to_units(step_size) or 1
+        self.min_notional_units = to_units(min_notional) if min_notional is not None else 0
+        self.min_price_units = to_units(min_price) if min_price is not None else 0
+        self.min_quantity_units = to_units(min_quantity) if min_quantity is not None else 0
+        self.price_decimals = step_decimals(self.tick_units)
+        self.quantity_decimals = step_decimals(self.step_units)
+
+    @classmethod
+    def from_filters(cls, filters: "TradeApiFilters") -> "SymbolQuantizer":
+        """
+        It builds a quantizer from the filters of a symbol, the minimum price and quantity stand in for
+        a missing tick and step size
+
+        :param filters: The TradeApiFilters of the symbol
+        :return: A SymbolQuantizer object.
+        """
+        return cls(
+            tick_size=filters.tickSize or filters.minPrice or "0.00000001",
+            step_size=filters.stepSize or filters.minQuantity or "0.00000001",
+            min_notional=filters.minNotional,
+            min_price=filters.minPrice,
+            min_quantity=filters.minQuantity,
+        )
+
+    @classmethod
+    def from_symbol_info(cls, symbol_info: dict) -> "SymbolQuantizer":
+        """
+        It builds a quantizer from a raw get_symbol_info or exchange info symbol dict
+
+        :param symbol_info: The exchange info of the symbol
+        :return: A SymbolQuantizer object.
+        """
+        filters = {x["filterType"]: x for x in symbol_info["filters"]}
+        price_filter = filters.get("PRICE_FILTER", {})
+        lot_size = filters.get("LOT_SIZE", {})
+        notional = filters.get("MIN_NOTIONAL") or filters.get("NOTIONAL") or {}
+        return cls(
+            tick_size=price_filter.get("tickSize") or price_filter.get("minPrice") or "0.00000001",
+            step_size=lot_size.get("stepSize") or lot_size.get("minQty") or "0.00000001",
+            min_notional=notional.get("minNotional"),
+            min_price=price_filter.get("minPrice"),
+            min_quantity=lot_size.get("minQty"),
+        )
+
+    def floor_price(self, price: Number) -> int:
+        """
+        It rounds a price down to the tick size
+
+        :param price: The price to snap
+        :return: The price in 1e-8 units.
+        """
+        return to_units(price) // self.tick_units * self.tick_units
+
+    def floor_quantity(self, quantity: Number) -> int:
+        """
+        It rounds a quantity down to the step size
+
+        :param quantity: The quantity to snap
+        :return: The quantity in 1e-8 units.
+        """
+        return to_units(quantity) // self.step_units * self.step_units
+
+    def quantity_for_quote(self, quote: Number, price_units: int) -> int:
+        """
+        It returns the largest quantity on the step size that costs at most quote at a price
+
+        :param quote: The amount of the quote asset to spend
+        :param price_units: The price in 1e-8 units
+        :return: The quantity in 1e-8 units, 0 for a zero price.
+        """
+        if price_units <= 0:
+            return 0
+        return to_units(quote) * SCALE // price_units // self.step_units * self.step_units
+
+    def is_valid(self, price_units: int, quantity_units: int) -> bool:
+        """
+        It returns True if an order passes the minimum price, quantity and notional filters
+        """
+        return (
+            price_units > 0 and quantity_units > 0
+            and price_units >= self.min_price_units
+            and quantity_units >= self.min_quantity_units
+            and price_units * quantity_units >= self.min_notional_units * SCALE
+        )
+
+    def format_price(self, price: Number) -> str:
+        """
+        It returns the exchange string of a price rounded down to the tick size
+
+        :param price: The price, as a number or string
+        """
+        return format_units(self.floor_price(price), self.price_decimals)
+
+    def format_quantity(self, quantity: Number) -> str:
+        """
+        It returns the exchange string of a quantity rounded down to the step size
+
+        :param quantity: The quantity, as a number or string
+        """
+        return format_units(self.floor_quantity(quantity), self.quantity_decimals)
+
+    def price_string(self, price_units: int) -> str:
+        """
+        It formats a price already snapped to the tick size
+        """
+        return format_units(price_units, self.price_decimals)
+
+    def quantity_string(self, quantity_units: int) -> str:
+        """
+        It formats a quantity already snapped to the step size
+        """
+        return format_units(quantity_units, self.quantity_decimals)
@@ -0,0 +1,386 @@
+"""
+This module contains the RateGovernor class which keeps every REST call within the Binance request
+weight and order rate limits
+"""
+
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from binance.exceptions import BinanceAPIException
+
+from config import Config as config
+from app import metrics
+
+# request weight of the python-binance client methods we use, a callable gets the call's params
+ENDPOINT_WEIGHTS = {
+    "ping": 1,
+    "get_server_time": 1,
+    "get_exchange_info": 20,
+    "get_symbol_info": 20,
+    "get_ticker": lambda params: 2 if params.get("symbol") else 80,
+    "get_symbol_ticker": lambda params: 2 if params.get("symbol") else 4,
+    "get_orderbook_ticker": lambda params: 2 if params.get("symbol") else 4,
+    "get_order_book": lambda params: {5: 2, 10: 2, 20: 2, 50: 2, 100: 5, 500: 25, 1000: 50}.get(params.get("limit", 100), 250),
+    "get_klines": 2,
+    "get_account": 20,
+    "get_open_orders": lambda params: 6 if params.get("symbol") else 80,
+    "get_order": 4,
+    "get_all_orders": 20,
+    "cancel_order": 1,
+    "create_order": 1,
+    "order_limit": 1,
+    "order_limit_buy": 1,
+    "order_limit_sell": 1,
+    "order_market": 1,
+    "order_market_buy": 1,
+    "order_market_sell": 1,
+    "stream_get_listen_key": 2,
+    "stream_keepalive": 2,
+    "stream_close": 2,
+}
+
+ORDER_METHODS = {"create_order", "order_limit", "order_limit_buy", "order_limit_sell", "order_market", "order_market_buy", "order_market_sell"}
+
+
+def endpoint_weight(method: str, params: dict) -> Tuple[int, bool]:
+    """
+    It returns the request weight of a client method call and whether it places an order
+
+    :param method: The name of the python-binance client method
+    :param params: The keyword arguments of the call
+    :return: A tuple of the weight and the order flag.
+    """
+    weight = ENDPOINT_WEIGHTS.get(method, 1)
+    if callable(weight):
+        weight = weight(params)
+    return weight, method in ORDER_METHODS
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a call would have to wait longer than config.max_rate_wait for the rate limits
+    """
+
+    def __init__(self, method: str, wait: float):
+        self.method = method
+        self.wait = wait
+
+    def __str__(self):
+        return f"RateLimitExceeded: {self.method} would wait {self.wait:.1f}s"
+
+
+class TokenBucket:
+    """
+    Token bucket for a single Binance rate limit window
+
+    It refills `capacity` tokens evenly over `period` seconds. The used count reported by the
+    exchange headers can only drain it further, never refill it. A bucket holding a `share` of the
+    exchange limit counts the same share of the used count against itself.
+    """
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.share = 1.0
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / self.period)
+        self._updated = now
+
+    def wait_time(self, cost: float, now: float, reserve: float = 0.0) -> float:
+        """
+        It returns the seconds until `cost` tokens are available while keeping `reserve` tokens
+        """
+        self._refill(now)
+        missing = cost + reserve - self.tokens
+        return max(missing, 0.0) * self.period / self.capacity
+
+    def take(self, cost: float):
+        self.tokens -= cost
+
+    def sync_used(self, used: float, now: float):
+        """
+        It drains the bucket to what the exchange reports as used in the current window, by every process
+        of the IP or account
+        """
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used * self.share)
+
+
+class RateGovernor:
+    """
+    Rate governor for the Binance API
+
+    Every REST call reserves its weight from a per-minute weight bucket, and orders also reserve
+    from the 10 second and daily order buckets. Market data reads leave `order_reserve` of the
+    weight to orders and wait while an order is waiting. A 429 or 418 blocks every call until the
+    Retry-After time.
+    """
+
+    def __init__(
+        self,
+        weight_per_minute: Optional[int] = None,
+        orders_per_10s: Optional[int] = None,
+        orders_per_day: Optional[int] = None,
+        order_reserve: Optional[float] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        :param weight_per_minute: The request weight limit per minute
+        :param orders_per_10s: The order limit per 10 seconds
+        :param orders_per_day: The order limit per day
+        :param order_reserve: The fraction of the weight market data reads leave to orders
+        :param max_wait: The longest a call waits for the limits before RateLimitExceeded is raised
+        """
+        self.weight = TokenBucket(weight_per_minute or config.weight_per_minute, 60)
+        self.orders_10s = TokenBucket(orders_per_10s or config.orders_per_10s, 10)
+        self.orders_day = TokenBucket(orders_per_day or config.orders_per_day, 86400)
+        self.order_reserve = config.order_weight_reserve if order_reserve is None else order_reserve
+        self.max_wait = config.max_rate_wait if max_wait is None else max_wait
+        self.blocked_until = 0.0
+
+        self.calls = 0
+        self.orders = 0
+        self.weight_used = 0
+        self.waits = 0
+        self.waited = 0.0
+        self.throttled = 0
+        self.banned = 0
+        self.retries = 0
+        self.calls_per_endpoint: Dict[str, int] = defaultdict(int)
+
+        self._orders_waiting = 0
+        self._lock = Lock()
+
+    def reserve(self, method: str, weight: int, is_order: bool) -> float:
+        """
+        It reserves the weight of a call if the limits allow it
+
+        :param method: The name of the client method
+        :param weight: The request weight of the call
+        :param is_order: True if the call places an order
+        :return: 0 if the call may proceed, otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.blocked_until > now:
+                return self.blocked_until - now
+
+            if is_order:
+                wait = max(self.weight.wait_time(weight, now), self.orders_10s.wait_time(1, now), self.orders_day.wait_time(1, now))
+            elif self._orders_waiting:
+                wait = 0.01
+            else:
+                wait = self.weight.wait_time(weight, now, reserve=self.weight.capacity * self.order_reserve)
+            if wait > 0:
+                return wait
+
+            self.weight.take(weight)
+            if is_order:
+                self.orders_10s.take(1)
+                self.orders_day.take(1)
+                self.orders += 1
+            self.calls += 1
+            self.weight_used += weight
+            self.calls_per_endpoint[method] += 1
+            return 0.0
+
+    def share(self, fraction: float):
+        """
+        It scales every limit down to a fraction of the limits of the IP and account, for one of several
+        processes trading from them
+
+        :param fraction: The part of the limits this governor may use, between 0 and 1
+        """
+        with self._lock:
+            for bucket in (self.weight, self.orders_10s, self.orders_day):
+                bucket.capacity *= fraction
+                bucket.share *= fraction
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def _check_wait(self, method: str, waited: float, wait: float):
+        if waited + wait > self.max_wait:
+            raise RateLimitExceeded(method, waited + wait)
+
+    def acquire(self, method: str, weight: int, is_order: bool):
+        """
+        It blocks until the call may proceed
+
+        :param method: The name of the client method
+        :param weight: The request weight of the call
+        :param is_order: True if the call places an order
+        """
+        waited = 0.0
+        wait = self.reserve(method, weight, is_order)
+        if not wait:
+            return
+        with self._lock:
+            self.waits += 1
+            self._orders_waiting += is_order
+        try:
+            while wait:
+                self._check_wait(method, waited, wait)
+                time.sleep(wait)
+                waited += wait
+                wait = self.reserve(method, weight, is_order)
+        finally:
+            with self._lock:
+                self.waited += waited
+                self._orders_waiting -= is_order
+
+    async def acquire_async(self, method: str, weight: int, is_order: bool):
+        """
+        Async version of acquire, it waits without blocking the event loop
+        """
+        waited = 0.0
+        wait = self.reserve(method, weight, is_order)
+        if not wait:
+            return
+        with self._lock:
+            self.waits += 1
+            self._orders_waiting += is_order
+        try:
+            while wait:
+                self._check_wait(method, waited, wait)
+                await asyncio.sleep(wait)
+                waited += wait
+                wait = self.reserve(method, weight, is_order)
+        finally:
+            with self._lock:
+                self.waited += waited
+                self._orders_waiting -= is_order
+
+    def update_from_headers(self, headers):
+        """
+        It syncs the buckets with the used weight and order count reported by the exchange
+
+        :param headers: The headers of the last response
+        """
+        now = time.monotonic()
+        with self._lock:
+            for header, bucket in (("X-MBX-USED-WEIGHT-1M", self.weight), ("X-MBX-ORDER-COUNT-10S", self.orders_10s),
+                                   ("X-MBX-ORDER-COUNT-1D", self.orders_day)):
+                used = headers.get(header)
+                if used is not None:
+                    bucket.sync_used(float(used), now)
+
+    def backoff(self, status_code: int, retry_after: Optional[str], attempt: int = 0):
+        """
+        It blocks every call after a 429 (too many requests) or 418 (IP ban) response
+
+        :param status_code: The status code of the response
+        :param retry_after: The Retry-After header of the response in seconds
+        :param attempt: The number of times the call was already retried
+        """
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif status_code == 418:
+            delay = config.ban_backoff
+        else:
+            delay = min(2 ** attempt, 60)
+        with self._lock:
+            if status_code == 418:
+                self.banned += 1
+            else:
+                self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        logging.warning("Binance responded %s, backing off for %.1fs", status_code, delay)
+
+
+def _retry_after(error: BinanceAPIException) -> Optional[str]:
+    headers = getattr(error.response, "headers", None)
+    return headers.get("Retry-After") if headers is not None else None
+
+
+class GovernedClient:
+    """
+    Governed client for the Binance API
+
+    It wraps a python-binance Client so every known endpoint method goes through a RateGovernor.
+    Other attributes are passed through unchanged.
+    """
+
+    def __init__(self, client, governor: RateGovernor, max_retries: Optional[int] = None):
+        """
+        :param client: The python-binance Client to wrap
+        :param governor: The governor the calls go through
+        :param max_retries: The number of times a call is retried after a 429
+        """
+        self.client = client
+        self.governor = governor
+        self.max_retries = config.max_rate_retries if max_retries is None else max_retries
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in ENDPOINT_WEIGHTS or not callable(attr):
+            return attr
+        return lambda *args, **kwargs: self.call(name, attr, *args, **kwargs)
+
+    def _sync_headers(self):
+        headers = getattr(getattr(self.client, "response", None), "headers", None)
+        if headers is not None:
+            self.governor.update_from_headers(headers)
+
+    def call(self, name: str, func, *args, **kwargs):
+        """
+        It calls a client method within the rate limits, retrying after a 429
+
+        :param name: The name of the client method
+        :param func: The bound client method
+        :return: The response of the call.
+        """
+        weight, is_order = endpoint_weight(name, kwargs)
+        attempt = 0
+        while True:
+            self.governor.acquire(name, weight, is_order)
+            metrics.request_weight.inc(name, amount=weight)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BinanceAPIException as e:
+                metrics.request_errors.inc(name, str(e.status_code))
+                if e.status_code not in (418, 429):
+                    raise
+                self.governor.backoff(e.status_code, _retry_after(e), attempt)
+                if e.status_code == 418 or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.governor.retries += 1
+            finally:
+                metrics.request_seconds.observe(time.perf_counter() - start, name)
+                self._sync_headers()
+
+
+class AsyncGovernedClient(GovernedClient):
+    """
+    Governed client for the python-binance AsyncClient
+    """
+
+    async def call(self, name: str, func, *args, **kwargs):
+        weight, is_order = endpoint_weight(name, kwargs)
+        attempt = 0
+        while True:
+            await self.governor.acquire_async(name, weight, is_order)
+            metrics.request_weight.inc(name, amount=weight)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except BinanceAPIException as e:
+                metrics.request_errors.inc(name, str(e.status_code))
+                if e.status_code not in (418, 429):
+                    raise
+                self.governor.backoff(e.status_code, _retry_after(e), attempt)
+                if e.status_code == 418 or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.governor.retries += 1
+            finally:
+                metrics.request_seconds.observe(time.perf_counter() - start, name)
+                self._sync_headers()
@@ -0,0 +1,259 @@
+"""
+This module contains the MarketDataRecorder class which appends ticker and trade updates to fixed-width
+binary column files, and the MarketDataReader class which memory-maps them back
+"""
+
+
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# the column files of every kind of record, all little endian so segments are portable
+TICKER_COLUMNS: Dict[str, str] = {
+    "time": "<i8",
+    "last": "<f8",
+    "change_percent": "<f8",
+    "bid": "<f8",
+    "ask": "<f8",
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "volume": "<f8",
+}
+TRADE_COLUMNS: Dict[str, str] = {
+    "time": "<i8",
+    "trade_id": "<i8",
+    "price": "<f8",
+    "quantity": "<f8",
+    "buyer_maker": "u1",
+}
+COLUMNS: Dict[str, Dict[str, str]] = {"ticker": TICKER_COLUMNS, "trade": TRADE_COLUMNS}
+
+# the fields of a REST ticker dict the ticker columns are read from
+TICKER_FIELDS = ("lastPrice", "priceChangePercent", "bidPrice", "askPrice", "openPrice", "highPrice", "lowPrice", "volume")
+
+
+def segment_day(time_ms: int) -> str:
+    """
+    It returns the UTC day of a time in milliseconds, segments are split on it
+    """
+    return datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class _Segment:
+    """
+    The open column files and buffered rows of one symbol and day
+    """
+
+    def __init__(self, path: str, columns: Dict[str, str]):
+        os.makedirs(path, exist_ok=True)
+        self.columns = columns
+        self.files: Dict[str, BinaryIO] = {name: open(os.path.join(path, f"{name}.bin"), "ab") for name in columns}
+        self.rows: List[tuple] = []
+
+    def flush(self) -> int:
+        if not self.rows:
+            return 0
+        values = list(zip(*self.rows))
+        for (name, dtype), column in zip(self.columns.items(), values):
+            self.files[name].write(np.asarray(column, dtype=dtype).tobytes())
+            self.files[name].flush()
+        count, self.rows = len(self.rows), []
+        return count
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+
+class MarketDataRecorder:
+    """
+    Market data recorder for the Binance API
+
+    Every update is buffered and appended to one column file per field, in a segment directory per
+    kind, symbol and UTC day: `<root>/<kind>/<symbol>/<YYYY-MM-DD>/<column>.bin`. Updates older than
+    the last one recorded for a symbol are dropped, so the time column of every segment is sorted.
+    """
+
+    def __init__(self, root: str, flush_rows: int = 1024, flush_interval: float = 1.0):
+        """
+        :param root: The directory the segments are written to
+        :param flush_rows: The number of buffered rows of a segment after which they are written
+        :param flush_interval: The seconds after which every buffered row is written
+        """
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.dropped = 0
+        self._segments: Dict[Tuple[str, str], Tuple[str, _Segment]] = {}
+        self._last_times: Dict[Tuple[str, str], int] = {}
+        self._flushed_at = time.monotonic()
+        self._lock = Lock()
+
+    def _append(self, kind: str, symbol: str, row: tuple):
+        key = (kind, symbol)
+        if row[0] < self._last_times.get(key, 0):
+            self.dropped += 1
+            return
+        self._last_times[key] = row[0]
+
+        day = segment_day(row[0])
+        current = self._segments.get(key)
+        if current is None or current[0] != day:
+            if current is not None:
+                current[1].close()
+            current = self._segments[key] = (day, _Segment(os.path.join(self.root, kind, symbol, day), COLUMNS[kind]))
+        segment = current[1]
+        segment.rows.append(row)
+        self.recorded += 1
+        if len(segment.rows) >= self.flush_rows:
+            segment.flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self._flush()
+
+    def _flush(self):
+        for _, segment in self._segments.values():
+            segment.flush()
+        self._flushed_at = time.monotonic()
+
+    def record_ticker(self, ticker: dict, time_ms: Optional[int] = None):
+        """
+        It records a ticker
+
+        :param ticker: A ticker dict as returned by the get_ticker call or built by ticker_from_event
+        :param time_ms: The event time in milliseconds, defaults to the closeTime of the ticker
+        """
+        row = (int(ticker["closeTime"] if time_ms is None else time_ms),) + tuple(float(ticker[x]) for x in TICKER_FIELDS)
+        with self._lock:
+            self._append("ticker", ticker["symbol"], row)
+            self._maybe_flush()
+
+    def record_tickers(self, tickers: Iterable[dict]):
+        """
+        It records every ticker of a REST snapshot
+        """
+        with self._lock:
+            for ticker in tickers:
+                self._append("ticker", ticker["symbol"], (int(ticker["closeTime"]),) + tuple(float(ticker[x]) for x in TICKER_FIELDS))
+            self._maybe_flush()
+
+    def record_trade(self, event: dict):
+        """
+        It records a `trade` stream event
+
+        :param event: The trade stream event
+        """
+        row = (int(event["T"]), int(event["t"]), float(event["p"]), float(event["q"]), int(event["m"]))
+        with self._lock:
+            self._append("trade", event["s"], row)
+            self._maybe_flush()
+
+    def flush(self):
+        """
+        It writes every buffered row
+        """
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """
+        It writes every buffered row and closes the segments
+        """
+        with self._lock:
+            for _, segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+        logging.info("Recorded %s market data updates, dropped %s out of order", self.recorded, self.dropped)
+
+
+class MarketDataReader:
+    """
+    Market data reader for the Binance API
+
+    It memory-maps the segments written by MarketDataRecorder, so a time range is read as NumPy views of
+    the column files without copying or parsing anything.
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: The directory the segments were written to
+        """
+        self.root = root
+
+    def symbols(self, kind: str = "ticker") -> List[str]:
+        """
+        It returns the recorded symbols of a kind
+        """
+        path = os.path.join(self.root, kind)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def days(self, symbol: str, kind: str = "ticker") -> List[str]:
+        """
+        It returns the recorded UTC days of a symbol
+        """
+        path = os.path.join(self.root, kind, symbol)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def read_segment(self, symbol: str, day: str, kind: str = "ticker") -> Dict[str, np.ndarray]:
+        """
+        It memory-maps every column of a segment
+
+        :param symbol: The symbol of the segment
+        :param day: The UTC day of the segment, e.g. 2023-01-31
+        :param kind: ticker or trade
+        :return: A read-only array per column, all of the same length.
+        """
+        path = os.path.join(self.root, kind, symbol, day)
+        columns = COLUMNS[kind]
+        sizes = {name: os.path.getsize(os.path.join(path, f"{name}.bin")) // np.dtype(dtype).itemsize for name, dtype in columns.items()}
+        # a row is complete once it was appended to every column file
+        rows = min(sizes.values())
+        if not rows:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+        return {name: np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+                for name, dtype in columns.items()}
+
+    def iter_range(self, symbol: str, start_ms: int, end_ms: int, kind: str = "ticker") -> Iterator[Dict[str, np.ndarray]]:
+        """
+        It yields zero-copy views of the rows of every segment within a time range
+
+        :param symbol: The symbol to read
+        :param start_ms: The first time in milliseconds, inclusive
+        :param end_ms: The last time in milliseconds, exclusive
+        :param kind: ticker or trade
+        """
+        first, last = segment_day(start_ms), segment_day(max(end_ms - 1, start_ms))
+        for day in self.days(symbol, kind):
+            if first <= day <= last:
+                segment = self.read_segment(symbol, day, kind)
+                times = segment["time"]
+                start, end = np.searchsorted(times, start_ms), np.searchsorted(times, end_ms)
+                if end > start:
+                    yield {name: column[start:end] for name, column in segment.items()}
+
+    def read(self, symbol: str, start_ms: int, end_ms: int, kind: str = "ticker") -> Dict[str, np.ndarray]:
+        """
+        It returns the rows of a symbol within a time range, as zero-copy views when the range is within
+        a single segment and concatenated otherwise
+
+        :param symbol: The symbol to read
+        :param start_ms: The first time in milliseconds, inclusive
+        :param end_ms: The last time in milliseconds, exclusive
+        :param kind: ticker or trade
+        :return: An array per column.
+        """
+        parts = list(self.iter_range(symbol, start_ms, end_ms, kind))
+        if len(parts) == 1:
+            return parts[0]
+        columns = COLUMNS[kind]
+        return {name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype=dtype)
+                for name, dtype in columns.items()}
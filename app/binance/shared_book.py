@@ -0,0 +1,223 @@
+"""
+This module contains the SharedTickerBook class, a ticker book kept in shared memory so one feeder process
+can publish the prices every shard process of the bot reads
+"""
+
+
+import time
+from multiprocessing import shared_memory
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.binance.market_stream import ticker_from_event
+from app.binance.trade_api import Quote, SymbolData, TickerBook, TickerData
+
+# the numeric fields of a REST ticker, the columns of a row after its sequence number and event time
+FIELDS = ("priceChange", "priceChangePercent", "weightedAvgPrice", "prevClosePrice", "lastPrice", "bidPrice", "askPrice",
+          "openPrice", "highPrice", "lowPrice", "volume", "openTime", "closeTime")
+COLUMNS = {field: i + 2 for i, field in enumerate(FIELDS)}
+INTEGER_FIELDS = {"openTime", "closeTime"}
+QUOTE_COLUMNS = [COLUMNS[x] for x in ("lastPrice", "priceChangePercent", "bidPrice", "askPrice", "volume")]
+# the update time and the number of updates of the whole book, before the rows
+HEADER = 2
+# the reads of a row being written before it is read as missing, e.g. after its writer died mid-write
+MAX_READ_RETRIES = 1000
+
+
+class SharedTickerBook(TickerBook):
+    """
+    Shared ticker book for the Binance API
+
+    A TickerBook whose prices live in a float64 array in a `multiprocessing.shared_memory` block,
+    one row per symbol of a symbol list fixed at creation. The process that creates the book frees
+    it, a single process writes it and any number of processes attach to it by name and read the
+    rows in place, nothing is pickled or sent between them. Every row starts with a sequence number
+    the writer makes odd while it writes the row, so a reader copies the row again when it saw a
+    partial write.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, symbols: List[str], owner: bool):
+        super().__init__([])
+        self.memory = memory
+        self.owner = owner
+        self._symbols = list(symbols)
+        self._index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self._symbols)}
+        array = np.ndarray((HEADER + len(self._symbols) * (len(FIELDS) + 2),), dtype=np.float64, buffer=memory.buf)
+        self._header = array[:HEADER]
+        self._rows = array[HEADER:].reshape(len(self._symbols), len(FIELDS) + 2)
+        self._write_lock = Lock()
+
+    @classmethod
+    def create(cls, symbols: Iterable[str]) -> "SharedTickerBook":
+        """
+        It creates an empty book for the symbols, freed when the caller closes it
+
+        :param symbols: The symbols of the book, in the order every process attaches with
+        """
+        symbols = list(symbols)
+        memory = shared_memory.SharedMemory(create=True, size=8 * (HEADER + len(symbols) * (len(FIELDS) + 2)))
+        book = cls(memory, symbols, owner=True)
+        book._header[:] = 0
+        book._rows[:] = 0
+        return book
+
+    @classmethod
+    def attach(cls, name: str, symbols: Iterable[str]) -> "SharedTickerBook":
+        """
+        It attaches to the book created by another process, e.g. the parent of a process started by multiprocessing
+
+        :param name: The name of the shared memory block of the book
+        :param symbols: The symbols the book was created with
+        """
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before Python 3.13 an attach is tracked too, by the resource tracker spawned processes share with their parent
+            memory = shared_memory.SharedMemory(name=name)
+        return cls(memory, symbols, owner=False)
+
+    @property
+    def name(self) -> str:
+        """
+        It returns the name other processes attach to the book with
+        """
+        return self.memory.name
+
+    def close(self):
+        """
+        It detaches from the shared memory, and frees it when this process created it
+        """
+        self._header = self._rows = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    # writer
+
+    def _write(self, index: int, ticker: dict, event_time: Optional[float] = None):
+        row = self._rows[index]
+        values = [float(ticker[field]) for field in FIELDS]
+        row[0] += 1
+        if event_time is not None:
+            row[1] = event_time
+        row[2:] = values
+        row[0] += 1
+
+    def recover(self):
+        """
+        It completes the rows a previous writer died in the middle of, so a new writer can take over
+        """
+        with self._write_lock:
+            torn = self._rows[:, 0] % 2 == 1
+            self._rows[torn, 0] += 1
+
+    def _touch(self):
+        self._header[0] = time.time()
+        self._header[1] += 1
+
+    def seed(self, tickers: Iterable[dict]):
+        """
+        It writes a REST ticker snapshot to the book, the symbols it was not created with are ignored
+
+        :param tickers: The ticker dicts returned by the get_ticker call
+        """
+        index = self._index
+        with self._write_lock:
+            for ticker in tickers:
+                i = index.get(ticker["symbol"])
+                if i is not None:
+                    self._write(i, ticker)
+            self._touch()
+
+    def update(self, event: dict) -> bool:
+        """
+        It applies a ticker stream event to the book, as LiveTickerBook.update does, so a MarketDataStream
+        can keep it up to date
+
+        :param event: The stream event
+        :type event: dict
+        :return: True if the event was applied.
+        """
+        i = self._index.get(event["s"])
+        if i is None:
+            return False
+        event_time = event["E"]
+        with self._write_lock:
+            last_time = self._rows[i, 1]
+            if event_time < last_time or (event["e"] == "24hrMiniTicker" and event_time == last_time):
+                return False
+            self._write(i, ticker_from_event(event), event_time)
+            self._touch()
+        return True
+
+    # readers
+
+    def _read(self, symbol: str) -> Optional[List[float]]:
+        """
+        It returns a consistent copy of the row of a symbol, None before the symbol was first written
+        """
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        row = self._rows[i]
+        for _ in range(MAX_READ_RETRIES):
+            values = row.tolist()
+            if values[0] % 2 == 0 and row[0] == values[0]:
+                return values if values[0] else None
+        return None
+
+    def __contains__(self, symbol: str) -> bool:
+        i = self._index.get(symbol)
+        return i is not None and self._rows[i, 0] > 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._rows[:, 0]))
+
+    @property
+    def age(self) -> float:
+        """
+        It returns the number of seconds since the book was last written, by any process
+        """
+        updated_at = self._header[0]
+        return time.time() - updated_at if updated_at else float("inf")
+
+    @property
+    def updates(self) -> int:
+        """
+        It returns the number of writes to the book
+        """
+        return int(self._header[1])
+
+    @property
+    def symbols(self) -> List[str]:
+        return [symbol for symbol in self._symbols if symbol in self]
+
+    def get_ticker(self, symbol: str) -> Optional[TickerData]:
+        values = self._read(symbol)
+        if values is None:
+            return None
+        return TickerData(symbol=symbol, **{field: self._format(field, values[COLUMNS[field]]) for field in FIELDS})
+
+    def get_quote(self, symbol: str) -> Optional[Quote]:
+        values = self._read(symbol)
+        if values is None:
+            return None
+        return Quote(symbol, *[values[i] for i in QUOTE_COLUMNS])
+
+    def get_symbol(self, symbol: str) -> Optional[SymbolData]:
+        values = self._read(symbol)
+        return values and SymbolData(symbol=symbol, price=values[COLUMNS["lastPrice"]])
+
+    def get_fields(self, symbols: Iterable[str], field: str) -> List[Optional[str]]:
+        column = COLUMNS[field]
+        fields = []
+        for symbol in symbols:
+            values = self._read(symbol)
+            fields.append(None if values is None else self._format(field, values[column]))
+        return fields
+
+    @staticmethod
+    def _format(field: str, value: float):
+        return int(value) if field in INTEGER_FIELDS else f"{value:.8f}"
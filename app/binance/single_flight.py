@@ -0,0 +1,143 @@
+"""
+This module contains the SingleFlight class which coalesces concurrent identical reads into one call
+"""
+
+
+import asyncio
+import time
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """
+    A call in flight, shared by every caller of the same key
+    """
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Single flight for the Binance API
+
+    Concurrent callers asking for the same key share one in-flight call and its result. A result is
+    also returned to callers arriving within `window` seconds after it completed.
+    """
+
+    def __init__(self, window: float = 0.0, max_results: int = 4096):
+        """
+        :param window: The number of seconds a completed result is shared for
+        :param max_results: The number of completed results after which expired ones are dropped
+        """
+        self.window = window
+        self.max_results = max_results
+        self.calls = 0
+        self.executed = 0
+        self.shared = 0
+        self.fresh_hits = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = Lock()
+
+    @property
+    def deduplicated(self) -> int:
+        """
+        It returns the number of calls that did not reach the exchange
+        """
+        return self.shared + self.fresh_hits
+
+    def _fresh_result(self, key: Hashable, now: float, window: Optional[float]) -> Tuple[bool, Any]:
+        window = self.window if window is None else window
+        cached = self._results.get(key)
+        if cached is not None and window > 0 and now - cached[0] <= window:
+            self.fresh_hits += 1
+            return True, cached[1]
+        return False, None
+
+    def _store(self, key: Hashable, result: Any):
+        if self.window <= 0:
+            return
+        now = time.monotonic()
+        if len(self._results) >= self.max_results:
+            self._results = {k: v for k, v in self._results.items() if now - v[0] <= self.window}
+        self._results[key] = (now, result)
+
+    def do(self, key: Hashable, func: Callable[[], Any], window: Optional[float] = None) -> Any:
+        """
+        It returns the result of func, sharing it with every concurrent caller of the same key
+
+        :param key: The key identifying the endpoint and its params
+        :param func: The call to make if no call of the key is in flight
+        :param window: The oldest completed result in seconds the caller accepts, defaults to self.window
+        :return: The result of the call.
+        """
+        with self._lock:
+            self.calls += 1
+            fresh, result = self._fresh_result(key, time.monotonic(), window)
+            if fresh:
+                return result
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.error is None:
+                    self._store(key, call.result)
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    Single flight for the async Binance API, the calls in flight are shared as asyncio futures
+    """
+
+    async def do(self, key: Hashable, func: Callable[[], Any], window: Optional[float] = None) -> Any:
+        self.calls += 1
+        fresh, result = self._fresh_result(key, time.monotonic(), window)
+        if fresh:
+            return result
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        self.executed += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # retrieve the exception so an unshared failure is not reported as never retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._store(key, result)
+            return result
+        finally:
+            del self._in_flight[key]
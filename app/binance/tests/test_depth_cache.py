@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from app.binance.depth_cache import DepthBook, DepthCache, DepthSide
+from app.binance.quantize import SymbolQuantizer
+from app.binance.tests.ws_stand_in import StandInStreamServer
+from app.bot.strategy import calculate_depth_buy_order, calculate_sell_prices
+
+
+def _snapshot(last_update_id: int) -> dict:
+    return {"lastUpdateId": last_update_id,
+            "bids": [["0.00358000", "2"], ["0.00357000", "5"], ["0.00356000", "10"]],
+            "asks": [["0.00358200", "1"], ["0.00359000", "3"], ["0.00360000", "10"]]}
+
+
+def _diff(first: int, last: int, bids=(), asks=()) -> dict:
+    return {"e": "depthUpdate", "E": last, "s": "LTCBTC", "U": first, "u": last, "b": list(bids), "a": list(asks)}
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# test that the levels stay sorted best first and that a quantity of 0 removes a level
+def test_depth_side_keeps_levels_sorted():
+    bids = DepthSide(descending=True)
+    bids.load([["1.0", "1"], ["3.0", "1"], ["2.0", "0"]])
+    bids.set(2.0, 4.0)
+    bids.set(3.0, 0.0)
+    bids.set(1.0, 6.0)
+    bids.set(5.0, 0.0)
+    assert bids.top(5) == [(2.0, 4.0), (1.0, 6.0)]
+    assert bids.best() == (2.0, 4.0)
+
+    asks = DepthSide(descending=False)
+    asks.load([["3.0", "1"], ["1.0", "1"]])
+    asks.set(2.0, 1.0)
+    assert asks.top(2) == [(1.0, 1.0), (2.0, 1.0)]
+
+
+# test the fill price of a base quantity and of a quote amount
+def test_price_to_fill():
+    book = DepthBook("LTCBTC")
+    book.load_snapshot(_snapshot(100))
+    fill = book.price_to_fill("BUY", quantity=3)
+    assert fill.worst_price == 0.00359 and fill.levels == 2
+    assert fill.average_price == pytest.approx((0.003582 + 2 * 0.00359) / 3)
+    assert fill.slippage_percent == pytest.approx((fill.average_price / 0.003582 - 1) * 100)
+
+    fill = book.price_to_fill("SELL", quote=0.00358 * 2 + 0.00357)
+    assert fill.quantity == pytest.approx(3) and fill.worst_price == 0.00357
+
+    assert book.price_to_fill("SELL", quantity=17.5) is None
+    assert book.price_to_fill("SELL", quantity=0) is None
+    assert book.price_to_fill("BUY", quote=0) is None
+    assert book.top(1) == ([(0.00358, 2.0)], [(0.003582, 1.0)])
+
+
+# test that the diffs follow the update ids of the snapshot and a gap takes the book out of sync
+def test_depth_book_sequencing():
+    book = DepthBook("LTCBTC")
+    book.load_snapshot(_snapshot(100))
+    # ends before the snapshot
+    assert book.apply_diff(_diff(95, 100, bids=[["0.00358000", "0"]]))
+    assert book.bids.best() == (0.00358, 2.0)
+    # straddles the snapshot
+    assert book.apply_diff(_diff(99, 102, bids=[["0.00358000", "0"]], asks=[["0.00358100", "4"]]))
+    assert book.bids.best() == (0.00357, 5.0) and book.asks.best() == (0.003581, 4.0)
+    assert book.apply_diff(_diff(103, 104))
+    assert book.last_update_id == 104 and book.synced
+
+    assert not book.apply_diff(_diff(106, 107, asks=[["0.00300000", "1"]]))
+    assert not book.synced
+    assert book.asks.best() == (0.003581, 4.0)
+
+
+# test the cache against a local stand-in server, including a resync after a gap
+def test_depth_cache_resyncs_after_a_gap():
+    snapshots = [_snapshot(100), _snapshot(111)]
+    requests = []
+
+    def snapshot(symbol, limit):
+        requests.append((symbol, limit))
+        return snapshots.pop(0)
+
+    batches = [[
+        {"stream": "ltcbtc@depth@100ms", "data": _diff(95, 100)},
+        {"stream": "ltcbtc@depth@100ms", "data": _diff(99, 102, asks=[["0.00358100", "4"]])},
+        {"stream": "ltcbtc@depth@100ms", "data": _diff(110, 112, bids=[["0.00358500", "1"]])},
+        {"stream": "ltcbtc@depth@100ms", "data": _diff(113, 113, asks=[["0.00358200", "0"]])},
+    ]]
+    with StandInStreamServer(batches) as server:
+        cache = DepthCache(["LTCBTC"], snapshot, url=server.url, limit=50, reconnect_delay=0.01)
+        assert cache.get("LTCBTC") is None
+        cache.start()
+        try:
+            _wait_for(lambda: cache.messages == 4 and cache.books["LTCBTC"].last_update_id == 113)
+            book = cache.get("LTCBTC")
+        finally:
+            cache.stop()
+
+    assert server.paths[0] == "/stream?streams=ltcbtc@depth@100ms"
+    assert requests == [("LTCBTC", 50), ("LTCBTC", 50)]
+    assert cache.resyncs == 1
+    assert book.bids.best() == (0.003585, 1.0)
+    assert book.asks.best() == (0.00359, 3.0)
+    assert cache.get("LTCBTC") is None
+
+
+# test that a buy is priced at the worst ask it reaches and skipped on a thin book, and a sell at the bids
+def test_depth_pricing():
+    quantizer = SymbolQuantizer("0.000001", "0.01", "0.0001")
+    book = DepthBook("LTCBTC")
+    book.load_snapshot(_snapshot(100))
+
+    buy = calculate_depth_buy_order(0.00358, book, quantizer, buy_quantity=0.01, max_slippage_percent=1)
+    assert buy.order_price == "0.003590" and buy.price == 0.00359
+    assert buy.quantity == 2.78
+    assert calculate_depth_buy_order(0.00358, book, quantizer, buy_quantity=0.01, max_slippage_percent=0.1) is None
+    assert calculate_depth_buy_order(0.00358, book, quantizer, buy_quantity=1, max_slippage_percent=1) is None
+
+    average, worst = calculate_sell_prices(0.0036, 4, book)
+    assert average == pytest.approx((2 * 0.00358 + 2 * 0.00357) / 4) and worst == 0.00357
+    assert calculate_sell_prices(0.0036, 4) == (0.0036, 0.0036)
+    assert calculate_sell_prices(0.0036, 100, book) == (0.0036, 0.0036)
+    # an order that has not filled yet sells nothing, so it is priced at the last price
+    assert calculate_sell_prices(0.0036, 0.0, book) == (0.0036, 0.0036)
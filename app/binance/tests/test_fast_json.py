@@ -0,0 +1,30 @@
+import pytest
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+from app.binance.fast_json import FastJsonClient, loads
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode()
+
+    def json(self):
+        raise AssertionError("the response is decoded by requests")
+
+
+# test that the client decodes responses with the fast decoder into the same objects as json
+def test_fast_json_client_decodes_response():
+    content = b'[{"symbol": "LTCBTC", "orderId": 9223372036854775807, "price": "0.1", "isWorking": true}]'
+    assert FastJsonClient._handle_response(FakeResponse(200, content)) == [
+        {"symbol": "LTCBTC", "orderId": 9223372036854775807, "price": "0.1", "isWorking": True}]
+    assert loads(content.decode()) == loads(content)
+
+
+# test that errors and invalid documents raise the python-binance exceptions
+def test_fast_json_client_errors():
+    with pytest.raises(BinanceAPIException):
+        FastJsonClient._handle_response(FakeResponse(400, b'{"code": -1121, "msg": "Invalid symbol."}'))
+    with pytest.raises(BinanceRequestException):
+        FastJsonClient._handle_response(FakeResponse(200, b"<html>"))
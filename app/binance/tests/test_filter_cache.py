@@ -0,0 +1,86 @@
+import time
+
+from app.binance.trade_api import SymbolFilterCache, TradeApiFilters, AssetInfo
+
+
+def _symbol_info(symbol: str) -> dict:
+    return {"symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-3], "baseAssetPrecision": 8, "quoteAsset": symbol[-3:], "quotePrecision": 8,
+            "orderTypes": ["LIMIT", "MARKET"], "icebergAllowed": True,
+            "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.00000100", "maxPrice": "100000.00000000", "tickSize": "0.00000100"},
+                        {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "100000.00000000", "stepSize": "0.00100000"},
+                        {"filterType": "MIN_NOTIONAL", "minNotional": "0.00010000", "applyToMarket": True, "avgPriceMins": 5}]}
+
+
+class FakeExchangeInfoClient:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.exchange_info_calls = 0
+        self.symbol_info_calls = 0
+
+    def get_exchange_info(self):
+        self.exchange_info_calls += 1
+        return {"symbols": [_symbol_info(symbol) for symbol in self.symbols]}
+
+    def get_symbol_info(self, symbol):
+        self.symbol_info_calls += 1
+        return _symbol_info(symbol) if symbol == "NEWBTC" else None
+
+
+# test that every symbol is loaded from one exchange info call
+def test_filter_cache_loads_all_symbols_in_one_call():
+    client = FakeExchangeInfoClient(["LTCBTC", "ETHBTC"])
+    cache = SymbolFilterCache(client, ttl=60)
+    cache.refresh()
+
+    filters = cache.get_filters("LTCBTC")
+    assert isinstance(filters, TradeApiFilters)
+    assert filters.minPrice == "0.00000100"
+    assert filters.tickSize == "0.00000100"
+    assert filters.minQuantity == "0.00100000"
+    assert filters.stepSize == "0.00100000"
+    assert filters.minNotional == "0.00010000"
+    assert isinstance(cache.get_asset_info("ETHBTC"), AssetInfo)
+    assert client.exchange_info_calls == 1
+    assert client.symbol_info_calls == 0
+    assert cache.hits == 2
+    assert cache.misses == 0
+
+
+# test that unknown symbols are counted as misses and fetched individually
+def test_filter_cache_miss_falls_back_to_symbol_info():
+    client = FakeExchangeInfoClient(["LTCBTC"])
+    cache = SymbolFilterCache(client, ttl=60)
+
+    assert cache.get_filters("NEWBTC").stepSize == "0.00100000"
+    assert cache.get_filters("NEWBTC").stepSize == "0.00100000"
+    assert cache.get_filters("ETHIC") is None
+    assert client.exchange_info_calls == 1
+    assert client.symbol_info_calls == 2
+    assert cache.misses == 2
+    assert cache.hits == 1
+
+
+# test that the cache reloads after the ttl and on explicit refresh
+def test_filter_cache_expires_after_ttl():
+    client = FakeExchangeInfoClient(["LTCBTC"])
+    cache = SymbolFilterCache(client, ttl=0.01)
+    cache.get_filters("LTCBTC")
+    time.sleep(0.02)
+    cache.get_filters("LTCBTC")
+    assert client.exchange_info_calls == 2
+
+    cache.refresh()
+    assert cache.loads == 3
+
+
+# test that only the symbols read are validated
+def test_filter_cache_validates_lazily():
+    client = FakeExchangeInfoClient(["LTCBTC", "ETHBTC", "XRPBTC"])
+    cache = SymbolFilterCache(client, ttl=60)
+    cache.refresh()
+    assert cache._assets == {}
+
+    assert cache.get_cached_quantizer("ETHBTC").tick_units == 100
+    assert cache.get_cached_filters("ETHBTC").minQuantity == "0.00100000"
+    assert list(cache._assets) == ["ETHBTC"]
+    assert cache.get_cached_filters("ETHIC") is None
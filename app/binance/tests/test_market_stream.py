@@ -0,0 +1,103 @@
+import time
+
+from app.binance.market_stream import LiveTickerBook, MarketDataStream, ticker_from_event
+from app.binance.trade_api import TradeAPI
+from app.binance.tests.ws_stand_in import StandInStreamServer
+from config import Config as config
+
+
+def _mini_ticker(symbol: str, close: str, event_time: int) -> dict:
+    return {"e": "24hrMiniTicker", "E": event_time, "s": symbol, "c": close, "o": "0.00350000", "h": "0.00400000", "l": "0.00300000", "v": "1000",
+            "q": "3.5"}
+
+
+def _ticker(symbol: str, close: str, event_time: int) -> dict:
+    return {"e": "24hrTicker", "E": event_time, "s": symbol, "p": "0.00008100", "P": "2.314", "w": "0.00355000", "x": "0.00350000", "c": close,
+            "Q": "10", "b": "0.00358000", "B": "5", "a": "0.00358200", "A": "5", "o": "0.00350000", "h": "0.00400000", "l": "0.00300000",
+            "v": "1000", "q": "3.5", "O": 0, "C": event_time, "F": 1, "L": 100, "n": 100}
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# test that mini ticker events derive the change percent from the open price
+def test_ticker_from_mini_ticker_event():
+    ticker = ticker_from_event(_mini_ticker("LTCBTC", "0.00357000", 1000))
+    assert ticker["lastPrice"] == "0.00357000"
+    assert ticker["priceChangePercent"] == "2.000"
+
+
+# test that old events are ignored
+def test_live_ticker_book_ignores_out_of_order_events():
+    book = LiveTickerBook()
+    assert book.update(_ticker("LTCBTC", "0.00358100", 2000))
+    assert not book.update(_ticker("LTCBTC", "0.00300000", 1000))
+    assert not book.update(_mini_ticker("LTCBTC", "0.00300000", 2000))
+    assert book.get_ticker("LTCBTC").lastPrice == "0.00358100"
+    assert book.get_ticker("LTCBTC").priceChangePercent == "2.314"
+
+
+# test that a reseed replaces the quotes parsed before the gap
+def test_live_ticker_book_reseed_replaces_quotes():
+    book = LiveTickerBook()
+    book.update(_ticker("LTCBTC", "0.00358100", 2000))
+    assert book.get_quote("LTCBTC").last_price == 0.003581
+
+    book.seed([ticker_from_event(_ticker("LTCBTC", "0.00400000", 3000))])
+    assert book.get_quote("LTCBTC").last_price == 0.004
+    assert book.get_ticker("LTCBTC").lastPrice == "0.00400000"
+
+
+# test the stream against a local stand-in server, including a reconnect
+def test_market_stream_reconnects_and_resyncs():
+    snapshots = []
+
+    def snapshot():
+        snapshots.append(time.monotonic())
+        return [{"symbol": "ETHBTC", **ticker_from_event(_mini_ticker("ETHBTC", "0.06000000", 1))}]
+
+    batches = [
+        [{"stream": "!miniTicker@arr", "data": [_mini_ticker("LTCBTC", "0.00357000", 1000)]}],
+        [{"stream": "ltcbtc@ticker", "data": _ticker("LTCBTC", "0.00358100", 2000)}],
+    ]
+    with StandInStreamServer(batches) as server:
+        stream = MarketDataStream(LiveTickerBook(), ["LTCBTC"], url=server.url, snapshot=snapshot, reconnect_delay=0.01)
+        stream.start()
+        try:
+            _wait_for(lambda: stream.messages == 2)
+        finally:
+            stream.stop()
+
+    assert server.paths[0] == "/stream?streams=!miniTicker@arr/ltcbtc@ticker"
+    assert stream.reconnects == 1
+    assert stream.gaps == 1
+    assert len(snapshots) == 2
+    assert stream.book.get_ticker("LTCBTC").lastPrice == "0.00358100"
+    assert stream.book.get_ticker("ETHBTC").lastPrice == "0.06000000"
+
+
+# test that the trade api reads from the live book and falls back to REST when it is stale
+def test_trade_api_falls_back_to_rest_when_stream_is_stale(monkeypatch):
+    class FakeTickerClient:
+        calls = 0
+
+        def get_ticker(self):
+            self.calls += 1
+            return [ticker_from_event(_mini_ticker("LTCBTC", "0.00300000", 1))]
+
+    monkeypatch.setattr(config, "stream_max_age", 60)
+    api = TradeAPI(is_mock=True)
+    api.client = FakeTickerClient()
+    api.live_book = LiveTickerBook()
+    api.live_book.update(_ticker("LTCBTC", "0.00358100", 2000))
+
+    assert api.get_ticker_info("LTCBTC").lastPrice == "0.00358100"
+    assert api.client.calls == 0
+
+    monkeypatch.setattr(config, "stream_max_age", 0)
+    assert api.get_ticker_info("LTCBTC", max_age=60).lastPrice == "0.00300000"
+    assert api.client.calls == 1
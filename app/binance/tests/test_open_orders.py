@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+from app.binance.async_trade_api import AsyncTradeAPI
+from app.binance.trade_api import TradeAPI, OpenOrderBook, Order
+from config import Config as config
+
+
+def _order(symbol: str, order_id: int) -> dict:
+    return {"symbol": symbol, "orderId": order_id, "clientOrderId": "test", "price": "0.1", "origQty": "1.0", "executedQty": "0.0",
+            "status": "NEW", "timeInForce": "GTC", "type": "LIMIT", "side": "BUY", "stopPrice": "0.0", "icebergQty": "0.0", "time": 0}
+
+
+class FakeOrderClient:
+    def __init__(self, orders):
+        self.orders = orders
+        self.calls = []
+
+    def get_open_orders(self, **params):
+        self.calls.append(("get_open_orders", params.get("symbol")))
+        return list(self.orders)
+
+    def order_limit_buy(self, **params):
+        self.calls.append(("order_limit_buy", params["symbol"]))
+        self.orders.append(_order(params["symbol"], len(self.orders) + 1))
+        return {"orderId": len(self.orders)}
+
+    def cancel_order(self, **params):
+        self.calls.append(("cancel_order", params["symbol"]))
+        self.orders = [x for x in self.orders if x["orderId"] != params["orderId"]]
+        return {}
+
+
+def _trade_api(client) -> TradeAPI:
+    api = TradeAPI(is_mock=True)
+    api.client = client
+    return api
+
+
+# test that the book partitions the account's open orders by symbol
+def test_open_order_book_partitions_by_symbol():
+    book = OpenOrderBook([_order("LTCBTC", 1), _order("ETHBTC", 2), _order("LTCBTC", 3)])
+    assert len(book) == 3
+    assert sorted(book.symbols) == ["ETHBTC", "LTCBTC"]
+    assert [x.orderId for x in book.get_orders("LTCBTC")] == [1, 3]
+    assert isinstance(book.get_orders("LTCBTC")[0], Order)
+    assert book.get_orders("XRPBTC") == []
+
+
+# test that every symbol of a cycle reads from one account-wide sweep
+def test_sweep_is_shared_by_symbols(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 60)
+    api = _trade_api(FakeOrderClient([_order("LTCBTC", 1), _order("ETHBTC", 2)]))
+
+    assert [x.orderId for x in api.get_open_orders("LTCBTC")] == [1]
+    assert [x.orderId for x in api.get_open_orders("ETHBTC")] == [2]
+    assert api.get_open_orders("XRPBTC") == []
+    assert api.client.calls == [("get_open_orders", None)]
+
+
+# test that the sweep is fetched again once it is older than the max age
+def test_sweep_freshness(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 0.05)
+    api = _trade_api(FakeOrderClient([_order("LTCBTC", 1)]))
+
+    api.get_open_orders("LTCBTC")
+    api.get_open_orders("LTCBTC")
+    assert len(api.client.calls) == 1
+    time.sleep(0.06)
+    api.get_open_orders("LTCBTC")
+    assert len(api.client.calls) == 2
+
+
+# test that placing or cancelling an order invalidates the sweep at once
+def test_orders_invalidate_sweep(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 60)
+    api = _trade_api(FakeOrderClient([]))
+
+    assert api.get_open_orders("LTCBTC") == []
+    api.order_limit_buy(symbol="LTCBTC", quantity="1", price="0.1")
+    assert [x.orderId for x in api.get_open_orders("LTCBTC")] == [1]
+    api.cancel_order(symbol="LTCBTC", orderId=1)
+    assert api.get_open_orders("LTCBTC") == []
+    assert [x[0] for x in api.client.calls] == ["get_open_orders", "order_limit_buy", "get_open_orders", "cancel_order", "get_open_orders"]
+
+
+# test that a sweep requested before an order was placed is not cached after it
+def test_sweep_in_flight_during_order_is_stale(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 60)
+    client = FakeOrderClient([])
+    api = _trade_api(client)
+    started, release = threading.Event(), threading.Event()
+    fetch = client.get_open_orders
+
+    def slow_get_open_orders(**params):
+        orders = fetch(**params)
+        started.set()
+        release.wait(5)
+        return orders
+
+    client.get_open_orders = slow_get_open_orders
+    thread = threading.Thread(target=api.get_open_orders, args=("LTCBTC",))
+    thread.start()
+    started.wait(5)
+    api.order_limit_buy(symbol="LTCBTC", quantity="1", price="0.1")
+    release.set()
+    thread.join()
+
+    client.get_open_orders = fetch
+    assert [x.orderId for x in api.get_open_orders("LTCBTC")] == [1]
+
+
+# test that a caller delayed past a completed sweep of its generation does not sweep again
+def test_late_caller_reuses_completed_sweep(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 60)
+    api = _trade_api(FakeOrderClient([_order("LTCBTC", 1)]))
+    book = api.get_open_order_book()
+    assert api._fetch_open_order_book(api._order_generation, 60) is book
+    assert len(api.client.calls) == 1
+
+    class AsyncFakeOrderClient(FakeOrderClient):
+        async def get_open_orders(self, **params):
+            return FakeOrderClient.get_open_orders(self, **params)
+
+    async_api = AsyncTradeAPI(client=AsyncFakeOrderClient([_order("LTCBTC", 1)]))
+
+    async def run():
+        book = await async_api.get_open_order_book()
+        return book, await async_api._fetch_open_order_book(async_api._order_generation, 60)
+
+    book, late = asyncio.run(run())
+    assert late is book
+    assert len(async_api.client.calls) == 1
+
+
+# test that the async api shares one sweep between coroutines and invalidates it on orders
+def test_async_sweep(monkeypatch):
+    monkeypatch.setattr(config, "open_orders_max_age", 60)
+
+    class AsyncFakeOrderClient(FakeOrderClient):
+        async def get_open_orders(self, **params):
+            await asyncio.sleep(0.01)
+            return FakeOrderClient.get_open_orders(self, **params)
+
+        async def order_limit_buy(self, **params):
+            return FakeOrderClient.order_limit_buy(self, **params)
+
+    api = AsyncTradeAPI(client=AsyncFakeOrderClient([_order("LTCBTC", 1)]))
+
+    async def run():
+        results = await asyncio.gather(*[api.get_open_orders(symbol) for symbol in ("LTCBTC", "ETHBTC", "LTCBTC")])
+        await api.order_limit_buy(symbol="ETHBTC", quantity="1", price="0.1")
+        return results, await api.get_open_orders("ETHBTC")
+
+    results, after = asyncio.run(run())
+    assert [[x.orderId for x in orders] for orders in results] == [[1], [], [1]]
+    assert [x.orderId for x in after] == [2]
+    assert api.client.calls == [("get_open_orders", None), ("order_limit_buy", "ETHBTC"), ("get_open_orders", None)]
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import hmac
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from app.binance.fast_json import FastJsonClient
+from app.binance.order_submitter import AsyncOrderSubmitter, OrderSigner, OrderSubmitter, ServerClock
+from app.exchange.server import SimulatorServer
+from app.exchange.simulator import ExchangeSimulator
+
+
+@pytest.fixture
+def skewed_server():
+    # the exchange clock is 3 seconds behind, so local timestamps are in its future
+    server = SimulatorServer(ExchangeSimulator(["AAABTC"], seed=1, clock_offset_ms=-3000), tick_interval=0).start()
+    yield server
+    server.stop()
+
+
+def _order_params(server) -> dict:
+    price = float(server.simulator.ticker("AAABTC")["lastPrice"]) * 0.5
+    return {"symbol": "AAABTC", "quantity": "1.000", "price": f"{price:.8f}"}
+
+
+def test_clock_keeps_the_shortest_round_trip():
+    clock = ServerClock()
+    clock.update([(1000.0, 1600.0, 1200.0), (2000.0, 2530.0, 2040.0)])
+    assert clock.offset_ms == 510.0 and clock.round_trip_ms == 40.0
+
+
+def test_signer_reuses_prefixes_and_signs_the_body():
+    clock = ServerClock()
+    signer = OrderSigner("secret", clock, recv_window=5000)
+    signer.prepare(["AAABTC"])
+    body = signer.body("BUY", symbol="AAABTC", quantity="1.000", price="0.00100000", newClientOrderId="x")
+    unsigned, _, signature = body.rpartition("&signature=")
+
+    assert unsigned.startswith("symbol=AAABTC&side=BUY&type=LIMIT&timeInForce=GTC&quantity=1.000&price=0.00100000"
+                               "&recvWindow=5000&newClientOrderId=x&timestamp=")
+    assert signature == hmac.new(b"secret", unsigned.encode(), hashlib.sha256).hexdigest()
+    assert len(signer._prefixes) == 2
+
+
+def test_submitter_syncs_the_clock_under_skew(skewed_server):
+    client = FastJsonClient("key", "secret", api_url=skewed_server.url)
+    with pytest.raises(BinanceAPIException) as error:
+        client.order_limit_buy(**_order_params(skewed_server))
+    assert error.value.code == -1021
+
+    submitter = OrderSubmitter("key", "secret", api_url=skewed_server.url, sync_interval=0).start()
+    try:
+        assert abs(submitter.clock.offset_ms + 3000) < 100
+        assert submitter.order_limit_buy(**_order_params(skewed_server))["status"] == "NEW"
+
+        # a drifted clock is resynced on the timestamp error and the order sent again
+        submitter.clock.offset_ms = 0
+        assert submitter.order_limit_sell(**dict(_order_params(skewed_server), price="1.00000000"))["side"] == "SELL"
+        assert submitter.timestamp_retries == 1 and abs(submitter.clock.offset_ms + 3000) < 100
+    finally:
+        submitter.close()
+
+
+def test_async_submitter(skewed_server):
+    async def place():
+        submitter = await AsyncOrderSubmitter.create("key", "secret", api_url=skewed_server.url, sync_interval=0)
+        try:
+            return await submitter.order_limit_buy(**_order_params(skewed_server))
+        finally:
+            await submitter.close_connection()
+
+    assert asyncio.run(place())["status"] == "NEW"
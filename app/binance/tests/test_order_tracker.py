@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+from app.binance.async_trade_api import AsyncTradeAPI
+from app.binance.order_tracker import OrderTracker, UserDataStream
+from app.binance.trade_api import TradeAPI, Order
+from app.binance.tests.ws_stand_in import StandInStreamServer
+
+
+def _order(order_id: int, status: str = "NEW", executed: str = "0.0") -> dict:
+    return {"symbol": "LTCBTC", "orderId": order_id, "clientOrderId": f"myOrder{order_id}", "price": "0.1", "origQty": "1.0", "executedQty": executed,
+            "status": status, "timeInForce": "GTC", "type": "LIMIT", "side": "BUY", "stopPrice": "0.0", "icebergQty": "0.0", "time": 1499827319559,
+            "updateTime": 1499827319559}
+
+
+def _execution_report(order_id: int, status: str, execution_type: str, last_qty: str, cumulative_qty: str, transaction_time: int) -> dict:
+    return {"e": "executionReport", "E": transaction_time, "s": "LTCBTC", "c": f"myOrder{order_id}", "S": "BUY", "o": "LIMIT", "f": "GTC",
+            "q": "1.0", "p": "0.1", "P": "0.0", "F": "0.0", "x": execution_type, "X": status, "i": order_id, "l": last_qty, "z": cumulative_qty,
+            "L": "0.1", "n": "0", "N": "BNB", "T": transaction_time, "O": 1499827319559}
+
+
+class FakeUserStreamClient:
+    def __init__(self, open_orders, orders):
+        self.open_orders = open_orders
+        self.orders = orders
+        self.get_order_calls = 0
+
+    def stream_get_listen_key(self):
+        return "listen-key"
+
+    def stream_keepalive(self, listen_key):
+        pass
+
+    def get_open_orders(self, **params):
+        return self.open_orders
+
+    def get_order(self, **params):
+        self.get_order_calls += 1
+        return self.orders[params["orderId"]]
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# test that execution reports update the order state and fills
+def test_order_tracker_applies_execution_reports():
+    tracker = OrderTracker()
+    assert tracker.apply_execution_report(_execution_report(1, "NEW", "NEW", "0.0", "0.0", 1000))
+    assert tracker.apply_execution_report(_execution_report(1, "PARTIALLY_FILLED", "TRADE", "0.4", "0.4", 2000))
+    assert tracker.apply_execution_report(_execution_report(1, "FILLED", "TRADE", "0.6", "1.0", 3000))
+    assert not tracker.apply_execution_report(_execution_report(1, "PARTIALLY_FILLED", "TRADE", "0.4", "0.4", 2000))
+
+    assert tracker.get_order(1).status == "FILLED"
+    assert tracker.get_order(1).executedQty == "1.0"
+    assert [x.quantity for x in tracker.get_fills(1)] == ["0.4", "0.6"]
+    assert tracker.get_open_orders("LTCBTC") == []
+
+
+# test that orders closed while disconnected are reconciled over REST
+def test_order_tracker_marks_missing_open_orders_unconfirmed():
+    tracker = OrderTracker()
+    tracker.apply_execution_report(_execution_report(1, "NEW", "NEW", "0.0", "0.0", 1000))
+    tracker.sync_open_orders([Order(**_order(2))])
+
+    assert [x.orderId for x in tracker.get_unconfirmed_orders()] == [1]
+    assert sorted(x.orderId for x in tracker.get_open_orders()) == [1, 2]
+    tracker.track(Order(**_order(1, "FILLED", "1.0")), 4000)
+    assert tracker.get_unconfirmed_orders() == []
+
+
+# test the user data stream against a local stand-in server
+def test_user_data_stream_feeds_trade_api():
+    client = FakeUserStreamClient([_order(1)], {1: _order(1, "FILLED", "1.0")})
+    batches = [[_execution_report(1, "FILLED", "TRADE", "1.0", "1.0", 2000), _execution_report(2, "NEW", "NEW", "0.0", "0.0", 2000)]]
+    with StandInStreamServer(batches) as server:
+        stream = UserDataStream(OrderTracker(), client, url=server.url)
+        api = TradeAPI(is_mock=True)
+        api.order_tracker = stream.tracker
+        stream.start()
+        try:
+            _wait_for(lambda: stream.messages == 2)
+            assert api.get_order("LTCBTC", "1").status == "FILLED"
+            assert [x.orderId for x in api.get_open_orders("LTCBTC")] == [2]
+        finally:
+            stream.stop()
+
+    assert server.paths == ["/ws/listen-key"]
+    assert client.get_order_calls == 0
+    assert not stream.tracker.synced
+
+
+# test that orders are read over REST while the user data stream is disconnected
+def test_trade_api_reads_orders_over_rest_while_unsynced():
+    client = FakeUserStreamClient([], {1: _order(1, "FILLED", "1.0")})
+    tracker = OrderTracker()
+    tracker.apply_execution_report(_execution_report(1, "NEW", "NEW", "0.0", "0.0", 1000))
+    tracker.synced = False
+    api = TradeAPI(is_mock=True)
+    api.client = client
+    api.order_tracker = tracker
+
+    assert api.get_order("LTCBTC", 1).status == "FILLED"
+    assert client.get_order_calls == 1
+    assert tracker.get_order(1).status == "FILLED"
+
+    async_client = FakeUserStreamClient([], {1: _order(1, "FILLED", "1.0")})
+
+    async def get_order(**params):
+        return FakeUserStreamClient.get_order(async_client, **params)
+
+    async_client.get_order = get_order
+    tracker = OrderTracker()
+    tracker.apply_execution_report(_execution_report(1, "NEW", "NEW", "0.0", "0.0", 1000))
+    async_api = AsyncTradeAPI(client=async_client)
+    async_api.order_tracker = tracker
+
+    assert asyncio.run(async_api.get_order("LTCBTC", 1)).status == "FILLED"
+    assert async_client.get_order_calls == 1
+
+
+# test that an expired listenKey drops the sync and reconnects with a new listenKey
+def test_user_data_stream_reconnects_on_expired_listen_key():
+    client = FakeUserStreamClient([_order(1)], {})
+    listen_keys = iter(["listen-key-1", "listen-key-2"])
+    client.stream_get_listen_key = lambda: next(listen_keys)
+    batches = [[{"e": "listenKeyExpired", "E": 2000}], [_execution_report(1, "FILLED", "TRADE", "1.0", "1.0", 3000)]]
+    with StandInStreamServer(batches, keep_open=True) as server:
+        stream = UserDataStream(OrderTracker(), client, url=server.url, reconnect_delay=0.01)
+        stream.start()
+        try:
+            _wait_for(lambda: stream.messages == 2)
+            assert stream.reconnects == 1
+            assert stream.listen_key == "listen-key-2"
+            assert stream.tracker.get_order(1).status == "FILLED"
+            assert stream.tracker.synced
+        finally:
+            stream.stop()
+
+    assert server.paths == ["/ws/listen-key-1", "/ws/listen-key-2"]
+
+    stream.tracker.synced = True
+    stream.on_message({"e": "listenKeyExpired", "E": 4000})
+    assert not stream.tracker.synced and stream.listen_key is None
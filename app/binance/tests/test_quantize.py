@@ -0,0 +1,56 @@
+import pytest
+
+from app.binance.quantize import SymbolQuantizer, to_units, format_units, step_decimals
+from app.binance.trade_api import TradeApiFilters
+
+
+# test the conversion between decimal strings, floats and integer units
+def test_units():
+    assert to_units("0.00358100") == 358100
+    assert to_units("12") == 1200000000
+    assert to_units("-0.5") == -50000000
+    assert to_units("0.123456789") == 12345678
+    assert to_units(0.0025) == 250000
+    assert to_units(0.3) == 30000000
+    assert to_units(2) == 200000000
+    assert format_units(358100) == "0.00358100"
+    assert format_units(358100, 6) == "0.003581"
+    assert format_units(1200000000, 0) == "12"
+    assert step_decimals(to_units("0.00100000")) == 3
+    assert step_decimals(to_units("1.00000000")) == 0
+
+
+# test that prices and quantities are snapped down to the filters and formatted exactly
+def test_symbol_quantizer():
+    quantizer = SymbolQuantizer.from_filters(TradeApiFilters(minPrice="0.00000100", tickSize="0.00000100", minQuantity="0.00100000",
+                                                             stepSize="0.00100000", minNotional="0.00010000"))
+    assert quantizer.format_price(0.0025) == "0.002500"
+    assert quantizer.format_price("0.00358199") == "0.003581"
+    assert quantizer.format_quantity("1.23456") == "1.234"
+    assert quantizer.format_quantity(0.88) == "0.880"
+
+    price = quantizer.floor_price(0.0025)
+    quantity = quantizer.quantity_for_quote(0.0022, price)
+    assert quantizer.quantity_string(quantity) == "0.880"
+    assert quantizer.is_valid(price, quantity)
+    assert not quantizer.is_valid(price, quantizer.floor_quantity("0.01"))
+    assert quantizer.quantity_for_quote(0.0022, 0) == 0
+
+
+# test that the float modulo rounding it replaces loses a step where the integer one does not
+@pytest.mark.parametrize("quote, price, expected", [(0.0022, 0.0025, "0.880"), (0.3, 0.1, "3.000"), (0.0007, 0.0001, "7.000")])
+def test_quantity_matches_decimal_arithmetic(quote, price, expected):
+    quantizer = SymbolQuantizer("0.00000100", "0.00100000")
+    assert quantizer.quantity_string(quantizer.quantity_for_quote(quote, quantizer.floor_price(price))) == expected
+
+
+# test that floats of large prices are not floored a tick below their decimal
+def test_large_float_prices_keep_their_tick():
+    quantizer = SymbolQuantizer("0.01000000", "0.00001000")
+    assert quantizer.format_price(1024.36) == "1024.36"
+    assert quantizer.format_price(25000 * 1.005) == "25125.00"
+    assert quantizer.format_price(1024.369) == "1024.36"
+    for cents in range(100000, 10000000, 997):
+        assert quantizer.format_price(cents / 100) == f"{cents // 100}.{cents % 100:02d}"
+    assert to_units(123456.78901234) == 12345678901234
+    assert to_units(0.00000001) == 1
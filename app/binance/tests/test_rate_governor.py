@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+from binance.exceptions import BinanceAPIException
+
+from app.binance.rate_governor import RateGovernor, GovernedClient, RateLimitExceeded, endpoint_weight
+
+
+class FakeResponse:
+    def __init__(self, headers, status_code=200):
+        self.headers = headers
+        self.status_code = status_code
+        self.text = json.dumps({"code": -1003, "msg": "Too many requests"})
+
+
+class FakeHeaderClient:
+    """
+    Fake python-binance client that reports its used weight and order count in the response headers
+    """
+
+    def __init__(self, throttle: int = 0, retry_after: str = "0.01", status_code: int = 429):
+        self.used_weight = 0
+        self.order_count = 0
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.status_code = status_code
+        self.response = None
+        self.calls = []
+
+    def _respond(self, weight, orders=0):
+        self.used_weight += weight
+        self.order_count += orders
+        headers = {"X-MBX-USED-WEIGHT-1M": str(self.used_weight), "X-MBX-ORDER-COUNT-10S": str(self.order_count)}
+        if self.throttle:
+            self.throttle -= 1
+            self.response = FakeResponse({**headers, "Retry-After": self.retry_after}, self.status_code)
+            raise BinanceAPIException(self.response, self.status_code, self.response.text)
+        self.response = FakeResponse(headers)
+
+    def get_ticker(self, **params):
+        self.calls.append("get_ticker")
+        self._respond(2 if params.get("symbol") else 80)
+        return []
+
+    def order_limit_buy(self, **params):
+        self.calls.append("order_limit_buy")
+        self._respond(1, 1)
+        return {"orderId": 1}
+
+
+# test the weight table
+def test_endpoint_weight():
+    assert endpoint_weight("get_ticker", {}) == (80, False)
+    assert endpoint_weight("get_ticker", {"symbol": "LTCBTC"}) == (2, False)
+    assert endpoint_weight("get_open_orders", {"symbol": "LTCBTC"}) == (6, False)
+    assert endpoint_weight("order_limit_buy", {"symbol": "LTCBTC"}) == (1, True)
+
+
+# test that the calls are counted and the buckets follow the exchange headers
+def test_governor_counts_calls_and_syncs_headers():
+    governor = RateGovernor(weight_per_minute=1000, orders_per_10s=10, orders_per_day=1000, order_reserve=0, max_wait=1)
+    fake = FakeHeaderClient()
+    client = GovernedClient(fake, governor)
+    client.get_ticker()
+    client.get_ticker(symbol="LTCBTC")
+    client.order_limit_buy(symbol="LTCBTC", quantity="1", price="1")
+
+    assert governor.calls == 3
+    assert governor.orders == 1
+    assert governor.weight_used == 83
+    assert dict(governor.calls_per_endpoint) == {"get_ticker": 2, "order_limit_buy": 1}
+
+    # another process on the same IP used most of the weight
+    fake.used_weight = 990
+    client.get_ticker(symbol="LTCBTC")
+    assert governor.weight.tokens < 10
+
+
+# test that a governor sharing the limits of the IP counts its share of the weight the IP used
+def test_shared_governor_syncs_its_share_of_the_headers():
+    governor = RateGovernor(weight_per_minute=6000, orders_per_10s=100, orders_per_day=200000, order_reserve=0.1, max_wait=0.05)
+    governor.share(0.25)
+    assert governor.weight.capacity == 1500
+
+    # the whole IP used a sixth of its weight
+    governor.update_from_headers({"X-MBX-USED-WEIGHT-1M": "1000", "X-MBX-ORDER-COUNT-10S": "10"})
+    assert governor.weight.tokens == pytest.approx(1250, abs=1)
+    assert governor.orders_10s.tokens == pytest.approx(22.5, abs=0.1)
+    assert governor.reserve("get_ticker", 80, False) == 0
+
+
+# test that reads wait and give up when the weight is used up, while orders use the reserve
+def test_governor_reserves_weight_for_orders():
+    governor = RateGovernor(weight_per_minute=100, orders_per_10s=10, orders_per_day=1000, order_reserve=0.5, max_wait=0.05)
+    client = GovernedClient(FakeHeaderClient(), governor)
+    assert governor.reserve("get_ticker", 40, False) == 0
+    with pytest.raises(RateLimitExceeded):
+        client.get_ticker()
+
+    client.order_limit_buy(symbol="LTCBTC", quantity="1", price="1")
+    assert governor.orders == 1
+
+
+# test the 429 backoff and retry
+def test_governor_backs_off_on_429():
+    governor = RateGovernor(weight_per_minute=6000, orders_per_10s=10, orders_per_day=1000, max_wait=1)
+    fake = FakeHeaderClient(throttle=2, retry_after="0.05")
+    client = GovernedClient(fake, governor, max_retries=3)
+
+    start = time.monotonic()
+    client.get_ticker(symbol="LTCBTC")
+    assert time.monotonic() - start >= 0.1
+    assert governor.throttled == 2
+    assert governor.retries == 2
+    assert fake.calls == ["get_ticker"] * 3
+
+
+# test that a 418 is not retried and blocks the next calls
+def test_governor_stops_on_418():
+    governor = RateGovernor(weight_per_minute=6000, orders_per_10s=10, orders_per_day=1000, max_wait=0.1)
+    fake = FakeHeaderClient(throttle=1, retry_after="60", status_code=418)
+    client = GovernedClient(fake, governor)
+
+    with pytest.raises(BinanceAPIException):
+        client.get_ticker(symbol="LTCBTC")
+    with pytest.raises(RateLimitExceeded):
+        client.order_limit_buy(symbol="LTCBTC", quantity="1", price="1")
+    assert governor.banned == 1
+    assert fake.calls == ["get_ticker"]
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from app.binance.market_stream import LiveTickerBook, MarketDataStream
+from app.binance.recorder import MarketDataRecorder, MarketDataReader
+from app.binance.tests.test_market_stream import _ticker
+
+DAY = 1672531200000
+
+
+def _rest_ticker(symbol: str, last_price: float, close_time: int) -> dict:
+    return {"symbol": symbol, "priceChange": "0", "priceChangePercent": "1.500", "weightedAvgPrice": "1", "prevClosePrice": "1",
+            "lastPrice": f"{last_price:.8f}", "bidPrice": "1", "askPrice": "1", "openPrice": "1", "highPrice": "2", "lowPrice": "0.5",
+            "volume": "1000", "openTime": close_time - 86400000, "closeTime": close_time}
+
+
+def _trade(symbol: str, trade_id: int, price: str, trade_time: int) -> dict:
+    return {"e": "trade", "E": trade_time, "s": symbol, "t": trade_id, "p": price, "q": "0.5", "T": trade_time, "m": trade_id % 2 == 0,
+            "M": True}
+
+
+# test that segments are split per day and read back as zero-copy views of a time range
+def test_recorder_round_trip(tmp_path):
+    recorder = MarketDataRecorder(str(tmp_path), flush_rows=7)
+    times = [DAY - 2000 + i * 500 for i in range(10)]
+    recorder.record_tickers([_rest_ticker("LTCBTC", i, t) for i, t in enumerate(times)])
+    recorder.record_ticker(_rest_ticker("LTCBTC", 99, DAY - 3000))
+    recorder.close()
+    assert recorder.recorded == 10 and recorder.dropped == 1
+
+    reader = MarketDataReader(str(tmp_path))
+    assert reader.symbols() == ["LTCBTC"]
+    assert reader.days("LTCBTC") == ["2022-12-31", "2023-01-01"]
+
+    today = reader.read("LTCBTC", DAY, DAY + 1000)
+    assert list(today["time"]) == [DAY, DAY + 500]
+    assert list(today["last"]) == [4.0, 5.0]
+    assert isinstance(today["last"].base, np.memmap)
+
+    everything = reader.read("LTCBTC", 0, DAY * 2)
+    assert list(everything["last"]) == list(range(10))
+    assert list(everything["change_percent"]) == [1.5] * 10
+    assert len(reader.read("LTCBTC", DAY * 2, DAY * 3)["time"]) == 0
+
+
+# test that a row appended to only some of the column files is not read
+def test_reader_ignores_torn_rows(tmp_path):
+    recorder = MarketDataRecorder(str(tmp_path))
+    recorder.record_tickers([_rest_ticker("LTCBTC", 1, DAY), _rest_ticker("LTCBTC", 2, DAY + 1)])
+    recorder.close()
+    with open(os.path.join(tmp_path, "ticker", "LTCBTC", "2023-01-01", "time.bin"), "ab") as f:
+        f.write(np.array([DAY + 2], dtype="<i8").tobytes())
+
+    assert list(MarketDataReader(str(tmp_path)).read("LTCBTC", 0, DAY * 2)["time"]) == [DAY, DAY + 1]
+
+
+# test that the market stream records the applied ticker updates and the trades
+def test_market_stream_records_updates(tmp_path):
+    recorder = MarketDataRecorder(str(tmp_path))
+    stream = MarketDataStream(LiveTickerBook(), ["LTCBTC"], url="ws://localhost", recorder=recorder, trade_symbols=["LTCBTC"])
+    assert stream.streams == ["!miniTicker@arr", "ltcbtc@ticker", "ltcbtc@trade"]
+
+    stream.on_message({"stream": "ltcbtc@ticker", "data": _ticker("LTCBTC", "0.00358100", DAY + 2000)})
+    stream.on_message({"stream": "ltcbtc@ticker", "data": _ticker("LTCBTC", "0.00300000", DAY + 1000)})
+    for i in range(3):
+        stream.on_message({"stream": "ltcbtc@trade", "data": _trade("LTCBTC", i, "0.0035", DAY + i)})
+    recorder.close()
+
+    reader = MarketDataReader(str(tmp_path))
+    tickers = reader.read("LTCBTC", DAY, DAY + 3000)
+    assert list(tickers["last"]) == [0.003581]
+    trades = reader.read("LTCBTC", DAY, DAY + 3000, kind="trade")
+    assert list(trades["trade_id"]) == [0, 1, 2]
+    assert list(trades["buyer_maker"]) == [1, 0, 1]
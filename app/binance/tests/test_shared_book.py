@@ -0,0 +1,74 @@
+import pytest
+
+from app.binance.shared_book import SharedTickerBook
+from app.binance.trade_api import Quote, SymbolData, TradeAPI
+
+
+def _ticker(symbol: str, last_price: str) -> dict:
+    return {"symbol": symbol, "priceChange": "0.00000100", "priceChangePercent": "2.5", "weightedAvgPrice": last_price, "prevClosePrice": last_price,
+            "lastPrice": last_price, "bidPrice": last_price, "askPrice": last_price, "openPrice": last_price, "highPrice": last_price,
+            "lowPrice": last_price, "volume": "1000", "openTime": 1499783499040, "closeTime": 1499869899040, "firstId": 1, "lastId": 10, "count": 10}
+
+
+def _event(symbol: str, close: str, event_time: int) -> dict:
+    return {"e": "24hrTicker", "E": event_time, "s": symbol, "p": "0.00008100", "P": "2.314", "w": "0.00355000", "x": "0.00350000", "c": close,
+            "Q": "10", "b": "0.00358000", "B": "5", "a": "0.00358200", "A": "5", "o": "0.00350000", "h": "0.00400000", "l": "0.00300000",
+            "v": "1000", "q": "3.5", "O": 0, "C": event_time, "F": 1, "L": 100, "n": 100}
+
+
+@pytest.fixture
+def book():
+    book = SharedTickerBook.create(["LTCBTC", "ETHBTC"])
+    yield book
+    book.close()
+
+
+# test that a book attached by name reads what the writer wrote, in place
+def test_attached_book_reads_the_writes(book):
+    reader = SharedTickerBook.attach(book.name, ["LTCBTC", "ETHBTC"])
+    assert len(reader) == 0
+    assert reader.get_quote("LTCBTC") is None
+    assert reader.age == float("inf")
+
+    book.seed([_ticker("LTCBTC", "0.00358100"), _ticker("XRPBTC", "0.00001000")])
+    assert len(reader) == 1
+    assert "LTCBTC" in reader and "ETHBTC" not in reader and "XRPBTC" not in reader
+    assert reader.get_quote("LTCBTC") == Quote("LTCBTC", 0.003581, 2.5, 0.003581, 0.003581, 1000.0)
+    assert reader.get_symbol("LTCBTC") == SymbolData(symbol="LTCBTC", price=0.003581)
+    assert reader.get_ticker("LTCBTC").lastPrice == "0.00358100"
+    assert reader.get_ticker("LTCBTC").closeTime == 1499869899040
+    assert reader.get_fields(["LTCBTC", "ETHBTC"], "lastPrice") == ["0.00358100", None]
+    assert reader.age < 1
+    assert reader.updates == 1
+    reader.close()
+
+    # the block outlives its readers
+    assert book.get_quote("LTCBTC").last_price == 0.003581
+
+
+# test that old stream events are ignored, as in the LiveTickerBook
+def test_shared_book_ignores_out_of_order_events(book):
+    assert book.update(_event("LTCBTC", "0.00358100", 2000))
+    assert not book.update(_event("LTCBTC", "0.00300000", 1000))
+    assert not book.update(_event("XRPBTC", "0.00300000", 3000))
+    assert book.get_ticker("LTCBTC").lastPrice == "0.00358100"
+    assert book.get_ticker("LTCBTC").priceChangePercent == "2.31400000"
+
+
+# test that a row left half written by a dead writer is read as missing until a new writer recovers it
+def test_shared_book_recovers_torn_rows(book):
+    book.seed([_ticker("LTCBTC", "0.00358100")])
+    book._rows[0, 0] += 1
+    assert book.get_quote("LTCBTC") is None
+
+    book.recover()
+    assert book.get_quote("LTCBTC").last_price == 0.003581
+
+
+# test that the trade api reads the shared book as a live book
+def test_trade_api_reads_the_shared_book(book):
+    api = TradeAPI(is_mock=True)
+    api.live_book = SharedTickerBook.attach(book.name, ["LTCBTC", "ETHBTC"])
+    book.seed([_ticker("LTCBTC", "0.00358100")])
+    assert api.get_quote("LTCBTC").last_price == 0.003581
+    api.live_book.close()
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.binance.async_trade_api import AsyncTradeAPI
+from app.binance.single_flight import SingleFlight, AsyncSingleFlight
+from app.binance.trade_api import TradeAPI
+
+OPEN_ORDER = {"symbol": "LTCBTC", "orderId": 1, "orderListId": -1, "clientOrderId": "test", "price": "0.1", "origQty": "1.0",
+              "executedQty": "0.0", "cummulativeQuoteQty": "0.0", "status": "NEW", "timeInForce": "GTC", "type": "LIMIT",
+              "side": "BUY", "stopPrice": "0.0", "icebergQty": "0.0", "time": 0, "updateTime": 0, "isWorking": True,
+              "origQuoteOrderQty": "0.0"}
+
+
+class SlowClient:
+    """
+    Fake python-binance client whose calls take `delay` seconds
+    """
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = []
+
+    def get_open_orders(self, **params):
+        self.calls.append(("get_open_orders", params.get("symbol")))
+        time.sleep(self.delay)
+        return [OPEN_ORDER]
+
+    def get_ticker(self, **params):
+        self.calls.append(("get_ticker",))
+        time.sleep(self.delay)
+        return []
+
+
+class AsyncSlowClient(SlowClient):
+    async def get_open_orders(self, **params):
+        self.calls.append(("get_open_orders", params.get("symbol")))
+        await asyncio.sleep(self.delay)
+        return [OPEN_ORDER]
+
+
+def _concurrently(func, *args, count: int = 8):
+    with ThreadPoolExecutor(count) as executor:
+        return [future.result() for future in [executor.submit(func, *args) for _ in range(count)]]
+
+
+# test that concurrent identical reads make a single request and distinct reads do not share it
+def test_trade_api_coalesces_concurrent_reads():
+    api = TradeAPI(is_mock=True)
+    api.client = SlowClient()
+    results = _concurrently(api.get_open_orders, "LTCBTC")
+
+    assert api.client.calls == [("get_open_orders", None)]
+    assert all(result[0].orderId == 1 for result in results)
+    assert api.single_flight.executed == 1
+    assert api.single_flight.deduplicated == 7
+
+    api.invalidate_open_orders()
+    api.get_open_orders("ETHBTC")
+    assert api.client.calls[-1] == ("get_open_orders", None)
+    assert api.single_flight.executed == 2
+
+
+# test that the snapshot refresh is made once by concurrent workers
+def test_trade_api_coalesces_ticker_refresh():
+    api = TradeAPI(is_mock=True)
+    api.client = SlowClient()
+    books = _concurrently(api.get_ticker_snapshot, 0)
+
+    assert api.client.calls == [("get_ticker",)]
+    assert all(book is books[0] for book in books)
+
+
+# test the window completed results are shared for
+def test_single_flight_window():
+    flight = SingleFlight(window=0.05)
+    calls = []
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    time.sleep(0.06)
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
+    assert flight.fresh_hits == 1
+
+    no_window = SingleFlight()
+    assert no_window.do("key", lambda: 1) == 1
+    assert no_window.do("key", lambda: 2) == 2
+
+
+# test that an error is raised to every caller and is not shared afterwards
+def test_single_flight_shares_errors():
+    flight = SingleFlight(window=1)
+
+    def fail():
+        time.sleep(0.05)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(flight.do, "key", fail) for _ in range(4)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.executed == 1
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+# test that concurrent identical coroutines make a single request
+def test_async_single_flight():
+    api = AsyncTradeAPI(client=AsyncSlowClient())
+
+    async def run():
+        return await asyncio.gather(*[api.get_open_orders("LTCBTC") for _ in range(8)])
+
+    results = asyncio.run(run())
+    assert api.client.calls == [("get_open_orders", None)]
+    assert all(result[0].orderId == 1 for result in results)
+    assert api.single_flight.shared == 7
+
+    async def fail():
+        raise ValueError("failed")
+
+    flight = AsyncSingleFlight()
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do("key", fail))
+    assert not flight._in_flight
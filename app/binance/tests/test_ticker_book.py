@@ -0,0 +1,72 @@
+import time
+
+from app.binance.trade_api import TradeAPI, TickerBook, TickerData, SymbolData, Quote
+from config import Config as config
+
+
+def _ticker(symbol: str, last_price: str) -> dict:
+    return {"symbol": symbol, "priceChange": "0.00000100", "priceChangePercent": "2.5", "weightedAvgPrice": last_price, "prevClosePrice": last_price,
+            "lastPrice": last_price, "bidPrice": last_price, "askPrice": last_price, "openPrice": last_price, "highPrice": last_price,
+            "lowPrice": last_price, "volume": "1000", "openTime": 1499783499040, "closeTime": 1499869899040, "firstId": 1, "lastId": 10, "count": 10}
+
+
+class FakeTickerClient:
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.calls = []
+
+    def get_ticker(self, **params):
+        self.calls.append(params)
+        return self.tickers
+
+
+def _trade_api(client) -> TradeAPI:
+    api = TradeAPI(is_mock=True)
+    api.client = client
+    return api
+
+
+# test that the ticker book indexes every symbol of a snapshot
+def test_ticker_book_indexes_symbols():
+    book = TickerBook([_ticker("LTCBTC", "0.00358100"), _ticker("ETHBTC", "0.06000000")])
+    assert len(book) == 2
+    assert "LTCBTC" in book
+    assert book.get_symbol("LTCBTC") == SymbolData(symbol="LTCBTC", price=0.00358100)
+    assert isinstance(book.get_ticker("ETHBTC"), TickerData)
+    assert book.get_ticker("ETHBTC") is book.get_ticker("ETHBTC")
+    assert book.get_ticker("ETHIC") is None
+    assert book.get_symbol("ETHIC") is None
+
+
+# test that a quote is parsed once and without validating the ticker
+def test_ticker_book_quotes():
+    book = TickerBook([_ticker("LTCBTC", "0.00358100")])
+    quote = book.get_quote("LTCBTC")
+    assert quote == Quote("LTCBTC", 0.003581, 2.5, 0.003581, 0.003581, 1000.0)
+    assert book.get_quote("LTCBTC") is quote
+    assert book.get_quote("ETHIC") is None
+    assert book._tickers == {}
+
+
+# test that all reads share one bulk get_ticker call
+def test_trade_api_reads_from_one_snapshot(monkeypatch):
+    monkeypatch.setattr(config, "symbols", ["LTCBTC", "ETHBTC", "ETHIC"])
+    client = FakeTickerClient([_ticker("LTCBTC", "0.00358100"), _ticker("ETHBTC", "0.06000000")])
+    api = _trade_api(client)
+
+    assert api.get_symbol("LTCBTC", max_age=60).price == 0.00358100
+    assert api.get_symbol("ETHIC", max_age=60) is None
+    assert api.get_ticker_info("ETHBTC", max_age=60).lastPrice == "0.06000000"
+    assert [x.symbol for x in api.get_symbols_data(max_age=60)] == ["LTCBTC", "ETHBTC"]
+    assert client.calls == [{}]
+
+
+# test that a stale snapshot is refetched
+def test_trade_api_refreshes_stale_snapshot():
+    client = FakeTickerClient([_ticker("LTCBTC", "0.00358100")])
+    api = _trade_api(client)
+
+    api.get_symbol("LTCBTC", max_age=60)
+    time.sleep(0.01)
+    api.get_symbol("LTCBTC", max_age=0)
+    assert len(client.calls) == 2
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from threading import Thread, Event
+from typing import List
+
+import websockets
+
+
+class StandInStreamServer:
+    """
+    Local WebSocket stand-in for the Binance combined stream endpoint. Every connection is sent the
+    next batch of messages and is then closed, or kept open if it is the last batch or keep_open is set.
+    """
+
+    def __init__(self, batches: List[List[dict]], keep_open: bool = False):
+        self.batches = batches
+        self.keep_open = keep_open
+        self.paths: List[str] = []
+        self.port = None
+        self._ready = Event()
+        self._loop = None
+        self._stop = None
+        self._thread = Thread(target=asyncio.run, args=(self._serve(),), daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def _handler(self, ws, *args):
+        request = getattr(ws, "request", None)
+        self.paths.append(request.path if request is not None else args[0])
+        batch = self.batches.pop(0) if self.batches else []
+        for message in batch:
+            await ws.send(json.dumps(message))
+        if self.keep_open or not self.batches:
+            await self._stop
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = self._loop.create_future()
+        async with websockets.serve(self._handler, "127.0.0.1", 0) as server:
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            self._ready.set()
+            await self._stop
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set_result, None)
+        self._thread.join(5)
@@ -5,16 +5,19 @@ This module contains the TradeAPI class which is used to interact with the Binan
 
 from enum import Enum
 import logging
-from typing import List, Union, Optional, Iterable
+import time
+from threading import Lock
+from typing import Dict, List, NamedTuple, Union, Optional, Iterable
 from config import Config as config
 from binance import Client
+from binance.exceptions import BinanceAPIException
 from pydantic import BaseModel
-
-logging.basicConfig(
-    filename='../../logs/trade_api.log', encoding='utf-8', level=logging.DEBUG
-)
-
-logging.info("Loading config...")
+from app import metrics
+from app.binance.fast_json import FastJsonClient
+from app.binance.order_submitter import OrderSubmitter
+from app.binance.quantize import SymbolQuantizer
+from app.binance.rate_governor import RateGovernor, GovernedClient
+from app.binance.single_flight import SingleFlight
 
 
 class SymbolData(BaseModel):
@@ -39,6 +42,7 @@ class AssetFilterType(Enum):
     PRICE_FILTER = "PRICE_FILTER"
     LOT_SIZE = "LOT_SIZE"
     MIN_NOTIONAL = "MIN_NOTIONAL"
+    NOTIONAL = "NOTIONAL"
 
 
 class AssetFilter(BaseModel):
@@ -61,6 +65,9 @@ class TradeApiFilters(BaseModel):
     """
     minPrice: Optional[str]
     minQuantity: Optional[str]
+    tickSize: Optional[str]
+    stepSize: Optional[str]
+    minNotional: Optional[str]
 
 
 class AssetInfo(BaseModel):
@@ -82,6 +89,7 @@ class TickerData(BaseModel):
     """
     Ticker data model for the Binance API
     """
+    symbol: Optional[str] = None
     priceChange: str
     priceChangePercent: str
     weightedAvgPrice: str
@@ -100,6 +108,26 @@ class TickerData(BaseModel):
     count: Optional[int] = None
 
 
+class Quote(NamedTuple):
+    """
+    The numeric ticker fields the trading loop reads, parsed once per snapshot
+    """
+    symbol: str
+    last_price: float
+    change_percent: float
+    bid_price: float
+    ask_price: float
+    volume: float
+
+    @classmethod
+    def from_ticker(cls, ticker: dict) -> "Quote":
+        """
+        It parses a raw ticker dict as returned by the get_ticker call
+        """
+        return cls(ticker["symbol"], float(ticker["lastPrice"]), float(ticker["priceChangePercent"]), float(ticker["bidPrice"]),
+                   float(ticker["askPrice"]), float(ticker["volume"]))
+
+
 class Order(BaseModel):
     """
     Order model for the Binance API
@@ -119,83 +147,618 @@ class Order(BaseModel):
     time: int
 
 
+def build_trade_api_filters(asset_info: AssetInfo) -> TradeApiFilters:
+    """
+    It collapses the PRICE_FILTER, LOT_SIZE and MIN_NOTIONAL filters of a symbol into a single
+    TradeApiFilters object
+
+    :param asset_info: The exchange info of the symbol
+    :type asset_info: AssetInfo
+    :return: A TradeApiFilters object.
+    """
+    filters: Dict[str, AssetFilter] = {_filter.filterType: _filter for _filter in asset_info.filters}
+    price_filter = filters.get(AssetFilterType.PRICE_FILTER.value)
+    lot_size = filters.get(AssetFilterType.LOT_SIZE.value)
+    notional = filters.get(AssetFilterType.MIN_NOTIONAL.value) or filters.get(AssetFilterType.NOTIONAL.value)
+    return TradeApiFilters(
+        minPrice=price_filter and price_filter.minPrice,
+        tickSize=price_filter and price_filter.tickSize,
+        minQuantity=lot_size and lot_size.minQty,
+        stepSize=lot_size and lot_size.stepSize,
+        minNotional=notional and notional.minNotional,
+    )
+
+
+class SymbolFilterCache:
+    """
+    Symbol filter cache for the Binance API
+
+    Every symbol of the exchange is loaded from a single get_exchange_info call and kept until the
+    cache expires or is refreshed explicitly. A symbol is validated into its AssetInfo, TradeApiFilters
+    and SymbolQuantizer the first time it is read.
+    """
+
+    def __init__(self, client: Optional[Client], ttl: float):
+        """
+        :param client: The Binance client used to load the exchange info
+        :param ttl: The number of seconds after which the exchange info is reloaded
+        """
+        self.client = client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        # the raw exchange info of every symbol, validated into the three dicts below on first use
+        self._raw: Dict[str, dict] = {}
+        self._assets: Dict[str, AssetInfo] = {}
+        self._filters: Dict[str, TradeApiFilters] = {}
+        self._quantizers: Dict[str, SymbolQuantizer] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def is_expired(self) -> bool:
+        """
+        It returns True if the exchange info was never loaded or is older than the ttl
+        """
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def load(self, exchange_info: dict):
+        """
+        It rebuilds the cache from a get_exchange_info response
+
+        :param exchange_info: The exchange info of every symbol
+        :type exchange_info: dict
+        """
+        raw = {x["symbol"]: x for x in exchange_info["symbols"]}
+        with self._lock:
+            self._raw, self._assets, self._filters, self._quantizers = raw, {}, {}, {}
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        logging.info("Loaded exchange info for %s symbols", len(raw))
+
+    def _validate(self, symbol: str) -> Optional[AssetInfo]:
+        """
+        It validates the raw exchange info of a symbol the first time it is read, the symbols the bot
+        never trades are never validated
+        """
+        asset = self._assets.get(symbol)
+        if asset is not None or symbol not in self._raw:
+            return asset
+        with self._lock:
+            raw = self._raw.get(symbol)
+            if raw is None:
+                return None
+            asset = AssetInfo(**raw)
+            filters = build_trade_api_filters(asset)
+            self._filters[symbol] = filters
+            self._quantizers[symbol] = SymbolQuantizer.from_filters(filters)
+            self._assets[symbol] = asset
+        return asset
+
+    def refresh(self):
+        """
+        It loads the exchange info for every symbol in a single call and rebuilds the cache
+        """
+        self.load(self.client.get_exchange_info())
+
+    def get_tradable_symbols(self, quote_asset: Optional[str] = None) -> List[str]:
+        """
+        It returns the symbols in TRADING status from the raw exchange info, without validating them
+
+        :param quote_asset: The quote asset the symbols must be quoted in, any if None
+        :return: A list of symbols.
+        """
+        if self.is_expired:
+            self.refresh()
+        return [symbol for symbol, info in self._raw.items()
+                if info.get("status") == "TRADING" and (quote_asset is None or info.get("quoteAsset") == quote_asset)]
+
+    def add_symbol(self, symbol_info: Optional[dict]) -> Optional[AssetInfo]:
+        """
+        It adds a single symbol that was not part of the last exchange info, e.g. a new listing
+
+        :param symbol_info: The get_symbol_info response, None if the exchange does not know the symbol
+        :return: An AssetInfo object, or None.
+        """
+        if symbol_info is None:
+            return None
+        asset = AssetInfo(**symbol_info)
+        filters = build_trade_api_filters(asset)
+        with self._lock:
+            self._raw[asset.symbol] = symbol_info
+            self._assets[asset.symbol] = asset
+            self._filters[asset.symbol] = filters
+            self._quantizers[asset.symbol] = SymbolQuantizer.from_filters(filters)
+        return asset
+
+    def lookup(self, symbol: str) -> Optional[AssetInfo]:
+        """
+        It returns the cached exchange info for a given symbol without any I/O, counting the hit or miss
+
+        :param symbol: The symbol to get the exchange info for
+        :type symbol: str
+        :return: An AssetInfo object, or None if the symbol is not cached.
+        """
+        asset = self._validate(symbol)
+        if asset is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return asset
+
+    def get_asset_info(self, symbol: str) -> Optional[AssetInfo]:
+        """
+        It returns the cached exchange info for a given symbol
+
+        :param symbol: The symbol to get the exchange info for
+        :type symbol: str
+        :return: An AssetInfo object, or None if the exchange does not know the symbol.
+        """
+        if self.is_expired:
+            self.refresh()
+        asset = self.lookup(symbol)
+        if asset is None:
+            asset = self.add_symbol(self.client.get_symbol_info(symbol))
+        return asset
+
+    def get_filters(self, symbol: str) -> Optional[TradeApiFilters]:
+        """
+        It returns the precomputed filters for a given symbol
+
+        :param symbol: The symbol to get the filters for
+        :type symbol: str
+        :return: A TradeApiFilters object, or None if the exchange does not know the symbol.
+        """
+        if self.get_asset_info(symbol) is None:
+            return None
+        return self._filters[symbol]
+
+    def get_cached_filters(self, symbol: str) -> Optional[TradeApiFilters]:
+        """
+        It returns the precomputed filters for a given symbol without any I/O
+
+        :param symbol: The symbol to get the filters for
+        :type symbol: str
+        :return: A TradeApiFilters object, or None if the symbol is not cached.
+        """
+        self._validate(symbol)
+        return self._filters.get(symbol)
+
+    def get_cached_quantizer(self, symbol: str) -> Optional[SymbolQuantizer]:
+        """
+        It returns the precomputed quantizer for a given symbol without any I/O
+
+        :param symbol: The symbol to get the quantizer for
+        :type symbol: str
+        :return: A SymbolQuantizer object, or None if the symbol is not cached.
+        """
+        self._validate(symbol)
+        return self._quantizers.get(symbol)
+
+
+class TickerBook:
+    """
+    Ticker book for the Binance API
+
+    It indexes a single all-symbol ticker response by symbol. The raw tickers are only validated into
+    TickerData objects, or parsed into Quote objects, the first time a symbol is read.
+    """
+
+    def __init__(self, tickers: Iterable[dict], fetched_at: Optional[float] = None):
+        """
+        :param tickers: The ticker dicts returned by the get_ticker call
+        :param fetched_at: The monotonic time the tickers were fetched at, defaults to now
+        """
+        self.fetched_at: float = time.monotonic() if fetched_at is None else fetched_at
+        self._raw: Dict[str, dict] = {x["symbol"]: x for x in tickers}
+        self._tickers: Dict[str, TickerData] = {}
+        self._quotes: Dict[str, Quote] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._raw
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    @property
+    def age(self) -> float:
+        """
+        It returns the number of seconds since the snapshot was fetched
+        """
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns every symbol in the snapshot
+        """
+        return list(self._raw)
+
+    def get_ticker(self, symbol: str) -> Optional[TickerData]:
+        """
+        It returns the ticker data for a given symbol
+
+        :param symbol: The symbol to get the ticker for
+        :type symbol: str
+        :return: A TickerData object, or None if the symbol is not in the snapshot.
+        """
+        ticker = self._tickers.get(symbol)
+        if ticker is None and symbol in self._raw:
+            ticker = self._tickers[symbol] = TickerData(**self._raw[symbol])
+        return ticker
+
+    def get_quote(self, symbol: str) -> Optional[Quote]:
+        """
+        It returns the parsed prices, price change and volume of a symbol, without validating its ticker
+
+        :param symbol: The symbol to get the quote for
+        :type symbol: str
+        :return: A Quote object, or None if the symbol is not in the snapshot.
+        """
+        quote = self._quotes.get(symbol)
+        if quote is None and symbol in self._raw:
+            quote = self._quotes[symbol] = Quote.from_ticker(self._raw[symbol])
+        return quote
+
+    def get_symbol(self, symbol: str) -> Optional[SymbolData]:
+        """
+        It returns the symbol data for a given symbol
+
+        :param symbol: The symbol to get the price for
+        :type symbol: str
+        :return: A SymbolData object, or None if the symbol is not in the snapshot.
+        """
+        raw = self._raw.get(symbol)
+        return raw and SymbolData(symbol=symbol, price=float(raw["lastPrice"]))
+
+    def get_fields(self, symbols: Iterable[str], field: str) -> List[Optional[str]]:
+        """
+        It returns a raw ticker field for many symbols without parsing their tickers
+
+        :param symbols: The symbols to get the field for
+        :param field: The name of the ticker field, e.g. lastPrice
+        :return: The field values in the order of symbols, None for a symbol not in the snapshot.
+        """
+        raw = self._raw
+        return [raw[symbol][field] if symbol in raw else None for symbol in symbols]
+
+
+class OpenOrderBook:
+    """
+    Open order book for the Binance API
+
+    It partitions a single account-wide get_open_orders response by symbol, so every symbol worker of
+    a cycle reads its open orders from one request.
+    """
+
+    def __init__(self, orders: Iterable[dict], generation: int = 0, fetched_at: Optional[float] = None):
+        """
+        :param orders: The order dicts returned by the get_open_orders call
+        :param generation: The order generation of the TradeAPI when the orders were requested
+        :param fetched_at: The monotonic time the orders were fetched at, defaults to now
+        """
+        self.fetched_at: float = time.monotonic() if fetched_at is None else fetched_at
+        self.generation = generation
+        self._raw: Dict[str, List[dict]] = {}
+        for order in orders:
+            self._raw.setdefault(order["symbol"], []).append(order)
+        self._orders: Dict[str, List[Order]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(x) for x in self._raw.values())
+
+    @property
+    def age(self) -> float:
+        """
+        It returns the number of seconds since the orders were fetched
+        """
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns every symbol with an open order
+        """
+        return list(self._raw)
+
+    def get_orders(self, symbol: str) -> List[Order]:
+        """
+        It returns the open orders of a symbol, validated the first time the symbol is read
+
+        :param symbol: The symbol to get the open orders for
+        :type symbol: str
+        :return: A list of Order objects.
+        """
+        orders = self._orders.get(symbol)
+        if orders is None:
+            orders = self._orders[symbol] = [Order(**x) for x in self._raw.get(symbol, ())]
+        return list(orders)
+
+
 class TradeAPI:
     """
     Trade API class for the Binance API
     """
 
-    def __init__(self, is_mock: bool = False):
+    def __init__(self, is_mock: bool = False, governor: Optional[RateGovernor] = None, api_url: Optional[str] = None):
         """
         The function retrieves data from Binance and transforms the buy price change from 1% to 1.01
+
+        :param is_mock: Do not connect to Binance
+        :param governor: The rate governor every REST call goes through, shared by all clients of the same IP
+        :param api_url: The base url of the REST API, e.g. of the exchange simulator, defaults to config.api_url
         """
+        self.governor = governor or RateGovernor()
         self.client: Client = (
-            None if is_mock else Client(config.api_key, config.api_secret)
+            None if is_mock else GovernedClient(FastJsonClient(config.api_key, config.api_secret, api_url=api_url), self.governor)
+        )
+        # orders go over their own session with a synced clock, and over the client when it is not set
+        self.order_client: Optional[OrderSubmitter] = (
+            None if is_mock else GovernedClient(OrderSubmitter(config.api_key, config.api_secret, api_url=api_url).start(), self.governor)
         )
+        self.filter_cache = SymbolFilterCache(self.client, ttl=config.filter_cache_ttl)
+        self._ticker_book: Optional[TickerBook] = None
+
+        # bumped on every order placed or cancelled, an open order book of an older generation is stale
+        self._open_order_book: Optional[OpenOrderBook] = None
+        self._order_generation = 0
+
+        # concurrent identical reads from the symbol workers share one request
+        self.single_flight = SingleFlight(window=config.coalesce_window)
+
+        # set to the LiveTickerBook of a running MarketDataStream to read prices without any I/O
+        self.live_book: Optional[TickerBook] = None
+
+        # set to the OrderTracker of a running UserDataStream to read orders without any I/O
+        self.order_tracker = None
+
+        # set to a MarketDataRecorder to keep every fetched ticker
+        self.recorder = None
+
+        # set to an IndicatorEngine to feed it every fetched ticker
+        self.indicators = None
+
+        # set to the DepthCache of a running depth stream to price orders against the order books
+        self.depth_cache = None
+
         # Retrieve data from Binance
+        if not is_mock:
+            self.filter_cache.refresh()
 
-    def get_symbol(self, symbol) -> SymbolData:
+    @metrics.timed(metrics.api_call_seconds, "get_ticker_snapshot")
+    def get_ticker_snapshot(self, max_age: Optional[float] = None) -> TickerBook:
+        """
+        It returns a ticker book for every symbol on the exchange, fetching a new one with a single
+        get_ticker call when the current snapshot is older than max_age. While a live book is attached
+        and updated within config.stream_max_age it is returned instead, and REST is only the fallback
+        for a stale stream.
+
+        :param max_age: The oldest snapshot in seconds the caller accepts, defaults to config.ticker_max_age
+        :type max_age: float
+        :return: A TickerBook object.
+        """
+        live_book = self.live_book
+        if live_book is not None and live_book.age <= config.stream_max_age:
+            return live_book
+
+        max_age = config.ticker_max_age if max_age is None else max_age
+        book = self._ticker_book
+        if book is not None and book.age <= max_age:
+            return book
+
+        # the book age already decides whether a completed snapshot is reused
+        return self.single_flight.do(("get_ticker",), self._fetch_ticker_book, window=0)
+
+    def _fetch_ticker_book(self) -> TickerBook:
+        """
+        It fetches a new ticker book for every symbol with a single get_ticker call
+        """
+        tickers = self.client.get_ticker()
+        if self.recorder is not None:
+            self.recorder.record_tickers(tickers)
+        if self.indicators is not None:
+            self.indicators.update_tickers(tickers)
+        book = self._ticker_book = TickerBook(tickers)
+        return book
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol")
+    def get_symbol(self, symbol, max_age: Optional[float] = None) -> Optional[SymbolData]:
         """
         this method exists to refresh the symbol data for all symbols, and return
         a given symbol data on request. We do this because we want to ensure that
-        our price data always live - at the cost of an extra api call or two.
+        our price data is never older than max_age - at the cost of a single api call
+        for the whole exchange.
 
         :param symbol: The symbol of the instrument you want to trade
-        :return: The next symbol data object that matches the symbol passed in.
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :return: The symbol data object that matches the symbol passed in, or None.
         """
-        symbols_data: List[SymbolData] = self.get_symbols_data()
-        return next(filter(lambda x: x.symbol == symbol, symbols_data))
+        return self.get_ticker_snapshot(max_age).get_symbol(symbol)
 
-    def get_symbols_data(self) -> List[SymbolData]:
+    @metrics.timed(metrics.api_call_seconds, "get_symbols_data")
+    def get_symbols_data(self, max_age: Optional[float] = None) -> List[SymbolData]:
         """
-        Gets the symbols data from the client and returns it as a SymbolsData object
+        Gets the symbols data from the ticker snapshot and returns it as a SymbolsData object
+
+        :param max_age: The oldest snapshot in seconds the caller accepts
         :return: A list of SymbolData objects
         """
+        book = self.get_ticker_snapshot(max_age)
+        return [book.get_symbol(symbol) for symbol in config.symbols if symbol in book]
 
-        def _generate_symbols() -> Iterable[SymbolData]:
-            """
-            This function returns an iterable of `SymbolData` objects
-            """
-            for symbol in config.symbols:
-                ticker_info = self.client.get_ticker(symbol=symbol)
-                price = ticker_info and ticker_info.get("lastPrice")
-                yield SymbolData(symbol=symbol, price=float(price))
-
-        return list(_generate_symbols())
-
-    def get_ticker_info(self, symbol) -> TickerData:
+    @metrics.timed(metrics.api_call_seconds, "get_ticker_info")
+    def get_ticker_info(self, symbol, max_age: Optional[float] = None) -> Optional[TickerData]:
         """
         It returns the ticker info for a given symbol
 
         :param symbol: The ticker to get the info for
         :type symbol: str
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :type max_age: float
         :return: A TickerData object.
         """
-        return self.client.get_ticker(symbol=symbol)
+        return self.get_ticker_snapshot(max_age).get_ticker(symbol)
 
+    @metrics.timed(metrics.api_call_seconds, "get_quote")
+    def get_quote(self, symbol, max_age: Optional[float] = None) -> Optional[Quote]:
+        """
+        It returns the parsed prices, price change and volume of a symbol
+
+        :param symbol: The symbol to get the quote for
+        :type symbol: str
+        :param max_age: The oldest snapshot in seconds the caller accepts
+        :type max_age: float
+        :return: A Quote object, or None if the symbol is not in the snapshot.
+        """
+        return self.get_ticker_snapshot(max_age).get_quote(symbol)
+
+    def get_depth(self, symbol: str):
+        """
+        It returns the order book of a symbol from the attached depth cache
+
+        :param symbol: The symbol to get the order book for
+        :type symbol: str
+        :return: A DepthBook object, or None without a depth cache or while the book is out of sync.
+        """
+        depth_cache = self.depth_cache
+        return depth_cache.get(symbol) if depth_cache is not None else None
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol_filters")
     def get_symbol_filters(self, symbol: str) -> TradeApiFilters:
         """
         It returns the minimum and maximum price for a given symbol
 
         :param symbol: The symbol to get the filters for
         :type symbol: str
-        :return: A tuple of floats.
+        :return: A TradeApiFilters object.
+        """
+        filters: Optional[TradeApiFilters] = self.filter_cache.get_cached_filters(symbol)
+        if filters is None or self.filter_cache.is_expired:
+            filters = self.single_flight.do(("get_symbol_filters", symbol), lambda: self.filter_cache.get_filters(symbol))
+        if filters is None:
+            logging.error("Error retrieving data for symbol %s", symbol)
+        return filters
+
+    @metrics.timed(metrics.api_call_seconds, "get_symbol_quantizer")
+    def get_symbol_quantizer(self, symbol: str) -> Optional[SymbolQuantizer]:
+        """
+        It returns the quantizer that snaps order prices and quantities to the filters of a symbol
+
+        :param symbol: The symbol to get the quantizer for
+        :type symbol: str
+        :return: A SymbolQuantizer object, or None if the exchange does not know the symbol.
         """
-        symbol_data: Optional[AssetInfo] = self.client.get_symbol_info(symbol)
-        if symbol_data is None:
-            logging.error(f"Error retrieving data for symbol {symbol}")
-        price_filter = next(filter(lambda _filter: _filter.filterType == AssetFilterType.PRICE_FILTER, symbol_data.filters))
-        return TradeApiFilters(minPrice=price_filter.minPrice, minQuantity=price_filter.minQty)
+        if self.get_symbol_filters(symbol) is None:
+            return None
+        return self.filter_cache.get_cached_quantizer(symbol)
 
+    @metrics.timed(metrics.api_call_seconds, "get_open_order_book")
+    def get_open_order_book(self, max_age: Optional[float] = None) -> OpenOrderBook:
+        """
+        It returns the open orders of the whole account, fetching them with a single get_open_orders
+        call when the current book is older than max_age or an order was placed or cancelled since
+
+        :param max_age: The oldest book in seconds the caller accepts, defaults to config.open_orders_max_age
+        :type max_age: float
+        :return: An OpenOrderBook object.
+        """
+        max_age = config.open_orders_max_age if max_age is None else max_age
+        generation = self._order_generation
+        book = self._open_order_book
+        if book is not None and book.generation == generation and book.age <= max_age:
+            return book
+
+        # a sweep requested before an order was placed is not shared with the callers after it
+        return self.single_flight.do(("get_open_orders", generation), lambda: self._fetch_open_order_book(generation, max_age), window=0)
+
+    def _fetch_open_order_book(self, generation: int, max_age: Optional[float] = None) -> OpenOrderBook:
+        """
+        It fetches the open orders of the whole account with a single get_open_orders call, unless a
+        sweep of the same generation completed within max_age after the caller read the book
+        """
+        book = self._open_order_book
+        if max_age is not None and book is not None and book.generation == generation and book.age <= max_age:
+            return book
+        book = OpenOrderBook(self.client.get_open_orders(recvWindow=10000), generation)
+        if generation == self._order_generation:
+            self._open_order_book = book
+        return book
+
+    def invalidate_open_orders(self):
+        """
+        It makes the next get_open_orders call fetch the open orders again
+        """
+        self._order_generation += 1
+        self._open_order_book = None
+
+    @metrics.timed(metrics.api_call_seconds, "get_open_orders")
     def get_open_orders(self, symbol) -> List[Order]:
         """
-        It returns the open orders for the configured symbols
+        It returns the open orders for the configured symbols, from the order tracker while it is
+        synced with the user data stream and from the account-wide open order book otherwise
+        """
+        if self.order_tracker is not None and self.order_tracker.synced:
+            return self.order_tracker.get_open_orders(symbol)
+        return self.get_open_order_book().get_orders(symbol)
+
+    @metrics.timed(metrics.api_call_seconds, "order_limit_buy")
+    def order_limit_buy(self, **params) -> dict:
+        """
+        It places a limit buy order and invalidates the open order book
         """
-        orders = self.client.get_open_orders(symbol=symbol, recvWindow=10000)
-        return [Order(**x) for x in orders]
+        params.setdefault("recvWindow", config.order_recv_window)
+        try:
+            order = (self.order_client or self.client).order_limit_buy(**params)
+        except BinanceAPIException:
+            metrics.order_rejects.inc("BUY")
+            raise
+        finally:
+            self.invalidate_open_orders()
+        metrics.orders.inc("BUY")
+        return order
+
+    @metrics.timed(metrics.api_call_seconds, "order_limit_sell")
+    def order_limit_sell(self, **params) -> dict:
+        """
+        It places a limit sell order and invalidates the open order book
+        """
+        params.setdefault("recvWindow", config.order_recv_window)
+        try:
+            order = (self.order_client or self.client).order_limit_sell(**params)
+        except BinanceAPIException:
+            metrics.order_rejects.inc("SELL")
+            raise
+        finally:
+            self.invalidate_open_orders()
+        metrics.orders.inc("SELL")
+        return order
+
+    @metrics.timed(metrics.api_call_seconds, "cancel_order")
+    def cancel_order(self, **params) -> dict:
+        """
+        It cancels an order and invalidates the open order book
+        """
+        try:
+            return self.client.cancel_order(**params)
+        finally:
+            self.invalidate_open_orders()
 
+    @metrics.timed(metrics.api_call_seconds, "get_order")
     def get_order(self, symbol, order_id) -> Order:
         """
-        It returns the order for the given symbol and orderId
+        It returns the order for the given symbol and orderId, from the order tracker while it is synced
+        and knows the order, and from the REST API otherwise
         """
-        order = self.client.get_order(symbol=symbol, orderId=order_id, recvWindow=10000)
-        return Order(**order)
+        if self.order_tracker is not None and self.order_tracker.synced:
+            order = self.order_tracker.get_order(int(order_id))
+            if order is not None:
+                return order
+        state = self.single_flight.do(
+            ("get_order", symbol, str(order_id)),
+            lambda: self.client.get_order(symbol=symbol, orderId=order_id, recvWindow=10000)
+        )
+        order = Order(**state)
+        if self.order_tracker is not None:
+            self.order_tracker.track(order, state.get("updateTime", 0))
+        return order
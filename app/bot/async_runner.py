@@ -0,0 +1,216 @@
+"""
+This module contains the AsyncPumpDumpBot class which evaluates every symbol from a single event loop
+"""
+
+
+import asyncio
+import logging
+import time
+from typing import Iterable, List, Optional
+
+from config import Config as config
+from app import metrics
+from app.bot.models import Trades
+from app.bot.runner import (BuyPrice, BuySellEnum, cycle_log, handle_error, indicators, is_buy_signal, is_window_buy_signal,
+                            calculate_buy_order, calculate_depth_buy_order, calculate_sell_prices, is_sell_signal, positions)
+from app.binance.async_trade_api import AsyncTradeAPI
+from app.binance.quantize import SymbolQuantizer
+from app.binance.trade_api import Order, Quote
+
+
+class AsyncPumpDumpBot:
+    """
+    Async PnDBot class for the application
+
+    It mirrors PumpDumpBot over an AsyncTradeAPI, so hundreds of symbols can be checked concurrently
+    from one event loop. At most `concurrency` symbols are checked at the same time.
+    """
+
+    def __init__(self, trade_api: AsyncTradeAPI, concurrency: Optional[int] = None):
+        """
+        :param trade_api: The async trade api to use
+        :param concurrency: The number of symbols checked at the same time, defaults to config.max_concurrency
+        """
+        self.trade_api = trade_api
+        self.concurrency = concurrency or config.max_concurrency
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def calculate_buy_price(self, symbol: str) -> Optional[BuyPrice]:
+        """
+        Async version of PumpDumpBot.calculate_buy_price
+
+        :param symbol: The symbol you want to buy
+        :return: BuyPrice(quantity=quantity, price=final_buy_price, last_price=last_price)
+        """
+        # Get the current price and price change
+        quote: Quote = await self.trade_api.get_quote(symbol)
+        window = indicators.window(symbol, config.trigger_window)
+
+        if is_buy_signal(quote.last_price, quote.change_percent) or is_window_buy_signal(window):
+            metrics.signals.inc("BUY")
+            # Calculate the minimum price and quantity
+            quantizer: SymbolQuantizer = await self.trade_api.get_symbol_quantizer(symbol)
+            depth = self.trade_api.get_depth(symbol)
+            if depth is not None:
+                return calculate_depth_buy_order(quote.last_price, depth, quantizer)
+            return calculate_buy_order(quote.last_price, quantizer)
+
+    async def check_buy(self, symbol: str):
+        """
+        Async version of PumpDumpBot.check_buy
+
+        :param symbol: The symbol you want to buy
+        """
+        cycle_log.debug("Looking for Buy Opportunities on %s", symbol, extra={"symbol": symbol})
+
+        # Get the open trades of the symbol from the position index
+        open_trades = positions.get_trades(symbol)
+        open_trade = open_trades[0] if open_trades else None
+        if open_trade and await self.check_order_status(symbol, BuySellEnum.BUY):
+            cycle_log.debug("Already have an open order for %s, skipping...", symbol, extra={"symbol": symbol})
+            return
+
+        # Get all open orders from the exchange
+        open_orders: List[Order] = await self.trade_api.get_open_orders(symbol)
+        if not open_orders and not open_trade:
+            # Calculate the buy price
+            buy_data: Optional[BuyPrice] = await self.calculate_buy_price(symbol)
+            if buy_data is None:
+                return
+            signal_at = time.perf_counter()
+
+            # Place an order to buy
+            _order = await self.trade_api.order_limit_buy(
+                symbol=symbol,
+                quantity=buy_data.order_quantity,
+                price=buy_data.order_price
+            )
+            metrics.signal_to_ack_seconds.observe(time.perf_counter() - signal_at, "BUY")
+
+            logging.info("Buy %s at %s from %s", symbol, buy_data.price, buy_data.last_price,
+                         extra={"symbol": symbol, "order_id": _order["orderId"]})
+
+            # Add the order to the positions, the journal writes it to the database behind the order path
+            positions.add(Trades(symbol=symbol, order_id=_order["orderId"], price=buy_data.price, quantity=buy_data.quantity))
+
+    async def check_sell(self, symbol: str):
+        """
+        Async version of PumpDumpBot.check_sell
+
+        :param symbol: The symbol of the coin you want to trade
+        :type symbol: str
+        """
+        cycle_log.debug("Looking for Sell Opportunities on %s", symbol, extra={"symbol": symbol})
+
+        # Get the open trades of the symbol from the position index
+        open_trades = positions.get_trades(symbol)
+        order_status = await self.check_order_status(symbol, BuySellEnum.SELL)
+
+        # Check if the symbol is already in open orders
+        if open_trades and order_status:
+            cycle_log.debug("Already have an open sell order for %s, skipping...", symbol, extra={"symbol": symbol})
+            return
+
+        # Get the latest price action for the symbol
+        quote: Quote = await self.trade_api.get_quote(symbol)
+        open_orders: List[Order] = await self.trade_api.get_open_orders(symbol)
+        quantizer: SymbolQuantizer = await self.trade_api.get_symbol_quantizer(symbol)
+        depth = self.trade_api.get_depth(symbol)
+
+        for order in open_orders:
+            # with an order book, the price the quantity actually sells at
+            last_price, sell_price = calculate_sell_prices(quote.last_price, float(order.executedQty), depth)
+
+            # Check if the current price is greater than the price of the order by the expected change
+            if is_sell_signal(last_price, float(order.price)):
+                metrics.signals.inc("SELL")
+                signal_at = time.perf_counter()
+                logging.info("sell on %s at %s, current price is %s", order.symbol, order.price, last_price,
+                             extra={"symbol": order.symbol, "order_id": order.orderId})
+
+                # Place an order to sell
+                await self.trade_api.order_limit_sell(
+                    symbol=order.symbol,
+                    quantity=quantizer.format_quantity(order.executedQty),
+                    price=quantizer.format_price(sell_price),
+                )
+                metrics.signal_to_ack_seconds.observe(time.perf_counter() - signal_at, "SELL")
+
+    async def check_order_status(self, symbol: str, side: BuySellEnum):
+        """
+        Async version of PumpDumpBot.check_order_status
+
+        :param symbol: The symbol of the asset you want to trade
+        :type symbol: str
+        :param side: BuySellEnum.BUY or BuySellEnum.SELL
+        """
+        try:
+            cycle_log.debug("Checking status of %s", symbol, extra={"symbol": symbol})
+
+            # Get the open trades of the symbol from the position index
+            open_trades = positions.get_trades(symbol)
+
+            for trade in open_trades:
+                order: Order = await self.trade_api.get_order(symbol=trade.symbol, order_id=trade.order_id)
+
+                # Check if the order has been filled
+                if order.status == "FILLED":
+                    logging.info("Order %s %s", order.symbol, order.status, extra={"symbol": order.symbol, "order_id": order.orderId})
+
+                    # Delete the order from the database
+                    if side == BuySellEnum.SELL:
+                        positions.delete_symbol(order.symbol)
+                        logging.info("Deleted %s from database", order.symbol, extra={"symbol": order.symbol})
+                        return True
+                cycle_log.debug("%s Not FILLED yet...", order.symbol, extra={"symbol": order.symbol, "order_id": order.orderId})
+        except Exception as e:
+            handle_error(e)
+
+    async def check_symbol(self, symbol: str):
+        """
+        It checks a symbol for buy and sell opportunities, waiting for a free concurrency slot first
+
+        :param symbol: The symbol of the asset you want to trade
+        """
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                await self.check_buy(symbol)
+                await self.check_sell(symbol)
+            except Exception as e:
+                handle_error(e)
+            finally:
+                metrics.cycle_seconds.observe(time.perf_counter() - start, symbol)
+
+    async def run_cycle(self, symbols: Iterable[str]):
+        """
+        It checks every symbol once, concurrently
+
+        :param symbols: The symbols to check
+        """
+        await asyncio.gather(*(self.check_symbol(symbol) for symbol in symbols))
+
+    async def run_loop(self, symbols: Iterable[str]):
+        """
+        It checks every symbol every config.wait_time seconds, forever
+
+        :param symbols: The symbols to check
+        """
+        symbols = list(symbols)
+        while True:
+            await self.run_cycle(symbols)
+            await asyncio.sleep(config.wait_time)
+
+
+async def run(symbols: Iterable[str]):
+    """
+    It connects an AsyncTradeAPI and runs an AsyncPumpDumpBot over the given symbols until cancelled
+
+    :param symbols: The symbols to check
+    """
+    trade_api = await AsyncTradeAPI.create()
+    trade_api.indicators = indicators
+    try:
+        await AsyncPumpDumpBot(trade_api).run_loop(symbols)
+    finally:
+        await trade_api.close()
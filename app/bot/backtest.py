@@ -0,0 +1,353 @@
+"""
+This module contains the SymbolBacktest class which replays historical klines through the buy and sell
+decisions of PumpDumpBot with a simulated fill model and no network
+
+Run a parameter sweep from the repository root with
+`python -m app.bot.backtest data/ --buy 150 200 --sell 5 10 --processes 8`
+"""
+
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import islice, product
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from config import Config as config
+from app.binance.quantize import SymbolQuantizer
+from app.bot.strategy import BuyPrice, is_buy_signal, calculate_buy_order, is_sell_signal
+
+DAY_MS = 86400000
+
+# columns of the data.binance.vision kline files: open time, open, high, low, close, volume, ...
+KLINE_COLUMNS = (0, 1, 3, 4)
+
+
+def read_klines(path: str, chunk_size: int = 1000000) -> Iterator[np.ndarray]:
+    """
+    It streams a Binance kline CSV file in chunks, so a month of 1 second klines never has to fit in memory
+
+    :param path: The path of the kline file, with or without a header line
+    :param chunk_size: The number of klines per chunk
+    :return: Arrays of (open time in ms, open, low, close) rows.
+    """
+    with open(path) as f:
+        first = True
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            if first and not lines[0][:1].isdigit():
+                lines = lines[1:]
+            first = False
+            if not lines:
+                continue
+            chunk = np.loadtxt(lines, delimiter=",", usecols=KLINE_COLUMNS, ndmin=2)
+            # the spot files switched to microsecond timestamps in 2025
+            if chunk[0, 0] > 1e14:
+                chunk[:, 0] //= 1000
+            yield chunk
+
+
+class BacktestParams(BaseModel):
+    """
+    Backtest params model for the application
+    """
+    expected_change_buy: float
+    expected_change_sell: float
+    buy_quantity: float
+    buy_price_offset: float = 0.0
+    fee_rate: float = 0.001
+
+    @classmethod
+    def from_config(cls, **overrides) -> "BacktestParams":
+        """
+        It returns the params of the live bot, with the given fields overridden
+        """
+        params = {
+            "expected_change_buy": config.expected_change_buy,
+            "expected_change_sell": config.expected_change_sell,
+            "buy_quantity": config.buy_quantity_btc,
+            "buy_price_offset": config.buy_price_offset_percent,
+        }
+        params.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**params)
+
+
+class BacktestTrade(BaseModel):
+    """
+    Backtest trade model for the application
+    """
+    symbol: str
+    order_time: int
+    order_price: float
+    quantity: float
+    buy_time: Optional[int] = None
+    buy_price: Optional[float] = None
+    sell_time: Optional[int] = None
+    sell_price: Optional[float] = None
+    pnl: Optional[float] = None
+
+
+class BacktestResult(BaseModel):
+    """
+    Backtest result model for the application
+    """
+    symbol: str
+    params: BacktestParams
+    rows: int
+    trades: List[BacktestTrade]
+    pnl: float
+    fees: float
+    wins: int
+    losses: int
+    elapsed: float
+
+
+class PositionState(Enum):
+    """
+    PositionState enum for the application
+    """
+
+    FLAT = "flat"
+    ORDERED = "ordered"
+    HOLDING = "holding"
+
+
+class SymbolBacktest:
+    """
+    Symbol backtest for the application
+
+    It mirrors PumpDumpBot for one symbol: with no trade it places a limit buy on a buy signal, the order
+    fills once the price trades down to it, and the position is sold at the last price on a sell
+    signal. Each kline chunk is scanned with NumPy for the next candidate tick, which is confirmed by
+    the same is_buy_signal, calculate_buy_order and is_sell_signal functions the bots use, so no
+    per-tick objects are built.
+    """
+
+    def __init__(self, symbol: str, quantizer: SymbolQuantizer, params: BacktestParams):
+        """
+        :param symbol: The symbol replayed
+        :param quantizer: The quantizer of the symbol filters
+        :param params: The strategy params
+        """
+        self.symbol = symbol
+        self.quantizer = quantizer
+        self.params = params
+        self.state = PositionState.FLAT
+        self.rows = 0
+        self.fees = 0.0
+        self.trades: List[BacktestTrade] = []
+        self._order: Optional[BuyPrice] = None
+        self._window_times = np.empty(0)
+        self._window_opens = np.empty(0)
+
+    def _price_change_percent(self, times: np.ndarray, opens: np.ndarray, closes: np.ndarray) -> np.ndarray:
+        """
+        It returns the rolling 24 hour price change in percent the ticker endpoint would have reported
+        """
+        all_times = np.concatenate((self._window_times, times))
+        all_opens = np.concatenate((self._window_opens, opens))
+        day_open = all_opens[np.searchsorted(all_times, times - DAY_MS, side="right")]
+
+        # keep the last day of opens for the next chunk
+        keep = np.searchsorted(all_times, times[-1] - DAY_MS, side="right")
+        self._window_times, self._window_opens = all_times[keep:], all_opens[keep:]
+        return np.round((closes - day_open) / day_open * 100, 3)
+
+    def _buy(self, buy_time: int, price: float):
+        trade = self.trades[-1]
+        trade.buy_time, trade.buy_price = buy_time, price
+        self.fees += trade.quantity * price * self.params.fee_rate
+        self.state = PositionState.HOLDING
+
+    def _sell(self, sell_time: int, price: float):
+        trade = self.trades[-1]
+        trade.sell_time, trade.sell_price = sell_time, price
+        fees = trade.quantity * (trade.buy_price + price) * self.params.fee_rate
+        trade.pnl = trade.quantity * (price - trade.buy_price) - fees
+        self.fees += trade.quantity * price * self.params.fee_rate
+        self.state = PositionState.FLAT
+        self._order = None
+
+    def feed(self, chunk: np.ndarray):
+        """
+        It replays a chunk of klines
+
+        :param chunk: An array of (open time, open, low, close) rows, see read_klines
+        """
+        times, opens, lows, closes = (np.ascontiguousarray(chunk[:, i]) for i in range(4))
+        changes = self._price_change_percent(times, opens, closes)
+        buy_change, sell_change = self.params.expected_change_buy, self.params.expected_change_sell
+        self.rows += len(times)
+
+        # the same operations as is_buy_signal, every candidate is confirmed with it below
+        candidates = np.flatnonzero((closes <= closes * buy_change / 100) & (changes > buy_change))
+
+        i, n = 0, len(times)
+        while i < n:
+            if self.state == PositionState.FLAT:
+                k = np.searchsorted(candidates, i)
+                if k == len(candidates):
+                    break
+                j = int(candidates[k])
+                last_price = float(closes[j])
+                i = j + 1
+                if not is_buy_signal(last_price, float(changes[j]), buy_change):
+                    continue
+                order = calculate_buy_order(last_price, self.quantizer, self.params.buy_quantity, self.params.buy_price_offset)
+                if order is None:
+                    continue
+                self._order = order
+                self.trades.append(BacktestTrade(symbol=self.symbol, order_time=int(times[j]), order_price=order.price,
+                                                 quantity=order.quantity))
+                self.state = PositionState.ORDERED
+                # a limit at or above the last price takes the book right away
+                if order.price >= last_price:
+                    self._buy(int(times[j]), last_price)
+
+            elif self.state == PositionState.ORDERED:
+                filled = lows[i:] <= self._order.price
+                k = int(filled.argmax())
+                if not filled[k]:
+                    break
+                self._buy(int(times[i + k]), self._order.price)
+                i += k + 1
+
+            else:
+                # the same operations as is_sell_signal, the candidate is confirmed with it below
+                target = closes[i:] >= self._order.price * (1 + sell_change / 100)
+                k = int(target.argmax())
+                if not target[k]:
+                    break
+                last_price = float(closes[i + k])
+                if is_sell_signal(last_price, self._order.price, sell_change):
+                    self._sell(int(times[i + k]), last_price)
+                i += k + 1
+
+    def result(self, elapsed: float = 0.0) -> BacktestResult:
+        """
+        It returns the result of the replay so far, a trade still open is not counted in the pnl
+
+        :param elapsed: The seconds the replay took
+        :return: A BacktestResult object.
+        """
+        closed = [trade for trade in self.trades if trade.pnl is not None]
+        return BacktestResult(
+            symbol=self.symbol,
+            params=self.params,
+            rows=self.rows,
+            trades=self.trades,
+            pnl=sum(trade.pnl for trade in closed),
+            fees=self.fees,
+            wins=sum(trade.pnl > 0 for trade in closed),
+            losses=sum(trade.pnl <= 0 for trade in closed),
+            elapsed=elapsed,
+        )
+
+
+def run_backtest(symbol: str, paths: Iterable[str], quantizer: SymbolQuantizer, params: BacktestParams,
+                 chunk_size: int = 1000000) -> BacktestResult:
+    """
+    It replays the kline files of a symbol in order
+
+    :param symbol: The symbol replayed
+    :param paths: The kline files of the symbol, oldest first
+    :param quantizer: The quantizer of the symbol filters
+    :param params: The strategy params
+    :param chunk_size: The number of klines read at a time
+    :return: A BacktestResult object.
+    """
+    start = time.perf_counter()
+    backtest = SymbolBacktest(symbol, quantizer, params)
+    for path in paths:
+        for chunk in read_klines(path, chunk_size):
+            backtest.feed(chunk)
+    return backtest.result(time.perf_counter() - start)
+
+
+def _run_job(job: Tuple[str, List[str], SymbolQuantizer, BacktestParams, int]) -> BacktestResult:
+    return run_backtest(*job)
+
+
+def sweep(files: Dict[str, List[str]], quantizers: Dict[str, SymbolQuantizer], params: Iterable[BacktestParams],
+          processes: int = 1, chunk_size: int = 1000000) -> List[BacktestResult]:
+    """
+    It backtests every symbol with every set of params, fanned out over a process pool
+
+    :param files: The kline files of every symbol, oldest first
+    :param quantizers: The quantizer of every symbol
+    :param params: The sets of strategy params to try
+    :param processes: The number of worker processes, 1 runs in this process
+    :param chunk_size: The number of klines read at a time
+    :return: A BacktestResult for every symbol and params, in that order.
+    """
+    jobs = [(symbol, paths, quantizers[symbol], p, chunk_size) for p, (symbol, paths) in product(params, files.items())]
+    if processes <= 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(_run_job, jobs))
+
+
+def find_kline_files(paths: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    It groups kline files by symbol from their data.binance.vision names, e.g. LTCBTC-1s-2023-01.csv
+
+    :param paths: Kline files or directories of kline files
+    :return: The sorted files of every symbol.
+    """
+    files = defaultdict(list)
+    for path in paths:
+        names = [os.path.join(path, x) for x in os.listdir(path)] if os.path.isdir(path) else [path]
+        for name in names:
+            if name.endswith(".csv"):
+                files[os.path.basename(name).split("-")[0]].append(name)
+    return {symbol: sorted(paths) for symbol, paths in sorted(files.items())}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay Binance kline files through the PumpDumpBot decisions")
+    parser.add_argument("paths", nargs="+", help="kline csv files or directories")
+    parser.add_argument("--buy", type=float, nargs="+", default=[None], help="expected_change_buy values to try")
+    parser.add_argument("--sell", type=float, nargs="+", default=[None], help="expected_change_sell values to try")
+    parser.add_argument("--quantity", type=float, default=None, help="quote quantity per buy, defaults to buy_quantity_btc")
+    parser.add_argument("--offset", type=float, default=None, help="buy price offset in percent, defaults to buy_price_offset_percent")
+    parser.add_argument("--fee", type=float, default=0.001, help="fee rate per fill")
+    parser.add_argument("--exchange-info", help="a saved get_exchange_info response to take the symbol filters from")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    files = find_kline_files(args.paths)
+    quantizers = {symbol: SymbolQuantizer("0.00000001", "0.00000001") for symbol in files}
+    if args.exchange_info:
+        with open(args.exchange_info) as f:
+            symbols = {x["symbol"]: x for x in json.load(f)["symbols"]}
+        quantizers.update({symbol: SymbolQuantizer.from_symbol_info(symbols[symbol]) for symbol in files if symbol in symbols})
+
+    params = [BacktestParams.from_config(expected_change_buy=buy, expected_change_sell=sell, buy_quantity=args.quantity,
+                                        buy_price_offset=args.offset, fee_rate=args.fee)
+              for buy, sell in product(args.buy, args.sell)]
+    start = time.perf_counter()
+    results = sweep(files, quantizers, params, processes=args.processes)
+
+    totals = defaultdict(lambda: [0, 0.0, 0, 0])
+    for result in results:
+        total = totals[(result.params.expected_change_buy, result.params.expected_change_sell)]
+        total[0] += result.rows
+        total[1] += result.pnl
+        total[2] += result.wins
+        total[3] += result.losses
+    for (buy, sell), (rows, pnl, wins, losses) in totals.items():
+        print(f"buy {buy:g}% sell {sell:g}%: {wins + losses} trades, {wins} wins, pnl {pnl:.8f} over {rows} klines")
+    print(f"replayed {sum(x.rows for x in results)} klines of {len(files)} symbols in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+This module contains the IndicatorEngine class which keeps the price change, volume and trade count of every
+symbol over rolling windows of a few seconds to a few minutes, for pumps too fast for the 24 hour ticker change
+"""
+
+
+import math
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from config import Config as config
+from app.binance.trade_api import TickerBook
+
+# the log return, volume and trade count of a bucket, the values the baseline is kept for
+RETURN, VOLUME, TRADES = range(3)
+
+
+class WindowStats(NamedTuple):
+    """
+    The indicators of a symbol over a window, z-scores are NaN until the baseline covers the longest window
+    """
+
+    window: float
+    change_percent: float
+    volume: float
+    trades: float
+    change_z: float
+    volume_z: float
+    trades_z: float
+
+
+class RollingWindows:
+    """
+    Rolling windows of a symbol
+
+    The ticks are added up in buckets of `resolution` seconds kept in fixed-size ring buffers, one slot
+    per bucket of the longest window. Every window keeps the running volume and trade count of its
+    buckets: a new bucket is added to it and the bucket falling out of it is subtracted, so a tick
+    costs the same whatever the window lengths, and the memory of a symbol never grows. The
+    baseline is an exponentially weighted mean and variance of the closed buckets over about
+    `baseline` seconds, which a window is scored against.
+    """
+
+    def __init__(self, windows: Iterable[float], resolution: float, baseline: float):
+        """
+        :param windows: The window lengths in seconds
+        :param resolution: The length of a bucket in seconds
+        :param baseline: The seconds the baseline is averaged over
+        """
+        self.windows = tuple(windows)
+        self.resolution = resolution
+        self.lengths = [max(int(round(x / resolution)), 1) for x in self.windows]
+        self.size = max(self.lengths) + 1
+        self._close = np.zeros(self.size)
+        self._volume = np.zeros(self.size)
+        self._trades = np.zeros(self.size)
+        self._volume_sums = [0.0] * len(self.windows)
+        self._trade_sums = [0.0] * len(self.windows)
+        self._bucket: Optional[int] = None
+
+        self._alpha = min(resolution / baseline, 1.0)
+        self._mean = [0.0, 0.0, 0.0]
+        self._variance = [0.0, 0.0, 0.0]
+        self.baseline_buckets = 0
+
+        # the 24 hour volume and last trade id of the previous ticker, a ticker only carries totals
+        self.last_volume: Optional[float] = None
+        self.last_trade_id: Optional[int] = None
+        # set once trades are added one by one, the ticker totals are then only read for the price
+        self.trade_fed = False
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _observe(self, slot: int, previous: int):
+        """
+        It adds a closed bucket to the baseline
+        """
+        close, previous_close = self._close[slot], self._close[previous]
+        values = (math.log(close / previous_close) if close > 0 and previous_close > 0 else 0.0, self._volume[slot], self._trades[slot])
+        alpha = self._alpha
+        for i, value in enumerate(values):
+            delta = value - self._mean[i]
+            self._mean[i] += alpha * delta
+            self._variance[i] = (1 - alpha) * (self._variance[i] + alpha * delta * delta)
+        self.baseline_buckets += 1
+
+    def advance(self, timestamp: float):
+        """
+        It closes the buckets before the one of timestamp, an earlier timestamp is counted in the current bucket
+        """
+        bucket = int(timestamp // self.resolution)
+        current = self._bucket
+        if current is None or bucket <= current:
+            return
+        size = self.size
+        if bucket - current > size:
+            # every window only holds empty buckets since the last tick
+            self._observe(current % size, (current - 1) % size)
+            self._close[:] = self._close[current % size]
+            self._volume[:] = 0.0
+            self._trades[:] = 0.0
+            self._volume_sums = [0.0] * len(self.windows)
+            self._trade_sums = [0.0] * len(self.windows)
+            self._bucket = bucket
+            return
+        for b in range(current + 1, bucket + 1):
+            slot, previous = b % size, (b - 1) % size
+            self._observe(previous, (b - 2) % size)
+            for i, length in enumerate(self.lengths):
+                leaving = (b - length) % size
+                self._volume_sums[i] -= self._volume[leaving]
+                self._trade_sums[i] -= self._trades[leaving]
+            self._close[slot] = self._close[previous]
+            self._volume[slot] = 0.0
+            self._trades[slot] = 0.0
+        self._bucket = bucket
+
+    def tick(self, timestamp: float, price: float, volume: float = 0.0, trades: float = 0.0):
+        """
+        It adds a trade or price update
+
+        :param timestamp: The time of the tick in seconds
+        :param price: The last price
+        :param volume: The base asset volume traded since the previous tick
+        :param trades: The number of trades since the previous tick
+        """
+        if self._bucket is None:
+            self._bucket = int(timestamp // self.resolution)
+            self._close[:] = price
+        else:
+            self.advance(timestamp)
+        slot = self._bucket % self.size
+        self._close[slot] = price
+        if volume or trades:
+            self._volume[slot] += volume
+            self._trades[slot] += trades
+            for i in range(len(self.windows)):
+                self._volume_sums[i] += volume
+                self._trade_sums[i] += trades
+
+    def tick_totals(self, timestamp: float, price: float, volume: float, trade_id: Optional[int] = None):
+        """
+        It adds a ticker, whose volume is a 24 hour total and trade id the last one, as the change since the previous ticker
+
+        The 24 hour volume also drops as old trades leave it, so a negative change counts as none.
+        """
+        volume_change = trades = 0.0
+        if not self.trade_fed:
+            if self.last_volume is not None:
+                volume_change = max(volume - self.last_volume, 0.0)
+            if trade_id is not None and self.last_trade_id is not None:
+                trades = max(trade_id - self.last_trade_id, 0)
+        self.last_volume = volume
+        if trade_id is not None:
+            self.last_trade_id = trade_id
+        self.tick(timestamp, price, volume_change, trades)
+
+    def _z_score(self, value: float, kind: int, length: int) -> float:
+        standard_deviation = math.sqrt(length * self._variance[kind])
+        if self.baseline_buckets < self.size - 1 or standard_deviation == 0:
+            return math.nan
+        return (value - length * self._mean[kind]) / standard_deviation
+
+    def stats(self) -> List[WindowStats]:
+        """
+        It returns the indicators of every window, ending with the current bucket
+        """
+        if self._bucket is None:
+            return []
+        size = self.size
+        close = self._close[self._bucket % size]
+        stats = []
+        for i, length in enumerate(self.lengths):
+            start = self._close[(self._bucket - length) % size]
+            change = math.log(close / start) if close > 0 and start > 0 else 0.0
+            stats.append(WindowStats(
+                window=self.windows[i],
+                change_percent=(close / start - 1) * 100 if start > 0 else 0.0,
+                volume=self._volume_sums[i],
+                trades=self._trade_sums[i],
+                change_z=self._z_score(change, RETURN, length),
+                volume_z=self._z_score(self._volume_sums[i], VOLUME, length),
+                trades_z=self._z_score(self._trade_sums[i], TRADES, length),
+            ))
+        return stats
+
+
+class IndicatorEngine:
+    """
+    Indicator engine for the application
+
+    It keeps the RollingWindows of every tracked symbol. A symbol is tracked from the first time its
+    indicators are read, and only tracked symbols are updated by the ticker snapshots, stream
+    events and trades the engine is fed, so the engine costs nothing for the symbols the bot never
+    looks at.
+    """
+
+    def __init__(self, windows: Optional[Iterable[float]] = None, resolution: Optional[float] = None, baseline: Optional[float] = None):
+        """
+        :param windows: The window lengths in seconds, defaults to config.indicator_windows
+        :param resolution: The length of a bucket in seconds, defaults to config.indicator_resolution
+        :param baseline: The seconds the baseline is averaged over, defaults to config.indicator_baseline
+        """
+        self.windows = tuple(config.indicator_windows if windows is None else windows)
+        self.resolution = resolution or config.indicator_resolution
+        self.baseline = baseline or config.indicator_baseline
+        self._symbols: Dict[str, RollingWindows] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns the tracked symbols
+        """
+        return list(self._symbols)
+
+    def track(self, symbol: str) -> RollingWindows:
+        """
+        It returns the windows of a symbol, tracking it if it is not tracked yet
+        """
+        rolling = self._symbols.get(symbol)
+        if rolling is None:
+            with self._lock:
+                rolling = self._symbols.get(symbol)
+                if rolling is None:
+                    rolling = self._symbols[symbol] = RollingWindows(self.windows, self.resolution, self.baseline)
+        return rolling
+
+    def update(self, symbol: str, timestamp: float, price: float, volume: float = 0.0, trades: float = 0.0):
+        """
+        It adds a tick to a symbol, see RollingWindows.tick
+        """
+        rolling = self.track(symbol)
+        with rolling.lock:
+            rolling.tick(timestamp, price, volume, trades)
+
+    def update_trade(self, event: dict):
+        """
+        It adds a `trade` stream event to its symbol if it is tracked
+        """
+        rolling = self._symbols.get(event["s"])
+        if rolling is not None:
+            with rolling.lock:
+                rolling.trade_fed = True
+                rolling.tick(event["T"] / 1000, float(event["p"]), float(event["q"]), 1)
+
+    def update_ticker(self, ticker: dict, timestamp: Optional[float] = None):
+        """
+        It adds a REST ticker, or a stream event converted with ticker_from_event, to its symbol if it is tracked
+
+        :param ticker: The ticker dict
+        :param timestamp: The time of the ticker in seconds, defaults to now
+        """
+        rolling = self._symbols.get(ticker["symbol"])
+        if rolling is not None:
+            with rolling.lock:
+                rolling.tick_totals(time.time() if timestamp is None else timestamp, float(ticker["lastPrice"]), float(ticker["volume"]),
+                                    ticker.get("lastId"))
+
+    def update_tickers(self, tickers: Iterable[dict], timestamp: Optional[float] = None):
+        """
+        It adds the tickers of the tracked symbols of a get_ticker response
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        symbols = self._symbols
+        for ticker in tickers:
+            if ticker["symbol"] in symbols:
+                self.update_ticker(ticker, timestamp)
+
+    def update_book(self, book: TickerBook, timestamp: Optional[float] = None):
+        """
+        It adds the quotes of the tracked symbols of a ticker book, e.g. a SharedTickerBook, without trade counts
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for symbol, rolling in list(self._symbols.items()):
+            quote = book.get_quote(symbol)
+            if quote is not None:
+                with rolling.lock:
+                    rolling.tick_totals(timestamp, quote.last_price, quote.volume)
+
+    def get(self, symbol: str, timestamp: Optional[float] = None) -> List[WindowStats]:
+        """
+        It returns the indicators of every window of a symbol, tracking it from now on
+
+        :param symbol: The symbol to get the indicators for
+        :param timestamp: The time the windows end at in seconds, defaults to now
+        :return: A list of WindowStats in the order of the windows, empty before the first tick.
+        """
+        rolling = self.track(symbol)
+        with rolling.lock:
+            rolling.advance(time.time() if timestamp is None else timestamp)
+            return rolling.stats()
+
+    def window(self, symbol: str, seconds: float, timestamp: Optional[float] = None) -> Optional[WindowStats]:
+        """
+        It returns the indicators of a symbol over one of the windows, tracking it from now on
+
+        :param symbol: The symbol to get the indicators for
+        :param seconds: The length of the window, one of the windows of the engine
+        :param timestamp: The time the window ends at in seconds, defaults to now
+        :return: A WindowStats object, or None before the first tick or if there is no such window.
+        """
+        for stats in self.get(symbol, timestamp):
+            if stats.window == seconds:
+                return stats
+        return None
@@ -0,0 +1,206 @@
+"""
+This module contains the TradeJournal class which takes the trade inserts and deletes off the order path
+and writes them to the database in batches
+"""
+
+
+import atexit
+import logging
+import time
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import Config as config
+from app import metrics
+from app.bot.models import Trades
+
+# a queued write, ("insert", column values) or ("delete", symbol)
+Operation = Tuple[str, object]
+
+
+class TradeJournal:
+    """
+    Trade journal for the application
+
+    Inserts and deletes are queued and written by a background thread in one transaction per batch,
+    once `batch_size` writes are queued or `flush_interval` seconds passed. Reads merge the queued
+    writes over the database, so a worker always sees its own writes. Every queued write is flushed
+    when the journal is closed, at the latest when the interpreter exits.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        """
+        :param session_factory: The sessionmaker or scoped_session the reads and writes use
+        :param batch_size: The number of queued writes that triggers a flush, defaults to config.journal_batch_size
+        :param flush_interval: The longest a write stays queued in seconds, defaults to config.journal_flush_interval
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size or config.journal_batch_size
+        self.flush_interval = config.journal_flush_interval if flush_interval is None else flush_interval
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+        self._pending: List[Operation] = []
+        self._in_flight: List[Operation] = []
+        self._lock = Lock()
+        self._wakeup = Condition(self._lock)
+        self._flush_lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._stopped = False
+
+    @property
+    def pending(self) -> int:
+        """
+        It returns the number of writes not yet committed
+        """
+        return len(self._pending) + len(self._in_flight)
+
+    def start(self):
+        """
+        It starts the background flush thread and flushes the journal when the interpreter exits
+        """
+        self._stopped = False
+        self._thread = Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """
+        It stops the background thread and flushes every queued write
+        """
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _queue(self, operation: Operation):
+        with self._lock:
+            self._pending.append(operation)
+            full = len(self._pending) >= self.batch_size
+            if full:
+                self._wakeup.notify()
+        if full and self._thread is None:
+            self.flush()
+
+    def add(self, trade: Trades):
+        """
+        It queues the insert of a trade
+
+        :param trade: The trade to insert, it is not attached to any session
+        """
+        self._queue(("insert", {"symbol": trade.symbol, "order_id": str(trade.order_id), "price": trade.price, "quantity": trade.quantity}))
+
+    def delete_symbol(self, symbol: str):
+        """
+        It queues the delete of every trade of a symbol
+
+        :param symbol: The symbol of the trades
+        """
+        self._queue(("delete", symbol))
+
+    def _merge(self, trades: List[Trades], operations: List[Operation], symbol: Optional[str] = None) -> List[Trades]:
+        # replaying the writes over rows that already include some of them gives the same rows, since a
+        # delete drops the whole symbol and an insert is skipped if its order is already there
+        by_symbol: Dict[str, Dict[str, Trades]] = {}
+        for trade in trades:
+            by_symbol.setdefault(trade.symbol, {})[str(trade.order_id)] = trade
+        for kind, value in operations:
+            if kind == "delete":
+                by_symbol.pop(value, None)
+            elif symbol is None or value["symbol"] == symbol:
+                rows = by_symbol.setdefault(value["symbol"], {})
+                if value["order_id"] not in rows:
+                    rows[value["order_id"]] = Trades(**value)
+        return [trade for rows in by_symbol.values() for trade in rows.values()]
+
+    def _read(self, symbol: Optional[str]) -> List[Trades]:
+        with self._lock:
+            operations = self._in_flight + self._pending
+        session = self.session_factory()
+        try:
+            query = session.query(Trades)
+            trades = (query.filter_by(symbol=symbol) if symbol is not None else query).all()
+        finally:
+            # ends the read transaction, so the next read sees the latest commit
+            session.close()
+        return self._merge(trades, operations, symbol)
+
+    def get_trades(self, symbol: str) -> List[Trades]:
+        """
+        It returns the trades of a symbol, including the queued writes
+
+        :param symbol: The symbol of the trades
+        :return: A list of detached Trades objects.
+        """
+        return self._read(symbol)
+
+    def get_all_trades(self) -> List[Trades]:
+        """
+        It returns every trade, including the queued writes
+        """
+        return self._read(None)
+
+    def flush(self) -> int:
+        """
+        It writes every queued write in a single transaction
+
+        :return: The number of writes committed.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                operations, self._pending = self._pending, []
+                self._in_flight = operations
+
+            session = self.session_factory()
+            try:
+                inserts = []
+                for kind, value in operations:
+                    if kind == "insert":
+                        inserts.append(value)
+                        continue
+                    if inserts:
+                        session.bulk_insert_mappings(Trades, inserts)
+                        inserts = []
+                    session.query(Trades).filter_by(symbol=value).delete(synchronize_session=False)
+                if inserts:
+                    session.bulk_insert_mappings(Trades, inserts)
+                start = time.perf_counter()
+                session.commit()
+                metrics.db_commit_seconds.observe(time.perf_counter() - start)
+            except Exception as e:
+                session.rollback()
+                self.failures += 1
+                logging.error("Error flushing %s trade writes, retrying: %s", len(operations), (type(e).__name__, e))
+                with self._lock:
+                    self._pending = operations + self._pending
+                return 0
+            finally:
+                session.close()
+                with self._lock:
+                    self._in_flight = []
+
+            self.flushes += 1
+            self.written += len(operations)
+            return len(operations)
+
+    def _run(self):
+        flushed_at = time.monotonic()
+        while True:
+            with self._lock:
+                while not self._stopped and len(self._pending) < self.batch_size:
+                    timeout = flushed_at + self.flush_interval - time.monotonic()
+                    if timeout <= 0 and self._pending:
+                        break
+                    self._wakeup.wait(timeout if timeout > 0 else self.flush_interval)
+                if self._stopped:
+                    return
+            self.flush()
+            flushed_at = time.monotonic()
@@ -1,7 +1,7 @@
 """
 This module contains the models for the application
 """
-from sqlalchemy import Column, Integer, Text, Float
+from sqlalchemy import Column, Index, Integer, Text, Float
 from sqlalchemy.ext.declarative import declarative_base
 from app import engine
 
@@ -13,12 +13,17 @@ class Trades(Base):
     Trades model for the application
     """
     __tablename__ = 'trade'
+    # the trades are loaded and deleted by symbol and looked up by symbol and order
+    __table_args__ = (Index('ix_trade_symbol_order_id', 'symbol', 'order_id'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol = Column(Text)
+    symbol = Column(Text, nullable=False)
     price = Column(Float)
-    order_id = Column(Text)
+    order_id = Column(Text, nullable=False)
     quantity = Column(Float)
 
 
 Base.metadata.create_all(engine)
+# create_all skips existing tables, so the indexes of a database made before them are added here
+for index in Trades.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
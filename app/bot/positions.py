@@ -0,0 +1,124 @@
+"""
+This module contains the PositionIndex class which keeps the open trades in memory, keyed by symbol and order id
+"""
+
+
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+from app.bot.journal import TradeJournal
+from app.bot.models import Trades
+
+
+class PositionIndex:
+    """
+    Position index for the application
+
+    It is the authoritative copy of the open trades. It is loaded from the Trades table once, on first
+    use, and every change is applied in memory and then queued on the TradeJournal, so the lookups of
+    the trading loop run no SQL. The trades are detached Trades objects and must not be modified.
+    """
+
+    def __init__(self, journal: TradeJournal):
+        """
+        :param journal: The journal the changes are written through
+        """
+        self.journal = journal
+        self._by_symbol: Dict[str, Dict[str, Trades]] = {}
+        self._by_order: Dict[str, Trades] = {}
+        self._loaded = False
+        self._lock = Lock()
+
+    def load(self):
+        """
+        It replaces the index with the trades of the database and of the journal queue
+        """
+        trades = self.journal.get_all_trades()
+        with self._lock:
+            self._by_symbol, self._by_order = {}, {}
+            for trade in trades:
+                self._index(trade)
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _index(self, trade: Trades):
+        order_id = str(trade.order_id)
+        self._by_symbol.setdefault(trade.symbol, {})[order_id] = trade
+        self._by_order[order_id] = trade
+
+    def add(self, trade: Trades):
+        """
+        It adds a trade to the index and queues its insert
+
+        :param trade: The trade to add, it is not attached to any session
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._index(trade)
+        self.journal.add(trade)
+
+    def delete_symbol(self, symbol: str):
+        """
+        It removes every trade of a symbol from the index and queues their delete
+
+        :param symbol: The symbol of the trades
+        """
+        self._ensure_loaded()
+        with self._lock:
+            for order_id in self._by_symbol.pop(symbol, {}):
+                self._by_order.pop(order_id, None)
+        self.journal.delete_symbol(symbol)
+
+    def get_trades(self, symbol: str) -> List[Trades]:
+        """
+        It returns the open trades of a symbol
+
+        :param symbol: The symbol of the trades
+        :return: A list of Trades objects.
+        """
+        self._ensure_loaded()
+        trades = self._by_symbol.get(symbol)
+        return list(trades.values()) if trades else []
+
+    def get_trade(self, order_id) -> Optional[Trades]:
+        """
+        It returns the open trade of an order, or None
+
+        :param order_id: The orderId of the trade
+        """
+        self._ensure_loaded()
+        return self._by_order.get(str(order_id))
+
+    def has_position(self, symbol: str) -> bool:
+        """
+        It returns True if there is an open trade in the symbol
+        """
+        self._ensure_loaded()
+        return bool(self._by_symbol.get(symbol))
+
+    def symbols(self) -> Iterator[str]:
+        """
+        It iterates over the symbols with an open trade
+        """
+        self._ensure_loaded()
+        with self._lock:
+            symbols = [symbol for symbol, trades in self._by_symbol.items() if trades]
+        return iter(symbols)
+
+    def trades(self) -> List[Trades]:
+        """
+        It returns every open trade
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._by_order.values())
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._by_order)
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.has_position(symbol)
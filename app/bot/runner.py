@@ -3,21 +3,32 @@ import time
 import logging
 from typing import List, Optional
 
-from pydantic import BaseModel
 from config import Config as config
+from app import metrics
+from app.logger import RateLimitedLogger
+from app.bot.journal import TradeJournal
 from app.bot.models import Trades
-from app.binance.trade_api import TradeAPI, TickerData, Order, SymbolData, TradeApiFilters
+from app.bot.positions import PositionIndex
+from app.binance.quantize import SymbolQuantizer
+from app.binance.trade_api import TradeAPI, Order, Quote
+from app.bot.signals import SignalEngine, Signals
+from app.bot.indicators import IndicatorEngine
+from app.bot.strategy import (BuyPrice, is_buy_signal, is_window_buy_signal, calculate_buy_order, calculate_depth_buy_order,
+                              calculate_sell_prices, is_sell_signal)
 from concurrent.futures import ThreadPoolExecutor
 import sys
 from app import Session
 
-logging.basicConfig(filename='../../logs/app.log', encoding='utf-8', level=logging.DEBUG)
-
 # using pytest we need to test these functions, we have a mock fixture in app.binance.tests.mock_binance
 
 
 trade_api = TradeAPI(is_mock=True)
-db = Session()
+journal = TradeJournal(Session)
+positions = PositionIndex(journal)
+# the rolling windows of the symbols the bot checks, fed by the ticker snapshots and streams
+indicators = IndicatorEngine()
+# the messages every symbol logs on every cycle
+cycle_log = RateLimitedLogger(logging.getLogger(__name__))
 
 
 def handle_error(e):
@@ -29,16 +40,6 @@ def handle_error(e):
     logging.error(f'Error on line {sys.exc_info()[-1].tb_lineno}\n{type(e).__name__, e}')
 
 
-class BuyPrice(BaseModel):
-    """
-    Buy price model for the application
-    """
-
-    quantity: float
-    price: float
-    last_price: float
-
-
 class BuySellEnum(Enum):
     """
     BuySellEnum enum for the application
@@ -54,47 +55,29 @@ class PumpDumpBot:
     """
 
     @classmethod
-    def calculate_buy_price(cls, symbol: str) -> BuyPrice:
+    def calculate_buy_price(cls, symbol: str) -> Optional[BuyPrice]:
         """
         If the current price is less than or equal to the expected price with
         expected_increase_percent, and the price change is greater than expected_increase_percent,
+        or the price rose by trigger_change_percent over the trigger_window on a volume spike,
         and the symbol is not already in open orders, then calculate the minimum price
-        and quantity, calculate the final buy price using final_buy_price_change_percent,
-        and calculate the quantity to buy
+        and quantity, calculate the final buy price with buy_price_offset_percent,
+        or against the asks of the order book when the depth cache has it, and calculate
+        the quantity to buy
         :return: BuyPrice(quantity=quantity, price=final_buy_price, last_price=last_price)
         """
-
-        def _run_calculation(_last_price) -> BuyPrice:
-            """
-            Calculate the quantity and price to buy based on the last price and the symbol filters
-
-            :param _last_price: The last price of the symbol
-            :return: The quantity, price, and last_price are being returned.
-            """
-            # Calculate the minimum price and quantity
-            filters: TradeApiFilters = trade_api.get_symbol_filters(symbol)
-
-            # Calculate the final buy price using final_buy_price_change_percent
-            symbol_data: SymbolData = trade_api.get_symbol(symbol)
-            temp_price = _last_price * symbol_data.price / 100
-            final_buy_price = temp_price - (temp_price % float(filters.minPrice))
-
-            # Calculate the quantity to buy
-            temp_quantity = config.buy_quantity_btc / float(final_buy_price)
-            quantity = round((temp_quantity - (temp_quantity % float(filters.minQuantity))), 8)
-            return BuyPrice(quantity=quantity, price=final_buy_price, last_price=_last_price)
-
         # Get the current price and price change
-        price_action: TickerData = trade_api.get_ticker_info(symbol)
-        last_price = float(price_action.lastPrice)
-        price_change_percent = float(price_action.priceChangePercent)
+        quote: Quote = trade_api.get_quote(symbol)
+        window = indicators.window(symbol, config.trigger_window)
 
-        # Calculate the expected increase using expected_increase_percent
-        expected_increase = last_price * config.expected_change_buy / 100
-
-        if last_price <= expected_increase and price_change_percent > config.expected_change_buy:
-            # Check if the symbol is already in open orders
-            return _run_calculation(symbol)
+        if is_buy_signal(quote.last_price, quote.change_percent) or is_window_buy_signal(window):
+            metrics.signals.inc("BUY")
+            # Calculate the minimum price and quantity
+            quantizer: SymbolQuantizer = trade_api.get_symbol_quantizer(symbol)
+            depth = trade_api.get_depth(symbol)
+            if depth is not None:
+                return calculate_depth_buy_order(quote.last_price, depth, quantizer)
+            return calculate_buy_order(quote.last_price, quantizer)
 
     @classmethod
     def check_buy(cls, symbol):
@@ -104,33 +87,37 @@ class PumpDumpBot:
         :param cls: This is the class itself
         :param symbol: The symbol you want to buy
         """
-        logging.info("Looking for Buy Opportunities...")
+        cycle_log.debug("Looking for Buy Opportunities on %s", symbol, extra={"symbol": symbol})
 
-        # Get all the open orders from database
-        open_trade = db.session.query(Order).filter_by(symbol=symbol).first()
+        # Get the open trades of the symbol from the position index
+        open_trades = positions.get_trades(symbol)
+        open_trade = open_trades[0] if open_trades else None
         if open_trade and cls.check_order_status(symbol, BuySellEnum.BUY):
-            logging.info(f"Already have an open order for {symbol}, skipping...")
+            cycle_log.debug("Already have an open order for %s, skipping...", symbol, extra={"symbol": symbol})
             return
 
         # Get all open orders from the exchange
         open_orders: Optional[List[Order]] = trade_api.get_open_orders(symbol)
         if not open_orders and not open_trade:
             # Calculate the buy price
-            buy_data: BuyPrice = cls.calculate_buy_price(symbol)
+            buy_data: Optional[BuyPrice] = cls.calculate_buy_price(symbol)
+            if buy_data is None:
+                return
+            signal_at = time.perf_counter()
 
             # Place an order to buy
-            _order = trade_api.client.order_limit_buy(
+            _order = trade_api.order_limit_buy(
                 symbol=symbol,
-                recvWindow=1000,
-                quantity="{0:.3f}".format(float(buy_data.quantity)),
-                price="{0:.8f}".format(float(buy_data.price))
+                quantity=buy_data.order_quantity,
+                price=buy_data.order_price
             )
+            metrics.signal_to_ack_seconds.observe(time.perf_counter() - signal_at, "BUY")
 
-            logging.info(f"Buy {symbol} at {buy_data.price} from {buy_data.last_price}")
+            logging.info("Buy %s at %s from %s", symbol, buy_data.price, buy_data.last_price,
+                         extra={"symbol": symbol, "order_id": _order["orderId"]})
 
-            # Add the order to the database
-            db.add(Trades(pair=symbol, order_id=_order["orderId"]))
-            db.commit()
+            # Add the order to the positions, the journal writes it to the database behind the order path
+            positions.add(Trades(symbol=symbol, order_id=_order["orderId"], price=buy_data.price, quantity=buy_data.quantity))
 
     @classmethod
     def check_sell(cls, symbol: str):
@@ -142,36 +129,42 @@ class PumpDumpBot:
         :param symbol: The symbol of the coin you want to trade
         :type symbol: str
         """
-        logging.info("Looking for Sell Opportunities...")
+        cycle_log.debug("Looking for Sell Opportunities on %s", symbol, extra={"symbol": symbol})
 
-        # Get all the open orders from database
-        open_trades = db.query(Trades).filter_by(symbol=symbol).all()
+        # Get the open trades of the symbol from the position index
+        open_trades = positions.get_trades(symbol)
         order_status = cls.check_order_status(symbol, BuySellEnum.SELL)
 
         # Check if the symbol is already in open orders
         if open_trades and order_status:
-            logging.info(f"Already have an open sell order for {symbol}, skipping...")
+            cycle_log.debug("Already have an open sell order for %s, skipping...", symbol, extra={"symbol": symbol})
             return
 
         # Get the latest price action for the symbol
-        price_action: TickerData = trade_api.get_ticker_info(symbol)
+        quote: Quote = trade_api.get_quote(symbol)
         open_orders: List[Order] = trade_api.get_open_orders(symbol)
+        quantizer: SymbolQuantizer = trade_api.get_symbol_quantizer(symbol)
+        depth = trade_api.get_depth(symbol)
 
         # Check if the current price is greater than the price of the order by the expected change
         for order in open_orders:
-            last_price = float(price_action.lastPrice)
+            # with an order book, the price the quantity actually sells at
+            last_price, sell_price = calculate_sell_prices(quote.last_price, float(order.executedQty), depth)
 
             # Check if the current price is greater than the price of the order by the expected change
-            if last_price >= float(order.price) * (1 + config.expected_change_sell / 100):
-                logging.info(f"sell on {order.symbol} at {order.price}, current price is {last_price}")
+            if is_sell_signal(last_price, float(order.price)):
+                metrics.signals.inc("SELL")
+                signal_at = time.perf_counter()
+                logging.info("sell on %s at %s, current price is %s", order.symbol, order.price, last_price,
+                             extra={"symbol": order.symbol, "order_id": order.orderId})
 
                 # Place an order to sell
-                _order = trade_api.client.order_limit_sell(
+                _order = trade_api.order_limit_sell(
                     symbol=order.symbol,
-                    recvWindow=10000,
-                    quantity="{0:.2f}".format(float(order.executedQty)),
-                    price="{0:.8f}".format(last_price),
+                    quantity=quantizer.format_quantity(order.executedQty),
+                    price=quantizer.format_price(sell_price),
                 )
+                metrics.signal_to_ack_seconds.observe(time.perf_counter() - signal_at, "SELL")
 
     @classmethod
     def check_order_status(cls, symbol: str, side: BuySellEnum):
@@ -185,43 +178,90 @@ class PumpDumpBot:
         :type side: str
         """
         try:
-            logging.info("Checking status...")
+            cycle_log.debug("Checking status of %s", symbol, extra={"symbol": symbol})
 
-            # Get all the open orders from database
-            open_orders = db.query(Trades).filter_by(symbol=symbol).all()
+            # Get the open trades of the symbol from the position index
+            open_trades = positions.get_trades(symbol)
 
             # Check if the symbol is already in open orders
-            for order in open_orders:
-                order: Order = trade_api.get_order(symbol=order.symbol, order_id=order.orderId)
+            for trade in open_trades:
+                order: Order = trade_api.get_order(symbol=trade.symbol, order_id=trade.order_id)
 
                 # Check if the order has been filled
                 if order.status == "FILLED":
-                    logging.info(f"Order {order.symbol} {order.status}")
+                    logging.info("Order %s %s", order.symbol, order.status, extra={"symbol": order.symbol, "order_id": order.orderId})
 
                     # Delete the order from the database
                     if side == BuySellEnum.SELL:
-                        db.query(Trades).filter_by(pair=order.symbol).delete()
-                        db.commit()
-                        logging.info(f"Deleted {order.symbol} from database")
+                        positions.delete_symbol(order.symbol)
+                        logging.info("Deleted %s from database", order.symbol, extra={"symbol": order.symbol})
                         return True
-                logging.info(f"{order.symbol} Not FILLED yet...")
+                cycle_log.debug("%s Not FILLED yet...", order.symbol, extra={"symbol": order.symbol, "order_id": order.orderId})
         except Exception as e:
             handle_error(e)
 
     @classmethod
-    def run_loop(cls, symbol: str):
+    def has_open_position(cls, symbol: str) -> bool:
         """
-        It loops through the symbols in the config file and checks if the conditions for buying are met
+        It returns True if we hold a trade in the symbol
+
+        :param symbol: The symbol of the asset
+        """
+        return positions.has_position(symbol)
+
+    @classmethod
+    def check_symbol(cls, symbol: str):
+        """
+        It checks a symbol once for buy and sell opportunities, handling exceptions
 
         :param cls: the class that the method is in
         :param symbol: The symbol of the asset you want to trade
         """
-        while True:
+        try:
+            cls.check_buy(symbol)
+            cls.check_sell(symbol)
+        except Exception as e:
+            handle_error(e)
+
+    @classmethod
+    def scan(cls, engine: SignalEngine) -> Signals:
+        """
+        It evaluates the signals of every symbol of the engine in one pass over the ticker snapshot,
+        and only checks the symbols with a buy or sell signal
+
+        :param cls: the class that the method is in
+        :param engine: The signal engine holding the symbol universe
+        :return: The Signals of the pass.
+        """
+        # the lowest trade price of a symbol, so it signals as soon as any of its trades can be sold
+        entries = {}
+        for trade in positions.trades():
+            entries[trade.symbol] = min(trade.price, entries.get(trade.symbol, trade.price))
+        engine.set_entries(entries)
+
+        signals = engine.evaluate(trade_api.get_ticker_snapshot())
+        for symbol in signals.buy_symbols():
             try:
                 cls.check_buy(symbol)
+            except Exception as e:
+                handle_error(e)
+        for symbol in signals.sell_symbols():
+            try:
                 cls.check_sell(symbol)
             except Exception as e:
                 handle_error(e)
+        return signals
+
+    @classmethod
+    def run_loop(cls, symbol: str):
+        """
+        It loops through the symbols in the config file and checks if the conditions for buying are met
+
+        :param cls: the class that the method is in
+        :param symbol: The symbol of the asset you want to trade
+        """
+        while True:
+            cls.check_symbol(symbol)
             time.sleep(config.wait_time)
 
 
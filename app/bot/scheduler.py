@@ -0,0 +1,308 @@
+"""
+This module contains the SymbolScheduler class which dispatches symbol evaluations to a fixed size
+worker pool, checking hot symbols more often than cold ones
+"""
+
+
+import heapq
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from config import Config as config
+from app import metrics
+from app.bot.runner import handle_error
+
+
+class SchedulerStats(BaseModel):
+    """
+    Scheduler stats model for the application
+    """
+    symbols: int
+    in_flight: int
+    ticks: int
+    ticks_per_symbol: Dict[str, int]
+    intervals: Dict[str, float]
+    lag_last: float
+    lag_max: float
+    lag_avg: float
+    budget_scale: float
+
+
+class TickerHeat:
+    """
+    Ticker heat for the application
+
+    It scores a symbol between 0 (cold) and 1 (hot) from its price change, a spike of the volume traded
+    since its last score over an exponential moving average, and whether we hold a position in it.
+    """
+
+    def __init__(self, trade_api, has_position: Callable[[str], bool], smoothing: float = 0.1):
+        """
+        :param trade_api: The trade api used to read the ticker snapshot
+        :param has_position: A callable returning True if we hold a position in a symbol
+        :param smoothing: The weight of a new volume in the volume moving average
+        """
+        self.trade_api = trade_api
+        self.has_position = has_position
+        self.smoothing = smoothing
+        self._volumes: Dict[str, float] = {}
+        self._volume_baselines: Dict[str, float] = {}
+
+    def __call__(self, symbol: str) -> float:
+        if self.has_position(symbol):
+            return 1.0
+        quote = self.trade_api.get_quote(symbol)
+        if quote is None:
+            return 0.0
+
+        change = min(abs(quote.change_percent) / config.hot_change_percent, 1.0)
+
+        # the ticker volume is a rolling 24 hour total, the volume of an interval is its change
+        previous = self._volumes.get(symbol)
+        self._volumes[symbol] = quote.volume
+        spike = 0.0
+        if previous is not None:
+            volume = max(quote.volume - previous, 0.0)
+            baseline = self._volume_baselines.get(symbol, volume)
+            self._volume_baselines[symbol] = baseline + self.smoothing * (volume - baseline)
+            if baseline > 0:
+                spike = min(max(volume / baseline - 1, 0.0) / (config.hot_volume_ratio - 1), 1.0)
+        return max(change, spike)
+
+
+class SymbolScheduler:
+    """
+    Symbol scheduler for the application
+
+    It owns the symbol universe and keeps a heap of the time each symbol is due. A due symbol is
+    evaluated on the worker pool and rescheduled once its evaluation finished, so a symbol is never
+    evaluated twice at the same time. The interval of a symbol goes from cold_interval at heat 0
+    to hot_interval at heat 1, and all intervals are stretched when their total rate would exceed
+    max_ticks_per_second.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[str], None],
+        heat: Optional[Callable[[str], float]] = None,
+        symbols: Iterable[str] = (),
+        workers: Optional[int] = None,
+        hot_interval: Optional[float] = None,
+        cold_interval: Optional[float] = None,
+        max_ticks_per_second: Optional[float] = None,
+        rescore_interval: Optional[float] = None,
+    ):
+        """
+        :param evaluate: The callable evaluating a symbol, e.g. PumpDumpBot.check_symbol
+        :param heat: A callable scoring a symbol between 0 and 1, every symbol is cold if not given
+        :param symbols: The initial symbol universe
+        :param workers: The size of the worker pool, defaults to config.scheduler_workers
+        :param hot_interval: The seconds between evaluations of a symbol with heat 1
+        :param cold_interval: The seconds between evaluations of a symbol with heat 0
+        :param max_ticks_per_second: The global evaluation budget
+        :param rescore_interval: The seconds between heat rescoring of the universe
+        """
+        self.evaluate = evaluate
+        self.heat = heat or (lambda symbol: 0.0)
+        self.workers = workers or config.scheduler_workers
+        self.hot_interval = hot_interval or config.hot_interval
+        self.cold_interval = cold_interval or config.cold_interval
+        self.max_ticks_per_second = max_ticks_per_second or config.max_ticks_per_second
+        self.rescore_interval = rescore_interval or config.rescore_interval
+
+        self.tick_counts: Dict[str, int] = defaultdict(int)
+        self.lag_last = self.lag_max = self.lag_total = 0.0
+        self.dispatched = 0
+        self.budget_scale = 1.0
+
+        self._symbols: Set[str] = set()
+        self._heats: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due: Dict[str, float] = {}
+        self._sequence = 0
+        self._in_flight: Set[str] = set()
+        self._rescored_at: Optional[float] = None
+        self._condition = Condition()
+        self._stopped = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[Thread] = None
+
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns the current symbol universe
+        """
+        return sorted(self._symbols)
+
+    def _push(self, symbol: str, due: float):
+        # the latest due time of a symbol wins, older heap entries are skipped when popped
+        self._due[symbol] = due
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, symbol))
+        self._condition.notify()
+
+    def add_symbol(self, symbol: str):
+        """
+        It adds a symbol to the universe, due immediately
+
+        :param symbol: The symbol to add
+        """
+        with self._condition:
+            if symbol in self._symbols:
+                return
+            self._symbols.add(symbol)
+            self._intervals[symbol] = self.cold_interval * self.budget_scale
+            self._push(symbol, time.monotonic())
+
+    def remove_symbol(self, symbol: str):
+        """
+        It removes a symbol from the universe, a running evaluation is allowed to finish
+
+        :param symbol: The symbol to remove
+        """
+        with self._condition:
+            self._symbols.discard(symbol)
+            self._due.pop(symbol, None)
+            self._heats.pop(symbol, None)
+            self._intervals.pop(symbol, None)
+
+    def interval_for(self, heat: float) -> float:
+        """
+        It returns the interval between evaluations for a given heat, before the budget is applied
+        """
+        heat = min(max(heat, 0.0), 1.0)
+        return self.cold_interval - heat * (self.cold_interval - self.hot_interval)
+
+    def rescore(self):
+        """
+        It scores the heat of every symbol and recomputes the intervals within the budget
+        """
+        heats = {}
+        for symbol in self.symbols:
+            try:
+                heats[symbol] = self.heat(symbol)
+            except Exception as e:
+                handle_error(e)
+                heats[symbol] = 0.0
+
+        intervals = {symbol: self.interval_for(heat) for symbol, heat in heats.items()}
+        rate = sum(1 / interval for interval in intervals.values())
+        budget_scale = max(rate / self.max_ticks_per_second, 1.0)
+
+        with self._condition:
+            self.budget_scale = budget_scale
+            for symbol in self._symbols & heats.keys():
+                previous = self._intervals[symbol]
+                self._heats[symbol] = heats[symbol]
+                self._intervals[symbol] = intervals[symbol] * budget_scale
+                # a symbol that just turned hot should not wait out its cold interval
+                due = self._due.get(symbol)
+                if due is not None and symbol not in self._in_flight:
+                    hot_due = due - previous + self._intervals[symbol]
+                    if hot_due < due:
+                        self._push(symbol, hot_due)
+            self._rescored_at = time.monotonic()
+
+    def stats(self) -> SchedulerStats:
+        """
+        It returns the tick counts, intervals and loop lag of the scheduler
+        """
+        with self._condition:
+            return SchedulerStats(
+                symbols=len(self._symbols),
+                in_flight=len(self._in_flight),
+                ticks=sum(self.tick_counts.values()),
+                ticks_per_symbol=dict(self.tick_counts),
+                intervals=dict(self._intervals),
+                lag_last=self.lag_last,
+                lag_max=self.lag_max,
+                lag_avg=self.lag_total / self.dispatched if self.dispatched else 0.0,
+                budget_scale=self.budget_scale,
+            )
+
+    def _tick(self, symbol: str):
+        """
+        It evaluates a symbol on a worker and schedules its next evaluation
+        """
+        start = time.perf_counter()
+        try:
+            self.evaluate(symbol)
+        except Exception as e:
+            handle_error(e)
+        finally:
+            metrics.cycle_seconds.observe(time.perf_counter() - start, symbol)
+            with self._condition:
+                self._in_flight.discard(symbol)
+                self.tick_counts[symbol] += 1
+                if symbol in self._symbols:
+                    self._push(symbol, time.monotonic() + self._intervals[symbol])
+
+    def run_once(self) -> float:
+        """
+        It dispatches every due symbol a worker is free for
+
+        :return: The number of seconds until the next symbol is due.
+        """
+        if self._rescored_at is None or time.monotonic() - self._rescored_at >= self.rescore_interval:
+            self.rescore()
+
+        with self._condition:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now and len(self._in_flight) < self.workers:
+                due, _, symbol = heapq.heappop(self._heap)
+                # skip removed symbols and the stale entry of a symbol rescheduled by rescore
+                if self._due.get(symbol) != due or symbol in self._in_flight:
+                    continue
+                lag = now - due
+                self.lag_last, self.lag_max = lag, max(self.lag_max, lag)
+                self.lag_total += lag
+                metrics.scheduling_lag_seconds.observe(lag)
+                self.dispatched += 1
+                self._in_flight.add(symbol)
+                self._executor.submit(self._tick, symbol)
+
+            if len(self._in_flight) >= self.workers or not self._heap:
+                return self.rescore_interval
+            return min(max(self._heap[0][0] - now, 0.0), self.rescore_interval)
+
+    def run(self):
+        """
+        It dispatches symbols until the scheduler is stopped
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="symbol-worker") as self._executor:
+            while not self._stopped:
+                wait = self.run_once()
+                with self._condition:
+                    if not self._stopped:
+                        self._condition.wait(wait)
+        logging.info("Scheduler stopped")
+
+    def start(self):
+        """
+        It runs the scheduler on a daemon thread
+        """
+        self._stopped = False
+        self._thread = Thread(target=self.run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        It stops dispatching and waits for running evaluations to finish
+
+        :param timeout: The number of seconds to wait for the scheduler thread
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,211 @@
+"""
+This module contains the MarketScreener class which ranks every symbol of the exchange from one ticker snapshot
+and keeps the scheduler on the top candidates, so the bot is not limited to the symbols listed in advance
+"""
+
+
+import logging
+import time
+from threading import Event, Thread
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import Config as config
+from app import metrics
+from app.bot.runner import handle_error
+from app.binance.trade_api import TickerBook
+
+
+class Candidate(NamedTuple):
+    """
+    A symbol ranked by the screener
+    """
+
+    symbol: str
+    score: float
+    change_percent: float
+    recent_change_percent: float
+    volume_ratio: float
+    quote_volume: float
+
+
+def z_scores(values: np.ndarray) -> np.ndarray:
+    """
+    It returns the z-scores of values across the market, NaN for the missing values and 0 without any spread
+    """
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.full(values.shape, np.nan)
+    mean, standard_deviation = values[finite].mean(), values[finite].std()
+    if standard_deviation == 0:
+        return np.where(finite, 0.0, np.nan)
+    return np.where(finite, (values - mean) / standard_deviation, np.nan)
+
+
+class MarketScreener:
+    """
+    Market screener for the application
+
+    The universe is every symbol in TRADING status quoted in quote_asset, read from the cached
+    exchange info and rebuilt when it reloads. Each rank reads the last price, 24 hour change,
+    volume and average price of the whole universe from one ticker snapshot into NumPy arrays. A
+    symbol is scored by the sum of its z-scores across the market of the 24 hour change, the change
+    since the previous rank and the log of its volume since the previous rank over the moving average
+of that volume. The symbols below
+    min_quote_volume are left out and the top_k best are the candidates.
+    """
+
+    def __init__(
+        self,
+        trade_api,
+        pinned: Iterable[str] = (),
+        quote_asset: Optional[str] = None,
+        min_quote_volume: Optional[float] = None,
+        top_k: Optional[int] = None,
+        interval: Optional[float] = None,
+        smoothing: float = 0.1,
+    ):
+        """
+        :param trade_api: The trade api used to read the exchange info and the ticker snapshot
+        :param pinned: The symbols that are always checked, e.g. config.symbols
+        :param quote_asset: The quote asset of the universe, defaults to config.screener_quote_asset
+        :param min_quote_volume: The lowest 24 hour quote volume of a candidate, defaults to config.screener_min_quote_volume
+        :param top_k: The number of candidates, defaults to config.screener_top_k
+        :param interval: The seconds between two ranks, defaults to config.screener_interval
+        :param smoothing: The weight of a new volume in the volume moving average
+        """
+        self.trade_api = trade_api
+        self.pinned = set(pinned or ())
+        self.quote_asset = quote_asset or config.screener_quote_asset
+        self.min_quote_volume = config.screener_min_quote_volume if min_quote_volume is None else min_quote_volume
+        self.top_k = top_k or config.screener_top_k
+        self.interval = interval or config.screener_interval
+        self.smoothing = smoothing
+        self.candidates: List[Candidate] = []
+        self.ranks = 0
+        self._symbols: List[str] = []
+        self._loads: Optional[int] = None
+        self._last_price = np.empty(0)
+        self._volume = np.empty(0)
+        self._volume_baseline = np.empty(0)
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns the universe of the last rank
+        """
+        return list(self._symbols)
+
+    def _refresh_universe(self):
+        """
+        It rebuilds the universe after the exchange info reloaded, keeping the history of the symbols still in it
+        """
+        cache = self.trade_api.filter_cache
+        if not cache.is_expired and cache.loads == self._loads:
+            return
+        symbols = cache.get_tradable_symbols(self.quote_asset)
+        previous = {symbol: i for i, symbol in enumerate(self._symbols)}
+        index = np.array([previous.get(symbol, -1) for symbol in symbols], dtype=int)
+        known = index >= 0
+        last_price, volume, volume_baseline = (np.full(len(symbols), np.nan) for _ in range(3))
+        last_price[known] = self._last_price[index[known]]
+        volume[known] = self._volume[index[known]]
+        volume_baseline[known] = self._volume_baseline[index[known]]
+        self._symbols, self._last_price, self._volume, self._volume_baseline = symbols, last_price, volume, volume_baseline
+        self._loads = cache.loads
+
+    def rank(self, book: Optional[TickerBook] = None) -> List[Candidate]:
+        """
+        It ranks the universe and returns the top candidates, best first
+
+        :param book: The ticker snapshot to rank, defaults to the snapshot of the trade api
+        :return: A list of Candidate objects.
+        """
+        start = time.perf_counter()
+        self._refresh_universe()
+        book = self.trade_api.get_ticker_snapshot() if book is None else book
+        symbols = self._symbols
+        last_price = np.array(book.get_fields(symbols, "lastPrice"), dtype=float)
+        change = np.array(book.get_fields(symbols, "priceChangePercent"), dtype=float)
+        volume = np.array(book.get_fields(symbols, "volume"), dtype=float)
+        quote_volume = volume * np.array(book.get_fields(symbols, "weightedAvgPrice"), dtype=float)
+
+        # the ticker volume is a rolling 24 hour total, the volume of an interval is its change
+        interval_volume = np.maximum(volume - self._volume, 0.0)
+        baseline = np.where(np.isnan(self._volume_baseline), interval_volume, self._volume_baseline)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recent = (last_price / self._last_price - 1) * 100
+            volume_ratio = np.where(baseline > 0, interval_volume / baseline, np.nan)
+            log_volume_ratio = np.log(np.where(volume_ratio > 0, volume_ratio, np.nan))
+        # a symbol without history yet scores as the average on the change since the last rank and its volume
+        score = z_scores(change) + np.nan_to_num(z_scores(recent)) + np.nan_to_num(z_scores(log_volume_ratio))
+        eligible = np.flatnonzero(np.isfinite(score) & (quote_volume >= self.min_quote_volume))
+        if len(eligible) > self.top_k:
+            eligible = eligible[np.argpartition(-score[eligible], self.top_k - 1)[:self.top_k]]
+        eligible = eligible[np.argsort(-score[eligible], kind="stable")]
+        self.candidates = [
+            Candidate(symbol=symbols[i], score=float(score[i]), change_percent=float(change[i]), recent_change_percent=float(recent[i]),
+                      volume_ratio=float(volume_ratio[i]), quote_volume=float(quote_volume[i]))
+            for i in eligible
+        ]
+
+        self._last_price = np.where(np.isnan(last_price), self._last_price, last_price)
+        self._volume = np.where(np.isnan(volume), self._volume, volume)
+        self._volume_baseline = np.where(np.isnan(interval_volume), self._volume_baseline,
+                                         baseline + self.smoothing * (interval_volume - baseline))
+        self.ranks += 1
+        metrics.screen_seconds.observe(time.perf_counter() - start)
+        return self.candidates
+
+    def apply(self, scheduler, keep: Optional[Callable[[str], bool]] = None) -> Tuple[List[str], List[str]]:
+        """
+        It adds the candidates and pinned symbols to a SymbolScheduler and removes the symbols that left them
+
+        :param scheduler: The scheduler whose universe is updated
+        :param keep: A callable returning True for a symbol that must stay, e.g. PumpDumpBot.has_open_position
+        :return: The added and the removed symbols.
+        """
+        active = {candidate.symbol for candidate in self.candidates} | self.pinned
+        current = set(scheduler.symbols)
+        added = sorted(active - current)
+        removed = sorted(symbol for symbol in current - active if keep is None or not keep(symbol))
+        for symbol in added:
+            scheduler.add_symbol(symbol)
+        for symbol in removed:
+            scheduler.remove_symbol(symbol)
+        if added or removed:
+            logging.info("Screener added %s and removed %s", ", ".join(added) or "no symbols", ", ".join(removed) or "no symbols")
+        return added, removed
+
+    def run(self, scheduler, keep: Optional[Callable[[str], bool]] = None):
+        """
+        It ranks the market and updates the scheduler every interval until the screener is stopped
+        """
+        while not self._stopped.is_set():
+            try:
+                self.rank()
+                self.apply(scheduler, keep)
+            except Exception as e:
+                handle_error(e)
+            self._stopped.wait(self.interval)
+
+    def start(self, scheduler, keep: Optional[Callable[[str], bool]] = None):
+        """
+        It runs the screener on a daemon thread
+        """
+        self._stopped.clear()
+        self._thread = Thread(target=self.run, args=(scheduler, keep), name="screener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        It stops the screener and waits for its thread
+
+        :param timeout: The number of seconds to wait for the thread
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,267 @@
+"""
+This module contains the ShardSupervisor class which runs the bot as several processes, each trading a shard of
+the symbols, fed by a single ticker feeder process through a SharedTickerBook
+"""
+
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional, Union
+
+from config import Config as config
+from app import metrics
+from app.binance.depth_cache import DepthCache
+from app.binance.fast_json import FastJsonClient
+from app.binance.market_stream import MarketDataStream
+from app.binance.order_tracker import OrderTracker, UserDataStream
+from app.binance.rate_governor import GovernedClient, RateGovernor
+from app.binance.shared_book import SharedTickerBook
+from app.binance.trade_api import TradeAPI
+from app.bot import runner
+from app.bot.runner import PumpDumpBot, handle_error, indicators, journal, positions
+from app.bot.scheduler import SymbolScheduler, TickerHeat
+from app.logger import setup_logging
+
+# the part of the request weight of the IP the feeder may use, the shards share the rest
+FEEDER_WEIGHT_SHARE = 0.5
+
+# spawned processes start from a fresh interpreter, without the threads and locks of the supervisor
+context = multiprocessing.get_context("spawn")
+
+
+def partition(symbols: List[str], shards: int) -> List[List[str]]:
+    """
+    It splits the symbols into shards of sizes that differ by one at most, keeping their order
+
+    :param symbols: The symbols to split
+    :param shards: The number of shards
+    :return: A list of shards.
+    """
+    return [symbols[i::shards] for i in range(shards)]
+
+
+def process_log_file(name: str) -> str:
+    """
+    It returns the log file of a process of the sharded bot, e.g. logs/run.shard-0.log
+    """
+    base, extension = os.path.splitext(config.log_file)
+    return f"{base}.{name}{extension}"
+
+
+def _exit_on_sigterm():
+    # exit through the finally blocks on SIGTERM, so the queued trades are written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def _sample_indicators(book: SharedTickerBook, stopped: Event):
+    # a shard fetches no tickers, so its rolling windows sample the shared book
+    while not stopped.wait(config.indicator_resolution):
+        try:
+            indicators.update_book(book)
+        except Exception as e:
+            handle_error(e)
+
+
+def run_feeder(book_name: str, symbols: List[str]):
+    """
+    It keeps the shared ticker book up to date, from the market data stream when config.use_market_stream
+    is set and from a REST snapshot every config.ticker_max_age seconds otherwise
+
+    :param book_name: The name of the shared ticker book
+    :param symbols: The symbols the book was created with
+    """
+    setup_logging(process_log_file("feeder"))
+    _exit_on_sigterm()
+    book = SharedTickerBook.attach(book_name, symbols)
+    book.recover()
+    governor = RateGovernor()
+    governor.share(FEEDER_WEIGHT_SHARE)
+    client = GovernedClient(FastJsonClient(config.api_key, config.api_secret), governor)
+    try:
+        if config.use_market_stream:
+            stream = MarketDataStream(book, symbols, snapshot=client.get_ticker)
+            stream.start()
+            while True:
+                time.sleep(1)
+        while True:
+            start = time.monotonic()
+            try:
+                book.seed(client.get_ticker())
+            except Exception as e:
+                handle_error(e)
+            time.sleep(max(config.ticker_max_age - (time.monotonic() - start), 0.0))
+    finally:
+        book.close()
+
+
+def run_shard(index: int, shards: int, symbols: List[str], book_name: str, book_symbols: List[str]):
+    """
+    It runs PumpDumpBot over the symbols of a shard, reading the prices from the shared ticker book
+
+    :param index: The index of the shard
+    :param shards: The number of shards
+    :param symbols: The symbols of the shard
+    :param book_name: The name of the shared ticker book
+    :param book_symbols: The symbols the book was created with
+    """
+    setup_logging(process_log_file(f"shard-{index}"))
+    _exit_on_sigterm()
+    book = SharedTickerBook.attach(book_name, book_symbols)
+    # every shard trades over its own clients, within its part of the limits of the IP and account
+    governor = RateGovernor()
+    governor.share((1 - FEEDER_WEIGHT_SHARE) / shards)
+    trade_api = runner.trade_api = TradeAPI(governor=governor, api_url=config.api_url)
+    trade_api.live_book = book
+    stopped = Event()
+    Thread(target=_sample_indicators, args=(book, stopped), name="indicators", daemon=True).start()
+
+    if config.use_user_stream:
+        user_stream = UserDataStream(OrderTracker(), trade_api.client)
+        user_stream.start()
+        trade_api.order_tracker = user_stream.tracker
+
+    if config.use_depth_stream:
+        # every shard keeps the order books of its own symbols
+        depth_cache = DepthCache(symbols, trade_api.client.get_order_book)
+        depth_cache.start()
+        trade_api.depth_cache = depth_cache
+
+    journal.start()
+    positions.load()
+    if config.metrics_port:
+        metrics.serve(config.metrics_port + 1 + index)
+    if config.metrics_summary_interval:
+        metrics.log_summary(config.metrics_summary_interval)
+
+    heat = TickerHeat(trade_api, PumpDumpBot.has_open_position)
+    scheduler = SymbolScheduler(PumpDumpBot.check_symbol, heat, symbols, max_ticks_per_second=config.max_ticks_per_second / shards)
+    try:
+        scheduler.run()
+    finally:
+        stopped.set()
+        journal.close()
+        book.close()
+
+
+class ShardSupervisor:
+    """
+    Shard supervisor for the application
+
+    It creates the shared ticker book of the symbols, starts the feeder process that writes it and a
+    process for every shard of the symbols, and restarts any of them that exits. A process that
+    exits again soon after a restart waits twice as long before the next one, up to
+    max_restart_delay.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        shards: Optional[int] = None,
+        restart_delay: Optional[float] = None,
+        max_restart_delay: float = 60.0,
+        shard_target: Callable = run_shard,
+        feeder_target: Callable = run_feeder,
+    ):
+        """
+        :param symbols: The symbols of the bot
+        :param shards: The number of shard processes, defaults to config.shards
+        :param restart_delay: The seconds before restarting a process, defaults to config.shard_restart_delay
+        :param max_restart_delay: The longest delay before restarting a process that keeps exiting
+        :param shard_target: The function a shard process runs, with the arguments of run_shard
+        :param feeder_target: The function the feeder process runs, with the arguments of run_feeder
+        """
+        self.symbols = list(symbols)
+        self.shards = partition(self.symbols, shards or config.shards)
+        self.restart_delay = config.shard_restart_delay if restart_delay is None else restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.shard_target = shard_target
+        self.feeder_target = feeder_target
+        self.book: Optional[SharedTickerBook] = None
+        self.processes: Dict[Union[int, str], multiprocessing.Process] = {}
+        self.restarts: Dict[Union[int, str], int] = {}
+        self._started_at: Dict[Union[int, str], float] = {}
+        self._delays: Dict[Union[int, str], float] = {}
+        self._restart_at: Dict[Union[int, str], float] = {}
+        self._stopped = False
+
+    def _start(self, key: Union[int, str]):
+        if key == "feeder":
+            process = context.Process(target=self.feeder_target, args=(self.book.name, self.symbols), name="ticker-feeder", daemon=True)
+        else:
+            process = context.Process(target=self.shard_target, args=(key, len(self.shards), self.shards[key], self.book.name, self.symbols),
+                                      name=f"shard-{key}", daemon=True)
+        process.start()
+        self.processes[key] = process
+        self._started_at[key] = time.monotonic()
+
+    def start(self):
+        """
+        It creates the shared ticker book, unless one was set, and starts the feeder and shard processes
+        """
+        if self.book is None:
+            self.book = SharedTickerBook.create(self.symbols)
+        self._start("feeder")
+        self.restarts["feeder"] = 0
+        for index in range(len(self.shards)):
+            self._start(index)
+            self.restarts[index] = 0
+        logging.info("Started %s shards of %s symbols", len(self.shards), len(self.symbols))
+
+    def check(self):
+        """
+        It schedules the restart of the processes that exited and restarts the ones that are due
+        """
+        now = time.monotonic()
+        for key, process in list(self.processes.items()):
+            if process.is_alive() or self._stopped:
+                continue
+            if key not in self._restart_at:
+                delay = self._delays.get(key)
+                if delay is None or now - self._started_at[key] >= self.max_restart_delay:
+                    delay = self.restart_delay
+                else:
+                    delay = min(max(delay * 2, self.restart_delay), self.max_restart_delay)
+                self._delays[key] = delay
+                self._restart_at[key] = now + delay
+                logging.error("%s exited with code %s, restarting in %.1fs", process.name, process.exitcode, delay)
+            elif now >= self._restart_at[key]:
+                del self._restart_at[key]
+                self.restarts[key] += 1
+                self._start(key)
+
+    def run(self, interval: float = 1.0):
+        """
+        It starts the processes and supervises them until it is stopped, e.g. by a KeyboardInterrupt
+
+        :param interval: The seconds between two checks
+        """
+        self.start()
+        try:
+            while not self._stopped:
+                self.check()
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        It terminates the processes, waits for them to write their trades and frees the shared ticker book
+
+        :param timeout: The number of seconds to wait for each process
+        """
+        self._stopped = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+        if self.book is not None:
+            self.book.close()
+            self.book = None
@@ -0,0 +1,165 @@
+"""
+This module contains the SignalEngine class which evaluates the buy and sell signals of every symbol
+in one vectorized pass
+"""
+
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from config import Config as config
+from app.binance.quantize import FLOAT_TOLERANCE, SCALE, SymbolQuantizer
+from app.binance.trade_api import TickerBook, TradeApiFilters
+
+
+class Signals(NamedTuple):
+    """
+    Buy and sell decisions of a SignalEngine pass, indexed like `symbols`
+    """
+
+    symbols: List[str]
+    buy: np.ndarray
+    sell: np.ndarray
+    buy_price: np.ndarray
+    sell_price: np.ndarray
+
+    def buy_symbols(self) -> List[str]:
+        """
+        It returns the symbols with a buy signal
+        """
+        return [self.symbols[i] for i in np.flatnonzero(self.buy)]
+
+    def sell_symbols(self) -> List[str]:
+        """
+        It returns the symbols with a sell signal
+        """
+        return [self.symbols[i] for i in np.flatnonzero(self.sell)]
+
+
+class SignalEngine:
+    """
+    Signal engine for the application
+
+    It holds the last price, price change, entry price, tick size and thresholds of every symbol in
+    NumPy arrays and computes the buy and sell signals of the whole universe at once. The decisions are
+    the same as is_buy_signal, calculate_buy_order and is_sell_signal in strategy.py, which remain the
+    per-symbol reference. Missing values are NaN and never signal.
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), expected_change_buy: Optional[float] = None,
+                 expected_change_sell: Optional[float] = None, price_offset_percent: Optional[float] = None):
+        """
+        :param symbols: The symbols to evaluate
+        :param expected_change_buy: The default buy threshold in percent, defaults to config.expected_change_buy
+        :param expected_change_sell: The default sell threshold in percent, defaults to config.expected_change_sell
+        :param price_offset_percent: The percent above the last price buys are placed at, defaults to config.buy_price_offset_percent
+        """
+        self.expected_change_buy = float(config.expected_change_buy if expected_change_buy is None else expected_change_buy)
+        self.expected_change_sell = float(config.expected_change_sell if expected_change_sell is None else expected_change_sell)
+        self.price_offset_percent = float(config.buy_price_offset_percent if price_offset_percent is None else price_offset_percent)
+        self._symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.last_price = np.empty(0)
+        self.change_percent = np.empty(0)
+        self.entry_price = np.empty(0)
+        self.tick_units = np.empty(0)
+        self.buy_change = np.empty(0)
+        self.sell_change = np.empty(0)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        """
+        It returns the evaluated symbols in array order
+        """
+        return list(self._symbols)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def add_symbol(self, symbol: str) -> int:
+        """
+        It adds a symbol to the universe with the default thresholds
+
+        :param symbol: The symbol to add
+        :return: The index of the symbol in the arrays.
+        """
+        index = self._index.get(symbol)
+        if index is not None:
+            return index
+        index = self._index[symbol] = len(self._symbols)
+        self._symbols.append(symbol)
+        self.last_price = np.append(self.last_price, np.nan)
+        self.change_percent = np.append(self.change_percent, np.nan)
+        self.entry_price = np.append(self.entry_price, np.nan)
+        self.tick_units = np.append(self.tick_units, np.nan)
+        self.buy_change = np.append(self.buy_change, self.expected_change_buy)
+        self.sell_change = np.append(self.sell_change, self.expected_change_sell)
+        return index
+
+    def set_thresholds(self, symbol: str, buy: Optional[float] = None, sell: Optional[float] = None):
+        """
+        It overrides the buy and sell thresholds in percent of a symbol
+        """
+        index = self.add_symbol(symbol)
+        if buy is not None:
+            self.buy_change[index] = buy
+        if sell is not None:
+            self.sell_change[index] = sell
+
+    def set_filters(self, symbol: str, filters: TradeApiFilters):
+        """
+        It sets the price tick the buy price of a symbol is rounded down to
+        """
+        self.tick_units[self.add_symbol(symbol)] = SymbolQuantizer.from_filters(filters).tick_units
+
+    def set_entry(self, symbol: str, price: Optional[float]):
+        """
+        It sets the entry price the sell signal of a symbol is measured from, None clears it
+        """
+        self.entry_price[self.add_symbol(symbol)] = np.nan if price is None else price
+
+    def set_entries(self, entries: Dict[str, float]):
+        """
+        It replaces every entry price, symbols not in entries have no position to sell
+        """
+        self.entry_price[:] = np.nan
+        for symbol, price in entries.items():
+            self.set_entry(symbol, price)
+
+    def update(self, book: TickerBook):
+        """
+        It loads the last price and price change of every symbol from a ticker snapshot
+
+        :param book: The ticker snapshot, symbols missing from it get NaN
+        """
+        self.last_price = np.array(book.get_fields(self._symbols, "lastPrice"), dtype=float)
+        self.change_percent = np.array(book.get_fields(self._symbols, "priceChangePercent"), dtype=float)
+
+    def evaluate(self, book: Optional[TickerBook] = None) -> Signals:
+        """
+        It computes the buy and sell signals and target prices of every symbol
+
+        :param book: A ticker snapshot to update the prices from first
+        :return: A Signals object.
+        """
+        if book is not None:
+            self.update(book)
+        last_price = self.last_price
+
+        # the same operations as is_buy_signal and calculate_buy_order, so every float matches; the
+        # integer units of SymbolQuantizer are exact in float64 below 2 ** 53
+        expected_increase = last_price * self.buy_change / 100
+        buy = (last_price <= expected_increase) & (self.change_percent > self.buy_change)
+        scaled = last_price * (1 + self.price_offset_percent / 100) * SCALE
+        nearest = np.round(scaled)
+        price_units = np.where(np.abs(scaled - nearest) <= np.abs(scaled) * FLOAT_TOLERANCE, nearest, np.floor(scaled))
+        buy_price = np.floor_divide(price_units, self.tick_units) * self.tick_units / SCALE
+
+        # the same operations as is_sell_signal
+        sell_price = self.entry_price * (1 + self.sell_change / 100)
+        sell = last_price >= sell_price
+
+        return Signals(self.symbols, buy, sell, buy_price, sell_price)
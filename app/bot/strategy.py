@@ -0,0 +1,150 @@
+"""
+This module contains the buy and sell decisions shared by the bots and the backtester
+"""
+
+
+import logging
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import Config as config
+from app.binance.depth_cache import DepthBook
+from app.binance.quantize import SCALE, SymbolQuantizer
+from app.bot.indicators import WindowStats
+from app.logger import RateLimitedLogger
+
+# the buys skipped on every evaluation while their signal lasts
+skip_log = RateLimitedLogger(logging.getLogger(__name__))
+
+
+class BuyPrice(BaseModel):
+    """
+    Buy price model for the application
+    """
+
+    quantity: float
+    price: float
+    last_price: float
+    order_quantity: str
+    order_price: str
+
+
+def is_buy_signal(last_price: float, price_change_percent: float, expected_change_buy: Optional[float] = None) -> bool:
+    """
+    It returns True if the current price is less than or equal to the expected price with
+    expected_increase_percent, and the price change is greater than expected_increase_percent
+
+    :param last_price: The last price of the symbol
+    :param price_change_percent: The 24 hour price change of the symbol in percent
+    :param expected_change_buy: The buy threshold in percent, defaults to config.expected_change_buy
+    """
+    expected_change_buy = config.expected_change_buy if expected_change_buy is None else expected_change_buy
+
+    # Calculate the expected increase using expected_increase_percent
+    expected_increase = last_price * expected_change_buy / 100
+    return last_price <= expected_increase and price_change_percent > expected_change_buy
+
+
+def is_window_buy_signal(window: Optional[WindowStats], change_percent: Optional[float] = None,
+                         volume_z: Optional[float] = None) -> bool:
+    """
+    It returns True if the price rose by change_percent over a rolling window, on a volume volume_z
+    standard deviations above its baseline
+
+    :param window: The indicators of the symbol over the trigger window, None if it has none yet
+    :param change_percent: The price change in percent, defaults to config.trigger_change_percent, 0 disables the signal
+    :param volume_z: The volume z-score, defaults to config.trigger_volume_z
+    """
+    change_percent = config.trigger_change_percent if change_percent is None else change_percent
+    volume_z = config.trigger_volume_z if volume_z is None else volume_z
+    if window is None or not change_percent:
+        return False
+    # a z-score is NaN while the baseline warms up, which never signals
+    return window.change_percent >= change_percent and window.volume_z >= volume_z
+
+
+def calculate_buy_order(last_price: float, quantizer: SymbolQuantizer, buy_quantity: Optional[float] = None,
+                        price_offset_percent: Optional[float] = None) -> Optional[BuyPrice]:
+    """
+    Calculate the quantity and price to buy based on the last price and the symbol filters
+
+    :param last_price: The last price of the symbol
+    :param quantizer: The quantizer of the symbol filters
+    :param buy_quantity: The amount of the quote asset to spend, defaults to config.buy_quantity_btc
+    :param price_offset_percent: The percent above the last price the buy is placed at, negative to rest below it,
+        defaults to config.buy_price_offset_percent
+    :return: The quantity, price, last_price and their order strings, or None if the order would not
+        pass the symbol filters.
+    """
+    price_offset_percent = config.buy_price_offset_percent if price_offset_percent is None else price_offset_percent
+
+    # Calculate the final buy price from the last price and the offset, rounded down to the tick size
+    price = quantizer.floor_price(last_price * (1 + price_offset_percent / 100))
+
+    # Calculate the quantity to buy, rounded down to the step size
+    quantity = quantizer.quantity_for_quote(config.buy_quantity_btc if buy_quantity is None else buy_quantity, price)
+    if not quantizer.is_valid(price, quantity):
+        skip_log.info("Buy order of %s at %s is below the symbol filters, skipping...", quantity / SCALE, price / SCALE)
+        return None
+
+    return BuyPrice(quantity=quantity / SCALE, price=price / SCALE, last_price=last_price,
+                    order_quantity=quantizer.quantity_string(quantity), order_price=quantizer.price_string(price))
+
+
+def calculate_depth_buy_order(last_price: float, depth: DepthBook, quantizer: SymbolQuantizer, buy_quantity: Optional[float] = None,
+                              max_slippage_percent: Optional[float] = None) -> Optional[BuyPrice]:
+    """
+    Calculate the quantity and price to buy against the asks of the order book, the price is the worst
+    ask the order reaches so it fills at once instead of resting below a thin book
+
+    :param last_price: The last price of the symbol
+    :param depth: The order book of the symbol
+    :param quantizer: The quantizer of the symbol filters
+    :param buy_quantity: The amount of the quote asset to spend, defaults to config.buy_quantity_btc
+    :param max_slippage_percent: The highest average fill price above the best ask in percent, defaults to config.max_slippage_percent
+    :return: The quantity, price, last_price and their order strings, or None if the book is too thin or
+        the order would not pass the symbol filters.
+    """
+    buy_quantity = float(config.buy_quantity_btc if buy_quantity is None else buy_quantity)
+    max_slippage_percent = config.max_slippage_percent if max_slippage_percent is None else max_slippage_percent
+    fill = depth.price_to_fill("BUY", quote=buy_quantity)
+    if fill is None or fill.slippage_percent > max_slippage_percent:
+        skip_log.info("The %s asks are too thin for a buy of %s, skipping...", depth.symbol, buy_quantity, extra={"symbol": depth.symbol})
+        return None
+
+    price = quantizer.floor_price(fill.worst_price)
+    quantity = quantizer.quantity_for_quote(buy_quantity, price)
+    if not quantizer.is_valid(price, quantity):
+        skip_log.info("Buy order of %s at %s is below the symbol filters, skipping...", quantity / SCALE, price / SCALE)
+        return None
+
+    return BuyPrice(quantity=quantity / SCALE, price=price / SCALE, last_price=last_price,
+                    order_quantity=quantizer.quantity_string(quantity), order_price=quantizer.price_string(price))
+
+
+def is_sell_signal(last_price: float, order_price: float, expected_change_sell: Optional[float] = None) -> bool:
+    """
+    It returns True if the current price is greater than the price of the order by the expected change
+
+    :param last_price: The last price of the symbol
+    :param order_price: The price of the open order
+    :param expected_change_sell: The sell threshold in percent, defaults to config.expected_change_sell
+    """
+    expected_change_sell = config.expected_change_sell if expected_change_sell is None else expected_change_sell
+    return last_price >= order_price * (1 + expected_change_sell / 100)
+
+
+def calculate_sell_prices(last_price: float, quantity: float, depth: Optional[DepthBook] = None) -> Tuple[float, float]:
+    """
+    It returns the price a sell is decided on and the price it is placed at: the last price for both
+    without an order book or a quantity to sell, otherwise the average and the worst bid the quantity fills at
+
+    :param last_price: The last price of the symbol
+    :param quantity: The base asset quantity to sell
+    :param depth: The order book of the symbol, if any
+    """
+    fill = depth.price_to_fill("SELL", quantity=quantity) if depth is not None else None
+    if fill is None:
+        return last_price, last_price
+    return fill.average_price, fill.worst_price
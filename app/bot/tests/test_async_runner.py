@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.binance.async_trade_api import AsyncTradeAPI
+from app.bot import async_runner
+from app.bot.async_runner import AsyncPumpDumpBot
+from app.bot.journal import TradeJournal
+from app.bot.positions import PositionIndex
+from app.bot.models import Base, Trades
+from config import Config as config
+
+
+def _ticker(symbol: str, last_price: str, change_percent: str) -> dict:
+    return {"symbol": symbol, "priceChange": "0", "priceChangePercent": change_percent, "weightedAvgPrice": last_price, "prevClosePrice": last_price,
+            "lastPrice": last_price, "bidPrice": last_price, "askPrice": last_price, "openPrice": last_price, "highPrice": last_price,
+            "lowPrice": last_price, "volume": "1000", "openTime": 0, "closeTime": 0}
+
+
+def _symbol_info(symbol: str) -> dict:
+    return {"symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-3], "baseAssetPrecision": 8, "quoteAsset": "BTC", "quotePrecision": 8,
+            "orderTypes": ["LIMIT"], "icebergAllowed": True,
+            "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.00000100", "maxPrice": "1000", "tickSize": "0.00000100"},
+                        {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "100000", "stepSize": "0.00100000"}]}
+
+
+class FakeAsyncClient:
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.buys = []
+        self.ticker_calls = 0
+
+    async def _request(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+
+    async def get_ticker(self):
+        self.ticker_calls += 1
+        return self.tickers
+
+    async def get_exchange_info(self):
+        return {"symbols": [_symbol_info(x["symbol"]) for x in self.tickers]}
+
+    async def get_symbol_info(self, symbol):
+        return None
+
+    async def get_open_orders(self, **params):
+        await self._request()
+        return []
+
+    async def get_order(self, **params):
+        await self._request()
+        return {"symbol": params["symbol"], "orderId": params["orderId"], "clientOrderId": "myOrder", "price": "0.0025", "origQty": "0.88",
+                "executedQty": "0.0", "status": "NEW", "timeInForce": "GTC", "type": "LIMIT", "side": "BUY", "stopPrice": "0.0",
+                "icebergQty": "0.0", "time": 0}
+
+    async def order_limit_buy(self, **params):
+        await self._request()
+        self.buys.append(params)
+        return {"orderId": len(self.buys)}
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    journal = TradeJournal(factory)
+    monkeypatch.setattr(async_runner, "positions", PositionIndex(journal))
+    yield journal, factory()
+    journal.close()
+
+
+# test that every symbol is checked from one event loop within the concurrency limit
+def test_async_bot_checks_symbols_concurrently(monkeypatch, memory_db):
+    monkeypatch.setattr(config, "expected_change_buy", 100)
+    monkeypatch.setattr(config, "expected_change_sell", 10)
+    monkeypatch.setattr(config, "buy_quantity_btc", 0.0022)
+    monkeypatch.setattr(config, "ticker_max_age", 60)
+    monkeypatch.setattr(config, "stream_max_age", 0)
+
+    symbols = [f"C{i:03d}BTC" for i in range(200)]
+    tickers = [_ticker(symbol, "0.5", "150" if i % 2 else "1") for i, symbol in enumerate(symbols)]
+    client = FakeAsyncClient(tickers)
+    bot = AsyncPumpDumpBot(AsyncTradeAPI(client), concurrency=8)
+
+    asyncio.run(bot.run_cycle(symbols))
+
+    assert client.max_in_flight <= 8
+    assert client.max_in_flight > 1
+    assert client.ticker_calls == 1
+    assert len(client.buys) == 100
+    assert client.buys[0] == {"symbol": "C001BTC", "recvWindow": config.order_recv_window, "quantity": "0.004", "price": "0.500000"}
+    journal, db = memory_db
+    assert len(journal.get_all_trades()) == 100
+    journal.flush()
+    assert db.query(Trades).count() == 100
+    assert db.query(Trades).filter_by(symbol="C001BTC").first().order_id == "1"
@@ -0,0 +1,105 @@
+import numpy as np
+
+from app.binance.quantize import SymbolQuantizer
+from app.bot.backtest import BacktestParams, read_klines, run_backtest, sweep, find_kline_files
+from app.bot.strategy import is_buy_signal, calculate_buy_order, is_sell_signal
+
+START = 1672531200000
+QUANTIZER = SymbolQuantizer("0.01000000", "0.00001000", "0.00010000", "0.01000000", "0.00001000")
+
+
+def _write_klines(path, closes, header: bool = False):
+    """
+    It writes 1 second klines in the data.binance.vision layout, every kline opens at the previous close
+    """
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    lows = np.minimum(opens, closes) * 0.999
+    with open(path, "w") as f:
+        if header:
+            f.write("open_time,open,high,low,close,volume,close_time,quote_volume,count,taker_buy_volume,taker_buy_quote_volume,ignore\n")
+        for i, (o, l, c) in enumerate(zip(opens, lows, closes)):
+            t = START + i * 1000
+            f.write(f"{t},{o:.2f},{max(o, c):.2f},{l:.2f},{c:.2f},1.0,{t + 999},1.0,1,0.5,0.5,0\n")
+
+
+def _random_walk(size: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # pumps to a few times the price and dumps back, so both thresholds are crossed many times
+    trend = 20 + 80 * np.sin(np.linspace(0, 12 * np.pi, size)) ** 2
+    return np.round(trend * np.exp(np.cumsum(rng.normal(0, 0.002, size))), 2)
+
+
+def _reference(path, params: BacktestParams):
+    """
+    A tick by tick replay calling the strategy functions directly
+    """
+    chunk = next(read_klines(path))
+    times, opens, lows, closes = chunk.T
+    trades, order, holding = [], None, False
+    for i in range(len(times)):
+        day_open = opens[np.searchsorted(times, times[i] - 86400000, side="right")]
+        change = round((closes[i] - day_open) / day_open * 100, 3)
+        if order is None:
+            if is_buy_signal(closes[i], change, params.expected_change_buy):
+                order = calculate_buy_order(closes[i], QUANTIZER, params.buy_quantity, params.buy_price_offset)
+                if order is not None:
+                    trades.append([int(times[i])])
+                    if order.price >= closes[i]:
+                        trades[-1].append(float(closes[i]))
+                        holding = True
+        elif not holding:
+            if lows[i] <= order.price:
+                trades[-1].append(order.price)
+                holding = True
+        elif is_sell_signal(closes[i], order.price, params.expected_change_sell):
+            trades[-1].append(float(closes[i]))
+            order, holding = None, False
+    return trades
+
+
+# test that the vectorized replay makes the same trades as a tick by tick replay, whatever the chunk size
+def test_backtest_matches_tick_by_tick_replay(tmp_path):
+    path = tmp_path / "PUMPBTC-1s-2023-01.csv"
+    _write_klines(path, _random_walk(20000, 1), header=True)
+    params = BacktestParams(expected_change_buy=120, expected_change_sell=5, buy_quantity=1)
+
+    expected = _reference(path, params)
+    assert len(expected) > 2
+    for chunk_size in (1000000, 777):
+        result = run_backtest("PUMPBTC", [str(path)], QUANTIZER, params, chunk_size=chunk_size)
+        assert result.rows == 20000
+        trades = [[x for x in (t.order_time, t.buy_price, t.sell_price) if x is not None] for t in result.trades]
+        assert trades == expected
+        assert result.wins + result.losses == sum(len(x) == 3 for x in expected)
+
+
+# test the profit of a single pump and the fill model
+def test_backtest_pnl(tmp_path):
+    path = tmp_path / "PUMPBTC.csv"
+    # a pump from 40 to 100 is a 150% change, the buy limit at the last price of 100 takes the book at 100
+    _write_klines(path, np.array([40.0] * 10 + [100.0] * 5 + [105.0, 111.0, 111.0]))
+    params = BacktestParams(expected_change_buy=120, expected_change_sell=10, buy_quantity=1, fee_rate=0.001)
+    result = run_backtest("PUMPBTC", [str(path)], QUANTIZER, params)
+
+    # the sell at 111 is a 177% change from 40, so it buys again
+    trade, again = result.trades
+    assert again.buy_price == 111.0 and again.pnl is None
+    assert (trade.buy_price, trade.sell_price, trade.quantity) == (100.0, 111.0, 0.01)
+    assert trade.buy_time == START + 10000 and trade.sell_time == START + 16000
+    assert abs(trade.pnl - (0.01 * 11 - 0.01 * 211 * 0.001)) < 1e-12
+    assert result.wins == 1 and result.pnl == trade.pnl
+
+
+# test that a sweep over a process pool gives the results of a sequential one
+def test_backtest_sweep(tmp_path):
+    for i, symbol in enumerate(["AAABTC", "BBBBTC"]):
+        _write_klines(tmp_path / f"{symbol}-1s-2023-01.csv", _random_walk(5000, i))
+    files = find_kline_files([str(tmp_path)])
+    assert list(files) == ["AAABTC", "BBBBTC"]
+
+    quantizers = {symbol: QUANTIZER for symbol in files}
+    params = [BacktestParams(expected_change_buy=buy, expected_change_sell=5, buy_quantity=1) for buy in (110, 140)]
+    sequential = sweep(files, quantizers, params)
+    parallel = sweep(files, quantizers, params, processes=2)
+    assert [(x.symbol, x.params.expected_change_buy) for x in parallel] == [("AAABTC", 110), ("BBBBTC", 110), ("AAABTC", 140), ("BBBBTC", 140)]
+    assert [x.trades for x in parallel] == [x.trades for x in sequential]
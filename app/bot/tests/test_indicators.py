@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from app.bot.indicators import IndicatorEngine, RollingWindows, WindowStats
+from app.bot.strategy import is_window_buy_signal
+
+
+def _calm(rolling: RollingWindows, seconds: int, start: float = 0.0):
+    # one trade of volume 1 every second at a price moving 0.1% up and down
+    for i in range(seconds):
+        rolling.tick(start + i, 1.0 + 0.001 * (i % 2), 1.0, 1)
+
+
+# test that the windows add up the buckets they cover and drop the ones that left them
+def test_windows_roll():
+    rolling = RollingWindows((5, 30), resolution=1, baseline=60)
+    for i in range(40):
+        rolling.tick(i, 1.0 + i * 0.01, 2.0, 1)
+    short, long = rolling.stats()
+    assert short.volume == 10.0 and short.trades == 5
+    assert long.volume == 60.0 and long.trades == 30
+    assert short.change_percent == pytest.approx((1.39 / 1.34 - 1) * 100)
+    assert long.change_percent == pytest.approx((1.39 / 1.09 - 1) * 100)
+
+    # ticks of the same second share a bucket
+    rolling.tick(39.5, 1.40, 1.0, 1)
+    assert rolling.stats()[0].volume == 11.0
+
+    # a gap longer than every window empties them
+    rolling.advance(1000)
+    short, long = rolling.stats()
+    assert short.volume == long.volume == 0
+    assert short.change_percent == 0
+
+
+# test that the memory of a symbol is the same after any number of ticks
+def test_memory_is_bounded():
+    rolling = RollingWindows((5, 30, 300), resolution=1, baseline=3600)
+    assert len(rolling) == 301
+    _calm(rolling, 5000)
+    assert len(rolling) == 301
+    assert rolling._close.shape == rolling._volume.shape == rolling._trades.shape == (301,)
+    assert rolling.baseline_buckets == 4999
+
+
+# test that a pump scores far above the baseline while calm trading does not
+def test_z_scores_flag_a_pump():
+    rolling = RollingWindows((5, 30), resolution=1, baseline=300)
+    _calm(rolling, 20)
+    # the baseline is not warm yet
+    assert math.isnan(rolling.stats()[0].volume_z)
+
+    _calm(rolling, 600, start=20)
+    calm = rolling.stats()[0]
+    assert abs(calm.volume_z) < 3 and abs(calm.change_z) < 3
+
+    for i in range(5):
+        rolling.tick(620 + i, 1.0 * 1.02 ** (i + 1), 20.0, 10)
+    pump = rolling.stats()[0]
+    assert pump.change_percent > 9
+    assert pump.volume_z > 10 and pump.trades_z > 10 and pump.change_z > 10
+
+
+# test that tickers are added as the change of their totals, and trades one by one
+def test_engine_feeds_tracked_symbols():
+    engine = IndicatorEngine(windows=(5, 30), resolution=1, baseline=60)
+    engine.update_tickers([{"symbol": "LTCBTC", "lastPrice": "1.0", "volume": "100", "lastId": 10}], timestamp=0)
+    assert "LTCBTC" not in engine
+    assert engine.window("LTCBTC", 5, timestamp=0) is None
+
+    engine.update_tickers([{"symbol": "LTCBTC", "lastPrice": "1.0", "volume": "100", "lastId": 10}], timestamp=0)
+    engine.update_tickers([{"symbol": "LTCBTC", "lastPrice": "1.1", "volume": "105", "lastId": 17},
+                           {"symbol": "ETHBTC", "lastPrice": "1.0", "volume": "1", "lastId": 1}], timestamp=2)
+    # old trades leaving the 24 hour volume are no negative volume
+    engine.update_tickers([{"symbol": "LTCBTC", "lastPrice": "1.1", "volume": "90", "lastId": 18}], timestamp=3)
+    stats = engine.window("LTCBTC", 5, timestamp=3)
+    assert stats.volume == 5 and stats.trades == 8
+    assert stats.change_percent == pytest.approx(10)
+    assert engine.symbols == ["LTCBTC"]
+
+    engine.update_trade({"e": "trade", "s": "LTCBTC", "p": "1.2", "q": "3", "T": 4000})
+    engine.update_tickers([{"symbol": "LTCBTC", "lastPrice": "1.2", "volume": "200", "lastId": 30}], timestamp=4)
+    stats = engine.window("LTCBTC", 5, timestamp=4)
+    assert stats.volume == 8 and stats.trades == 9
+
+
+# test the window buy signal
+def test_window_buy_signal():
+    window = WindowStats(window=30, change_percent=12, volume=100, trades=50, change_z=8, volume_z=6, trades_z=5)
+    assert is_window_buy_signal(window, change_percent=10, volume_z=3)
+    assert not is_window_buy_signal(window, change_percent=15, volume_z=3)
+    assert not is_window_buy_signal(window, change_percent=10, volume_z=8)
+    assert not is_window_buy_signal(window._replace(volume_z=math.nan), change_percent=10, volume_z=3)
+    assert not is_window_buy_signal(window, change_percent=0, volume_z=3)
+    assert not is_window_buy_signal(None, change_percent=10, volume_z=3)
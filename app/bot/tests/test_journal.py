@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.bot.journal import TradeJournal
+from app.bot.models import Base, Trades
+
+
+@pytest.fixture
+def factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _count(factory, symbol=None):
+    session = factory()
+    try:
+        query = session.query(Trades)
+        return (query.filter_by(symbol=symbol) if symbol else query).count()
+    finally:
+        session.close()
+
+
+def _trade(symbol, order_id, price=1.0):
+    return Trades(symbol=symbol, order_id=order_id, price=price, quantity=2.0)
+
+
+# test that queued writes are visible to reads before they are flushed
+def test_reads_see_queued_writes(factory):
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    journal.add(_trade("ABCBTC", 1))
+    journal.add(_trade("XYZBTC", 2))
+
+    assert _count(factory) == 0
+    assert [t.order_id for t in journal.get_trades("ABCBTC")] == ["1"]
+    assert len(journal.get_all_trades()) == 2
+
+    journal.delete_symbol("ABCBTC")
+    assert journal.get_trades("ABCBTC") == []
+    assert journal.pending == 3
+
+
+# test that inserts and deletes are written in order in one flush
+def test_flush_keeps_write_order(factory):
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    journal.add(_trade("ABCBTC", 1))
+    journal.delete_symbol("ABCBTC")
+    journal.add(_trade("ABCBTC", 3))
+
+    assert journal.flush() == 3
+    assert journal.pending == 0
+    assert journal.flushes == 1
+    assert [t.order_id for t in journal.get_trades("ABCBTC")] == ["3"]
+    assert _count(factory, "ABCBTC") == 1
+
+
+# test that a full batch is flushed inline when the background thread is not running
+def test_batch_size_flushes_without_thread(factory):
+    journal = TradeJournal(factory, batch_size=3, flush_interval=60)
+    for order_id in range(2):
+        journal.add(_trade("ABCBTC", order_id))
+    assert _count(factory) == 0
+
+    journal.add(_trade("ABCBTC", 2))
+    assert _count(factory) == 3
+    assert journal.pending == 0
+
+
+# test that the background thread flushes a batch once the interval passed
+def test_thread_flushes_on_interval(factory):
+    journal = TradeJournal(factory, batch_size=100, flush_interval=0.05)
+    journal.start()
+    try:
+        journal.add(_trade("ABCBTC", 1))
+        deadline = time.monotonic() + 5
+        while _count(factory) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _count(factory) == 1
+    finally:
+        journal.close()
+
+
+# test that closing the journal writes every queued write
+def test_close_flushes_pending(factory):
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    journal.start()
+    for order_id in range(10):
+        journal.add(_trade("ABCBTC", order_id))
+    journal.close()
+
+    assert _count(factory) == 10
+    assert journal.written == 10
+
+
+# test that a failed flush keeps the writes queued for the next one
+def test_failed_flush_is_retried(factory, monkeypatch):
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    journal.add(_trade("ABCBTC", 1))
+
+    calls = []
+    original = factory.class_.commit
+
+    def fail_once(session):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return original(session)
+
+    monkeypatch.setattr(factory.class_, "commit", fail_once)
+    assert journal.flush() == 0
+    assert journal.failures == 1
+    assert journal.pending == 1
+    assert [t.order_id for t in journal.get_trades("ABCBTC")] == ["1"]
+
+    assert journal.flush() == 1
+    assert _count(factory) == 1
@@ -0,0 +1,74 @@
+import json
+import logging
+import queue
+
+from app.logger import BoundedQueueHandler, JsonFormatter, RateLimitedLogger, setup_logging, stop_logging
+
+
+def _record(msg: str, *args, level: int = logging.DEBUG, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("bot", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_keeps_extra_fields():
+    line = JsonFormatter().format(_record("Buy %s at %s", "ABCBTC", 0.1, level=logging.INFO, symbol="ABCBTC", order_id=7))
+    entry = json.loads(line)
+    assert entry["message"] == "Buy ABCBTC at 0.1" and entry["level"] == "INFO"
+    assert entry["symbol"] == "ABCBTC" and entry["order_id"] == 7
+
+
+def test_rate_limit_per_template():
+    records = []
+    logger = logging.getLogger("test_rate_limit")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.handle = records.append
+    cycle_log = RateLimitedLogger(logger, rate=2)
+
+    for i in range(5):
+        cycle_log.debug("Checking status of %s", f"S{i}", extra={"symbol": f"S{i}"})
+    cycle_log.debug("Looking for Buy Opportunities on %s", "S1")
+    assert [x.getMessage() for x in records] == ["Checking status of S0", "Checking status of S1", "Looking for Buy Opportunities on S1"]
+    assert records[0].symbol == "S0" and cycle_log.suppressed == 3
+
+    cycle_log._windows["Checking status of %s"][0] -= 1
+    cycle_log.debug("Checking status of %s", "S5")
+    assert records[-1].suppressed == 3
+
+
+def test_queue_handler_drops_when_full_and_reports_it():
+    handler = BoundedQueueHandler(queue.Queue(2))
+    for i in range(5):
+        handler.handle(_record("message %s", i))
+    assert handler.dropped == 3
+    handler.queue.get_nowait()
+    handler.handle(_record("after the burst"))
+    handler.queue.get_nowait()
+    record = handler.queue.get_nowait()
+    assert record.msg == "after the burst" and record.dropped == 3
+    # the record is queued unformatted
+    assert record.args == ()
+
+
+def test_setup_logging_writes_json_lines(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    path = tmp_path / "logs" / "bot.log"
+    try:
+        listener = setup_logging(str(path), "DEBUG", 100)
+        cycle_log = RateLimitedLogger(logging.getLogger("test_setup_logging"), rate=1)
+        for symbol in ("AAABTC", "BBBBTC"):
+            cycle_log.debug("Checking status of %s", symbol, extra={"symbol": symbol})
+        logging.info("Order %s %s", "AAABTC", "FILLED", extra={"symbol": "AAABTC", "order_id": 1})
+        stop_logging(listener)
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [x["message"] for x in entries] == ["Checking status of AAABTC", "Order AAABTC FILLED"]
+    assert entries[1]["order_id"] == 1
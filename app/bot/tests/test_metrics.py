@@ -0,0 +1,57 @@
+import asyncio
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from app import metrics
+from app.metrics import Counter, Gauge, Histogram, MetricsRegistry, timed
+
+
+def test_counter_adds_up_the_threads():
+    counter = Counter("test_total", "Test counter", ("side",))
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: counter.inc("BUY" if i % 2 else "SELL"), range(10000)))
+    assert counter.values() == {("BUY",): 5000, ("SELL",): 5000}
+
+
+def test_histogram_buckets_and_text_format():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("test_seconds", "Test histogram", ("method",), buckets=(0.1, 1.0)))
+    registry.register(Gauge("test_gauge", "Test gauge", function=lambda: 3))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "get")
+
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{method="get",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{method="get",le="1.0"} 3' in text
+    assert 'test_seconds_bucket{method="get",le="+Inf"} 4' in text
+    assert 'test_seconds_count{method="get"} 4' in text
+    assert 'test_seconds_sum{method="get"} 6.05' in text
+    assert 'test_gauge 3' in text
+    assert "test_seconds: count=4" in registry.summary()
+
+
+def test_timed_records_functions_and_coroutines():
+    histogram = Histogram("test_timed_seconds", "Test", ("method",))
+
+    @timed(histogram, "sync")
+    def sync():
+        return 1
+
+    @timed(histogram, "async")
+    async def coroutine():
+        return 2
+
+    assert sync() == 1 and asyncio.run(coroutine()) == 2
+    assert {labels: sum(counts[:-1]) for labels, counts in histogram.values().items()} == {("sync",): 1, ("async",): 1}
+
+
+def test_serve():
+    registry = MetricsRegistry()
+    registry.register(Counter("served_total", "Test")).inc()
+    server = metrics.serve(0, "127.0.0.1", registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert "served_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
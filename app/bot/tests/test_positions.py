@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.bot.journal import TradeJournal
+from app.bot.models import Base, Trades
+from app.bot.positions import PositionIndex
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _trade(symbol, order_id, price=1.0):
+    return Trades(symbol=symbol, order_id=order_id, price=price, quantity=2.0)
+
+
+# test that the index loads the trades of the database and of the journal queue
+def test_loads_database_and_queued_trades(engine):
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add(_trade("ABCBTC", 1))
+    session.commit()
+    session.close()
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    journal.add(_trade("XYZBTC", 2))
+
+    positions = PositionIndex(journal)
+
+    assert sorted(positions.symbols()) == ["ABCBTC", "XYZBTC"]
+    assert positions.get_trade(1).symbol == "ABCBTC"
+    assert positions.get_trade("2").symbol == "XYZBTC"
+    assert len(positions) == 2
+
+
+# test that changes are applied to the index and written through the journal
+def test_changes_write_through(engine):
+    factory = sessionmaker(bind=engine)
+    journal = TradeJournal(factory, batch_size=100, flush_interval=60)
+    positions = PositionIndex(journal)
+
+    positions.add(_trade("ABCBTC", 1))
+    positions.add(_trade("ABCBTC", 2))
+    positions.add(_trade("XYZBTC", 3))
+    positions.delete_symbol("XYZBTC")
+
+    assert [t.order_id for t in positions.get_trades("ABCBTC")] == [1, 2]
+    assert positions.has_position("ABCBTC")
+    assert "XYZBTC" not in positions
+    assert positions.get_trade(3) is None
+
+    journal.flush()
+    reloaded = PositionIndex(TradeJournal(factory))
+    assert sorted(t.order_id for t in reloaded.trades()) == ["1", "2"]
+
+
+# test that lookups run no SQL once the index is loaded
+def test_lookups_run_no_sql(engine):
+    journal = TradeJournal(sessionmaker(bind=engine), batch_size=100, flush_interval=60)
+    positions = PositionIndex(journal)
+    positions.load()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for i in range(10):
+        positions.add(_trade(f"S{i}BTC", i))
+        positions.get_trades(f"S{i}BTC")
+        positions.has_position(f"S{i}BTC")
+        list(positions.symbols())
+        positions.delete_symbol(f"S{i}BTC")
+
+    assert statements == []
+
+
+# test that the table is indexed on what the trades are looked up by
+def test_trades_table_indexes(engine):
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("trade")}
+    assert indexes["ix_trade_symbol_order_id"] == ["symbol", "order_id"]
@@ -85,8 +85,8 @@ def test_pump_dump_bot():
         with mock_binance():
             bot.check_buy("BTCUSDT")
 
-            # Assert that a new Trades object was added to the database with the expected pair and order_id attributes
-            trade = db.query(Trades).filter_by(pair="BTCUSDT").first()
+            # Assert that a new Trades object was added to the database with the expected symbol and order_id attributes
+            trade = db.query(Trades).filter_by(symbol="BTCUSDT").first()
             assert trade is not None
             assert trade.order_id == 1234
 
@@ -99,8 +99,8 @@ def test_pump_dump_bot():
         with mock_binance():
             bot.check_sell("BTCUSDT")
 
-            # Assert that a new Trades object was added to the database with the expected pair and order_id attributes
-            trade = db.query(Trades).filter_by(pair="BTCUSDT").first()
+            # Assert that a new Trades object was added to the database with the expected symbol and order_id attributes
+            trade = db.query(Trades).filter_by(symbol="BTCUSDT").first()
             assert trade is not None
             assert trade.order_id == 1234
 
@@ -120,7 +120,7 @@ def test_pump_dump_bot():
                     pass
 
             # Assert that a new Trades object was added and then deleted from the database
-            trade = db.query(Trades).filter_by(pair=symbol).first()
+            trade = db.query(Trades).filter_by(symbol=symbol).first()
             assert trade is None
 
     # Call the test functions
@@ -0,0 +1,108 @@
+import time
+from threading import Lock
+
+import pytest
+
+from app.bot.scheduler import SymbolScheduler, TickerHeat
+from app.binance.trade_api import Quote
+from config import Config as config
+
+
+class Recorder:
+    def __init__(self, duration: float = 0.0):
+        self.duration = duration
+        self.calls = []
+        self.running = set()
+        self.overlaps = 0
+        self._lock = Lock()
+
+    def __call__(self, symbol: str):
+        with self._lock:
+            if symbol in self.running:
+                self.overlaps += 1
+            self.running.add(symbol)
+            self.calls.append(symbol)
+        time.sleep(self.duration)
+        with self._lock:
+            self.running.discard(symbol)
+
+
+def _run_for(scheduler: SymbolScheduler, seconds: float):
+    scheduler.start()
+    time.sleep(seconds)
+    scheduler.stop()
+
+
+# test that hot symbols are evaluated more often than cold ones
+def test_scheduler_evaluates_hot_symbols_more_often():
+    recorder = Recorder()
+    heats = {"HOTBTC": 1.0, "COLDBTC": 0.0}
+    scheduler = SymbolScheduler(recorder, heats.get, ["HOTBTC", "COLDBTC"], workers=2, hot_interval=0.01, cold_interval=0.2,
+                                max_ticks_per_second=1000, rescore_interval=0.05)
+    _run_for(scheduler, 0.5)
+
+    stats = scheduler.stats()
+    assert stats.ticks_per_symbol["HOTBTC"] > 5 * stats.ticks_per_symbol["COLDBTC"]
+    assert stats.ticks_per_symbol["COLDBTC"] >= 2
+    assert stats.intervals == pytest.approx({"HOTBTC": 0.01, "COLDBTC": 0.2})
+    assert stats.lag_max >= stats.lag_avg >= 0
+
+
+# test that the intervals are stretched to stay within the budget
+def test_scheduler_respects_budget():
+    symbols = [f"C{i:04d}BTC" for i in range(1000)]
+    scheduler = SymbolScheduler(Recorder(), lambda symbol: 1.0, symbols, hot_interval=1, cold_interval=30, max_ticks_per_second=100)
+    scheduler.rescore()
+
+    stats = scheduler.stats()
+    assert stats.budget_scale == 10
+    assert sum(1 / interval for interval in stats.intervals.values()) <= 100.0001
+
+
+# test that a symbol is never evaluated twice at the same time and removed symbols stop
+def test_scheduler_never_overlaps_and_retires_symbols():
+    recorder = Recorder(duration=0.02)
+    scheduler = SymbolScheduler(recorder, None, ["LTCBTC", "ETHBTC"], workers=4, hot_interval=0.001, cold_interval=0.001,
+                                max_ticks_per_second=10000, rescore_interval=1)
+    scheduler.start()
+    time.sleep(0.2)
+    scheduler.remove_symbol("ETHBTC")
+    scheduler.add_symbol("BNBBTC")
+    time.sleep(0.05)
+    retired = scheduler.stats().ticks_per_symbol["ETHBTC"]
+    time.sleep(0.1)
+    scheduler.stop()
+
+    assert recorder.overlaps == 0
+    assert scheduler.stats().ticks_per_symbol["ETHBTC"] == retired
+    assert scheduler.stats().ticks_per_symbol["BNBBTC"] > 0
+    assert scheduler.symbols == ["BNBBTC", "LTCBTC"]
+
+
+# test the ticker heat scoring
+def test_ticker_heat(monkeypatch):
+    monkeypatch.setattr(config, "hot_change_percent", 10)
+    monkeypatch.setattr(config, "hot_volume_ratio", 2)
+    tickers = {"PUMPBTC": ("5", "100"), "FLATBTC": ("0.1", "10000")}
+
+    class FakeTradeAPI:
+        @staticmethod
+        def get_quote(symbol):
+            change, volume = tickers[symbol]
+            return Quote(symbol, 1.0, float(change), 1.0, 1.0, float(volume))
+
+    heat = TickerHeat(FakeTradeAPI(), lambda symbol: symbol == "HELDBTC")
+    assert heat("HELDBTC") == 1.0
+    assert heat("PUMPBTC") == 0.5
+    assert heat("FLATBTC") == 0.01
+
+    # a steady 10 per interval barely moves the 24 hour total, and is no spike
+    for volume in ("10010", "10020", "10030"):
+        tickers["FLATBTC"] = ("0.1", volume)
+        assert heat("FLATBTC") == 0.01
+
+    # a burst of three times the usual volume is fully hot, a rolling total that drops is no volume
+    tickers["FLATBTC"] = ("0.1", "10060")
+    assert heat("FLATBTC") == 1.0
+    tickers["FLATBTC"] = ("0.1", "10000")
+    assert heat("FLATBTC") == 0.01
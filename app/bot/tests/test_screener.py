@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+from app.binance.trade_api import SymbolFilterCache, TickerBook
+from app.bot.scheduler import SymbolScheduler
+from app.bot.screener import MarketScreener, z_scores
+
+
+class StaticTradeAPI:
+    def __init__(self, exchange_info: dict):
+        self.filter_cache = SymbolFilterCache(None, ttl=3600)
+        self.filter_cache.load(exchange_info)
+
+
+def _symbol_info(symbol: str, quote_asset: str = "BTC", status: str = "TRADING") -> dict:
+    return {"symbol": symbol, "status": status, "baseAsset": symbol[:-len(quote_asset)], "quoteAsset": quote_asset}
+
+
+def _ticker(symbol: str, last_price: float, change_percent: float, volume: float) -> dict:
+    return {"symbol": symbol, "lastPrice": f"{last_price:.8f}", "priceChangePercent": f"{change_percent:.3f}", "volume": f"{volume:.8f}",
+            "weightedAvgPrice": f"{last_price:.8f}"}
+
+
+def _market(pump_price: float = 1.0, pump_volume: float = 1000.0, volume: float = 1000.0) -> TickerBook:
+    return TickerBook([
+        _ticker("AAABTC", 1.0, 1.0, volume), _ticker("BBBBTC", 1.0, 2.0, volume), _ticker("CCCBTC", 1.0, -1.0, volume),
+        _ticker("PMPBTC", pump_price, 1.0, pump_volume),
+        # too little liquidity, not trading and quoted in another asset
+        _ticker("DRYBTC", 0.001, 50.0, 1000), _ticker("HLTBTC", 1.0, 50.0, 1000), _ticker("AAAUSDT", 1.0, 50.0, 1000),
+    ])
+
+
+def _screener(**kwargs) -> MarketScreener:
+    trade_api = StaticTradeAPI({"symbols": [
+        _symbol_info("AAABTC"), _symbol_info("BBBBTC"), _symbol_info("CCCBTC"), _symbol_info("PMPBTC"), _symbol_info("DRYBTC"),
+        _symbol_info("HLTBTC", status="BREAK"), _symbol_info("AAAUSDT", quote_asset="USDT"),
+    ]})
+    return MarketScreener(trade_api, quote_asset="BTC", min_quote_volume=10, **kwargs)
+
+
+# test the market z-scores
+def test_z_scores():
+    scores = z_scores(np.array([1.0, 3.0, np.nan]))
+    assert scores[0] == -1 and scores[1] == 1 and math.isnan(scores[2])
+    assert list(z_scores(np.array([2.0, 2.0]))) == [0.0, 0.0]
+    assert math.isnan(z_scores(np.array([np.nan]))[0])
+
+
+# test that only liquid trading symbols of the quote asset are ranked, and a pump rises to the top
+def test_screener_ranks_the_market():
+    screener = _screener(top_k=3)
+    candidates = screener.rank(_market())
+    assert screener.symbols == ["AAABTC", "BBBBTC", "CCCBTC", "PMPBTC", "DRYBTC"]
+    assert [x.symbol for x in candidates] == ["BBBBTC", "AAABTC", "PMPBTC"]
+
+    # the 24 hour volumes grow by 10 between two ranks, then the price jumps and three times as much is traded
+    screener.rank(_market(pump_volume=1010, volume=1010))
+    candidates = screener.rank(_market(pump_price=1.1, pump_volume=1040, volume=1020))
+    assert candidates[0].symbol == "PMPBTC"
+    assert candidates[0].volume_ratio == 3 and round(candidates[0].recent_change_percent, 6) == 10
+    assert "CCCBTC" not in [x.symbol for x in candidates]
+
+
+# test that the candidates are added to the scheduler and the others retired, except the pinned and kept symbols
+def test_screener_updates_the_scheduler():
+    screener = _screener(top_k=2, pinned=["XRPBTC"])
+    scheduler = SymbolScheduler(lambda symbol: None, symbols=["XRPBTC", "ETHBTC", "LTCBTC"])
+    screener.rank(_market())
+    added, removed = screener.apply(scheduler, keep=lambda symbol: symbol == "LTCBTC")
+    assert added == ["AAABTC", "BBBBTC"]
+    assert removed == ["ETHBTC"]
+    assert scheduler.symbols == ["AAABTC", "BBBBTC", "LTCBTC", "XRPBTC"]
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+from app.binance.shared_book import SharedTickerBook
+from app.bot.sharding import ShardSupervisor, partition
+
+
+def _ticker(symbol: str, last_price: str) -> dict:
+    return {"symbol": symbol, "priceChange": "0.00000100", "priceChangePercent": "2.5", "weightedAvgPrice": last_price, "prevClosePrice": last_price,
+            "lastPrice": last_price, "bidPrice": last_price, "askPrice": last_price, "openPrice": last_price, "highPrice": last_price,
+            "lowPrice": last_price, "volume": "1000", "openTime": 1499783499040, "closeTime": 1499869899040}
+
+
+def crashing_shard(index, shards, symbols, book_name, book_symbols):
+    """
+    A shard that reads the prices of its symbols from the shared book, writes them down and crashes
+    """
+    book = SharedTickerBook.attach(book_name, book_symbols)
+    prices = " ".join(f"{symbol}={book.get_quote(symbol).last_price}" for symbol in symbols)
+    with open(os.environ["SHARD_TEST_OUTPUT"], "a") as f:
+        f.write(f"{index}/{shards} {prices}\n")
+    book.close()
+    sys.exit(1)
+
+
+def idle_feeder(book_name, symbols):
+    time.sleep(60)
+
+
+# test that the symbols are split evenly and completely
+def test_partition():
+    symbols = [f"S{i}BTC" for i in range(10)]
+    shards = partition(symbols, 3)
+    assert [len(x) for x in shards] == [4, 3, 3]
+    assert sorted(sum(shards, [])) == sorted(symbols)
+    assert partition(symbols, 1) == [symbols]
+
+
+# test that the shards read the shared book and are restarted after crashing
+def test_supervisor_restarts_crashed_shards(tmp_path, monkeypatch):
+    output = tmp_path / "shards.txt"
+    monkeypatch.setenv("SHARD_TEST_OUTPUT", str(output))
+    symbols = ["LTCBTC", "ETHBTC", "XRPBTC"]
+    supervisor = ShardSupervisor(symbols, shards=2, restart_delay=0.1, shard_target=crashing_shard, feeder_target=idle_feeder)
+    supervisor.book = SharedTickerBook.create(symbols)
+    supervisor.book.seed([_ticker("LTCBTC", "0.003581"), _ticker("ETHBTC", "0.06"), _ticker("XRPBTC", "0.00001")])
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 60
+        while min(supervisor.restarts[0], supervisor.restarts[1]) < 1 or len(output.read_text().splitlines() if output.exists() else []) < 4:
+            assert time.monotonic() < deadline, "timed out"
+            supervisor.check()
+            time.sleep(0.05)
+        assert supervisor.processes["feeder"].is_alive()
+    finally:
+        supervisor.stop()
+
+    lines = set(output.read_text().splitlines())
+    assert lines == {"0/2 LTCBTC=0.003581 XRPBTC=1e-05", "1/2 ETHBTC=0.06"}
+    assert supervisor.book is None
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from app.binance.quantize import SCALE, SymbolQuantizer
+from app.binance.trade_api import TickerBook, TradeApiFilters
+from app.bot.runner import is_buy_signal, calculate_buy_order, is_sell_signal
+from app.bot.signals import SignalEngine
+from config import Config as config
+
+
+def _ticker(symbol: str, last_price: str, change_percent: str) -> dict:
+    return {"symbol": symbol, "priceChange": "0", "priceChangePercent": change_percent, "weightedAvgPrice": last_price, "prevClosePrice": last_price,
+            "lastPrice": last_price, "bidPrice": last_price, "askPrice": last_price, "openPrice": last_price, "highPrice": last_price,
+            "lowPrice": last_price, "volume": "1000", "openTime": 0, "closeTime": 0}
+
+
+def _universe(size: int, seed: int):
+    """
+    It returns random tickers, entry prices and filters for `size` symbols
+    """
+    rng = np.random.default_rng(seed)
+    symbols = [f"S{i:04d}BTC" for i in range(size)]
+    last_prices = np.round(rng.uniform(0, 20, size), 8)
+    last_prices[:3] = [0.0, 0.01, 19.5]
+    changes = np.round(rng.uniform(-50, 300, size), 3)
+    tickers = [_ticker(symbol, f"{price:.8f}", f"{change:.3f}") for symbol, price, change in zip(symbols, last_prices, changes)]
+    entries = {symbol: float(f"{price * rng.uniform(0.8, 1.2):.8f}") for symbol, price in zip(symbols, last_prices) if rng.random() < 0.5}
+    filters = {symbol: TradeApiFilters(minPrice=rng.choice(["0.00000100", "0.00010000", "0.01000000"]), minQuantity="0.001")
+               for symbol in symbols}
+    return symbols, tickers, entries, filters
+
+
+# test that the vectorized pass and the per-symbol functions give identical decisions and prices
+@pytest.mark.parametrize("expected_change_buy, price_offset_percent", [(2, 0), (150, 0), (150, -0.5)])
+def test_signal_engine_matches_reference(monkeypatch, expected_change_buy, price_offset_percent):
+    monkeypatch.setattr(config, "expected_change_buy", expected_change_buy)
+    monkeypatch.setattr(config, "buy_price_offset_percent", price_offset_percent)
+    monkeypatch.setattr(config, "expected_change_sell", 10)
+    monkeypatch.setattr(config, "buy_quantity_btc", 0.0022)
+    symbols, tickers, entries, filters = _universe(2000, expected_change_buy)
+    book = TickerBook(tickers)
+
+    engine = SignalEngine(symbols)
+    engine.set_entries(entries)
+    for symbol, symbol_filters in filters.items():
+        engine.set_filters(symbol, symbol_filters)
+    signals = engine.evaluate(book)
+
+    buys = sells = 0
+    for i, symbol in enumerate(symbols):
+        ticker = book.get_ticker(symbol)
+        last_price, change = float(ticker.lastPrice), float(ticker.priceChangePercent)
+
+        assert signals.buy[i] == is_buy_signal(last_price, change)
+        if signals.buy[i]:
+            buys += 1
+            quantizer = SymbolQuantizer.from_filters(filters[symbol])
+            order = calculate_buy_order(last_price, quantizer)
+            # calculate_buy_order skips an order below the symbol filters, so its snapped price is compared instead
+            price = order.price if order is not None else quantizer.floor_price(last_price * (1 + config.buy_price_offset_percent / 100)) / SCALE
+            assert signals.buy_price[i] == price
+
+        if symbol in entries:
+            assert signals.sell[i] == is_sell_signal(last_price, entries[symbol])
+            sells += signals.sell[i]
+        else:
+            assert not signals.sell[i]
+
+    assert signals.buy_symbols() == [symbols[i] for i in range(len(symbols)) if signals.buy[i]]
+    assert sells > 0
+    assert buys > 0 if expected_change_buy == 150 else buys <= 1
+
+
+# test that a buy is priced at the offset from the last price, whatever the magnitude of the price
+@pytest.mark.parametrize("last_price, tick_size, expected", [(0.0358, "0.00000100", "0.035979"), (25000.0, "0.01000000", "25125.00")])
+def test_buy_order_price_offset(last_price, tick_size, expected):
+    quantizer = SymbolQuantizer(tick_size, "0.00001000")
+    order = calculate_buy_order(last_price, quantizer, buy_quantity=1000, price_offset_percent=0.5)
+    assert order.order_price == expected
+    assert calculate_buy_order(last_price, quantizer, buy_quantity=1000, price_offset_percent=0).price == last_price
+
+
+# test that symbols missing from the snapshot and per-symbol thresholds are handled
+def test_signal_engine_missing_symbols_and_thresholds():
+    engine = SignalEngine(["LTCBTC", "ETHBTC"], expected_change_buy=150, expected_change_sell=10)
+    engine.set_entry("LTCBTC", 1.0)
+    engine.set_entry("ETHBTC", 1.0)
+    book = TickerBook([_ticker("LTCBTC", "1.05000000", "200")])
+
+    signals = engine.evaluate(book)
+    assert signals.buy_symbols() == ["LTCBTC"]
+    assert signals.sell_symbols() == []
+    assert np.isnan(signals.buy_price[0])
+
+    engine.set_thresholds("LTCBTC", buy=250, sell=5)
+    engine.set_filters("LTCBTC", TradeApiFilters(minPrice="0.01", minQuantity="0.001"))
+    signals = engine.evaluate(book)
+    assert signals.buy_symbols() == []
+    assert signals.sell_symbols() == ["LTCBTC"]
+    assert signals.buy_price[0] == pytest.approx(1.05)
+    assert engine.add_symbol("LTCBTC") == 0
+    assert len(engine) == 2
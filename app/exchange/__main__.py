@@ -0,0 +1,3 @@
+from app.exchange.server import main
+
+main()
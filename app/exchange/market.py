@@ -0,0 +1,99 @@
+"""
+This module contains the SyntheticMarket class which generates pump and dump price paths for many symbols at once
+"""
+
+
+from typing import List, NamedTuple
+
+import numpy as np
+
+NORMAL, PUMP, DUMP = 0, 1, 2
+
+
+class MarketTick(NamedTuple):
+    """
+    The prices of every symbol over one tick, and over the rolling window the 24h statistics stand for
+    """
+
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    window_open: np.ndarray
+    window_high: np.ndarray
+    window_low: np.ndarray
+    window_volume: np.ndarray
+
+
+class SyntheticMarket:
+    """
+    Synthetic market of the simulated exchange
+
+    Every symbol follows a geometric random walk. Once in a while a symbol starts a pump with a strong
+    upward drift, which usually ends in a dump, before it goes back to a quiet walk. The paths of all
+    symbols are stepped together with NumPy, and a rolling window of `window` ticks stands in for the 24
+    hours of the ticker statistics.
+    """
+
+    def __init__(self, symbols: List[str], seed: int = 0, window: int = 600, volatility: float = 0.002,
+                 pump_probability: float = 0.001, pump_drift: float = 0.02, dump_drift: float = -0.02,
+                 regime_end_probability: float = 0.05):
+        """
+        :param symbols: The symbols of the market
+        :param seed: The seed of the paths
+        :param window: The number of ticks of the rolling statistics
+        :param volatility: The standard deviation of a quiet tick's return
+        :param pump_probability: The chance a quiet symbol starts pumping on a tick
+        :param pump_drift: The mean return of a pumping tick
+        :param dump_drift: The mean return of a dumping tick
+        :param regime_end_probability: The chance a pump turns into a dump, or a dump ends, on a tick
+        """
+        self.symbols = list(symbols)
+        self.window = window
+        self.volatility = volatility
+        self.pump_probability = pump_probability
+        self.drifts = np.array([0.0, pump_drift, dump_drift])
+        self.regime_end_probability = regime_end_probability
+        self._random = np.random.default_rng(seed)
+        count = len(self.symbols)
+        self.close = 10 ** self._random.uniform(-5, 0, count)
+        self.regime = np.zeros(count, dtype=np.int8)
+        self.ticks = 0
+        self._closes = np.tile(self.close, (window, 1))
+        self._highs = self._closes.copy()
+        self._lows = self._closes.copy()
+        self._volumes = np.zeros((window, count))
+
+    def step(self) -> MarketTick:
+        """
+        It moves every symbol by one tick
+
+        :return: The MarketTick of the step.
+        """
+        count = len(self.symbols)
+        roll = self._random.random(count)
+        regime = self.regime
+        ends = roll < self.regime_end_probability
+        # a pump ends in a dump, a dump ends in a quiet walk, and a quiet symbol may start pumping
+        regime = np.where((regime == PUMP) & ends, DUMP, np.where((regime == DUMP) & ends, NORMAL, regime))
+        regime = np.where((regime == NORMAL) & (roll > 1 - self.pump_probability), PUMP, regime).astype(np.int8)
+        self.regime = regime
+
+        volatility = self.volatility * np.where(regime == NORMAL, 1.0, 3.0)
+        returns = self.drifts[regime] + volatility * self._random.standard_normal(count)
+        open_ = self.close
+        close = open_ * np.exp(returns)
+        spread = np.abs(volatility * self._random.standard_normal(count))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = self._random.gamma(2.0, 50.0, count) * np.where(regime == NORMAL, 1.0, 10.0)
+        self.close = close
+
+        slot = self.ticks % self.window
+        self._closes[slot], self._highs[slot], self._lows[slot], self._volumes[slot] = close, high, low, volume
+        self.ticks += 1
+        # the oldest close of the window is the open of the 24h statistics
+        window_open = self._closes[self.ticks % self.window]
+        return MarketTick(open_, high, low, close, volume, window_open, self._highs.max(axis=0), self._lows.min(axis=0),
+                          self._volumes.sum(axis=0))
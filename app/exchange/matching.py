@@ -0,0 +1,205 @@
+"""
+This module contains the OrderBook class which keeps the resting limit orders of a symbol and matches
+them with price-time priority
+"""
+
+
+import heapq
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from app.binance.quantize import SCALE
+
+BUY = "BUY"
+SELL = "SELL"
+
+# the statuses an order leaves the book with
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED"}
+
+
+class BookOrder:
+    """
+    A limit order of the simulated exchange, prices and quantities in 1e-8 units
+    """
+
+    __slots__ = ("order_id", "client_order_id", "symbol", "side", "price", "quantity", "executed", "quote", "status",
+                 "time_in_force", "time", "update_time")
+
+    def __init__(self, order_id: int, client_order_id: str, symbol: str, side: str, price: int, quantity: int,
+                 time_in_force: str = "GTC", time: int = 0):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.executed = 0
+        # the executed quantity times the execution prices, in 1e-8 units of the quote asset
+        self.quote = 0
+        self.status = "NEW"
+        self.time_in_force = time_in_force
+        self.time = time
+        self.update_time = time
+
+    @property
+    def remaining(self) -> int:
+        """
+        It returns the quantity left to execute
+        """
+        return self.quantity - self.executed
+
+    def fill(self, price: int, quantity: int):
+        """
+        It executes part of the order at a price
+        """
+        self.executed += quantity
+        self.quote += price * quantity // SCALE
+        self.status = "FILLED" if self.executed >= self.quantity else "PARTIALLY_FILLED"
+
+
+class Execution(NamedTuple):
+    """
+    A fill of an order, `maker` is True when the order was resting in the book
+    """
+
+    order: BookOrder
+    price: int
+    quantity: int
+    maker: bool
+
+
+class OrderBook:
+    """
+    Order book of the simulated exchange
+
+    Each side keeps a FIFO queue of orders per price level and a heap of its prices. An incoming order
+    executes against the best levels of the other side while they cross its price, oldest order
+    first, at the price of the resting order. Emptied levels are dropped from the heaps lazily.
+    """
+
+    def __init__(self, symbol: str):
+        """
+        :param symbol: The symbol of the book
+        """
+        self.symbol = symbol
+        self.orders: Dict[int, BookOrder] = {}
+        self._levels: Dict[str, Dict[int, Deque[BookOrder]]] = {BUY: {}, SELL: {}}
+        # bids are kept negated so both heaps pop the best price first
+        self._prices: Dict[str, List[int]] = {BUY: [], SELL: []}
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def _best(self, side: str) -> Optional[int]:
+        prices, levels = self._prices[side], self._levels[side]
+        while prices:
+            price = -prices[0] if side == BUY else prices[0]
+            if levels.get(price):
+                return price
+            heapq.heappop(prices)
+            levels.pop(price, None)
+        return None
+
+    @property
+    def best_bid(self) -> Optional[int]:
+        """
+        It returns the highest resting buy price, or None
+        """
+        return self._best(BUY)
+
+    @property
+    def best_ask(self) -> Optional[int]:
+        """
+        It returns the lowest resting sell price, or None
+        """
+        return self._best(SELL)
+
+    def rest(self, order: BookOrder):
+        """
+        It appends an order to the queue of its price level without matching it
+        """
+        levels = self._levels[order.side]
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = deque()
+            heapq.heappush(self._prices[order.side], -order.price if order.side == BUY else order.price)
+        level.append(order)
+        self.orders[order.order_id] = order
+
+    def _match(self, side: str, limit: Optional[int], quantity: int, taker: Optional[BookOrder]) -> List[Execution]:
+        """
+        It executes up to quantity against the resting orders of the other side of `side` that cross limit
+        """
+        maker_side = SELL if side == BUY else BUY
+        levels = self._levels[maker_side]
+        executions: List[Execution] = []
+        while quantity > 0:
+            price = self._best(maker_side)
+            if price is None or (limit is not None and (price > limit if side == BUY else price < limit)):
+                break
+            level = levels[price]
+            while level and quantity > 0:
+                maker = level[0]
+                size = min(quantity, maker.remaining)
+                maker.fill(price, size)
+                executions.append(Execution(maker, price, size, True))
+                if taker is not None:
+                    taker.fill(price, size)
+                    executions.append(Execution(taker, price, size, False))
+                quantity -= size
+                if maker.remaining <= 0:
+                    level.popleft()
+                    del self.orders[maker.order_id]
+        return executions
+
+    def match(self, order: BookOrder) -> List[Execution]:
+        """
+        It executes an incoming limit order against the resting orders it crosses
+
+        :param order: The new order
+        :return: The executions of the order and of the resting orders it matched, in order.
+        """
+        return self._match(order.side, order.price, order.remaining, order)
+
+    def add(self, order: BookOrder) -> List[Execution]:
+        """
+        It matches an incoming limit order and rests what is left of a GTC order
+
+        :param order: The new order
+        :return: The executions of the order and of the resting orders it matched, in order.
+        """
+        executions = self.match(order)
+        if order.remaining > 0:
+            if order.time_in_force == "GTC":
+                self.rest(order)
+            else:
+                order.status = "EXPIRED"
+        return executions
+
+    def cancel(self, order_id: int) -> Optional[BookOrder]:
+        """
+        It removes a resting order from the book
+
+        :param order_id: The id of the order
+        :return: The cancelled order, or None if it is not resting in the book.
+        """
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        level = self._levels[order.side].get(order.price)
+        if level is not None:
+            level.remove(order)
+        order.status = "CANCELED"
+        return order
+
+    def sweep(self, side: str, limit: int, quantity: int) -> List[Execution]:
+        """
+        It executes an order of another participant against the resting orders, e.g. the flow of the
+        synthetic market hitting every bid at or above the low of a tick
+
+        :param side: The side of the incoming flow, SELL hits the bids
+        :param limit: The worst price the flow trades at
+        :param quantity: The quantity of the flow
+        :return: The executions of the resting orders.
+        """
+        return self._match(side, limit, quantity, None)
@@ -0,0 +1,315 @@
+"""
+This module contains the SimulatorServer class which serves an ExchangeSimulator over the Binance REST
+endpoints and websocket streams the bot uses, so the whole bot can run against it
+"""
+
+
+import argparse
+import asyncio
+import logging
+import secrets
+from threading import Event, Thread
+from typing import Dict, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+from app.exchange.simulator import ExchangeError, ExchangeSimulator
+
+try:
+    import orjson
+
+    def dumps(data) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    # orjson is optional, the json module encodes the same objects
+    import json
+
+    def dumps(data) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+
+class SimulatorServer:
+    """
+    HTTP and websocket server of an ExchangeSimulator
+
+    The REST endpoints live under /api/v3 and answer in the formats of Binance, errors included. The
+    combined market streams are served on /stream?streams=... and the user data stream on
+    /ws/<listenKey>. A background task ticks the market every `tick_interval` seconds. Signatures
+    are not verified, only the timestamps of the signed requests.
+    """
+
+    def __init__(self, simulator: ExchangeSimulator, host: str = "127.0.0.1", port: int = 0, tick_interval: float = 1.0):
+        """
+        :param simulator: The simulated exchange
+        :param host: The host to listen on
+        :param port: The port to listen on, 0 picks a free one
+        :param tick_interval: The seconds between two market ticks
+        """
+        self.simulator = simulator
+        self.host = host
+        self.port = port
+        self.tick_interval = tick_interval
+        self.listen_keys: Set[str] = set()
+        self._market_queues: Dict[asyncio.Queue, Optional[Set[str]]] = {}
+        self._user_queues: Dict[asyncio.Queue, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._tick_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        simulator.market_listeners.append(self._on_market)
+        simulator.user_listeners.append(self._on_user)
+
+    @property
+    def url(self) -> str:
+        """
+        It returns the base url of the REST endpoints, e.g. for config.api_url
+        """
+        return f"http://{self.host}:{self.port}/api"
+
+    @property
+    def stream_url(self) -> str:
+        """
+        It returns the base url of the streams, e.g. for config.stream_url
+        """
+        return f"ws://{self.host}:{self.port}"
+
+    def app(self) -> web.Application:
+        """
+        It returns the aiohttp application of the exchange
+        """
+        app = web.Application(middlewares=[self._errors])
+        app.add_routes([
+            web.get("/api/v3/ping", self._ping),
+            web.get("/api/v3/time", self._time),
+            web.get("/api/v3/exchangeInfo", self._exchange_info),
+            web.get("/api/v3/ticker/24hr", self._ticker),
+            web.get("/api/v3/order", self._get_order),
+            web.post("/api/v3/order", self._place_order),
+            web.delete("/api/v3/order", self._cancel_order),
+            web.get("/api/v3/openOrders", self._open_orders),
+            web.post("/api/v3/userDataStream", self._new_listen_key),
+            web.put("/api/v3/userDataStream", self._keepalive_listen_key),
+            web.delete("/api/v3/userDataStream", self._close_listen_key),
+            web.get("/stream", self._market_stream),
+            web.get("/ws/{listen_key}", self._user_stream),
+        ])
+        return app
+
+    # REST
+
+    @web.middleware
+    async def _errors(self, request: web.Request, handler):
+        try:
+            return await handler(request)
+        except ExchangeError as e:
+            return web.Response(text=dumps({"code": e.code, "msg": e.message}), status=e.status, content_type="application/json")
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        return params
+
+    async def _signed_params(self, request: web.Request) -> dict:
+        params = await self._params(request)
+        self.simulator.check_timestamp(params)
+        return params
+
+    @staticmethod
+    def _json(data) -> web.Response:
+        return web.Response(text=dumps(data), content_type="application/json")
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        return self._json({})
+
+    async def _time(self, request: web.Request) -> web.Response:
+        return self._json({"serverTime": self.simulator.now()})
+
+    async def _exchange_info(self, request: web.Request) -> web.Response:
+        return self._json(self.simulator.exchange_info())
+
+    async def _ticker(self, request: web.Request) -> web.Response:
+        return self._json(self.simulator.ticker(request.query.get("symbol")))
+
+    async def _get_order(self, request: web.Request) -> web.Response:
+        return self._json(self.simulator.get_order(await self._signed_params(request)))
+
+    async def _place_order(self, request: web.Request) -> web.Response:
+        return self._json(self.simulator.place_order(await self._signed_params(request)))
+
+    async def _cancel_order(self, request: web.Request) -> web.Response:
+        return self._json(self.simulator.cancel_order(await self._signed_params(request)))
+
+    async def _open_orders(self, request: web.Request) -> web.Response:
+        params = await self._signed_params(request)
+        return self._json(self.simulator.open_orders(params.get("symbol")))
+
+    async def _new_listen_key(self, request: web.Request) -> web.Response:
+        listen_key = secrets.token_urlsafe(45)
+        self.listen_keys.add(listen_key)
+        return self._json({"listenKey": listen_key})
+
+    async def _keepalive_listen_key(self, request: web.Request) -> web.Response:
+        if (await self._params(request)).get("listenKey") not in self.listen_keys:
+            raise ExchangeError(-1125, "This listenKey does not exist.")
+        return self._json({})
+
+    async def _close_listen_key(self, request: web.Request) -> web.Response:
+        self.listen_keys.discard((await self._params(request)).get("listenKey"))
+        return self._json({})
+
+    # streams
+
+    def _on_market(self, events: List[dict]):
+        if not self._market_queues:
+            return
+        if events and events[0]["e"] == "24hrMiniTicker":
+            for queue, streams in self._market_queues.items():
+                if streams is None or "!miniTicker@arr" in streams:
+                    queue.put_nowait({"stream": "!miniTicker@arr", "data": events})
+                for stream in streams or ():
+                    if stream.endswith("@ticker") and stream[:-7].upper() in self.simulator.books:
+                        queue.put_nowait({"stream": stream, "data": self.simulator.ticker_event(stream[:-7].upper())})
+            return
+        for queue, streams in self._market_queues.items():
+            for event in events:
+                stream = f"{event['s'].lower()}@trade"
+                if streams is None or stream in streams:
+                    queue.put_nowait({"stream": stream, "data": event})
+
+    def _on_user(self, event: dict):
+        for queue in self._user_queues:
+            queue.put_nowait(event)
+
+    async def _forward(self, request: web.Request, queue: asyncio.Queue) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        async def send():
+            while True:
+                await ws.send_str(dumps(await queue.get()))
+
+        sender = asyncio.ensure_future(send())
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            sender.cancel()
+        return ws
+
+    async def _market_stream(self, request: web.Request) -> web.WebSocketResponse:
+        streams = request.query.get("streams")
+        queue: asyncio.Queue = asyncio.Queue()
+        self._market_queues[queue] = set(streams.split("/")) if streams else None
+        try:
+            return await self._forward(request, queue)
+        finally:
+            del self._market_queues[queue]
+
+    async def _user_stream(self, request: web.Request) -> web.WebSocketResponse:
+        listen_key = request.match_info["listen_key"]
+        if listen_key not in self.listen_keys:
+            raise web.HTTPBadRequest(text=dumps({"code": -1125, "msg": "This listenKey does not exist."}))
+        queue: asyncio.Queue = asyncio.Queue()
+        self._user_queues[queue] = listen_key
+        try:
+            return await self._forward(request, queue)
+        finally:
+            del self._user_queues[queue]
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                self.simulator.tick()
+            except Exception:
+                logging.exception("Could not tick the simulated market")
+
+    # lifecycle
+
+    async def serve(self):
+        """
+        It starts serving on the event loop of the caller, the port is known once it returns
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        if self.tick_interval > 0:
+            self._tick_task = asyncio.ensure_future(self._tick())
+
+    async def shutdown(self):
+        """
+        It stops the market ticks and the server
+        """
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def start(self) -> "SimulatorServer":
+        """
+        It serves the exchange from a background thread with its own event loop, e.g. for the tests
+        """
+        started = Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.shutdown())
+            self._loop.close()
+
+        self._thread = Thread(target=run, name="exchange-simulator", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def call(self, function, *args):
+        """
+        It runs a function of the simulator on the server loop, e.g. to tick it from a test
+        """
+        future = asyncio.run_coroutine_threadsafe(self._run(function, *args), self._loop)
+        return future.result()
+
+    @staticmethod
+    async def _run(function, *args):
+        return function(*args)
+
+    def stop(self):
+        """
+        It stops the background thread of `start`
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a simulated Binance exchange for load testing the bot")
+    parser.add_argument("--symbols", type=int, default=1000, help="The number of simulated symbols")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tick-interval", type=float, default=1.0, help="The seconds between two market ticks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clock-offset", type=int, default=0, help="The milliseconds the exchange clock is ahead")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = ExchangeSimulator([f"S{i:04d}BTC" for i in range(args.symbols)], seed=args.seed, clock_offset_ms=args.clock_offset)
+    server = SimulatorServer(simulator, args.host, args.port, args.tick_interval)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.serve())
+    logging.info(f"Simulated exchange on API_URL={server.url} STREAM_URL={server.stream_url}")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.shutdown())
+        loop.close()
@@ -0,0 +1,321 @@
+"""
+This module contains the ExchangeSimulator class which ties the synthetic market and the order books of
+the simulated exchange together and answers in the formats of the Binance REST and stream APIs
+"""
+
+
+import time
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.binance.quantize import SCALE, SymbolQuantizer, format_units, to_units
+from app.exchange.market import MarketTick, SyntheticMarket
+from app.exchange.matching import BUY, SELL, BookOrder, Execution, OrderBook
+
+
+class ExchangeError(Exception):
+    """
+    An error the exchange answers a request with, `code` is the Binance error code
+    """
+
+    def __init__(self, code: int, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def symbol_info(symbol: str, quote_asset: str = "BTC") -> dict:
+    """
+    It returns the exchange info of a simulated symbol
+    """
+    return {"symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-len(quote_asset)], "baseAssetPrecision": 8,
+            "quoteAsset": quote_asset, "quotePrecision": 8, "orderTypes": ["LIMIT"], "icebergAllowed": True,
+            "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.00000001", "maxPrice": "1000.00000000", "tickSize": "0.00000001"},
+                        {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "9000000.00000000", "stepSize": "0.00100000"},
+                        {"filterType": "MIN_NOTIONAL", "minNotional": "0.00010000", "applyToMarket": True, "avgPriceMins": 5}]}
+
+
+def format_array(values: np.ndarray) -> List[str]:
+    """
+    It formats an array of prices or quantities as 8 decimal strings
+    """
+    return ["%.8f" % x for x in values.tolist()]
+
+
+class ExchangeSimulator:
+    """
+    Exchange simulator for load testing the bot
+
+    Prices come from a SyntheticMarket. An incoming limit order first matches the resting orders of its
+    symbol, then the synthetic liquidity quoted `spread` around the last price, and rests in the book
+    otherwise. On every tick the synthetic flow sweeps the resting orders its range crossed, up to the
+    volume of the tick, so orders fill partially and in price-time order. Execution reports go to the
+    user listeners and ticker and trade events to the market listeners.
+    """
+
+    def __init__(self, symbols: Iterable[str], seed: int = 0, spread: float = 0.001, clock_offset_ms: int = 0, **market_params):
+        """
+        :param symbols: The symbols of the exchange
+        :param seed: The seed of the synthetic market
+        :param spread: The relative spread of the synthetic liquidity around the last price
+        :param clock_offset_ms: The milliseconds the exchange clock is ahead of the local clock
+        :param market_params: The parameters of the SyntheticMarket
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.market = SyntheticMarket(self.symbols, seed=seed, **market_params)
+        self.spread = spread
+        self.clock_offset_ms = clock_offset_ms
+        self.books: Dict[str, OrderBook] = {symbol: OrderBook(symbol) for symbol in self.symbols}
+        self.infos: Dict[str, dict] = {symbol: symbol_info(symbol) for symbol in self.symbols}
+        self.quantizers: Dict[str, SymbolQuantizer] = {s: SymbolQuantizer.from_symbol_info(x) for s, x in self.infos.items()}
+        self.orders: Dict[int, BookOrder] = {}
+        self.user_listeners: List[Callable[[dict], None]] = []
+        self.market_listeners: List[Callable[[List[dict]], None]] = []
+        self.orders_placed = 0
+        self.executions = 0
+        self._order_ids = count(1)
+        self._trade_ids = count(1)
+        self._last: MarketTick = self.market.step()
+
+    def now(self) -> int:
+        """
+        It returns the exchange time in milliseconds
+        """
+        return int(time.time() * 1000) + self.clock_offset_ms
+
+    def check_timestamp(self, params: dict):
+        """
+        It rejects a signed request whose timestamp is outside its recvWindow, as the exchange does
+        """
+        if "timestamp" not in params:
+            raise ExchangeError(-1102, "Mandatory parameter 'timestamp' was not sent, was empty/null, or malformed.")
+        timestamp, now = int(params["timestamp"]), self.now()
+        if timestamp > now + 1000 or now - timestamp > int(params.get("recvWindow", 5000)):
+            raise ExchangeError(-1021, "Timestamp for this request is outside of the recvWindow.")
+
+    def _symbol(self, params: dict) -> str:
+        symbol = params.get("symbol")
+        if symbol not in self.books:
+            raise ExchangeError(-1121, "Invalid symbol.")
+        return symbol
+
+    def _price(self, symbol: str) -> float:
+        return float(self._last.close[self.index[symbol]])
+
+    # REST
+
+    def exchange_info(self) -> dict:
+        return {"timezone": "UTC", "serverTime": self.now(), "rateLimits": [], "exchangeFilters": [], "symbols": list(self.infos.values())}
+
+    def ticker(self, symbol: Optional[str] = None):
+        """
+        It returns the 24hr ticker of a symbol, or of every symbol
+        """
+        if symbol is not None:
+            return self._tickers([self.index[self._symbol({"symbol": symbol})]])[0]
+        return self._tickers(range(len(self.symbols)))
+
+    def _tickers(self, indexes: Iterable[int]) -> List[dict]:
+        tick, now = self._last, self.now()
+        tickers = []
+        for i in indexes:
+            last, open_ = float(tick.close[i]), float(tick.window_open[i])
+            spread = last * self.spread / 2
+            tickers.append({
+                "symbol": self.symbols[i], "priceChange": f"{last - open_:.8f}", "priceChangePercent": f"{(last / open_ - 1) * 100:.3f}",
+                "weightedAvgPrice": f"{last:.8f}", "prevClosePrice": f"{open_:.8f}", "lastPrice": f"{last:.8f}", "lastQty": "1.00000000",
+                "bidPrice": f"{last - spread:.8f}", "bidQty": "100.00000000", "askPrice": f"{last + spread:.8f}", "askQty": "100.00000000",
+                "openPrice": f"{open_:.8f}", "highPrice": f"{float(tick.window_high[i]):.8f}", "lowPrice": f"{float(tick.window_low[i]):.8f}",
+                "volume": f"{float(tick.window_volume[i]):.8f}", "quoteVolume": f"{float(tick.window_volume[i]) * last:.8f}",
+                "openTime": now - 86400000, "closeTime": now, "firstId": 1, "lastId": self.market.ticks, "count": self.market.ticks,
+            })
+        return tickers
+
+    def order_response(self, order: BookOrder) -> dict:
+        """
+        It returns an order in the format of the GET order endpoint
+        """
+        return {"symbol": order.symbol, "orderId": order.order_id, "orderListId": -1, "clientOrderId": order.client_order_id,
+                "price": format_units(order.price), "origQty": format_units(order.quantity), "executedQty": format_units(order.executed),
+                "cummulativeQuoteQty": format_units(order.quote), "status": order.status,
+                "timeInForce": order.time_in_force, "type": "LIMIT", "side": order.side, "stopPrice": "0.00000000",
+                "icebergQty": "0.00000000", "time": order.time, "updateTime": order.update_time, "isWorking": True,
+                "origQuoteOrderQty": "0.00000000"}
+
+    def place_order(self, params: dict) -> dict:
+        """
+        It validates and places a limit order
+
+        :param params: The parameters of the POST order request
+        :return: The FULL order response.
+        """
+        symbol = self._symbol(params)
+        side = params.get("side")
+        if side not in (BUY, SELL):
+            raise ExchangeError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if params.get("type", "LIMIT") != "LIMIT":
+            raise ExchangeError(-1116, "Invalid orderType.")
+        try:
+            price, quantity = to_units(str(params["price"])), to_units(str(params["quantity"]))
+        except (KeyError, ValueError):
+            raise ExchangeError(-1102, "Mandatory parameter 'price' or 'quantity' was not sent, was empty/null, or malformed.")
+        quantizer = self.quantizers[symbol]
+        if price % quantizer.tick_units or price < quantizer.min_price_units:
+            raise ExchangeError(-1013, "Filter failure: PRICE_FILTER")
+        if quantity % quantizer.step_units or quantity < quantizer.min_quantity_units:
+            raise ExchangeError(-1013, "Filter failure: LOT_SIZE")
+        if price * quantity < quantizer.min_notional_units * SCALE:
+            raise ExchangeError(-1013, "Filter failure: MIN_NOTIONAL")
+
+        now = self.now()
+        order = BookOrder(next(self._order_ids), params.get("newClientOrderId") or f"sim{self.orders_placed}", symbol, side, price, quantity,
+                          params.get("timeInForce", "GTC"), now)
+        self.orders[order.order_id] = order
+        self.orders_placed += 1
+        self._report(order, "NEW", None, now)
+
+        book = self.books[symbol]
+        executions = book.match(order)
+        executions += self._take_liquidity(order)
+        if order.remaining > 0:
+            if order.time_in_force == "GTC":
+                book.rest(order)
+            else:
+                order.status = "EXPIRED"
+        self._publish(symbol, executions, now)
+
+        response = self.order_response(order)
+        response["transactTime"] = now
+        response["fills"] = [{"price": format_units(x.price), "qty": format_units(x.quantity), "commission": "0.00000000",
+                              "commissionAsset": "BNB", "tradeId": 0} for x in executions if x.order is order]
+        return response
+
+    def _take_liquidity(self, order: BookOrder) -> List[Execution]:
+        """
+        It fills what is left of an order against the synthetic liquidity when it crosses the quotes
+        """
+        if order.remaining <= 0:
+            return []
+        last = self._price(order.symbol)
+        quantizer = self.quantizers[order.symbol]
+        if order.side == BUY:
+            quote = -(-to_units(last * (1 + self.spread / 2)) // quantizer.tick_units) * quantizer.tick_units
+            crosses = order.price >= quote
+        else:
+            quote = to_units(last * (1 - self.spread / 2)) // quantizer.tick_units * quantizer.tick_units
+            crosses = order.price <= quote
+        if not crosses:
+            return []
+        size = order.remaining
+        order.fill(quote, size)
+        return [Execution(order, quote, size, False)]
+
+    def cancel_order(self, params: dict) -> dict:
+        """
+        It cancels an open order
+
+        :param params: The parameters of the DELETE order request
+        :return: The cancelled order.
+        """
+        symbol = self._symbol(params)
+        order = self._find(params)
+        if order.symbol != symbol or self.books[symbol].cancel(order.order_id) is None:
+            raise ExchangeError(-2011, "Unknown order sent.")
+        order.update_time = self.now()
+        self._report(order, "CANCELED", None, order.update_time)
+        return self.order_response(order)
+
+    def _find(self, params: dict) -> BookOrder:
+        order = None
+        if params.get("orderId") is not None:
+            order = self.orders.get(int(params["orderId"]))
+        elif params.get("origClientOrderId"):
+            order = next((x for x in self.orders.values() if x.client_order_id == params["origClientOrderId"]), None)
+        if order is None or order.symbol != params.get("symbol"):
+            raise ExchangeError(-2013, "Order does not exist.")
+        return order
+
+    def get_order(self, params: dict) -> dict:
+        """
+        It returns an order of the account
+        """
+        self._symbol(params)
+        return self.order_response(self._find(params))
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[dict]:
+        """
+        It returns the open orders of a symbol, or of the account
+        """
+        books = [self.books[self._symbol({"symbol": symbol})]] if symbol else self.books.values()
+        return [self.order_response(order) for book in books for order in book.orders.values()]
+
+    # market
+
+    def tick(self):
+        """
+        It moves the synthetic market by one tick, sweeps the resting orders the tick's range crossed
+        and publishes the ticker and trade events
+        """
+        tick = self._last = self.market.step()
+        now = self.now()
+        for symbol, book in self.books.items():
+            if not book.orders:
+                continue
+            i = self.index[symbol]
+            volume = to_units(float(tick.volume[i]))
+            # the flow of the tick sells down to its low and buys up to its high
+            executions = book.sweep(SELL, to_units(float(tick.low[i])), volume)
+            executions += book.sweep(BUY, to_units(float(tick.high[i])), volume)
+            self._publish(symbol, executions, now)
+
+        if self.market_listeners:
+            events = self._ticker_events(now)
+            for listener in self.market_listeners:
+                listener(events)
+
+    def _ticker_events(self, now: int) -> List[dict]:
+        tick = self._last
+        close, window_open = format_array(tick.close), format_array(tick.window_open)
+        high, low, volume = format_array(tick.window_high), format_array(tick.window_low), format_array(tick.window_volume)
+        return [{"e": "24hrMiniTicker", "E": now, "s": symbol, "c": close[i], "o": window_open[i], "h": high[i], "l": low[i],
+                 "v": volume[i], "q": "0.00000000"} for i, symbol in enumerate(self.symbols)]
+
+    def ticker_event(self, symbol: str) -> dict:
+        """
+        It returns the `24hrTicker` stream event of a symbol
+        """
+        ticker = self.ticker(symbol)
+        return {"e": "24hrTicker", "E": ticker["closeTime"], "s": symbol, "p": ticker["priceChange"], "P": ticker["priceChangePercent"],
+                "w": ticker["weightedAvgPrice"], "x": ticker["prevClosePrice"], "c": ticker["lastPrice"], "Q": ticker["lastQty"],
+                "b": ticker["bidPrice"], "B": ticker["bidQty"], "a": ticker["askPrice"], "A": ticker["askQty"], "o": ticker["openPrice"],
+                "h": ticker["highPrice"], "l": ticker["lowPrice"], "v": ticker["volume"], "q": ticker["quoteVolume"],
+                "O": ticker["openTime"], "C": ticker["closeTime"], "F": ticker["firstId"], "L": ticker["lastId"], "n": ticker["count"]}
+
+    def _publish(self, symbol: str, executions: List[Execution], now: int):
+        for execution in executions:
+            order = execution.order
+            order.update_time = now
+            self.executions += 1
+            self._report(order, "TRADE", execution, now)
+            if execution.maker or not any(x.maker for x in executions):
+                trade = {"e": "trade", "E": now, "s": symbol, "t": next(self._trade_ids), "p": format_units(execution.price),
+                         "q": format_units(execution.quantity), "b": 0, "a": 0, "T": now, "m": execution.maker, "M": True}
+                for listener in self.market_listeners:
+                    listener([trade])
+
+    def _report(self, order: BookOrder, execution_type: str, execution: Optional[Execution], now: int):
+        if not self.user_listeners:
+            return
+        event = {"e": "executionReport", "E": now, "s": order.symbol, "c": order.client_order_id, "S": order.side, "o": "LIMIT",
+                 "f": order.time_in_force, "q": format_units(order.quantity), "p": format_units(order.price), "P": "0.00000000",
+                 "F": "0.00000000", "g": -1, "C": "", "x": execution_type, "X": order.status, "r": "NONE", "i": order.order_id,
+                 "l": format_units(execution.quantity) if execution else "0.00000000", "z": format_units(order.executed),
+                 "L": format_units(execution.price) if execution else "0.00000000", "n": "0", "N": None, "T": now, "t": -1,
+                 "I": 0, "w": order.order_id in self.books[order.symbol].orders, "m": bool(execution and execution.maker), "M": False,
+                 "O": order.time, "Z": format_units(order.quote), "Y": "0.00000000", "Q": "0.00000000"}
+        for listener in self.user_listeners:
+            listener(event)
@@ -0,0 +1,63 @@
+from app.binance.quantize import to_units
+from app.exchange.matching import BUY, SELL, BookOrder, OrderBook
+
+
+def _order(order_id: int, side: str, price: str, quantity: str, time_in_force: str = "GTC") -> BookOrder:
+    return BookOrder(order_id, f"c{order_id}", "ABCBTC", side, to_units(price), to_units(quantity), time_in_force)
+
+
+def test_price_time_priority():
+    book = OrderBook("ABCBTC")
+    first, second, better = _order(1, SELL, "0.002", "1"), _order(2, SELL, "0.002", "1"), _order(3, SELL, "0.001", "1")
+    for order in (first, second, better):
+        assert book.add(order) == []
+    assert book.best_ask == to_units("0.001")
+
+    taker = _order(4, BUY, "0.002", "2.5")
+    executions = book.add(taker)
+
+    makers = [(x.order.order_id, x.price, x.quantity) for x in executions if x.maker]
+    assert makers == [(3, to_units("0.001"), to_units("1")), (1, to_units("0.002"), to_units("1")),
+                      (2, to_units("0.002"), to_units("0.5"))]
+    assert taker.status == "FILLED"
+    assert taker.quote == to_units("0.001") + to_units("0.002") + to_units("0.001")
+    assert second.status == "PARTIALLY_FILLED" and second.remaining == to_units("0.5")
+    assert list(book.orders) == [2]
+
+
+def test_unfilled_remainder_rests_or_expires():
+    book = OrderBook("ABCBTC")
+    book.add(_order(1, SELL, "0.002", "1"))
+
+    gtc = _order(2, BUY, "0.002", "3")
+    book.add(gtc)
+    assert gtc.status == "PARTIALLY_FILLED" and book.best_bid == to_units("0.002")
+
+    ioc = _order(3, SELL, "0.001", "5", "IOC")
+    book.add(ioc)
+    assert ioc.status == "EXPIRED" and ioc.executed == to_units("2")
+    assert book.best_bid is None and 3 not in book.orders
+
+
+def test_cancel():
+    book = OrderBook("ABCBTC")
+    order = _order(1, BUY, "0.001", "1")
+    book.add(order)
+
+    assert book.cancel(1) is order and order.status == "CANCELED"
+    assert book.cancel(1) is None
+    assert book.best_bid is None
+
+
+def test_sweep_fills_crossed_orders_up_to_the_quantity():
+    book = OrderBook("ABCBTC")
+    high, low = _order(1, BUY, "0.003", "1"), _order(2, BUY, "0.001", "1")
+    book.add(high)
+    book.add(low)
+
+    executions = book.sweep(SELL, to_units("0.002"), to_units("5"))
+    assert [x.order for x in executions] == [high]
+    assert high.status == "FILLED" and low.status == "NEW"
+
+    book.sweep(SELL, to_units("0.001"), to_units("0.4"))
+    assert low.status == "PARTIALLY_FILLED" and low.executed == to_units("0.4")
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+import websockets
+from binance.exceptions import BinanceAPIException
+
+from app.binance.fast_json import FastJsonClient
+from app.binance.quantize import to_units
+from app.binance.trade_api import TradeAPI
+from app.exchange.server import SimulatorServer
+from app.exchange.simulator import ExchangeSimulator
+from config import Config as config
+
+SYMBOLS = ["AAABTC", "BBBBTC"]
+
+
+@pytest.fixture
+def server():
+    server = SimulatorServer(ExchangeSimulator(SYMBOLS, seed=1), tick_interval=0).start()
+    yield server
+    server.stop()
+
+
+def _price(simulator: ExchangeSimulator, symbol: str, factor: float) -> str:
+    return f"{float(simulator.ticker(symbol)['lastPrice']) * factor:.8f}"
+
+
+def test_resting_order_fills_as_the_market_trades_through_it():
+    simulator = ExchangeSimulator(["AAABTC"], seed=1, volatility=0.05)
+    reports = []
+    simulator.user_listeners.append(reports.append)
+    order = simulator.place_order({"symbol": "AAABTC", "side": "BUY", "type": "LIMIT", "timeInForce": "GTC",
+                                   "price": _price(simulator, "AAABTC", 0.9), "quantity": "1.000"})
+    assert order["status"] == "NEW" and order["fills"] == []
+
+    for _ in range(1000):
+        simulator.tick()
+        if not simulator.books["AAABTC"].orders:
+            break
+    assert simulator.get_order({"symbol": "AAABTC", "orderId": order["orderId"]})["status"] == "FILLED"
+    assert [x["x"] for x in reports][0] == "NEW" and reports[-1]["X"] == "FILLED"
+    assert sum(to_units(x["l"]) for x in reports) == to_units("1")
+
+
+def test_rest_endpoints_through_the_binance_client(server):
+    client = FastJsonClient("key", "secret", api_url=server.url)
+    simulator = server.simulator
+
+    info = client.get_symbol_info("AAABTC")
+    assert info["symbol"] == "AAABTC" and len(client.get_ticker()) == len(SYMBOLS)
+
+    resting = client.order_limit_buy(symbol="AAABTC", price=_price(simulator, "AAABTC", 0.5), quantity="1.000")
+    assert resting["status"] == "NEW"
+    assert [x["orderId"] for x in client.get_open_orders()] == [resting["orderId"]]
+    assert client.get_order(symbol="AAABTC", orderId=resting["orderId"])["clientOrderId"] == resting["clientOrderId"]
+    assert client.cancel_order(symbol="AAABTC", orderId=resting["orderId"])["status"] == "CANCELED"
+    assert client.get_open_orders(symbol="AAABTC") == []
+
+    taker = client.order_limit_sell(symbol="BBBBTC", price=_price(simulator, "BBBBTC", 0.9), quantity="2.000")
+    assert taker["status"] == "FILLED" and taker["executedQty"] == "2.00000000" and len(taker["fills"]) == 1
+
+    with pytest.raises(BinanceAPIException) as error:
+        client.order_limit_buy(symbol="CCCBTC", price="0.1", quantity="1")
+    assert error.value.code == -1121
+    with pytest.raises(BinanceAPIException) as error:
+        client.order_limit_buy(symbol="AAABTC", price="0.000000001", quantity="1")
+    assert error.value.code == -1013
+
+
+def test_streams(server):
+    client = FastJsonClient("key", "secret", api_url=server.url)
+    listen_key = client.stream_get_listen_key()
+
+    async def receive():
+        streams = "!miniTicker@arr/aaabtc@ticker"
+        async with websockets.connect(f"{server.stream_url}/stream?streams={streams}") as market, \
+                websockets.connect(f"{server.stream_url}/ws/{listen_key}") as user:
+            await asyncio.sleep(0.1)
+            server.call(server.simulator.tick)
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: client.order_limit_buy(symbol="AAABTC", price="0.00000100", quantity="1000.000"))
+            messages = [json.loads(await asyncio.wait_for(market.recv(), 5)) for _ in range(2)]
+            report = json.loads(await asyncio.wait_for(user.recv(), 5))
+        return messages, report
+
+    messages, report = asyncio.run(receive())
+    assert {x["stream"] for x in messages} == {"!miniTicker@arr", "aaabtc@ticker"}
+    assert report["e"] == "executionReport" and report["s"] == "AAABTC" and report["X"] == "NEW"
+
+
+# test that the TradeAPI of the threaded bot reads prices and places orders on the simulator
+def test_trade_api_against_the_simulator(server, monkeypatch):
+    monkeypatch.setattr(config, "api_key", "key")
+    monkeypatch.setattr(config, "api_secret", "secret")
+    api = TradeAPI(api_url=server.url)
+    try:
+        quote = api.get_quote("AAABTC")
+        quantizer = api.get_symbol_quantizer("AAABTC")
+        assert quote.last_price == float(server.simulator.ticker("AAABTC")["lastPrice"])
+
+        order = api.order_limit_buy(symbol="AAABTC", price=quantizer.format_price(quote.last_price * 0.5), quantity="1.000")
+        assert [x.orderId for x in api.get_open_orders("AAABTC")] == [order["orderId"]]
+        assert api.get_order("AAABTC", order["orderId"]).status == "NEW"
+    finally:
+        api.order_client.close()
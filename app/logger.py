@@ -0,0 +1,153 @@
+"""
+This module sets up the logging of the bot: records are queued by the trading threads and formatted as JSON
+lines and written to the log file by a background thread
+"""
+
+
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from config import Config as config
+
+# the attributes every LogRecord has, anything else was passed with `extra`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a JSON line with its `extra` fields, e.g. symbol and order_id
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitedLogger(logging.LoggerAdapter):
+    """
+    Logger for the per-cycle messages that logs at most `rate` records per second for every message template
+
+    The messages of every symbol share a template, e.g. "Checking status of %s", so they are limited
+    together. The check runs before the LogRecord is created, which is most of the cost of a log
+    call, and takes no lock: under contention a few records more or less get through. The next
+    record let through carries the number of records suppressed before it.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: Optional[float] = None):
+        """
+        :param logger: The logger the records are passed to
+        :param rate: The records per second let through for each template, defaults to config.log_rate_limit
+        """
+        super().__init__(logger, {})
+        self.rate = config.log_rate_limit if rate is None else rate
+        self.suppressed = 0
+        # the start of the current second and the records let through and suppressed in it, per template
+        self._windows: Dict[str, list] = {}
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+    def log(self, level: int, msg: str, *args, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        window = self._windows.get(msg)
+        if window is None or now - window[0] >= 1.0:
+            if window is not None and window[2]:
+                kwargs["extra"] = dict(kwargs.get("extra") or {}, suppressed=window[2])
+            self._windows[msg] = [now, 1, 0]
+        elif window[1] < self.rate:
+            window[1] += 1
+        else:
+            window[2] += 1
+            self.suppressed += 1
+            return
+        self.logger.log(level, msg, *args, **kwargs)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that neither formats records nor blocks
+
+    The record is queued as it is and its message is only formatted by the writer thread. When the
+    queue is full the record is dropped and counted, and the next queued record carries the count.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._unreported:
+            record.dropped = self._unreported
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            return
+        if getattr(record, "dropped", 0):
+            self._unreported = 0
+
+
+def setup_logging(filename: Optional[str] = None, level: Optional[str] = None, queue_size: Optional[int] = None) -> QueueListener:
+    """
+    It routes every log record of the process through a bounded queue to a JSON lines file written by a
+    background thread, replacing the handlers of the root logger
+
+    :param filename: The log file, defaults to config.log_file
+    :param level: The level of the root logger, defaults to config.log_level
+    :param queue_size: The most records waiting for the writer, defaults to config.log_queue_size
+    :return: The started QueueListener, stopped with stop_logging at exit.
+    """
+    filename = filename or config.log_file
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.FileHandler(filename, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    handler = BoundedQueueHandler(queue.Queue(queue_size or config.log_queue_size))
+
+    root = logging.getLogger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+        previous.close()
+    root.addHandler(handler)
+    root.setLevel(level or config.log_level)
+
+    listener = QueueListener(handler.queue, file_handler)
+    listener.start()
+    atexit.register(stop_logging, listener)
+    return listener
+
+
+def stop_logging(listener: QueueListener):
+    """
+    It writes the queued records and stops the writer thread of setup_logging, if it is running
+    """
+    if listener._thread is not None:
+        listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,333 @@
+"""
+This module contains the counters, gauges and histograms of the bot and exposes them in the Prometheus
+text format over HTTP and as a periodic log summary
+"""
+
+
+import asyncio
+import functools
+import logging
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread, local
+from typing import Callable, Dict, List, Optional, Tuple
+
+Labels = Tuple[str, ...]
+
+# seconds, from a cached read to a slow REST call
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """
+    A metric whose values are kept per thread
+
+    Every thread writes to its own shard, so recording a value takes no lock and never waits for
+    another thread; a scrape adds the shards up. The lock only guards the list of shards, once
+    per thread.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        """
+        :param name: The name of the metric
+        :param documentation: The help text of the metric
+        :param labels: The names of the labels of the metric
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._local = local()
+        self._shards: List[dict] = []
+        self._lock = Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _label_string(self, values: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        """
+        It returns the lines of the metric in the Prometheus text format
+        """
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    A count that only goes up, e.g. the orders placed
+    """
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        """
+        It adds amount to the count of the label values
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        """
+        It returns the count of every label values
+        """
+        with self._lock:
+            shards = list(self._shards)
+        totals: Dict[Labels, float] = {}
+        for shard in shards:
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_string(labels)} {value}" for labels, value in sorted(self.values().items())]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, set directly or read from a function at every scrape
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), function: Optional[Callable[[], float]] = None):
+        """
+        :param function: The function the value is read from, e.g. the length of a queue
+        """
+        super().__init__(name, documentation, labels)
+        self.function = function
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str):
+        """
+        It sets the value of the label values
+        """
+        self._values[labels] = value
+
+    def values(self) -> Dict[Labels, float]:
+        """
+        It returns the value of every label values
+        """
+        if self.function is not None:
+            return {(): self.function()}
+        return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_string(labels)} {value}" for labels, value in sorted(self.values().items())]
+
+
+class Histogram(Metric):
+    """
+    A distribution of values in fixed buckets, e.g. call latencies
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        :param buckets: The upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str):
+        """
+        It records a value of the label values
+        """
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # a count per bucket, the last one for values above every bound, then the sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> Dict[Labels, List[float]]:
+        """
+        It returns the bucket counts and the sum of every label values
+        """
+        with self._lock:
+            shards = list(self._shards)
+        totals: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            for labels, counts in list(shard.items()):
+                total = totals.setdefault(labels, [0] * len(counts))
+                for i, count in enumerate(list(counts)):
+                    total[i] += count
+        return totals
+
+    def quantile(self, counts: List[float], q: float) -> float:
+        """
+        It returns the upper bound of the bucket holding the q quantile of the counts
+        """
+        count = sum(counts[:-1])
+        seen = 0
+        for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+            seen += bucket
+            if seen >= q * count:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, counts in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket = self._label_string(labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_string(labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self._label_string(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of the application by name
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        It adds a metric to the registry, replacing the metric of the same name
+        """
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        It returns every metric in the Prometheus text format
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """
+        It returns a one line per metric summary for the logs, histograms summed over their labels
+        """
+        lines = []
+        for metric in self.metrics.values():
+            values = metric.values()
+            if not values:
+                continue
+            if isinstance(metric, Histogram):
+                counts = [sum(x) for x in zip(*values.values())]
+                count = sum(counts[:-1])
+                lines.append(f"{metric.name}: count={count} avg={counts[-1] / count if count else 0:.4f} "
+                             f"p50<={metric.quantile(counts, 0.5)} p99<={metric.quantile(counts, 0.99)}")
+            elif len(values) == 1 and () in values:
+                lines.append(f"{metric.name}: {values[()]}")
+            else:
+                lines.append(f"{metric.name}: " + " ".join(f"{','.join(k)}={v}" for k, v in sorted(values.items())))
+        return "\n".join(lines)
+
+
+registry = MetricsRegistry()
+
+api_call_seconds = registry.register(Histogram("trade_api_call_seconds", "Latency of the TradeAPI methods", ("method",)))
+request_seconds = registry.register(Histogram("binance_request_seconds", "Latency of the Binance client calls", ("method",)))
+request_weight = registry.register(Counter("binance_request_weight_total", "Request weight of the Binance client calls", ("method",)))
+request_errors = registry.register(Counter("binance_request_errors_total", "Binance client calls that failed", ("method", "status")))
+db_commit_seconds = registry.register(Histogram("db_commit_seconds", "Duration of the SQLite commits of the trade journal"))
+cycle_seconds = registry.register(Histogram("symbol_cycle_seconds", "Duration of the evaluation of a symbol", ("symbol",)))
+scheduling_lag_seconds = registry.register(Histogram("scheduling_lag_seconds", "Delay between a symbol being due and dispatched"))
+signals = registry.register(Counter("signals_total", "Buy and sell signals", ("side",)))
+orders = registry.register(Counter("orders_total", "Orders placed", ("side",)))
+order_rejects = registry.register(Counter("order_rejects_total", "Orders the exchange rejected", ("side",)))
+signal_to_ack_seconds = registry.register(Histogram("signal_to_ack_seconds", "Delay between a signal and the exchange acknowledging its order",
+                                                   ("side",)))
+screen_seconds = registry.register(Histogram("screener_rank_seconds", "Duration of a full market rank of the screener"))
+
+
+def timed(histogram: Histogram, label: str):
+    """
+    It decorates a function or coroutine function to record its duration in a histogram
+
+    :param histogram: The histogram the durations are recorded in
+    :param label: The label value of the durations, e.g. the name of the method
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, label)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, label)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, host: str = "0.0.0.0", metrics: MetricsRegistry = registry) -> ThreadingHTTPServer:
+    """
+    It serves the metrics on http://host:port/metrics from a daemon thread
+
+    :param port: The port to listen on, 0 picks a free one
+    :param host: The host to listen on
+    :param metrics: The registry to serve
+    :return: The server, `shutdown()` stops it.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def log_summary(interval: float, metrics: MetricsRegistry = registry) -> Thread:
+    """
+    It logs the summary of the metrics every interval seconds from a daemon thread
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            logging.info("Metrics summary:\n%s", metrics.summary())
+
+    thread = Thread(target=run, name="metrics-summary", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for the hot paths of the bot, run them from the repository root with
+`python -m benchmarks.<name>`
+"""
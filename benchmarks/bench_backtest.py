@@ -0,0 +1,54 @@
+"""
+This module benchmarks the backtester on synthetic 1 second klines
+
+Run it from the repository root with `python -m benchmarks.bench_backtest [days] [symbols]`
+"""
+
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.binance.quantize import SymbolQuantizer
+from app.bot.backtest import BacktestParams, find_kline_files, sweep
+
+START = 1672531200000
+
+
+def write_klines(path: str, rows: int, seed: int):
+    """
+    It writes a random walk of 1 second klines in the data.binance.vision layout
+    """
+    rng = np.random.default_rng(seed)
+    trend = 20 + 80 * np.sin(np.linspace(0, rows / 86400 * np.pi, rows)) ** 2
+    closes = np.round(trend * np.exp(np.cumsum(rng.normal(0, 0.0005, rows))), 2)
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    times = START + np.arange(rows) * 1000
+    columns = [times, opens, np.maximum(opens, closes), np.minimum(opens, closes), closes, np.ones(rows), times + 999,
+               np.ones(rows), np.ones(rows), np.ones(rows), np.ones(rows), np.zeros(rows)]
+    np.savetxt(path, np.column_stack(columns), delimiter=",", fmt=["%d", "%.2f", "%.2f", "%.2f", "%.2f", "%g", "%d", "%g", "%d", "%g", "%g", "%d"])
+
+
+def main(days: int = 3, symbols: int = 4):
+    rows = days * 86400
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(symbols):
+            write_klines(os.path.join(directory, f"S{i:03d}BTC-1s-2023-01.csv"), rows, i)
+        files = find_kline_files([directory])
+        quantizers = {symbol: SymbolQuantizer("0.01", "0.00001") for symbol in files}
+        params = [BacktestParams(expected_change_buy=120, expected_change_sell=5, buy_quantity=1)]
+
+        for processes in (1, os.cpu_count()):
+            start = time.perf_counter()
+            results = sweep(files, quantizers, params, processes=processes)
+            elapsed = time.perf_counter() - start
+            trades = sum(len(x.trades) for x in results)
+            print(f"{processes} processes: {symbols * rows / elapsed:,.0f} klines/s, {trades} trades, "
+                  f"a month of 1s klines for 300 symbols in {300 * 30 * 86400 / (symbols * rows / elapsed) / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
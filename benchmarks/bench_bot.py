@@ -0,0 +1,165 @@
+"""
+This module benchmarks PumpDumpBot cycles against the FakeBinanceClient at several symbol counts and keeps
+the results of every run, so a regression shows up against the previous commit
+
+Run it from the repository root with `python -m benchmarks.bench_bot`
+"""
+
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# the injected errors are logged at ERROR
+logging.basicConfig(level=logging.CRITICAL)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from config import Config as config  # noqa: E402
+from app.binance.trade_api import TradeAPI  # noqa: E402
+from app.bot import runner  # noqa: E402
+from app.bot.journal import TradeJournal  # noqa: E402
+from app.bot.models import Base  # noqa: E402
+from app.bot.positions import PositionIndex  # noqa: E402
+from app.bot.signals import SignalEngine  # noqa: E402
+from benchmarks.fake_binance import EndpointProfile, FakeBinanceClient  # noqa: E402
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results", "bench_bot.jsonl")
+
+# a few milliseconds per read and a slower order path, with rare errors
+PROFILES = {
+    "get_ticker": EndpointProfile(latency=0.010, jitter=0.005, error_rate=0.001),
+    "get_open_orders": EndpointProfile(latency=0.005, jitter=0.002, error_rate=0.001),
+    "get_order": EndpointProfile(latency=0.003, jitter=0.001, error_rate=0.001),
+    "order_limit_buy": EndpointProfile(latency=0.010, jitter=0.005, error_rate=0.002),
+    "order_limit_sell": EndpointProfile(latency=0.010, jitter=0.005, error_rate=0.002),
+}
+
+
+def setup(symbols: List[str], seed: int) -> FakeBinanceClient:
+    """
+    It points the runner at a fresh fake exchange and an in-memory trade store
+    """
+    config.expected_change_buy = 100
+    config.expected_change_sell = 10
+    config.buy_quantity_btc = 0.01
+    config.ticker_max_age = 0.5
+    config.open_orders_max_age = 0.5
+    config.stream_max_age = 0
+
+    client = FakeBinanceClient(symbols, PROFILES, default=EndpointProfile(latency=0.002), seed=seed)
+    api = TradeAPI(is_mock=True)
+    api.client = api.filter_cache.client = client
+    api.filter_cache.refresh()
+    runner.trade_api = api
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    runner.positions = PositionIndex(TradeJournal(sessionmaker(bind=engine), batch_size=1000, flush_interval=60))
+    return client
+
+
+def run(symbol_count: int, cycles: int, mode: str, workers: int, seed: int = 0) -> Dict[str, float]:
+    """
+    It runs `cycles` cycles over `symbol_count` symbols and returns the measurements
+
+    :param symbol_count: The number of symbols of the market and the bot
+    :param cycles: The number of cycles
+    :param mode: check to check every symbol on a worker pool, scan to evaluate them in one SignalEngine pass
+    :param workers: The size of the worker pool of the check mode
+    :param seed: The seed of the fake exchange
+    """
+    symbols = [f"S{i:04d}BTC" for i in range(symbol_count)]
+    client = setup(symbols, seed)
+    engine = SignalEngine(symbols)
+    for symbol in symbols:
+        engine.set_filters(symbol, runner.trade_api.get_symbol_filters(symbol))
+    calls, weight = sum(client.calls.values()), client.weight
+
+    elapsed = 0.0
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in range(cycles):
+            client.tick()
+            start = time.perf_counter()
+            if mode == "scan":
+                runner.PumpDumpBot.scan(engine)
+            else:
+                list(pool.map(runner.PumpDumpBot.check_symbol, symbols))
+            elapsed += time.perf_counter() - start
+
+    latencies = sorted(client.order_latencies) or [0.0]
+    return {
+        "decisions_per_second": symbol_count * cycles / elapsed,
+        "cycle_ms": elapsed / cycles * 1000,
+        "calls_per_cycle": (sum(client.calls.values()) - calls) / cycles,
+        "weight_per_cycle": (client.weight - weight) / cycles,
+        "orders": len(client.order_latencies),
+        "errors": client.errors,
+        "tick_to_order_p50_ms": statistics.median(latencies) * 1000,
+        "tick_to_order_p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """
+    It returns the commit the tree is at, or None outside a git checkout
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_result(path: str, commit: Optional[str], mode: str, symbols: int) -> Optional[dict]:
+    """
+    It returns the last saved result of the same mode and symbol count from another commit
+    """
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["mode"] == mode and record["symbols"] == symbols and record["commit"] != commit:
+                previous = record
+    return previous
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark PumpDumpBot cycles against a fake exchange")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--mode", choices=["check", "scan"], nargs="+", default=["check", "scan"])
+    parser.add_argument("--workers", type=int, default=config.scheduler_workers)
+    parser.add_argument("--output", default=RESULTS, help="The JSON lines file the results are appended to")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    for mode in args.mode:
+        for symbol_count in args.symbols:
+            result = run(symbol_count, args.cycles, mode, args.workers)
+            previous = previous_result(args.output, commit, mode, symbol_count)
+            print(f"{mode} {symbol_count} symbols:")
+            for name, value in result.items():
+                change = ""
+                if previous and previous["result"].get(name):
+                    change = f" ({(value / previous['result'][name] - 1) * 100:+.1f}% vs {previous['commit']})"
+                print(f"  {name:22s} {value:12.2f}{change}")
+            if not args.no_save:
+                os.makedirs(os.path.dirname(args.output), exist_ok=True)
+                with open(args.output, "a") as f:
+                    f.write(json.dumps({"commit": commit, "time": int(time.time()), "mode": mode, "symbols": symbol_count,
+                                        "cycles": args.cycles, "result": result}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+This module benchmarks the DepthBook: the cost of applying a depth diff, of the price to fill an order and of
+the top levels, on a book of a few thousand levels per side
+
+Run it from the repository root with `python -m benchmarks.bench_depth`
+"""
+
+
+import argparse
+import random
+import time
+from typing import List, Optional
+
+from app.binance.depth_cache import DepthBook
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the local order book")
+    parser.add_argument("--levels", type=int, default=5000, help="The levels of every side of the snapshot")
+    parser.add_argument("--diffs", type=int, default=20000)
+    parser.add_argument("--changes", type=int, default=10, help="The level changes of every diff")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    tick = 0.000001
+    mid = 0.01
+    book = DepthBook("LTCBTC")
+    book.load_snapshot({
+        "lastUpdateId": 0,
+        "bids": [[f"{mid - (i + 1) * tick:.8f}", f"{rng.uniform(1, 100):.8f}"] for i in range(args.levels)],
+        "asks": [[f"{mid + (i + 1) * tick:.8f}", f"{rng.uniform(1, 100):.8f}"] for i in range(args.levels)],
+    })
+
+    # most of the changes of a real diff are near the top of the book, and some remove a level
+    def changes(sign: int) -> List[List[str]]:
+        return [[f"{mid + sign * int(rng.expovariate(0.05) + 1) * tick:.8f}", "0" if rng.random() < 0.2 else f"{rng.uniform(1, 100):.8f}"]
+                for _ in range(args.changes // 2)]
+
+    diffs = [{"e": "depthUpdate", "E": i, "s": "LTCBTC", "U": i + 1, "u": i + 1, "b": changes(-1), "a": changes(1)} for i in range(args.diffs)]
+
+    start = time.perf_counter()
+    for diff in diffs:
+        book.apply_diff(diff)
+    apply = (time.perf_counter() - start) / args.diffs
+
+    results = []
+    for quote in (0.01, 0.1, 1.0):
+        start = time.perf_counter()
+        for _ in range(10000):
+            fill = book.price_to_fill("BUY", quote=quote)
+        results.append((quote, fill.levels, (time.perf_counter() - start) / 10000))
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        book.top(10)
+    top = (time.perf_counter() - start) / 10000
+
+    print(f"{args.levels} levels per side, {args.diffs} diffs of {args.changes} changes")
+    print(f"  apply diff       {apply * 1e6:8.2f} us")
+    for quote, levels, elapsed in results:
+        print(f"  fill {quote:5.2f} BTC   {elapsed * 1e6:8.2f} us ({levels} levels)")
+    print(f"  top 10           {top * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+This module benchmarks the exchange simulator: the orders per second its matching engine takes in process and
+the orders per second its HTTP server takes from concurrent clients
+
+Run it from the repository root with `python -m benchmarks.bench_exchange`
+"""
+
+
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from app.exchange.server import SimulatorServer
+from app.exchange.simulator import ExchangeSimulator
+
+SYMBOLS = [f"S{i:04d}BTC" for i in range(1000)]
+
+
+def order_params(simulator: ExchangeSimulator, rng: random.Random) -> dict:
+    """
+    It returns a limit order within 2 percent of the last price, so about a third crosses the quotes
+    """
+    symbol = rng.choice(SYMBOLS)
+    price = float(simulator.ticker(symbol)["lastPrice"]) * rng.uniform(0.98, 1.02)
+    quantity = max(round(0.01 / price, 3), 0.001)
+    return {"symbol": symbol, "side": rng.choice(("BUY", "SELL")), "type": "LIMIT", "timeInForce": "GTC", "price": f"{price:.8f}",
+            "quantity": f"{quantity:.3f}", "timestamp": str(simulator.now())}
+
+
+def bench_engine(orders: int, tick_every: int = 1000) -> float:
+    """
+    It returns the orders per second placed directly on the simulator, with a market tick every tick_every orders
+    """
+    simulator = ExchangeSimulator(SYMBOLS, seed=1)
+    rng = random.Random(1)
+    params = [order_params(simulator, rng) for _ in range(orders)]
+    start = time.perf_counter()
+    for i, order in enumerate(params):
+        simulator.place_order(order)
+        if i % tick_every == tick_every - 1:
+            simulator.tick()
+    return orders / (time.perf_counter() - start)
+
+
+async def bench_http(orders: int, concurrency: int) -> float:
+    """
+    It returns the orders per second POSTed to the simulator server by `concurrency` clients
+    """
+    simulator = ExchangeSimulator(SYMBOLS, seed=1)
+    server = SimulatorServer(simulator, tick_interval=0.1)
+    await server.serve()
+    rng = random.Random(1)
+    params = [order_params(simulator, rng) for _ in range(orders)]
+    url = f"{server.url}/v3/order"
+
+    async def client(session: aiohttp.ClientSession, batch):
+        for order in batch:
+            order["timestamp"] = str(simulator.now())
+            async with session.post(url, data=order) as response:
+                await response.read()
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(client(session, params[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await server.shutdown()
+    return orders / elapsed
+
+
+def main(orders: int = 50000, http_orders: int = 5000, concurrency: int = 50):
+    print(f"matching engine: {bench_engine(orders):10.0f} orders/s ({orders} orders, {len(SYMBOLS)} symbols)")
+    print(f"http server:     {asyncio.run(bench_http(http_orders, concurrency)):10.0f} orders/s ({concurrency} clients, same process)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+This module benchmarks the IndicatorEngine: the cost of feeding it every ticker of a snapshot, of a single tick and
+of reading the windows of a symbol, and its memory per symbol after a long run
+
+Run it from the repository root with `python -m benchmarks.bench_indicators`
+"""
+
+
+import argparse
+import random
+import time
+from typing import List, Optional
+
+from app.bot.indicators import IndicatorEngine
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the rolling window indicators")
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--seconds", type=int, default=600, help="The seconds of one ticker per symbol per second fed")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    symbols = [f"S{i:04d}BTC" for i in range(args.symbols)]
+    engine = IndicatorEngine(windows=(5, 30, 300), resolution=1, baseline=3600)
+    for symbol in symbols:
+        engine.track(symbol)
+
+    prices = {symbol: rng.uniform(0.5, 2.0) for symbol in symbols}
+    volumes = dict.fromkeys(symbols, 1000.0)
+    elapsed = 0.0
+    for second in range(args.seconds):
+        tickers = []
+        for i, symbol in enumerate(symbols):
+            prices[symbol] *= 1 + rng.gauss(0, 0.001)
+            volumes[symbol] += rng.random()
+            tickers.append({"symbol": symbol, "lastPrice": f"{prices[symbol]:.8f}", "volume": f"{volumes[symbol]:.8f}",
+                            "lastId": second * 10 + i})
+        start = time.perf_counter()
+        engine.update_tickers(tickers, timestamp=second)
+        elapsed += time.perf_counter() - start
+
+    start = time.perf_counter()
+    for second in range(args.seconds, args.seconds + 100):
+        engine.update("S0000BTC", second, 1.0, 1.0, 1)
+    tick = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    for symbol in symbols:
+        engine.get(symbol, timestamp=args.seconds)
+    read = (time.perf_counter() - start) / len(symbols)
+
+    rolling = engine.track(symbols[0])
+    memory = rolling._close.nbytes + rolling._volume.nbytes + rolling._trades.nbytes
+    print(f"{args.symbols} symbols, {args.seconds} s of tickers")
+    print(f"  snapshot update  {elapsed / args.seconds * 1000:8.2f} ms ({elapsed / args.seconds / args.symbols * 1e6:.2f} us per ticker)")
+    print(f"  single tick      {tick * 1e6:8.2f} us")
+    print(f"  read windows     {read * 1e6:8.2f} us")
+    print(f"  ring buffers     {memory:8d} bytes per symbol, whatever the run length")
+
+
+if __name__ == "__main__":
+    main()
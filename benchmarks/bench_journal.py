@@ -0,0 +1,98 @@
+"""
+This module benchmarks the write-behind TradeJournal against a commit per trade from every worker thread
+
+Run it from the repository root with `python -m benchmarks.bench_journal`
+"""
+
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.bot.journal import TradeJournal
+from app.bot.models import Base, Trades
+
+# the symbols every worker cycles through, each is bought and then sold
+SYMBOLS = 50
+
+
+def make_session(path: str, wal: bool) -> scoped_session:
+    """
+    It returns a thread-local session factory of a fresh sqlite database
+    """
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30}, poolclass=QueuePool,
+                           pool_size=16, max_overflow=16)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(connection, _):
+        if wal:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+    Base.metadata.create_all(engine)
+    return scoped_session(sessionmaker(bind=engine))
+
+
+def commit_per_trade(session: scoped_session, worker: int, trades: int):
+    """
+    The buy and sell of the runner before the journal, a commit on the order path for every write
+    """
+    db = session()
+    for i in range(trades):
+        symbol = f"S{worker}_{i % SYMBOLS}BTC"
+        if db.query(Trades).filter_by(symbol=symbol).first() is None:
+            db.add(Trades(symbol=symbol, order_id=f"{worker}-{i}", price=1.0, quantity=1.0))
+        else:
+            db.query(Trades).filter_by(symbol=symbol).delete()
+        db.commit()
+    session.remove()
+
+
+def journaled(journal: TradeJournal, worker: int, trades: int):
+    """
+    The buy and sell of the runner with the journal
+    """
+    for i in range(trades):
+        symbol = f"S{worker}_{i % SYMBOLS}BTC"
+        if not journal.get_trades(symbol):
+            journal.add(Trades(symbol=symbol, order_id=f"{worker}-{i}", price=1.0, quantity=1.0))
+        else:
+            journal.delete_symbol(symbol)
+
+
+def run(workers: int, trades: int, wal: bool, use_journal: bool) -> float:
+    """
+    It returns the buys and sells written per second by `workers` threads
+    """
+    with tempfile.TemporaryDirectory() as root:
+        session = make_session(os.path.join(root, "trades.db"), wal)
+        journal = TradeJournal(session, batch_size=100, flush_interval=0.05)
+        if use_journal:
+            journal.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            if use_journal:
+                list(pool.map(lambda w: journaled(journal, w, trades), range(workers)))
+            else:
+                list(pool.map(lambda w: commit_per_trade(session, w, trades), range(workers)))
+        journal.close()
+        elapsed = time.perf_counter() - start
+        session.remove()
+        return workers * trades / elapsed
+
+
+def main(trades: int = 400):
+    for workers in (1, 4, 16):
+        rollback = run(workers, trades, wal=False, use_journal=False)
+        wal = run(workers, trades, wal=True, use_journal=False)
+        journal = run(workers, trades, wal=True, use_journal=True)
+        print(f"{workers:2d} workers: commit per trade {rollback:8.0f}/s, with WAL {wal:8.0f}/s, journal {journal:8.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+This module benchmarks the logging overhead of a symbol cycle: the synchronous f-string logging to a file the
+runners used before against the queued, lazily formatted and rate-limited JSON logging of app.logger
+
+Run it from the repository root with `python -m benchmarks.bench_logging`
+"""
+
+
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.logger import RateLimitedLogger, setup_logging, stop_logging
+
+SYMBOLS = [f"S{i:04d}BTC" for i in range(100)]
+
+cycle_log = RateLimitedLogger(logging.getLogger("bench"), rate=10)
+
+
+def cycle_before(symbol: str):
+    """
+    The messages a cycle without an order logged before
+    """
+    logging.info("Looking for Buy Opportunities...")
+    logging.info("Checking status...")
+    logging.info(f"Already have an open order for {symbol}, skipping...")
+    logging.info("Looking for Sell Opportunities...")
+    logging.info("Checking status...")
+    logging.info(f"{symbol} Not FILLED yet...")
+
+
+def cycle_after(symbol: str):
+    """
+    The same messages as the runners log them now
+    """
+    cycle_log.debug("Looking for Buy Opportunities on %s", symbol, extra={"symbol": symbol})
+    cycle_log.debug("Checking status of %s", symbol, extra={"symbol": symbol})
+    cycle_log.debug("Already have an open order for %s, skipping...", symbol, extra={"symbol": symbol})
+    cycle_log.debug("Looking for Sell Opportunities on %s", symbol, extra={"symbol": symbol})
+    cycle_log.debug("Checking status of %s", symbol, extra={"symbol": symbol})
+    cycle_log.debug("%s Not FILLED yet...", symbol, extra={"symbol": symbol, "order_id": 1})
+
+
+def cycle_none(symbol: str):
+    pass
+
+
+def measure(cycle, cycles: int, workers: int) -> float:
+    """
+    It returns the microseconds per symbol cycle of `cycles` cycles over every symbol on a worker pool
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        start = time.perf_counter()
+        for _ in range(cycles):
+            list(pool.map(cycle, SYMBOLS))
+        elapsed = time.perf_counter() - start
+    return elapsed / (cycles * len(SYMBOLS)) * 1e6
+
+
+def main(cycles: int = 200, workers: int = 8):
+    root = logging.getLogger()
+    with tempfile.TemporaryDirectory() as directory:
+        handler = logging.FileHandler(os.path.join(directory, "before.log"), encoding="utf-8")
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        none = measure(cycle_none, cycles, workers)
+        before = measure(cycle_before, cycles, workers)
+        root.removeHandler(handler)
+        handler.close()
+
+        listener = setup_logging(os.path.join(directory, "after.log"), "DEBUG")
+        after = measure(cycle_after, cycles, workers)
+        stop_logging(listener)
+        with open(os.path.join(directory, "after.log")) as f:
+            lines = sum(1 for _ in f)
+
+    print(f"no logging:                   {none:8.1f} us per symbol cycle")
+    print(f"synchronous f-string logging: {before:8.1f} us per symbol cycle")
+    print(f"queued JSON logging:          {after:8.1f} us per symbol cycle ({lines} of {cycles * len(SYMBOLS) * 6} records written)")
+
+
+if __name__ == "__main__":
+    main()
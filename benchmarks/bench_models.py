@@ -0,0 +1,112 @@
+"""
+This module benchmarks parsing a 2,000-symbol ticker snapshot and exchange info into the pydantic models
+against the fast decoder with lazily parsed Quote objects and lazily validated filters
+
+Run it from the repository root with `python -m benchmarks.bench_models`
+"""
+
+
+import json
+import random
+import timeit
+import tracemalloc
+
+from app.binance.fast_json import loads
+from app.binance.trade_api import AssetInfo, SymbolFilterCache, TickerBook, TickerData, build_trade_api_filters
+
+SYMBOLS = 2000
+# the symbols the bot trades out of the snapshot
+TRADED = 100
+
+
+def ticker_payload(count: int) -> bytes:
+    """
+    It returns a get_ticker response of count symbols as sent by the exchange
+    """
+    random.seed(1)
+    tickers = []
+    for i in range(count):
+        price = f"{random.uniform(0.0001, 100):.8f}"
+        tickers.append({"symbol": f"S{i:04d}BTC", "priceChange": "0.00000100", "priceChangePercent": f"{random.uniform(-20, 20):.3f}",
+                        "weightedAvgPrice": price, "prevClosePrice": price, "lastPrice": price, "lastQty": "1.00000000",
+                        "bidPrice": price, "bidQty": "1.00000000", "askPrice": price, "askQty": "1.00000000", "openPrice": price,
+                        "highPrice": price, "lowPrice": price, "volume": f"{random.uniform(0, 1e6):.8f}", "quoteVolume": "1000.00000000",
+                        "openTime": 1499783499040, "closeTime": 1499869899040, "firstId": 1, "lastId": 10, "count": 10})
+    return json.dumps(tickers).encode()
+
+
+def exchange_info_payload(count: int) -> bytes:
+    """
+    It returns a get_exchange_info response of count symbols
+    """
+    symbols = [{"symbol": f"S{i:04d}BTC", "status": "TRADING", "baseAsset": f"S{i:04d}", "baseAssetPrecision": 8, "quoteAsset": "BTC",
+                "quotePrecision": 8, "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT"],
+                "icebergAllowed": True,
+                "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.00000100", "maxPrice": "1000.00000000", "tickSize": "0.00000100"},
+                            {"filterType": "PERCENT_PRICE", "multiplierUp": "5", "multiplierDown": "0.2", "avgPriceMins": 5},
+                            {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "100000.00000000", "stepSize": "0.00100000"},
+                            {"filterType": "MIN_NOTIONAL", "minNotional": "0.00010000", "applyToMarket": True, "avgPriceMins": 5}]}
+               for i in range(count)]
+    return json.dumps({"timezone": "UTC", "symbols": symbols}).encode()
+
+
+def models_tickers(payload: bytes, traded):
+    """
+    The TickerData of every symbol, with the prices parsed again at every read
+    """
+    tickers = {x["symbol"]: TickerData(**x) for x in json.loads(payload)}
+    return tickers, [(float(tickers[s].lastPrice), float(tickers[s].priceChangePercent)) for s in traded]
+
+
+def lean_tickers(payload: bytes, traded):
+    """
+    The TickerBook of the snapshot, with a Quote parsed for the traded symbols only
+    """
+    book = TickerBook(loads(payload))
+    return book, [(q.last_price, q.change_percent) for q in map(book.get_quote, traded)]
+
+
+def models_exchange_info(payload: bytes, traded):
+    """
+    The AssetInfo and filters of every symbol, as the filter cache used to load them
+    """
+    assets = {x["symbol"]: AssetInfo(**x) for x in json.loads(payload)["symbols"]}
+    filters = {symbol: build_trade_api_filters(asset) for symbol, asset in assets.items()}
+    return assets, [filters[s] for s in traded]
+
+
+def lean_exchange_info(payload: bytes, traded):
+    """
+    The lazily validated filter cache
+    """
+    cache = SymbolFilterCache(None, ttl=3600)
+    cache.load(loads(payload))
+    return cache, [cache.get_cached_filters(s) for s in traded]
+
+
+def measure(func, payload: bytes, traded, number: int):
+    """
+    It returns the milliseconds per call and the bytes the result keeps alive
+    """
+    seconds = timeit.timeit(lambda: func(payload, traded), number=number) / number
+    tracemalloc.start()
+    result = func(payload, traded)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds * 1000, size
+
+
+def main(number: int = 5):
+    traded = [f"S{i:04d}BTC" for i in range(0, SYMBOLS, SYMBOLS // TRADED)]
+    for name, payload, old, new in (("ticker snapshot", ticker_payload(SYMBOLS), models_tickers, lean_tickers),
+                                    ("exchange info", exchange_info_payload(SYMBOLS), models_exchange_info, lean_exchange_info)):
+        old_ms, old_bytes = measure(old, payload, traded, number)
+        new_ms, new_bytes = measure(new, payload, traded, number)
+        print(f"{name} ({len(payload) / 1e6:.1f} MB, {SYMBOLS} symbols, {TRADED} read):")
+        print(f"  pydantic models: {old_ms:7.1f} ms {old_bytes / 1e6:6.1f} MB")
+        print(f"  lean:            {new_ms:7.1f} ms {new_bytes / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+This module benchmarks the signal-to-ack latency of limit orders placed on the exchange simulator while
+market data reads load the same host, through the python-binance client the bot used before and through
+the OrderSubmitter, with the exchange clock behind the local one
+
+Run it from the repository root with `python -m benchmarks.bench_orders`
+"""
+
+
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+from binance.exceptions import BinanceAPIException
+
+from app.binance.fast_json import FastJsonClient
+from app.binance.order_submitter import OrderSubmitter
+from app.exchange.server import SimulatorServer
+from app.exchange.simulator import ExchangeSimulator
+
+SYMBOLS = [f"S{i:04d}BTC" for i in range(500)]
+
+
+def place_orders(place, simulator: ExchangeSimulator, orders: int, workers: int):
+    """
+    It places `orders` limit buys below the market from a worker pool and returns the latencies and errors
+    """
+    rng = random.Random(1)
+    params = []
+    for _ in range(orders):
+        symbol = rng.choice(SYMBOLS)
+        price = float(simulator.ticker(symbol)["lastPrice"]) * 0.5
+        params.append({"symbol": symbol, "quantity": f"{max(round(0.01 / price, 3), 0.001):.3f}", "price": f"{price:.8f}"})
+
+    def place_one(order):
+        start = time.perf_counter()
+        try:
+            place(**order)
+            return time.perf_counter() - start, None
+        except BinanceAPIException as e:
+            return time.perf_counter() - start, e.code
+
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(place_one, params))
+    return sorted(x for x, _ in results), [code for _, code in results if code is not None]
+
+
+def run(name: str, client, place, simulator: ExchangeSimulator, orders: int, workers: int, readers: int):
+    """
+    It places the orders while `readers` threads fetch the full ticker over `client`
+    """
+    stopped = Event()
+
+    def read():
+        while not stopped.is_set():
+            client.get_ticker()
+
+    with ThreadPoolExecutor(readers) as pool:
+        for _ in range(readers):
+            pool.submit(read)
+        latencies, errors = place_orders(place, simulator, orders, workers)
+        stopped.set()
+    p50, p99 = statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+    rejects = f"{len(errors)} rejected ({', '.join(str(x) for x in sorted(set(errors)))})" if errors else "0 rejected"
+    print(f"{name}: p50 {p50 * 1000:7.2f} ms p99 {p99 * 1000:7.2f} ms, {rejects}")
+
+
+def main(orders: int = 1000, workers: int = 8, readers: int = 4):
+    for skew_ms in (0, -1500):
+        simulator = ExchangeSimulator(SYMBOLS, seed=1, clock_offset_ms=skew_ms)
+        server = SimulatorServer(simulator, tick_interval=0.5).start()
+        try:
+            client = FastJsonClient("key", "secret", api_url=server.url)
+            print(f"{orders} orders from {workers} workers, {readers} full ticker readers, exchange clock {skew_ms} ms off")
+            run("  client, recvWindow=1000", client, lambda **x: client.order_limit_buy(recvWindow=1000, **x), simulator, orders,
+                workers, readers)
+            submitter = OrderSubmitter("key", "secret", api_url=server.url, pool_size=workers).start()
+            run("  OrderSubmitter         ", client, submitter.order_limit_buy, simulator, orders, workers, readers)
+            submitter.close()
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+This module benchmarks the integer SymbolQuantizer against the float modulo rounding it replaced
+
+Run it from the repository root with `python -m benchmarks.bench_quantize`
+"""
+
+
+import random
+import timeit
+from types import SimpleNamespace
+
+from app.binance.quantize import SymbolQuantizer
+
+# stands in for the TradeApiFilters of a symbol
+FILTERS = SimpleNamespace(minPrice="0.00000100", tickSize="0.00000100", minQuantity="0.00100000", stepSize="0.00100000",
+                          minNotional="0.00010000")
+
+
+def float_order(buy_price: float, quote: float, filters):
+    """
+    The float modulo rounding and hardcoded formats of calculate_buy_order before the quantizer
+    """
+    final_buy_price = buy_price - (buy_price % float(filters.minPrice))
+    temp_quantity = quote / float(final_buy_price)
+    quantity = round((temp_quantity - (temp_quantity % float(filters.minQuantity))), 8)
+    return "{0:.3f}".format(float(quantity)), "{0:.8f}".format(float(final_buy_price))
+
+
+def integer_order(buy_price: float, quote: float, quantizer: SymbolQuantizer):
+    """
+    The integer rounding of calculate_buy_order
+    """
+    price = quantizer.floor_price(buy_price)
+    quantity = quantizer.quantity_for_quote(quote, price)
+    return quantizer.quantity_string(quantity), quantizer.price_string(price)
+
+
+def main(count: int = 100000):
+    random.seed(1)
+    # orders whose quote buys a whole number of steps, where a float rounding error loses a step
+    orders, quantities = [], []
+    for _ in range(1000):
+        price_units, hundredths = random.randint(100, 50000), random.randint(1, 1000)
+        orders.append((price_units / 1e6, price_units * hundredths / 1e8))
+        quantities.append(hundredths)
+    quantizer = SymbolQuantizer.from_filters(FILTERS)
+
+    float_time = timeit.timeit(lambda: [float_order(price, quote, FILTERS) for price, quote in orders], number=count // len(orders))
+    integer_time = timeit.timeit(lambda: [integer_order(price, quote, quantizer) for price, quote in orders], number=count // len(orders))
+
+    # the exact quantity is the whole number of hundredths, float modulo often rounds it a step too low
+    float_wrong = sum(float_order(price, quote, FILTERS)[0] != f"{hundredths / 100:.3f}" for (price, quote), hundredths in zip(orders, quantities))
+    integer_wrong = sum(integer_order(price, quote, quantizer)[0] != f"{hundredths / 100:.3f}" for (price, quote), hundredths in zip(orders, quantities))
+
+    print(f"float modulo: {float_time / count * 1e6:.2f} us per order")
+    print(f"integer:      {integer_time / count * 1e6:.2f} us per order")
+    print(f"wrong quantities with float modulo: {float_wrong} of {len(orders)}")
+    print(f"wrong quantities with integers:     {integer_wrong} of {len(orders)}")
+
+
+if __name__ == "__main__":
+    main()
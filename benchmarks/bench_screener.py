@@ -0,0 +1,61 @@
+"""
+This module benchmarks the MarketScreener: the time to rank every symbol of a FakeBinanceClient market from one
+all-ticker snapshot, and how many of its pumping symbols end up among the candidates
+
+Run it from the repository root with `python -m benchmarks.bench_screener`
+"""
+
+
+import argparse
+import statistics
+import time
+from typing import List, Optional
+
+from app.binance.trade_api import SymbolFilterCache, TickerBook
+from app.bot.screener import MarketScreener
+from benchmarks.fake_binance import FakeBinanceClient
+
+
+class MarketTradeAPI:
+    """
+    The part of the TradeAPI the screener reads, over a zero-latency FakeBinanceClient
+    """
+
+    def __init__(self, client: FakeBinanceClient):
+        self.client = client
+        self.filter_cache = SymbolFilterCache(client, ttl=3600)
+
+    def get_ticker_snapshot(self) -> TickerBook:
+        return TickerBook(self.client.get_ticker())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the full market screener")
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--ranks", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    client = FakeBinanceClient([f"S{i:04d}BTC" for i in range(args.symbols)], pump_ratio=0.005)
+    trade_api = MarketTradeAPI(client)
+    screener = MarketScreener(trade_api, quote_asset="BTC", min_quote_volume=0, top_k=args.top_k)
+
+    durations, found, pumping = [], 0, 0
+    for _ in range(args.ranks):
+        client.tick()
+        book = trade_api.get_ticker_snapshot()
+        start = time.perf_counter()
+        candidates = screener.rank(book)
+        durations.append(time.perf_counter() - start)
+        pumps = {symbol for symbol in client.symbols if float(book.get_ticker(symbol).priceChangePercent) > 100}
+        found += len(pumps & {x.symbol for x in candidates})
+        pumping += min(len(pumps), args.top_k)
+
+    durations.sort()
+    print(f"{args.symbols} symbols, {args.ranks} ranks, top {args.top_k}")
+    print(f"  rank p50 {statistics.median(durations) * 1000:8.2f} ms  p99 {durations[int(len(durations) * 0.99) - 1] * 1000:8.2f} ms")
+    print(f"  pumping symbols among the candidates {found}/{pumping}")
+
+
+if __name__ == "__main__":
+    main()
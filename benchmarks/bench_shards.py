@@ -0,0 +1,94 @@
+"""
+This module benchmarks the decisions per second of the sharded bot at several shard counts: every shard process
+checks its symbols against its own zero-latency FakeBinanceClient, so the run is CPU bound, and reads the prices
+from a SharedTickerBook the benchmark process keeps publishing. On N cores the decisions per second should grow
+close to N times up to N shards
+
+Run it from the repository root with `python -m benchmarks.bench_shards`
+"""
+
+
+import argparse
+import logging
+import os
+import time
+from typing import List, Optional
+
+from app.binance.shared_book import SharedTickerBook
+from app.bot.sharding import context, partition
+from benchmarks.fake_binance import EndpointProfile, FakeBinanceClient
+
+
+def shard(index: int, symbols: List[str], shard_symbols: List[str], book_name: str, duration: float, results):
+    """
+    It checks the symbols of a shard for `duration` seconds and puts the number of checks in results
+    """
+    # the injected errors are logged at ERROR
+    logging.basicConfig(level=logging.CRITICAL)
+    from benchmarks.bench_bot import setup
+    from app.bot import runner
+    from config import Config as config
+
+    client = setup(symbols, seed=index)
+    client.profiles, client.default = {}, EndpointProfile()
+    book = SharedTickerBook.attach(book_name, symbols)
+    runner.trade_api.live_book = book
+    config.stream_max_age = 5
+
+    checks = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for symbol in shard_symbols:
+            runner.PumpDumpBot.check_symbol(symbol)
+        checks += len(shard_symbols)
+    book.close()
+    results.put(checks)
+
+
+def run(symbol_count: int, shards: int, duration: float) -> float:
+    """
+    It runs `shards` shard processes over `symbol_count` symbols and returns the decisions per second of all of them
+    """
+    symbols = [f"S{i:04d}BTC" for i in range(symbol_count)]
+    # without pumps no orders are placed, so a decision costs the same whatever the number of orders of a shard
+    market = FakeBinanceClient(symbols, pump_ratio=0.0)
+    book = SharedTickerBook.create(symbols)
+    book.seed(market.get_ticker())
+    results = context.Queue()
+    processes = [context.Process(target=shard, args=(i, symbols, part, book.name, duration, results))
+                 for i, part in enumerate(partition(symbols, shards))]
+    for process in processes:
+        process.start()
+    checks = []
+    try:
+        # the feeder of the benchmark, a tick every 100 ms until every shard reported
+        while len(checks) < shards:
+            market.tick()
+            book.seed(market.get_ticker())
+            while not results.empty():
+                checks.append(results.get())
+            time.sleep(0.1)
+    finally:
+        for process in processes:
+            process.join()
+        book.close()
+    return sum(checks) / duration
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the decisions per second of the sharded bot")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="The seconds every shard checks its symbols for")
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} cores, {args.symbols} symbols")
+    baseline = None
+    for shards in args.shards:
+        decisions = run(args.symbols, shards, args.duration)
+        baseline = baseline or decisions
+        print(f"  {shards:2d} shards {decisions:12.0f} decisions/s  {decisions / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
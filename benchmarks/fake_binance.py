@@ -0,0 +1,170 @@
+"""
+This module contains the FakeBinanceClient class, a stand-in for binance.Client with the same method
+signatures and configurable latency, jitter and error rates per endpoint
+"""
+
+
+import random
+import time
+from itertools import count
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional
+
+from binance.exceptions import BinanceAPIException
+
+from app.binance.rate_governor import endpoint_weight
+
+
+class EndpointProfile(NamedTuple):
+    """
+    The simulated behaviour of an endpoint
+    """
+
+    # the seconds every call takes
+    latency: float = 0.0
+    # the most seconds added to or removed from the latency, uniformly
+    jitter: float = 0.0
+    # the fraction of calls that raise a BinanceAPIException
+    error_rate: float = 0.0
+
+
+class FakeBinanceClient:
+    """
+    Fake Binance client for the benchmarks
+
+    It simulates a market of `symbols` whose prices move on every `tick`, a fraction of them pumping,
+    and keeps the orders placed on it. Every call sleeps the latency of its endpoint profile and
+    is counted with its request weight.
+    """
+
+    def __init__(self, symbols: List[str], profiles: Optional[Dict[str, EndpointProfile]] = None,
+                 default: EndpointProfile = EndpointProfile(), pump_ratio: float = 0.1, fill_rate: float = 0.5, seed: int = 0):
+        """
+        :param symbols: The symbols of the market
+        :param profiles: The profile of each client method by name
+        :param default: The profile of the methods without one
+        :param pump_ratio: The fraction of symbols whose price change is above 100 percent at a tick
+        :param fill_rate: The chance an open order is filled when it is queried
+        :param seed: The seed of the prices, latencies and errors
+        """
+        self.symbols = list(symbols)
+        self.profiles = profiles or {}
+        self.default = default
+        self.pump_ratio = pump_ratio
+        self.fill_rate = fill_rate
+        self.calls: Dict[str, int] = {}
+        self.weight = 0
+        self.errors = 0
+        # the seconds from the market tick to each order placed on its prices
+        self.order_latencies: List[float] = []
+        self.ticked_at = time.perf_counter()
+        self._random = random.Random(seed)
+        self._order_ids = count(1)
+        self._orders: Dict[int, dict] = {}
+        self._prices: Dict[str, float] = {symbol: self._random.uniform(0.5, 2.0) for symbol in self.symbols}
+        self._changes: Dict[str, float] = {symbol: 0.0 for symbol in self.symbols}
+        self._lock = Lock()
+        self.tick()
+
+    def tick(self):
+        """
+        It moves every price and picks the pumping symbols
+        """
+        with self._lock:
+            for symbol in self.symbols:
+                self._prices[symbol] *= 1 + self._random.gauss(0, 0.01)
+                pumping = self._random.random() < self.pump_ratio
+                self._changes[symbol] = self._random.uniform(110, 200) if pumping else self._random.uniform(-10, 10)
+            self.ticked_at = time.perf_counter()
+
+    def _call(self, method: str, params: dict):
+        profile = self.profiles.get(method, self.default)
+        weight, _ = endpoint_weight(method, params)
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.weight += weight
+            delay = max(profile.latency + self._random.uniform(-profile.jitter, profile.jitter), 0.0)
+            failed = self._random.random() < profile.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise BinanceAPIException(None, 500, '{"code": -1000, "msg": "An unknown error occurred while processing the request."}')
+
+    def _ticker(self, symbol: str) -> dict:
+        price = f"{self._prices[symbol]:.8f}"
+        return {"symbol": symbol, "priceChange": "0.00000000", "priceChangePercent": f"{self._changes[symbol]:.3f}", "weightedAvgPrice": price,
+                "prevClosePrice": price, "lastPrice": price, "lastQty": "1.00000000", "bidPrice": price, "bidQty": "1.00000000",
+                "askPrice": price, "askQty": "1.00000000", "openPrice": price, "highPrice": price, "lowPrice": price,
+                "volume": "1000.00000000", "quoteVolume": "1000.00000000", "openTime": 0, "closeTime": int(time.time() * 1000),
+                "firstId": 1, "lastId": 10, "count": 10}
+
+    @staticmethod
+    def _symbol_info(symbol: str) -> dict:
+        return {"symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-3], "baseAssetPrecision": 8, "quoteAsset": symbol[-3:],
+                "quotePrecision": 8, "orderTypes": ["LIMIT", "MARKET"], "icebergAllowed": True,
+                "filters": [{"filterType": "PRICE_FILTER", "minPrice": "0.00000100", "maxPrice": "100000.00000000", "tickSize": "0.00000100"},
+                            {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "100000.00000000", "stepSize": "0.00100000"},
+                            {"filterType": "MIN_NOTIONAL", "minNotional": "0.00010000", "applyToMarket": True, "avgPriceMins": 5}]}
+
+    def get_ticker(self, **params):
+        self._call("get_ticker", params)
+        with self._lock:
+            if params.get("symbol"):
+                return self._ticker(params["symbol"])
+            return [self._ticker(symbol) for symbol in self.symbols]
+
+    def get_exchange_info(self) -> Dict:
+        self._call("get_exchange_info", {})
+        return {"timezone": "UTC", "symbols": [self._symbol_info(symbol) for symbol in self.symbols]}
+
+    def get_symbol_info(self, symbol) -> Optional[Dict]:
+        self._call("get_symbol_info", {"symbol": symbol})
+        return self._symbol_info(symbol) if symbol in self._prices else None
+
+    def get_open_orders(self, **params):
+        self._call("get_open_orders", params)
+        symbol = params.get("symbol")
+        with self._lock:
+            return [dict(x) for x in self._orders.values() if x["status"] == "NEW" and (symbol is None or x["symbol"] == symbol)]
+
+    def get_order(self, **params):
+        self._call("get_order", params)
+        with self._lock:
+            order = self._orders.get(int(params["orderId"]))
+            if order is None:
+                raise BinanceAPIException(None, 400, '{"code": -2013, "msg": "Order does not exist."}')
+            if order["status"] == "NEW" and self._random.random() < self.fill_rate:
+                order["status"], order["executedQty"] = "FILLED", order["origQty"]
+            return dict(order)
+
+    def _place(self, method: str, side: str, time_in_force: str, params: dict) -> dict:
+        self._call(method, params)
+        with self._lock:
+            self.order_latencies.append(time.perf_counter() - self.ticked_at)
+            order = {"symbol": params["symbol"], "orderId": next(self._order_ids), "orderListId": -1, "clientOrderId": "fake",
+                     "price": str(params["price"]), "origQty": str(params["quantity"]), "executedQty": "0.00000000",
+                     "cummulativeQuoteQty": "0.00000000", "status": "NEW", "timeInForce": time_in_force, "type": "LIMIT", "side": side,
+                     "stopPrice": "0.00000000", "icebergQty": "0.00000000", "time": int(time.time() * 1000)}
+            self._orders[order["orderId"]] = order
+            return dict(order)
+
+    def order_limit_buy(self, timeInForce='GTC', **params):
+        return self._place("order_limit_buy", "BUY", timeInForce, params)
+
+    def order_limit_sell(self, timeInForce='GTC', **params):
+        return self._place("order_limit_sell", "SELL", timeInForce, params)
+
+    def cancel_order(self, **params):
+        self._call("cancel_order", params)
+        with self._lock:
+            order = self._orders.get(int(params["orderId"]))
+            if order is None:
+                raise BinanceAPIException(None, 400, '{"code": -2011, "msg": "Unknown order sent."}')
+            order["status"] = "CANCELED"
+            return dict(order)
+
+    def get_server_time(self) -> Dict:
+        self._call("get_server_time", {})
+        return {"serverTime": int(time.time() * 1000)}
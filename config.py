@@ -13,6 +13,62 @@ class Config:
     wait_time: int = getenv("WAIT_TIME")
     buy_price_chang: int = getenv("BUY_PRICE_CHANGE")
     buy_quantity_btc: float = getenv("BUY_QUANTITY_BTC")
+    buy_price_offset_percent: float = float(getenv("BUY_PRICE_OFFSET_PERCENT", 0))
     expected_change_buy: float = getenv("EXPECTED_CHANGE_BUY")
     expected_change_sell: float = getenv("EXPECTED_CHANGE_SELL")
     symbols: list = getenv("SYMBOLS")
+    filter_cache_ttl: float = float(getenv("FILTER_CACHE_TTL", 3600))
+    ticker_max_age: float = float(getenv("TICKER_MAX_AGE", 1))
+    order_recv_window: int = int(getenv("ORDER_RECV_WINDOW", 5000))
+    time_sync_interval: float = float(getenv("TIME_SYNC_INTERVAL", 30))
+    open_orders_max_age: float = float(getenv("OPEN_ORDERS_MAX_AGE", 1))
+    use_market_stream: bool = getenv("USE_MARKET_STREAM", "false").lower() == "true"
+    api_url: str = getenv("API_URL", "")
+    stream_url: str = getenv("STREAM_URL", "wss://stream.binance.com:9443")
+    stream_max_age: float = float(getenv("STREAM_MAX_AGE", 5))
+    use_user_stream: bool = getenv("USE_USER_STREAM", "false").lower() == "true"
+    use_depth_stream: bool = getenv("USE_DEPTH_STREAM", "false").lower() == "true"
+    depth_limit: int = int(getenv("DEPTH_LIMIT", 100))
+    max_slippage_percent: float = float(getenv("MAX_SLIPPAGE_PERCENT", 1))
+    listen_key_keepalive: float = float(getenv("LISTEN_KEY_KEEPALIVE", 1800))
+    order_reconcile_interval: float = float(getenv("ORDER_RECONCILE_INTERVAL", 60))
+    async_mode: bool = getenv("ASYNC_MODE", "false").lower() == "true"
+    max_concurrency: int = int(getenv("MAX_CONCURRENCY", 50))
+    scheduler_workers: int = int(getenv("SCHEDULER_WORKERS", 8))
+    shards: int = int(getenv("SHARDS", 1))
+    shard_restart_delay: float = float(getenv("SHARD_RESTART_DELAY", 1))
+    hot_interval: float = float(getenv("HOT_INTERVAL", 1))
+    cold_interval: float = float(getenv("COLD_INTERVAL", 30))
+    max_ticks_per_second: float = float(getenv("MAX_TICKS_PER_SECOND", 20))
+    rescore_interval: float = float(getenv("RESCORE_INTERVAL", 5))
+    indicator_windows: list = [float(x) for x in getenv("INDICATOR_WINDOWS", "5,30,300").split(",")]
+    indicator_resolution: float = float(getenv("INDICATOR_RESOLUTION", 1))
+    indicator_baseline: float = float(getenv("INDICATOR_BASELINE", 3600))
+    trigger_window: float = float(getenv("TRIGGER_WINDOW", 30))
+    trigger_change_percent: float = float(getenv("TRIGGER_CHANGE_PERCENT", 0))
+    trigger_volume_z: float = float(getenv("TRIGGER_VOLUME_Z", 3))
+    use_screener: bool = getenv("USE_SCREENER", "false").lower() == "true"
+    screener_quote_asset: str = getenv("SCREENER_QUOTE_ASSET", "BTC")
+    screener_min_quote_volume: float = float(getenv("SCREENER_MIN_QUOTE_VOLUME", 10))
+    screener_top_k: int = int(getenv("SCREENER_TOP_K", 20))
+    screener_interval: float = float(getenv("SCREENER_INTERVAL", 5))
+    hot_change_percent: float = float(getenv("HOT_CHANGE_PERCENT", 10))
+    hot_volume_ratio: float = float(getenv("HOT_VOLUME_RATIO", 2))
+    weight_per_minute: int = int(getenv("WEIGHT_PER_MINUTE", 6000))
+    orders_per_10s: int = int(getenv("ORDERS_PER_10S", 100))
+    orders_per_day: int = int(getenv("ORDERS_PER_DAY", 200000))
+    order_weight_reserve: float = float(getenv("ORDER_WEIGHT_RESERVE", 0.1))
+    max_rate_wait: float = float(getenv("MAX_RATE_WAIT", 10))
+    max_rate_retries: int = int(getenv("MAX_RATE_RETRIES", 3))
+    ban_backoff: float = float(getenv("BAN_BACKOFF", 120))
+    coalesce_window: float = float(getenv("COALESCE_WINDOW", 0.05))
+    record_market_data: bool = getenv("RECORD_MARKET_DATA", "false").lower() == "true"
+    record_dir: str = getenv("RECORD_DIR", "data/market")
+    journal_batch_size: int = int(getenv("JOURNAL_BATCH_SIZE", 100))
+    journal_flush_interval: float = float(getenv("JOURNAL_FLUSH_INTERVAL", 0.5))
+    log_file: str = getenv("LOG_FILE", "logs/run.log")
+    log_level: str = getenv("LOG_LEVEL", "DEBUG")
+    log_queue_size: int = int(getenv("LOG_QUEUE_SIZE", 10000))
+    log_rate_limit: float = float(getenv("LOG_RATE_LIMIT", 10))
+    metrics_port: int = int(getenv("METRICS_PORT", 0))
+    metrics_summary_interval: float = float(getenv("METRICS_SUMMARY_INTERVAL", 60))
@@ -1,13 +1,84 @@
-import logging
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import signal
+import sys
 from config import Config as config
-from app.bot.runner import PumpDumpBot
+from app import metrics
+from app.bot.runner import PumpDumpBot, indicators, journal, positions
+from app.bot.scheduler import SymbolScheduler, TickerHeat
+from app.bot.screener import MarketScreener
+from app.bot.sharding import ShardSupervisor
+from app.binance.depth_cache import DepthCache
+from app.binance.market_stream import LiveTickerBook, MarketDataStream
+from app.binance.order_tracker import OrderTracker, UserDataStream
+from app.binance.recorder import MarketDataRecorder
+from app.binance.trade_api import TradeAPI
+from app.bot import async_runner, runner
+from app.logger import setup_logging
+
+
+def run_threaded():
+    """
+    It runs PumpDumpBot over every symbol on the scheduler's worker pool
+    """
+    # the runner starts with a mock trade api, the streams below need a connected client
+    trade_api = runner.trade_api = TradeAPI(api_url=config.api_url)
+    recorder = None
+    if config.record_market_data:
+        recorder = trade_api.recorder = MarketDataRecorder(config.record_dir)
+
+    trade_api.indicators = indicators
+    if config.use_market_stream:
+        stream = MarketDataStream(LiveTickerBook(), config.symbols, snapshot=trade_api.client.get_ticker, recorder=recorder,
+                                  trade_symbols=config.symbols if recorder is not None else (), indicators=indicators)
+        stream.start()
+        trade_api.live_book = stream.book
+
+    if config.use_user_stream:
+        user_stream = UserDataStream(OrderTracker(), trade_api.client)
+        user_stream.start()
+        trade_api.order_tracker = user_stream.tracker
+
+    if config.use_depth_stream:
+        depth_cache = DepthCache(config.symbols, trade_api.client.get_order_book)
+        depth_cache.start()
+        trade_api.depth_cache = depth_cache
+
+    heat = TickerHeat(trade_api, PumpDumpBot.has_open_position)
+    scheduler = SymbolScheduler(PumpDumpBot.check_symbol, heat, config.symbols)
+    screener = None
+    if config.use_screener:
+        # the symbols with a position stay checked until they are sold
+        screener = MarketScreener(trade_api, pinned=config.symbols)
+        screener.start(scheduler, PumpDumpBot.has_open_position)
+    try:
+        scheduler.run()
+    finally:
+        if screener is not None:
+            screener.stop()
+        if recorder is not None:
+            recorder.close()
 
-logging.basicConfig(filename='logs/run.log', encoding='utf-8', level=logging.DEBUG)
 
 if __name__ == "__main__":
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        bot = PumpDumpBot()
-        future = executor.map(bot.run_loop, config.symbols)
-        for result in future:
-            logging.info(result)
+    setup_logging()
+    # exit through the finally blocks on SIGTERM too, so the queued trades are written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if config.shards > 1:
+        # every shard process runs its own journal, metrics and scheduler
+        ShardSupervisor(config.symbols, config.shards).run()
+        sys.exit(0)
+    journal.start()
+    positions.load()
+    metrics.registry.register(metrics.Gauge("journal_pending_writes", "Trade writes waiting for the journal", function=lambda: journal.pending))
+    metrics.registry.register(metrics.Gauge("open_positions", "Open trades of the position index", function=lambda: len(positions)))
+    if config.metrics_port:
+        metrics.serve(config.metrics_port)
+    if config.metrics_summary_interval:
+        metrics.log_summary(config.metrics_summary_interval)
+    try:
+        if config.async_mode:
+            asyncio.run(async_runner.run(config.symbols))
+        else:
+            run_threaded()
+    finally:
+        journal.close()